@@ -1,12 +1,17 @@
 import streamlit as st
-import json
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 from datetime import datetime
 
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
+from opensearch_client import get_opensearch_client
+from titan_embedding import embed_text
+from hybrid_search import (build_filters, build_keyword_query, search_opensearch_knn, search_fusion,
+                           search_faiss, fetch_dashboard, fetch_document, redact_vectors)
+from faiss_backend import FaissVectorStore
+from index_metadata import get_index_metadata
+from search_cache import get_result_cache, get_query_vector_cache, make_result_key, make_dashboard_key
+from result_export import render_export_expander
 
 # 세션 상태 초기화
 if 'expander_state' not in st.session_state:
@@ -20,52 +25,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# AWS Bedrock 클라이언트 초기화
-@st.cache_resource
-def get_bedrock_client():
-    return boto3.client(
-        service_name='bedrock-runtime',
-        region_name='us-west-2'
-    )
+# 결과 표에 표시할 필드 (검색 시 이 필드만 가져오고, 나머지는 행을 선택했을 때 조회)
+RESULT_FIELDS = ["instance_name", "os", "server_status", "cpu", "memory", "disk",
+                 "department", "location", "ip_address", "purpose"]
+PAGE_SIZES = [10, 50, 100, 500, 1000]
+MAX_RESULTS = 2000      # 클라이언트 결합 시 후보 수 (x oversample) 가 kNN k 최대값 10000 을 넘지 않도록
 
-# AWS 인증 설정
-region = 'us-west-2'  # 예: 'us-west-2'
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
+# OpenSearch 클라이언트 (공유 커넥션 모듈, 프로세스당 한 번 생성)
+opensearch_client = get_opensearch_client()
 
-# OpenSearch Serverless 연결 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com'
-port = 443
-
-# OpenSearch 클라이언트 생성
-opensearch_client = OpenSearch(
-    hosts=[{'host': host, 'port': port}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
+# 로컬 FAISS 인덱스 로드 (프로세스당 한 번)
+@st.cache_resource
+def get_faiss_store(index_name):
+    return FaissVectorStore.load(index_name)
 
-# Titan 임베딩 생성
-def get_titan_embedding(text, bedrock_client, normalize=True):
-    response = bedrock_client.invoke_model(
-        modelId='amazon.titan-embed-text-v2:0',
-        contentType='application/json',
-        accept='application/json',
-        body=json.dumps({
-            "inputText": text,
-            "dimensions": 1024,
-            "normalize": normalize
-        })
-    )
-    return json.loads(response['body'].read())['embedding']
+# 선택한 결과 행의 상세 정보 (행을 선택했을 때만 조회)
+@st.cache_data(ttl=300)
+def get_document_details(index_name, doc_id):
+    return fetch_document(opensearch_client, index_name, doc_id)
 
-# 사용할 수 있는 Index 가져오기
-def get_opensearch_indices(client):
-    indices = client.cat.indices(format="json")
-    return [index['index'] for index in indices if not index['index'].startswith('.')]
+# 인덱스 메타데이터 캐시 (인덱스 목록 / 매핑, 재실행마다 cat.indices / get_mapping 을 호출하지 않음)
+index_metadata = get_index_metadata()
 
 # 앱 제목
 st.title("🔍 서버 인프라 검색 시스템")
@@ -76,7 +56,9 @@ st.markdown("""
 
 # 사이드바 필터
 st.sidebar.header("검색옵션")
-indices = get_opensearch_indices(opensearch_client)
+if st.sidebar.button("메타데이터 새로고침", help="인덱스 목록 / 매핑을 다시 읽습니다."):
+    index_metadata.refresh()
+indices = index_metadata.list_indices()
 
 selected_index = st.sidebar.selectbox(
     "사용할 Index를 선택하세요.",
@@ -127,134 +109,227 @@ with st.sidebar.expander("검색 가중치 설정", expanded=True):
     )
     vector_weight = 1 - keyword_weight
     
-    
+    # 점수 결합 방식 (bool 쿼리는 BM25 / kNN 점수 크기가 달라 가중치가 의도대로 동작하지 않을 수 있음)
+    fusion_label = st.radio(
+        "점수 결합 방식",
+        ["RRF (순위 결합)", "Min-max 정규화 가중합", "OpenSearch bool 쿼리 (boost)"],
+        help="RRF / Min-max 는 키워드 검색과 벡터 검색을 동시에 실행한 뒤 클라이언트에서 결과를 합칩니다."
+    )
+    fusion_method = {"RRF (순위 결합)": "rrf", "Min-max 정규화 가중합": "minmax"}.get(fusion_label)
+
+# 벡터 검색 백엔드 설정
+with st.sidebar.expander("벡터 검색 백엔드", expanded=False):
+    vector_backend = st.radio(
+        "kNN 검색 위치",
+        ["OpenSearch kNN", "로컬 FAISS"],
+        help="로컬 FAISS 는 `python faiss_backend.py --index <인덱스>` 로 미리 만든 인덱스를 사용합니다."
+    )
+    if vector_backend == "로컬 FAISS" and not FaissVectorStore.exists(selected_index):
+        st.warning(f"'{selected_index}' 의 로컬 FAISS 인덱스가 없습니다. OpenSearch kNN 을 사용합니다.")
+        vector_backend = "OpenSearch kNN"
+
+# 검색 결과 캐시 (프로세스 전체 공유)
+result_cache = get_result_cache()
+query_vector_cache = get_query_vector_cache()
+with st.sidebar.expander("검색 캐시", expanded=False):
+    cache_stats = result_cache.stats()
+    st.caption(f"항목 {cache_stats['entries']}개, 적중률 {cache_stats['hit_rate']:.0%}")
+    if st.button("현재 Index 캐시 비우기"):
+        result_cache.invalidate(selected_index)
+
+# 결과 표시 설정
+with st.sidebar.expander("결과 표시", expanded=False):
+    page_size = st.selectbox("페이지당 결과 수", PAGE_SIZES, index=1)
+    show_query = st.toggle("검색 쿼리 표시 (디버그)", value=False)
 
 # 메인 검색 인터페이스
 search_query = st.text_input("검색어를 입력하세요", placeholder="예: database server, 웹서버")
 
 if search_query:
     try:
-        bedrock_client = get_bedrock_client()
         # opensearch_client = get_opensearch_client()
         
-        # 쿼리 벡터 생성
-        query_vector = get_titan_embedding(search_query, bedrock_client)
+        # 필터 적용
+        filters = build_filters(os_filter, status_filter, cpu_range, memory_range) if applyfilter else []
         
-        # 검색 쿼리 구성
-        search_body = {
-            "size": 10,
-            "track_scores": True,
-            "query": {
-                "bool": {
-                    "should": [
-                        # 텍스트 검색
-                        {
-                            "match": {
-                                "full_text": {
-                                    "query": search_query,
-                                    "boost": keyword_weight  # 텍스트 검색 가중치
-                                }
-                            }
-                        },
-                        # 벡터 검색
-                        {
-                            "knn": {
-                                "vector_embedding": {
-                                    "vector": query_vector,  # Titan Embeddings로 생성한 벡터
-                                    "k": 10,
-                                    "boost": vector_weight
-                                }
-                            }
-                        }
-                    ]
-                    # "minimum_should_match": 1
-                    # 필터 조건 추가
-                }
-            }
-        }
+        # 검색 조건이 바뀌면 첫 페이지부터 표시
+        search_key = make_result_key(selected_index, search_query, filters,
+                                     keyword_weight, vector_weight, page_size, (vector_backend, fusion_method))
+        if st.session_state.get('result_search_key') != search_key:
+            st.session_state.result_search_key = search_key
+            st.session_state.result_page = 0
+        page = st.session_state.result_page
+        offset = page * page_size
         
-        # 필터 적용
-        if applyfilter:
-            if os_filter:
-                search_body["query"]["bool"]["filter"].append({"terms": {"os": os_filter}})
-            if status_filter:
-                search_body["query"]["bool"]["filter"].append({"terms": {"server_status": status_filter}})
+        # 같은 (인덱스, 검색어, 필터, 가중치, 페이지) 검색은 캐시된 결과 사용
+        cache_key = search_key + (offset,)
+        cached = result_cache.get(cache_key)
+        
+        if cached is not None:
+            hits, search_body = cached
+        else:
+            # 쿼리 벡터 생성 (가중치 / 필터만 바뀐 경우 캐시된 벡터 재사용)
+            query_vector = query_vector_cache.get_or_create(
+                search_query, index_metadata.vector_dimension(selected_index), embed_text
+            )
             
-            if cpu_range:
-                if "filter" not in search_body["query"]["bool"]:
-                    search_body["query"]["bool"]["filter"] = []
-                search_body["query"]["bool"]["filter"].append({
-                    "range": {"cpu": {"gte": cpu_range[0], "lte": cpu_range[1]}}
-                })
-
-            if memory_range:
-                if "filter" not in search_body["query"]["bool"]:
-                    search_body["query"]["bool"]["filter"] = []
-                search_body["query"]["bool"]["filter"].append({
-                    "range": {"memory": {"gte": memory_range[0], "lte": memory_range[1]}}
-                })
+            # 검색 실행
+            if vector_backend == "로컬 FAISS":
+                hits, search_body = search_faiss(
+                    opensearch_client, get_faiss_store(selected_index), selected_index,
+                    search_query, query_vector, keyword_weight, vector_weight, filters, size=page_size,
+                    method=fusion_method, offset=offset, source=RESULT_FIELDS
+                )
+            elif fusion_method:
+                hits, search_body = search_fusion(
+                    opensearch_client, selected_index,
+                    search_query, query_vector, keyword_weight, vector_weight, filters, size=page_size,
+                    method=fusion_method, offset=offset, source=RESULT_FIELDS,
+                    vector_engine=index_metadata.vector_engine(selected_index)
+                )
+            else:
+                hits, search_body = search_opensearch_knn(
+                    opensearch_client, selected_index,
+                    search_query, query_vector, keyword_weight, vector_weight, filters, size=page_size,
+                    offset=offset, source=RESULT_FIELDS
+                )
+            result_cache.put(cache_key, (hits, search_body))
         
-        # 검색 실행
-        results = opensearch_client.search(
-            index=selected_index,
-            body=search_body
-        )
+        # 검색별 지연 시간 (어느 쪽이 느린지 확인용)
+        if "latency_ms" in search_body:
+            latency = search_body["latency_ms"]
+            st.caption(f"키워드 {latency['keyword']}ms · 벡터 {latency['vector']}ms · 전체 {latency['round_trip']:.0f}ms")
+        elif "faiss_ms" in search_body:
+            st.caption(f"키워드 {search_body['keyword_ms']:.0f}ms · FAISS {search_body['faiss_ms']:.1f}ms")
         
-        st.write(search_body)
+        # 디버그: 실행한 검색 쿼리 (쿼리 벡터는 요약)
+        if show_query:
+            st.json(redact_vectors(search_body), expanded=False)
         
         # 결과 처리
-        hits = results['hits']['hits']
-        st.subheader(f"검색 결과: {len(hits)}개 발견")
+        if hits:
+            st.subheader(f"검색 결과: {offset + 1}–{offset + len(hits)}번째 ({page + 1} 페이지)")
+        else:
+            st.subheader("검색 결과: 0개 발견")
+        
+        # 대시보드 집계 (검색 결과 페이지가 아닌 필터에 맞는 전체 서버 기준, 필터 조합별 캐시)
+        dashboard_key = make_dashboard_key(selected_index, filters)
+        dashboard = result_cache.get(dashboard_key)
+        if dashboard is None:
+            dashboard = fetch_dashboard(opensearch_client, selected_index, filters,
+                                        index_fields=index_metadata.index_fields(selected_index))
+            result_cache.put(dashboard_key, dashboard)
         
-        # 결과를 데이터프레임으로 변환
         if hits:
-            df = pd.DataFrame([hit['_source'] for hit in hits])
-            
             # 통계 대시보드
+            st.caption(f"전체 {dashboard['total']:,}대 서버 기준 집계")
+            if dashboard['unavailable']:
+                # .keyword 하위 필드 없이 만든 인덱스 — 빈 차트 대신 안내
+                st.warning(f"{', '.join(dashboard['unavailable'])} 필드에 집계용 keyword 매핑이 없어 분포 차트를 표시하지 않습니다. "
+                           f"dummy-serverinfo.py 로 새 인덱스에 다시 적재(재색인)하면 차트를 볼 수 있습니다.")
             col1, col2 = st.columns(2)
             
             with col1:
                 # OS 분포 차트
-                os_counts = df['os'].value_counts()
-                fig1 = px.pie(values=os_counts.values, names=os_counts.index, title='운영체제 분포')
-                st.plotly_chart(fig1)
+                if dashboard['os'] is not None:
+                    os_counts = pd.DataFrame(dashboard['os'], columns=['os', 'count'])
+                    fig1 = px.pie(os_counts, values='count', names='os', title='운영체제 분포')
+                    st.plotly_chart(fig1)
             
             with col2:
                 # 서버 상태 분포
-                status_counts = df['server_status'].value_counts()
-                fig2 = px.bar(x=status_counts.index, y=status_counts.values, title='서버 상태 분포')
-                st.plotly_chart(fig2)
+                if dashboard['server_status'] is not None:
+                    status_counts = pd.DataFrame(dashboard['server_status'], columns=['server_status', 'count'])
+                    fig2 = px.bar(status_counts, x='server_status', y='count', title='서버 상태 분포')
+                    st.plotly_chart(fig2)
+            
+            with st.expander("부서 / 리소스 분포", expanded=False):
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    # 부서별 서버 수
+                    if dashboard['department'] is not None:
+                        department_counts = pd.DataFrame(dashboard['department'], columns=['department', 'count'])
+                        st.plotly_chart(px.bar(department_counts, x='department', y='count', title='부서별 서버 수'))
+                
+                with col2:
+                    # CPU 코어 수 구간
+                    cpu_buckets = pd.DataFrame(dashboard['cpu_histogram'], columns=['cpu', 'count'])
+                    st.plotly_chart(px.bar(cpu_buckets, x='cpu', y='count', title='CPU 코어 수 분포'))
+                
+                with col3:
+                    # 메모리 구간
+                    memory_buckets = pd.DataFrame(dashboard['memory_histogram'], columns=['memory', 'count'])
+                    st.plotly_chart(px.bar(memory_buckets, x='memory', y='count', title='메모리 (GB) 분포'))
+                
+                # 리소스 통계
+                stats_df = pd.DataFrame({
+                    name: dashboard[f"{name}_stats"] for name in ('cpu', 'memory', 'disk')
+                }).T[['count', 'min', 'avg', 'max', 'sum']]
+                st.dataframe(stats_df)
             
-            # 상세 결과 표시
-            for hit in hits:
-                with st.expander(f"🖥️ {hit['_source']['instance_name']} (스코어: {hit['_score']:.2f})"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**📋 기본 정보**")
-                        st.write(f"🔹 OS: {hit['_source']['os']}")
-                        st.write(f"🔹 상태: {hit['_source']['server_status']}")
-                        st.write(f"🔹 위치: {hit['_source']['location']}")
-                        st.write(f"🔹 부서: {hit['_source']['department']}")
-                    
-                    with col2:
-                        st.markdown("**💻 리소스 정보**")
-                        st.write(f"🔹 CPU: {hit['_source']['cpu']} cores")
-                        st.write(f"🔹 메모리: {hit['_source']['memory']} GB")
-                        st.write(f"🔹 디스크: {hit['_source']['disk']} GB")
-                        st.write(f"🔹 IP: {hit['_source']['ip_address']}")
-                    
-                    st.markdown("**🎯 용도**")
-                    st.write(hit['_source']['purpose'])
-                    
-                    st.markdown("**📅 날짜 정보**")
-                    st.write(f"등록일: {hit['_source']['registration_date']}")
-                    st.write(f"최종 수정일: {hit['_source']['last_updated']}")
-                    
-                    st.markdown("---")
-                    st.write(hit['_source']['full_text'])
+            # 결과 표 (현재 페이지만, Arrow 로 변환하여 한 번에 전달)
+            table = pa.Table.from_pylist([
+                {"score": hit['_score'], **{field: hit['_source'].get(field) for field in RESULT_FIELDS}}
+                for hit in hits
+            ])
+            # 선택 상태는 위젯 키에 묶이므로, 검색 조건 / 페이지마다 키를 달리해 이전 페이지의 선택을 버림
+            selection = st.dataframe(table, hide_index=True, use_container_width=True,
+                                     on_select="rerun", selection_mode="single-row",
+                                     key=f"result_table_{hash(search_key):x}_{offset}")
+            
+            # 페이지 이동
+            col1, col2, _ = st.columns([1, 1, 6])
+            if col1.button("◀ 이전", disabled=page == 0):
+                st.session_state.result_page -= 1
+                st.rerun()
+            if col2.button("다음 ▶", disabled=len(hits) < page_size or offset + page_size >= MAX_RESULTS):
+                st.session_state.result_page += 1
+                st.rerun()
+            
+            # 선택한 행의 상세 정보만 조회
+            selected_rows = [row for row in selection.selection.rows if row < len(hits)]
+            if selected_rows:
+                hit = hits[selected_rows[0]]
+                detail = get_document_details(selected_index, hit['_id'])
+                if detail is None:
+                    st.warning("문서를 찾을 수 없습니다.")
+                else:
+                    with st.container(border=True):
+                        st.markdown(f"#### 🖥️ {detail.get('instance_name')} (스코어: {hit['_score']:.2f})")
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            st.markdown("**📋 기본 정보**")
+                            st.write(f"🔹 OS: {detail.get('os')}")
+                            st.write(f"🔹 상태: {detail.get('server_status')}")
+                            st.write(f"🔹 위치: {detail.get('location')}")
+                            st.write(f"🔹 부서: {detail.get('department')}")
+                        
+                        with col2:
+                            st.markdown("**💻 리소스 정보**")
+                            st.write(f"🔹 CPU: {detail.get('cpu')} cores")
+                            st.write(f"🔹 메모리: {detail.get('memory')} GB")
+                            st.write(f"🔹 디스크: {detail.get('disk')} GB")
+                            st.write(f"🔹 IP: {detail.get('ip_address')}")
+                        
+                        st.markdown("**🎯 용도**")
+                        st.write(detail.get('purpose'))
+                        
+                        st.markdown("**📅 날짜 정보**")
+                        st.write(f"등록일: {detail.get('registration_date')}")
+                        st.write(f"최종 수정일: {detail.get('last_updated')}")
+                        
+                        st.markdown("---")
+                        st.write(detail.get('full_text'))
+            else:
+                st.caption("행을 선택하면 상세 정보를 표시합니다.")
         else:
             st.warning("검색 결과가 없습니다.")
+        
+        # 전체 결과 내보내기 (상위 10건 제한 없이 검색어 / 필터에 맞는 모든 문서를 파일로 저장)
+        render_export_expander(opensearch_client, selected_index, build_keyword_query(search_query, filters),
+                               note="벡터 검색은 상위 k 건만 반환하므로, 키워드 검색 + 필터에 맞는 문서 전체를 내보냅니다.")
             
     except Exception as e:
         st.error(f"검색 중 오류가 발생했습니다: {str(e)}")
@@ -1,126 +1,88 @@
 import streamlit as st
-import json
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
 
-# AWS 및 OpenSearch 설정
-region = 'us-west-2'  # 예: 'us-west-2'
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
+from opensearch_client import get_opensearch_client
+from llm_dsl import generate_dsl
+from dsl_cache import get_dsl_cache, schema_version
+from index_metadata import get_index_metadata, FALLBACK_SCHEMA_PROMPT
+from result_export import render_export_expander
+from weblog_partitions import is_weblog_target, route_indices, search_weblog
 
-# OpenSearch 연결 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com'  
-port = 443
+# OpenSearch 클라이언트 (공유 커넥션 모듈, 프로세스당 한 번 생성)
+opensearch_client = get_opensearch_client()
 
-# OpenSearch 클라이언트 생성
-opensearch_client = OpenSearch(
-    hosts=[{'host': host, 'port': port}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
-
-# Bedrock 클라이언트 생성
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name=region
-)
+# 인덱스 메타데이터 캐시 (인덱스 목록 / 매핑 / 필드 통계, 프로세스 전체 공유)
+index_metadata = get_index_metadata()
 
-def generate_opensearch_query(natural_language_query):
-    schema_info = """
-    Index Name: 
-        Purpose : server_info (It is an index that stores server information and has the fields below.
-        Fields:
-        - instance_name (keyword): Server instance name (e.g., srv-1234)
-        - cpu (interger): number of CPU logical core information (e.g., "4", "8")
-        - memory (integer): Memory amount information (e.g., "16", "32")
-        - disk (integer): Disk amount information (e.g., "500", "1000")
-        - os (keyword): Operating system (e.g., "Ubuntu 20.04", "CentOS 7")
-        - purpose (keyword): Server purpose (e.g., "Web Server", "Database Server")
-        - service_name (keyword): Name of the service running on the server
-        - ip_address (ip): IP address of the server
-        - location (text): Physical location of the server
-        - department (keyword): Department responsible for the server
-        - last_updated (date): Date of last update
-        - registration_date (date): Date when the server was registered
-        - server_status (keyword): Current status of the server (e.g., "running", "shutdown", "stop")
-    
-    Index Name: web_log 
-        Purpose : It is an index that stores web log information and has the fields below.
-        Fields:
-        - timestamp (date): Log entry creation time
-        - ip_address (ip): Client's IP address
-        - method (keyword): HTTP request method (e.g., "GET", "POST", "PUT", "DELETE")
-        - url (text): Requested URL path
-        - status_code (integer): HTTP response status code
-        - user_agent (text): Client's User-Agent string
-        - referrer (text): Request's Referrer URL
-        - response_time (float): Time spent processing the request (seconds)
-        - bytes_sent (long): Number of bytes sent in response
-        - vector_embedding (knn_vector): Vector representation for machine learning tasks
+def schema_info(index_name):
     """
+    선택한 인덱스의 실제 매핑으로 만든 스키마 설명과 DSL 캐시용 스키마 버전을 반환합니다.
 
-    messages = [
-        {
-            "role": "user",
-            "content": f"Given the following schema information:\n\n{schema_info}\n\nGenerate an OpenSearch query in JSON format for the following natural language query. The query should use the appropriate fields and query types based on the schema. Natural language query: {natural_language_query}"
-        }
-    ]
+    :return: (스키마 설명, 스키마 버전)
+    """
+    try:
+        return index_metadata.schema_prompt(index_name), index_metadata.schema_version(index_name)
+    except Exception as e:
+        st.warning(f"Index metadata unavailable, using the static schema description: {str(e)}")
+        return FALLBACK_SCHEMA_PROMPT, schema_version(FALLBACK_SCHEMA_PROMPT)
 
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 1000,
-        "temperature": 0.0,
-        "messages": messages
-    })
 
+def generate_opensearch_query(natural_language_query, schema_text=FALLBACK_SCHEMA_PROMPT):
     try:
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
-            contentType="application/json",
-            accept="application/json"
-        )
-        
-        response_body = json.loads(response['body'].read())
-        generated_query = response_body['content'][0]['text']
-        
-        # 생성된 쿼리에서 JSON 부분만 추출
-        json_start = generated_query.find('{')
-        json_end = generated_query.rfind('}') + 1
-        json_query = generated_query[json_start:json_end]
-        
-        return json.loads(json_query)
+        # JSON 객체가 완성되는 즉시 LLM 스트림 읽기를 멈춤
+        opensearch_query, _ = generate_dsl(natural_language_query, schema_text)
+        return opensearch_query
     except Exception as e:
         st.error(f"Error in generate_opensearch_query: {str(e)}")
         return None
 
 
-def get_opensearch_indices(client):
-    indices = client.cat.indices(format="json")
-    return [index['index'] for index in indices if not index['index'].startswith('.')]
-
-
 def search_opensearch(query, index_name):
     try:
-        response = opensearch_client.search(
-            index=index_name,
-            body=query
-        )
+        if is_weblog_target(index_name):
+            # 웹 로그는 쿼리의 timestamp 범위와 겹치는 시간 파티션만 검색
+            # (집계 쿼리는 롤업 인덱스로 답함)
+            response = search_weblog(query, client=opensearch_client)
+            if '_rollup' in response:
+                st.caption(f"Answered from {response['_rollup']['rows']} rollup rows "
+                           f"({', '.join(response['_rollup']['intervals']) or 'no data'}) instead of raw logs")
+                if response['_rollup'].get('url_prefix_depth'):
+                    st.caption(f"URLs are grouped by their first {response['_rollup']['url_prefix_depth']} "
+                               "path segment(s) (url_prefix), with IDs and numbers masked.")
+            else:
+                targets = route_indices(opensearch_client, query)
+                st.caption(f"Time-range routing: {len(targets)} partition target(s) "
+                           f"{', '.join(targets) if targets else '(no overlap)'}")
+        else:
+            response = opensearch_client.search(
+                index=index_name,
+                body=query
+            )
+        if response.get('aggregations'):
+            st.write(f"Aggregations ({response['hits']['total']['value']} matching documents):")
+            st.json(response['aggregations'])
         return response['hits']['hits']
     except Exception as e:
         st.error(f"Error in search_opensearch: {str(e)}")
-        return []
+        return None
+
+def weblog_export_index(index_name, query):
+    """
+    내보내기 대상 인덱스입니다. 웹 로그는 쿼리의 timestamp 범위와 겹치는 시간 파티션만 내보냅니다.
+    """
+    if not is_weblog_target(index_name):
+        return index_name
+    targets = route_indices(opensearch_client, query)
+    if not targets:
+        raise ValueError("No weblog partitions overlap the query time range.")
+    return ",".join(targets)
 
 # Streamlit 앱
 st.title("Server Info Chatbot")
 
 st.sidebar.header("Settings")
-indices = get_opensearch_indices(opensearch_client)
+if st.sidebar.button("메타데이터 새로고침", help="인덱스 목록 / 매핑 / 필드 통계를 다시 읽습니다."):
+    index_metadata.refresh()
+indices = index_metadata.list_indices()
 
 selected_index = st.sidebar.selectbox(
     "사용할 Index를 선택하세요.",
@@ -132,22 +94,42 @@ selected_index = st.sidebar.selectbox(
 user_query = st.text_input("서버의 정보를 알려드립니다. 무엇이든 물어보세요.")
 
 if user_query:
-    # OpenSearch 쿼리 생성
-    opensearch_query = generate_opensearch_query(user_query)
+    # 같은 / 비슷한 질문으로 검증된 DSL 이 있으면 LLM 호출 생략
+    schema_text, schema_version_id = schema_info(selected_index)
+    dsl_cache = get_dsl_cache()
+    cached = dsl_cache.lookup(user_query, selected_index, schema_version_id)
+    if cached.dsl is not None:
+        opensearch_query = cached.dsl
+    else:
+        # OpenSearch 쿼리 생성
+        opensearch_query = generate_opensearch_query(user_query, schema_text)
     
     if opensearch_query:
-        st.write("Generated OpenSearch Query:")
+        if cached.dsl is not None:
+            st.write(f"Cached OpenSearch Query ({cached.match} match, similarity {cached.similarity:.3f}):")
+            if cached.match == 'semantic':
+                st.caption(f"비슷한 이전 질문: {cached.question}")
+        else:
+            st.write("Generated OpenSearch Query:")
         st.json(opensearch_query)
         
         # OpenSearch 검색 수행
         st.write(f"Searching index: {selected_index}")
         search_results = search_opensearch(opensearch_query, selected_index)
         
+        # 검색 오류 없이 실행된 DSL 만 캐시에 저장
+        if cached.dsl is None and search_results is not None:
+            dsl_cache.store(user_query, selected_index, schema_version_id, opensearch_query, cached.vector)
+        
         if search_results:
             st.write(f"Found {len(search_results)} results:")
             for hit in search_results:
                 st.json(hit['_source'])
         else:
             st.write("No results found.")
+        
+        # 전체 결과 내보내기 (첫 페이지 제한 없이 PIT / search_after 로 모든 문서를 파일로 저장)
+        render_export_expander(opensearch_client, selected_index, opensearch_query,
+                               resolve_index=lambda: weblog_export_index(selected_index, opensearch_query))
     else:
         st.write("Failed to generate OpenSearch query.")
@@ -0,0 +1,203 @@
+import os
+import re
+import time
+import uuid
+import threading
+
+import boto3
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+
+# Athena 연결 설정 (환경 변수로 변경 가능)
+ATHENA_REGION = os.environ.get('ITSMS_ATHENA_REGION', 'us-west-2')
+ATHENA_DATABASE = os.environ.get('ITSMS_ATHENA_DATABASE', 'itsms')
+ATHENA_WORKGROUP = os.environ.get('ITSMS_ATHENA_WORKGROUP', 'primary')
+# 쿼리 결과 / UNLOAD 출력 위치 (s3://... 또는 오프라인 테스트용 로컬 디렉터리)
+STAGING_DIR = os.environ.get('ITSMS_ATHENA_STAGING_DIR', 's3://athena-federation-20240224/athenaresults/')
+
+MAX_CONTEXT_ROWS = 50       # LLM 에 전달할 최대 행 수
+POLL_INTERVAL = 0.5         # 쿼리 상태 확인 간격 (초)
+QUERY_TIMEOUT = 300         # 쿼리 대기 시간 제한 (초)
+
+_client = None
+_lock = threading.Lock()
+
+_SELECT_RE = re.compile(r"^\s*(?:\(\s*)*(?:select|with)\b", re.I)
+_ORDER_BY_RE = re.compile(r"\border\s+by\b", re.I)
+
+
+def get_athena_client():
+    """
+    프로세스 전체에서 공유하는 Athena 클라이언트를 반환합니다.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = boto3.client('athena', region_name=ATHENA_REGION)
+    return _client
+
+
+def set_athena_client(client):
+    """
+    공유 클라이언트를 교체합니다 (로컬 대체 클라이언트용).
+    """
+    global _client
+    _client = client
+
+
+def _join(location, *parts):
+    return "/".join([location.rstrip('/')] + list(parts))
+
+
+def can_unload(sql):
+    """
+    UNLOAD 로 Parquet 출력이 가능한 쿼리인지 확인합니다.
+    UNLOAD 는 SELECT 만 지원하고, 여러 파일로 나눠 쓰므로 ORDER BY 순서가 보장되지 않습니다.
+    """
+    return bool(_SELECT_RE.match(sql)) and not _ORDER_BY_RE.search(sql)
+
+
+def run_query(sql, output_location, database=ATHENA_DATABASE, workgroup=ATHENA_WORKGROUP,
+              timeout=QUERY_TIMEOUT, client=None):
+    """
+    쿼리를 실행하고 완료될 때까지 기다립니다.
+
+    :return: QueryExecution 정보 (ResultConfiguration.OutputLocation 에 결과 파일 위치)
+    """
+    client = client or get_athena_client()
+    query_id = client.start_query_execution(
+        QueryString=sql,
+        QueryExecutionContext={"Database": database},
+        ResultConfiguration={"OutputLocation": output_location},
+        WorkGroup=workgroup,
+    )['QueryExecutionId']
+    deadline = time.time() + timeout
+    while True:
+        execution = client.get_query_execution(QueryExecutionId=query_id)['QueryExecution']
+        state = execution['Status']['State']
+        if state == 'SUCCEEDED':
+            return execution
+        if state in ('FAILED', 'CANCELLED'):
+            reason = execution['Status'].get('StateChangeReason', state)
+            raise RuntimeError(f"Athena query {query_id} {state.lower()}: {reason}")
+        if time.time() > deadline:
+            client.stop_query_execution(QueryExecutionId=query_id)
+            raise TimeoutError(f"Athena query {query_id} did not finish in {timeout}s")
+        time.sleep(POLL_INTERVAL)
+
+
+def read_parquet_dir(location, max_rows=None):
+    """
+    UNLOAD 출력 디렉터리의 Parquet 파일을 Arrow 테이블로 읽습니다 (S3 / 로컬 모두 지원).
+    결과가 0 행이면 UNLOAD 가 파일을 쓰지 않아 디렉터리가 없으므로 빈 테이블을 반환합니다
+    (UNLOAD 매니페스트에는 스키마가 없어 컬럼도 없음).
+
+    :param max_rows: 최대 행 수 (None 이면 전체)
+    :return: (Arrow 테이블, 전체 행 수)
+    """
+    filesystem, path = fs.FileSystem.from_uri(location)
+    try:
+        dataset = ds.dataset(path, filesystem=filesystem, format='parquet')
+    except FileNotFoundError:
+        return pa.table({}), 0
+    if max_rows is None:
+        table = dataset.to_table()
+        return table, table.num_rows
+    # 전체 행 수는 Parquet 메타데이터로 계산 (데이터를 읽지 않음)
+    return dataset.head(max_rows), dataset.count_rows()
+
+
+def read_result_file(location, max_rows=None):
+    """
+    일반 쿼리의 결과 파일 (CSV, DDL / SHOW 는 텍스트) 을 Arrow 테이블로 읽습니다.
+    GetQueryResults 로 행을 하나씩 받지 않고 결과 파일을 한 번에 읽습니다.
+
+    :return: (Arrow 테이블, 전체 행 수)
+    """
+    filesystem, path = fs.FileSystem.from_uri(location)
+    with filesystem.open_input_stream(path) as stream:
+        if path.endswith('.csv'):
+            table = pa_csv.read_csv(stream)
+        else:
+            lines = stream.read().decode('utf-8').splitlines()
+            table = pa.table({"result": [line.strip() for line in lines if line.strip()]})
+    total = table.num_rows
+    return (table.slice(0, max_rows) if max_rows is not None else table), total
+
+
+def fetch_arrow(sql, max_rows=None, database=ATHENA_DATABASE, staging_dir=None, client=None):
+    """
+    Athena 쿼리 결과를 Arrow 테이블로 가져옵니다.
+    SELECT 는 UNLOAD 로 스테이징 위치에 Parquet 을 쓰고 읽으며, 그 밖의 쿼리는 결과 파일을 직접 읽습니다.
+
+    :param sql: 실행할 SQL
+    :param max_rows: 최대 행 수 (None 이면 전체)
+    :param database: Athena 데이터베이스
+    :param staging_dir: 결과 / UNLOAD 위치 (기본값: ITSMS_ATHENA_STAGING_DIR)
+    :param client: Athena 클라이언트 (기본값: 공유 클라이언트)
+    :return: (Arrow 테이블, 전체 행 수)
+    """
+    staging_dir = staging_dir or STAGING_DIR
+    sql = sql.strip().rstrip(';')
+    if can_unload(sql):
+        location = _join(staging_dir, 'unload', uuid.uuid4().hex) + '/'
+        unload = f"UNLOAD ({sql}) TO '{location}' WITH (format = 'PARQUET', compression = 'SNAPPY')"
+        run_query(unload, _join(staging_dir, 'unload-manifests') + '/', database, client=client)
+        return read_parquet_dir(location, max_rows)
+    execution = run_query(sql, staging_dir, database, client=client)
+    return read_result_file(execution['ResultConfiguration']['OutputLocation'], max_rows)
+
+
+def fetch_dataframe(sql, max_rows=None, **kwargs):
+    """
+    fetch_arrow() 결과를 pandas DataFrame 으로 반환합니다.
+    """
+    table, _ = fetch_arrow(sql, max_rows, **kwargs)
+    return table.to_pandas()
+
+
+def format_for_llm(table, total_rows=None, max_rows=MAX_CONTEXT_ROWS):
+    """
+    결과를 LLM 컨텍스트용 텍스트 표로 만듭니다 (최대 max_rows 행, 생략된 행 수 표시).
+    """
+    total_rows = table.num_rows if total_rows is None else total_rows
+    # 컬럼이 없는 빈 테이블은 slice 하면 행 수가 늘어나므로 실제 행 수 이하로 자름
+    rows = table.slice(0, min(max_rows, table.num_rows)).to_pylist()
+    lines = [" | ".join(table.column_names)]
+    lines.extend(" | ".join("" if value is None else str(value) for value in row.values()) for row in rows)
+    if total_rows == 0:
+        lines.append("(0 rows)")
+    if total_rows > len(rows):
+        lines.append(f"... ({total_rows - len(rows)} more rows, {total_rows} total)")
+    return "\n".join(lines)
+
+
+def fetch_for_llm(sql, max_rows=MAX_CONTEXT_ROWS, **kwargs):
+    """
+    SQL 에이전트용: 최대 max_rows 행만 읽어서 텍스트 표로 반환합니다.
+    """
+    table, total_rows = fetch_arrow(sql, max_rows, **kwargs)
+    return format_for_llm(table, total_rows, max_rows)
+
+
+# 메인 실행: SQL 결과를 Arrow 로 가져와 출력 / 저장
+if __name__ == "__main__":
+    import argparse
+    import pyarrow.parquet as pq
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sql')
+    parser.add_argument('--max-rows', type=int, default=None)
+    parser.add_argument('--output', default=None, help='결과를 저장할 Parquet 파일')
+    args = parser.parse_args()
+
+    start = time.time()
+    result, total = fetch_arrow(args.sql, args.max_rows)
+    print(format_for_llm(result, total))
+    print(f"\n{result.num_rows} of {total} rows in {time.time() - start:.1f}s")
+    if args.output:
+        pq.write_table(result, args.output, compression='zstd')
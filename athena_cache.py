@@ -0,0 +1,290 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+# Athena SQL 결과 / 테이블 스키마 캐시 설정 (환경 변수로 변경 가능)
+DEFAULT_CACHE_PATH = os.environ.get(
+    'ITSMS_ATHENA_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'itsms', 'athena_cache.sqlite')
+)
+RESULT_TTL = int(os.environ.get('ITSMS_ATHENA_RESULT_TTL', '3600'))      # SQL 결과 유효 시간 (초)
+SCHEMA_TTL = int(os.environ.get('ITSMS_ATHENA_SCHEMA_TTL', '86400'))     # 테이블 스키마 설명 유효 시간 (초)
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|\s+|[^'\"\s]+")
+# referenced_tables() 용: 문자열 / (점으로 이은) 이름 / 괄호 / 쉼표 단위로 나눔
+_SQL_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|(?:\"[^\"]*\"|[\w$]+)(?:\s*\.\s*(?:\"[^\"]*\"|[\w$]+))*|[(),]|[^\s\w$'\"(),]+")
+# FROM 절 (테이블 목록) 을 끝내는 키워드 — ON / USING 뒤의 같은 깊이 쉼표는 여전히 테이블 구분자
+_CLAUSE_KEYWORDS = {'where', 'group', 'order', 'having', 'limit', 'offset', 'fetch', 'window', 'qualify',
+                    'union', 'intersect', 'except', 'select'}
+# 테이블이 아니라 FROM 절의 함수
+_TABLE_FUNCTIONS = {'unnest', 'lateral'}
+
+
+def normalize_sql(sql):
+    """
+    주석 / 공백 / 대소문자 / 끝의 ';' 차이를 없앤 SQL 입니다 (문자열 리터럴은 그대로 유지).
+    """
+    sql = _COMMENT_RE.sub(" ", sql).strip().rstrip(';').strip()
+    parts = []
+    for token in _TOKEN_RE.findall(sql):
+        if token.isspace():
+            parts.append(" ")
+        elif token.startswith("'"):
+            parts.append(token)
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip()
+
+
+def referenced_tables(sql):
+    """
+    FROM / JOIN 뒤의 테이블 이름 목록입니다 (스키마 / 따옴표 제외, 소문자).
+    쉼표로 나열한 테이블과 서브쿼리 안의 테이블을 포함하며, 함수 인자 안의 FROM (extract(year from ts),
+    substring(s from 2) 등) 과 WITH 로 정의한 이름은 제외합니다.
+    """
+    words = [token.lower() for token in _SQL_TOKEN_RE.findall(_COMMENT_RE.sub(" ", sql))]
+    tables, ctes = set(), set()
+    # 괄호 깊이별 상태: [쿼리 (SELECT / WITH / FROM 의 서브쿼리) 인지, FROM 절 안인지]
+    levels = [[True, False]]
+    expect_table = False
+    for i, word in enumerate(words):
+        level = levels[-1]
+        if word == '(':
+            # FROM 바로 뒤의 괄호는 서브쿼리 또는 괄호로 묶은 조인 (FROM (a JOIN b))
+            following = words[i + 1] if i + 1 < len(words) else ''
+            levels.append([expect_table or following in ('select', 'with'), expect_table])
+            if i >= 2 and words[i - 1] == 'as' and levels[-1][0]:
+                ctes.add(words[i - 2].strip('"'))
+        elif word == ')':
+            if len(levels) > 1:
+                levels.pop()
+            expect_table = False
+        elif not level[0]:
+            continue
+        elif word in ('from', 'join'):
+            level[1] = expect_table = True
+        elif word in _CLAUSE_KEYWORDS:
+            level[1] = expect_table = False
+        elif word == ',':
+            expect_table = level[1]
+        elif expect_table:
+            expect_table = False
+            # 문자열 / 연산자는 이름이 아님
+            if word[0] == '"' or word[0].isalnum() or word[0] in '_$':
+                name = re.split(r'\s*\.\s*', word)[-1].strip('"')
+                if name not in _TABLE_FUNCTIONS:
+                    tables.add(name)
+    return sorted(tables - ctes)
+
+
+class AthenaCache:
+    """
+    Athena SQL 결과와 테이블 스키마 설명을 SQLite 파일에 저장하는 캐시입니다.
+    결과는 정규화한 SQL 로 찾으며 TTL 이 지나거나 참조한 테이블이 무효화되면 사용하지 않습니다.
+    파일을 공유하므로 Streamlit 세션 / 프로세스가 바뀌어도 캐시가 유지됩니다.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, result_ttl=RESULT_TTL, schema_ttl=SCHEMA_TTL):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.result_ttl = result_ttl
+        self.schema_ttl = schema_ttl
+        self.hits = {"result": 0, "schema": 0}
+        self.misses = {"result": 0, "schema": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sql_results (
+                key TEXT PRIMARY KEY,
+                sql TEXT,
+                result TEXT,
+                created_at REAL,
+                hit_count INTEGER DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS sql_result_tables (
+                key TEXT,
+                table_name TEXT,
+                PRIMARY KEY (key, table_name)
+            );
+            CREATE INDEX IF NOT EXISTS sql_result_tables_by_table ON sql_result_tables (table_name);
+            CREATE TABLE IF NOT EXISTS table_info (
+                schema_name TEXT,
+                table_name TEXT,
+                info TEXT,
+                created_at REAL,
+                PRIMARY KEY (schema_name, table_name)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _key(sql):
+        return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()
+
+    def get_result(self, sql):
+        """
+        :return: 캐시된 결과 (없거나 만료되었으면 None)
+        """
+        key = self._key(sql)
+        with self._lock:
+            row = self._conn.execute("SELECT result, created_at FROM sql_results WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] < self.result_ttl:
+                self._conn.execute("UPDATE sql_results SET hit_count = hit_count + 1 WHERE key = ?", (key,))
+                self._conn.commit()
+                self.hits["result"] += 1
+                return json.loads(row[0])
+            self.misses["result"] += 1
+        return None
+
+    def put_result(self, sql, result):
+        key = self._key(sql)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_results (key, sql, result, created_at) VALUES (?, ?, ?, ?)",
+                (key, normalize_sql(sql), json.dumps(result, default=str), time.time())
+            )
+            self._conn.execute("DELETE FROM sql_result_tables WHERE key = ?", (key,))
+            self._conn.executemany("INSERT INTO sql_result_tables (key, table_name) VALUES (?, ?)",
+                                   [(key, table) for table in referenced_tables(sql)])
+            self._conn.commit()
+
+    def get_table_info(self, schema_name, table_name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info, created_at FROM table_info WHERE schema_name = ? AND table_name = ?",
+                (schema_name or '', table_name)
+            ).fetchone()
+            if row and time.time() - row[1] < self.schema_ttl:
+                self.hits["schema"] += 1
+                return row[0]
+            self.misses["schema"] += 1
+        return None
+
+    def put_table_info(self, schema_name, table_name, info):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO table_info (schema_name, table_name, info, created_at) VALUES (?, ?, ?, ?)",
+                (schema_name or '', table_name, info, time.time())
+            )
+            self._conn.commit()
+
+    def invalidate(self, table_name=None):
+        """
+        테이블을 참조한 SQL 결과와 테이블 스키마 설명을 삭제합니다. table_name 이 없으면 전체를 삭제합니다.
+        """
+        with self._lock:
+            if table_name is None:
+                self._conn.executescript("DELETE FROM sql_results; DELETE FROM sql_result_tables; DELETE FROM table_info;")
+                return
+            table_name = table_name.lower()
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT key FROM sql_result_tables WHERE table_name = ?", (table_name,))]
+            self._conn.executemany("DELETE FROM sql_results WHERE key = ?", [(key,) for key in keys])
+            self._conn.executemany("DELETE FROM sql_result_tables WHERE key = ?", [(key,) for key in keys])
+            self._conn.execute("DELETE FROM table_info WHERE lower(table_name) = ?", (table_name,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            results = self._conn.execute("SELECT COUNT(*) FROM sql_results").fetchone()[0]
+            tables = self._conn.execute("SELECT COUNT(*) FROM table_info").fetchone()[0]
+        lookups = self.hits["result"] + self.misses["result"]
+        return {
+            "results": results,
+            "tables": tables,
+            "result_hits": self.hits["result"],
+            "result_misses": self.misses["result"],
+            "schema_hits": self.hits["schema"],
+            "schema_misses": self.misses["schema"],
+            "result_hit_rate": self.hits["result"] / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_athena_cache():
+    """
+    프로세스 전체에서 공유하는 기본 Athena 캐시를 반환합니다.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = AthenaCache()
+    return _default_cache
+
+
+def cached_sql_database(engine, cache=None, query_fn=None, **kwargs):
+    """
+    테이블을 사용할 때만 반영(reflect)하고, 스키마 설명과 SQL 결과를 캐시하는 SQLDatabase 를 만듭니다.
+    시작할 때 모든 테이블을 반영하거나 샘플 행을 조회하지 않습니다.
+
+    :param engine: SQLAlchemy 엔진 (Athena)
+    :param cache: AthenaCache (기본값: 공유 캐시)
+    :param query_fn: SQL 문자열을 받아 결과 텍스트를 반환하는 함수 (예: athena_arrow.fetch_for_llm).
+                     없으면 SQLAlchemy 커서로 실행
+    :param kwargs: SQLDatabase 인자
+    """
+    from langchain_community.utilities import SQLDatabase
+
+    class CachedSQLDatabase(SQLDatabase):
+        def get_table_info(self, table_names=None, get_col_comments=False):
+            names = list(table_names) if table_names else sorted(self.get_usable_table_names())
+            sections = []
+            for name in names:
+                info = None if get_col_comments else self._cache.get_table_info(self._schema, name)
+                if info is None:
+                    info = super().get_table_info([name], get_col_comments=get_col_comments)
+                    if not get_col_comments:
+                        self._cache.put_table_info(self._schema, name, info)
+                sections.append(info)
+            return "\n\n".join(sections)
+
+        def run(self, command, fetch="all", include_columns=False, **run_kwargs):
+            # 같은 SQL (정규화 기준) 은 Athena 에 다시 보내지 않음
+            if not isinstance(command, str) or fetch == "cursor" or run_kwargs.get('parameters'):
+                return super().run(command, fetch, include_columns, **run_kwargs)
+            use_query_fn = query_fn is not None and fetch == "all" and not include_columns
+            mode = "text" if use_query_fn else f"{fetch}:{int(include_columns)}"
+            key = f"{mode}:{normalize_sql(command)}"
+            result = self._cache.get_result(key)
+            if result is None:
+                if use_query_fn:
+                    result = query_fn(command)
+                else:
+                    result = super().run(command, fetch, include_columns, **run_kwargs)
+                self._cache.put_result(key, result)
+            return result
+
+    options = {"lazy_table_reflection": True, "sample_rows_in_table_info": 0}
+    options.update(kwargs)
+    database = CachedSQLDatabase(engine, **options)
+    database._cache = cache or get_athena_cache()
+    return database
+
+
+# 메인 실행: 캐시 상태 확인 / 삭제
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--table', default=None, help='무효화할 테이블 (없으면 전체)')
+    args = parser.parse_args()
+
+    cache = get_athena_cache()
+    if args.command == 'clear':
+        cache.invalidate(args.table)
+    print(json.dumps(cache.stats(), indent=2))
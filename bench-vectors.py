@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+
+from titan_embedding import embed_texts
+from faiss_backend import build_faiss_index, index_memory_bytes, QUANTIZERS
+from vector_mapping import SUPPORTED_DIMENSIONS
+from result_export import iter_documents
+
+
+# 벡터 저장 방식별 recall / 지연 시간 / 메모리 비교 벤치마크
+#   python bench-vectors.py --index server_info --index weblog_info
+#   python bench-vectors.py --input server_info.ndjson   (full_text / vector_embedding 필드가 있는 NDJSON)
+
+def load_documents_from_index(client, index_name, text_field='full_text', vector_field='vector_embedding',
+                              limit=None):
+    texts, vectors = [], []
+    query = {"exists": {"field": vector_field}}
+    for hit in iter_documents(client, index_name, query, page_size=500, source=[text_field, vector_field],
+                              max_docs=limit):
+        source = hit['_source']
+        if source.get(text_field) and source.get(vector_field):
+            texts.append(source[text_field])
+            vectors.append(source[vector_field])
+            if limit and len(texts) >= limit:
+                break
+    return texts, np.asarray(vectors, dtype='float32')
+
+
+def load_documents_from_file(path, text_field='full_text', vector_field='vector_embedding', limit=None):
+    texts, vectors = [], []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get(text_field) and record.get(vector_field):
+                texts.append(record[text_field])
+                vectors.append(record[vector_field])
+                if limit and len(texts) >= limit:
+                    break
+    return texts, np.asarray(vectors, dtype='float32')
+
+
+def vectors_for_dimension(texts, base_vectors, dimension):
+    # 저장된 벡터와 차원이 같으면 그대로, 다르면 해당 차원으로 다시 임베딩 (임베딩 캐시 사용)
+    if base_vectors.shape[1] == dimension:
+        return base_vectors
+    vectors = embed_texts(texts, dimensions=dimension)
+    if any(vector is None for vector in vectors):
+        raise RuntimeError(f"Failed to embed some documents at {dimension} dimensions.")
+    return np.asarray(vectors, dtype='float32')
+
+
+def exact_neighbors(doc_vectors, query_vectors, k):
+    index = build_faiss_index(doc_vectors, kind='flat')
+    return index.search(query_vectors, k)[1]
+
+
+def benchmark_config(doc_vectors, query_vectors, truth, kind, quantizer, k):
+    start = time.perf_counter()
+    index = build_faiss_index(doc_vectors, kind=kind, quantizer=quantizer)
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    recalls = []
+    for query_vector, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        _, positions = index.search(query_vector.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(positions[0]) & set(expected)) / k)
+
+    memory = index_memory_bytes(index)
+    return {
+        "kind": kind,
+        "quantizer": quantizer,
+        "dimension": int(doc_vectors.shape[1]),
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 4),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 4),
+        "build_s": round(build_s, 3),
+        "index_bytes": memory,
+        "bytes_per_vector": round(memory / len(doc_vectors), 1),
+    }
+
+
+def run_benchmark(name, texts, vectors, dimensions, kinds, quantizers, num_queries=100, k=10):
+    """
+    마지막 num_queries 개 문서를 쿼리로 사용하고, 나머지 문서를 인덱싱합니다.
+    정답은 저장된 전체 차원 float32 벡터의 정확 검색(top-k) 결과입니다.
+    쿼리는 전체의 1/5 이하로 제한하되 최소 1 개이며, 문서가 2 개 미만이면 ValueError 를 발생시킵니다.
+    """
+    if len(texts) < 2:
+        raise ValueError(f"{name}: need at least 2 documents (1 query + 1 indexed), got {len(texts)}.")
+    num_queries = max(1, min(num_queries, len(texts) // 5))
+    split = len(texts) - num_queries
+    truth = exact_neighbors(vectors[:split], vectors[split:], k)
+
+    results = []
+    for dimension in dimensions:
+        dim_vectors = vectors_for_dimension(texts, vectors, dimension)
+        doc_vectors, query_vectors = dim_vectors[:split], dim_vectors[split:]
+        for kind in kinds:
+            for quantizer in quantizers:
+                result = benchmark_config(doc_vectors, query_vectors, truth, kind, quantizer, k)
+                result.update({"dataset": name, "documents": split, "queries": num_queries})
+                results.append(result)
+                print(f"{name:12s} dim={dimension:<5d} {kind:5s} {quantizer:5s} "
+                      f"recall@{k}={result[f'recall@{k}']:.3f} "
+                      f"p50={result['latency_ms_p50']:.3f}ms p95={result['latency_ms_p95']:.3f}ms "
+                      f"{result['bytes_per_vector']:.0f} B/vector")
+    return results
+
+
+# 메인 실행
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--index', action='append', default=[], help='벤치마크할 인덱스 (여러 번 지정 가능)')
+    parser.add_argument('--input', action='append', default=[], help='NDJSON 파일 (오프라인 실행)')
+    parser.add_argument('--dimensions', type=int, nargs='+', choices=SUPPORTED_DIMENSIONS,
+                        default=list(SUPPORTED_DIMENSIONS))
+    parser.add_argument('--kinds', nargs='+', choices=['flat', 'hnsw', 'ivf'], default=['flat', 'hnsw', 'ivf'])
+    parser.add_argument('--quantizers', nargs='+', choices=QUANTIZERS, default=list(QUANTIZERS))
+    parser.add_argument('--queries', type=int, default=100, help='쿼리로 사용할 문서 수')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--limit', type=int, default=None, help='데이터셋별 최대 문서 수')
+    parser.add_argument('--output', default='bench_results/vectors.json')
+    args = parser.parse_args()
+
+    datasets = []
+    for path in args.input:
+        datasets.append((os.path.basename(path), *load_documents_from_file(path, limit=args.limit)))
+    if args.index:
+        from opensearch_client import get_opensearch_client
+
+        client = get_opensearch_client()
+        for index_name in args.index:
+            datasets.append((index_name, *load_documents_from_index(client, index_name, limit=args.limit)))
+
+    # 벤치마크를 시작하기 전에 쿼리 / 인덱스로 나눌 수 없는 데이터셋을 알림
+    for name, texts, _ in datasets:
+        if len(texts) < 2:
+            parser.exit(1, f"{name}: need at least 2 documents with text and vectors (1 query + 1 indexed), "
+                           f"got {len(texts)}.\n")
+
+    results = []
+    for name, texts, vectors in datasets:
+        results.extend(run_benchmark(name, texts, vectors, args.dimensions, args.kinds, args.quantizers,
+                                     num_queries=args.queries, k=args.k))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({"created_at": time.time(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,816 @@
+import re
+import json
+import asyncio
+import math
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+# 벤치마크용 Bedrock / OpenSearch 대체 구현
+# 실제 엔드포인트 없이 dummy-*.py, hybrid_search.py, get-serverinfo.py 의 코드 경로를 실행하기 위해 사용합니다.
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-Z가-힣]+")
+
+
+_SUBWORD_RE = re.compile(r"[0-9a-zA-Z가-힣]{1,4}|[^\s0-9a-zA-Z가-힣]")
+
+
+def tokenize(text):
+    return [token.lower() for token in _TOKEN_RE.findall(str(text))]
+
+
+def estimate_tokens(text):
+    """
+    모델 입력 토큰 수 근사치 (BPE 처럼 긴 단어는 4글자 단위로 나누고, 따옴표 / 괄호 등 기호는 한 토큰씩)
+    """
+    return len(_SUBWORD_RE.findall(str(text)))
+
+
+@lru_cache(maxsize=100_000)
+def _token_vector(token, dimensions):
+    seed = int.from_bytes(hashlib.sha256(f"{token}:{dimensions}".encode('utf-8')).digest()[:8], 'little')
+    return np.random.default_rng(seed).standard_normal(dimensions).astype('float32')
+
+
+def fake_embedding(text, dimensions=1024, normalize=True):
+    """
+    토큰별 고정 난수 벡터의 합으로 결정적인 임베딩을 만듭니다.
+    토큰이 겹치는 텍스트끼리 가까운 벡터가 되므로 검색 품질 비교에도 사용할 수 있습니다.
+    """
+    vector = np.zeros(dimensions, dtype='float32')
+    for token in tokenize(text) or ['<empty>']:
+        vector += _token_vector(token, dimensions)
+    if normalize:
+        vector /= float(np.linalg.norm(vector)) or 1.0
+    return vector.tolist()
+
+
+class _Body:
+    def __init__(self, payload):
+        self._data = json.dumps(payload).encode('utf-8')
+
+    def read(self):
+        return self._data
+
+
+class FakeBedrockRuntime:
+    """
+    invoke_model / invoke_model_with_response_stream 을 지원하는 Bedrock Runtime 대체 클라이언트입니다.
+    Titan 임베딩은 fake_embedding(), Claude 는 질문 키워드로 만든 고정 DSL 을 반환합니다.
+    Titan 지연은 embed_latency_ms 에 입력 토큰마다 embed_token_latency_ms 를 더한 값입니다.
+    """
+    def __init__(self, embed_latency_ms=0.0, llm_latency_ms=0.0, token_latency_ms=0.0, embed_token_latency_ms=0.0):
+        self.embed_latency_ms = embed_latency_ms
+        self.embed_token_latency_ms = embed_token_latency_ms
+        self.llm_latency_ms = llm_latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.calls = {"embedding": 0, "llm": 0}
+        self.input_tokens = {"embedding": 0, "llm": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, kind, tokens=0):
+        with self._lock:
+            self.calls[kind] += 1
+            self.input_tokens[kind] += tokens
+
+    def invoke_model(self, body, modelId, **kwargs):
+        request = json.loads(body)
+        if modelId.startswith('amazon.titan-embed'):
+            text = request['inputText']
+            tokens = estimate_tokens(text)
+            self._count("embedding", tokens)
+            time.sleep((self.embed_latency_ms + tokens * self.embed_token_latency_ms) / 1000)
+            return {'body': _Body({
+                "embedding": fake_embedding(text, request.get('dimensions', 1024), request.get('normalize', True)),
+                "inputTextTokenCount": tokens,
+            })}
+
+        self._count("llm")
+        question, text = self._claude_text(request)
+        # 전체 응답을 다 생성한 뒤 반환 (스트림과 같은 토큰 지연)
+        chunks = math.ceil(len(text) / _FakeEventStream.CHUNK_CHARS)
+        time.sleep((self.llm_latency_ms + max(chunks - 1, 0) * self.token_latency_ms) / 1000)
+        return {'body': _Body({
+            "content": [{"type": "text", "text": text}],
+            "usage": {"input_tokens": len(tokenize(question)), "output_tokens": len(tokenize(text))},
+        })}
+
+    def invoke_model_with_response_stream(self, body, modelId, **kwargs):
+        """
+        Claude 응답을 Messages 스트림 이벤트로 나눠 반환합니다.
+        llm_latency_ms 는 첫 토큰까지의 지연, token_latency_ms 는 이후 조각마다의 지연입니다.
+        """
+        self._count("llm")
+        request = json.loads(body)
+        question, text = self._claude_text(request)
+        return {'body': _FakeEventStream(self, question, text)}
+
+    def _claude_text(self, request):
+        # 질문은 마지막 user 메시지, assistant 메시지가 있으면 그 뒤부터 이어서 생성
+        user_messages = [message for message in request['messages'] if message['role'] == 'user']
+        question = user_messages[-1]['content'].rsplit('Natural language query:', 1)[-1]
+        dsl = json.dumps(fake_dsl_for_question(question), indent=2)
+        prefill = request['messages'][-1]['content'] if request['messages'][-1]['role'] == 'assistant' else None
+        if prefill and dsl.startswith(prefill):
+            text = dsl[len(prefill):]
+        else:
+            text = f"Here is the OpenSearch query for your request:\n\n```json\n{dsl}\n```"
+        text += "\n\nThis query filters the index using the fields described in the schema."
+        return question, text
+
+
+class _FakeEventStream:
+    # botocore EventStream 처럼 순회 / close() 를 지원
+    CHUNK_CHARS = 4     # 토큰 하나에 해당하는 글자 수 (대략)
+
+    def __init__(self, runtime, question, text):
+        self._runtime = runtime
+        self._question = question
+        self._text = text
+        self.closed = False
+        self.chunks_sent = 0
+
+    @staticmethod
+    def _event(payload):
+        return {"chunk": {"bytes": json.dumps(payload).encode('utf-8')}}
+
+    def __iter__(self):
+        time.sleep(self._runtime.llm_latency_ms / 1000)
+        yield self._event({"type": "message_start", "message": {
+            "role": "assistant", "usage": {"input_tokens": len(tokenize(self._question))}}})
+        yield self._event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for start in range(0, len(self._text), self.CHUNK_CHARS):
+            if self.closed:
+                return
+            if start:
+                time.sleep(self._runtime.token_latency_ms / 1000)
+            self.chunks_sent += 1
+            yield self._event({"type": "content_block_delta", "index": 0,
+                               "delta": {"type": "text_delta", "text": self._text[start:start + self.CHUNK_CHARS]}})
+        yield self._event({"type": "content_block_stop", "index": 0})
+        yield self._event({"type": "message_stop"})
+
+    def close(self):
+        self.closed = True
+
+
+def fake_dsl_for_question(question):
+    """
+    자주 묻는 질문 유형에 대한 고정 DSL 을 만듭니다.
+    """
+    q = question.lower()
+    filters = []
+    if 'running' in q:
+        filters.append({"match": {"server_status": "running"}})
+    if 'linux' in q:
+        filters.append({"match": {"os": "Ubuntu CentOS Red Hat"}})
+    if 'windows' in q:
+        filters.append({"match": {"os": "Windows"}})
+    memory = re.search(r"(\d+)\s*gb", q)
+    if memory:
+        filters.append({"range": {"memory": {"gt": int(memory.group(1))}}})
+    status = re.search(r"\b([45]\d\d)\b", q)
+    if status:
+        filters.append({"term": {"status_code": int(status.group(1))}})
+    if not filters:
+        return {"query": {"match_all": {}}}
+    return {"query": {"bool": {"must": filters}}}
+
+
+class _FakeIndices:
+    def __init__(self, client):
+        self._client = client
+
+    def exists(self, index, **kwargs):
+        return all(name in self._client.store for name in str(index).split(','))
+
+    def create(self, index, body=None, **kwargs):
+        if index in self._client.store:
+            raise ValueError(f"resource_already_exists_exception: {index}")
+        self._client._create(index, (body or {}).get('mappings'))
+        return {"acknowledged": True, "index": index}
+
+    def delete(self, index, **kwargs):
+        for name in self._client._resolve(index):
+            self._client.store.pop(name, None)
+            for members in self._client.aliases.values():
+                members.discard(name)
+        return {"acknowledged": True}
+
+    def put_index_template(self, name, body, **kwargs):
+        self._client.templates[name] = body
+        return {"acknowledged": True}
+
+    def put_mapping(self, body, index=None, **kwargs):
+        for name in self._client._resolve(index):
+            mappings = self._client.store[name]["mappings"]
+            mappings.setdefault("properties", {}).update(body.get("properties", {}))
+        return {"acknowledged": True}
+
+    def get_mapping(self, index, **kwargs):
+        return {name: {"mappings": self._client.store[name]["mappings"]} for name in self._client._resolve(index)}
+
+    def refresh(self, index=None, **kwargs):
+        return {"_shards": {"failed": 0}}
+
+
+class _FakeCat:
+    def __init__(self, client):
+        self._client = client
+
+    def indices(self, index=None, format=None, **kwargs):
+        names = self._client._resolve(index, ignore_unavailable=True)
+        return [{"index": name, "docs.count": str(len(self._client.store[name]["docs"])), "health": "green"}
+                for name in sorted(names)]
+
+
+def _field_value(source, field):
+    # 'os.keyword' 같은 멀티 필드는 원래 필드 값으로 처리
+    if field.endswith('.keyword'):
+        field = field[:-len('.keyword')]
+    value = source
+    for part in field.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _compare(value, op, bound):
+    if value is None:
+        return False
+    if isinstance(bound, (int, float)) and not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(bound, str) and not isinstance(value, str):
+        value = str(value)
+    return {"gt": value > bound, "gte": value >= bound, "lt": value < bound, "lte": value <= bound}[op]
+
+
+class FakeOpenSearch:
+    """
+    메모리 안에서 동작하는 OpenSearch 대체 클라이언트입니다.
+    index, bulk, search, msearch, count, cat.indices, indices.* 의 일부 기능을 지원합니다.
+    bulk 로 없는 인덱스에 쓰면 이름이 맞는 인덱스 템플릿의 매핑 / 별칭으로 생성합니다.
+    """
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.store = {}
+        self.templates = {}
+        self.aliases = {}   # 별칭 → 인덱스 이름 집합
+        self.calls = {}
+        self.indices = _FakeIndices(self)
+        self.cat = _FakeCat(self)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pits = {}     # PIT ID → 인덱스
+        self._scrolls = {}  # scroll ID → (인덱스, 검색 본문, 다음 위치)
+        self._vectors = {}  # 검색용 문서별 캐시 (numpy 벡터, 토큰): {id(docs): {문서 ID: {키: 값}}}
+
+    def _request(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.latency_ms / 1000)
+
+    def _resolve(self, index, ignore_unavailable=False):
+        if index is None or index in ('_all', '*'):
+            return list(self.store)
+        names = []
+        for pattern in str(index).split(','):
+            if '*' in pattern:
+                regex = re.compile('^' + re.escape(pattern).replace('\\*', '.*') + '$')
+                names.extend(name for name in self.store if regex.match(name))
+            elif pattern in self.store:
+                names.append(pattern)
+            elif pattern in self.aliases:
+                names.extend(sorted(self.aliases[pattern]))
+            elif not ignore_unavailable:
+                raise KeyError(f"index_not_found_exception: {pattern}")
+        return list(dict.fromkeys(names))
+
+    def _create(self, index, mappings=None):
+        # 이름이 맞는 템플릿 중 priority 가 가장 높은 것의 매핑 / 별칭 적용
+        template = {}
+        matching = [body for body in self.templates.values()
+                    if any(re.match('^' + re.escape(pattern).replace('\\*', '.*') + '$', index)
+                           for pattern in body.get('index_patterns', []))]
+        if matching:
+            template = max(matching, key=lambda body: body.get('priority', 0)).get('template', {})
+        self.store[index] = {"mappings": mappings or template.get('mappings', {}), "docs": {}}
+        for alias in template.get('aliases', {}):
+            self.aliases.setdefault(alias, set()).add(index)
+
+    def _put(self, index, doc_id, source):
+        with self._lock:
+            if index not in self.store:
+                self._create(index)
+            if doc_id is None:
+                self._next_id += 1
+                doc_id = f"fake-{self._next_id}"
+            docs = self.store[index]["docs"]
+            created = doc_id not in docs
+            docs[doc_id] = source
+            self._vectors.get(id(docs), {}).pop(doc_id, None)
+        return doc_id, created
+
+    def index(self, index, body, id=None, **kwargs):
+        self._request("index")
+        doc_id, created = self._put(index, id, body)
+        return {"_index": index, "_id": doc_id, "result": "created" if created else "updated"}
+
+    def bulk(self, body, index=None, **kwargs):
+        self._request("bulk")
+        lines = body.splitlines() if isinstance(body, str) else [json.dumps(line) for line in body]
+        lines = [line for line in lines if line.strip()]
+        items = []
+        for action_line, source_line in zip(lines[::2], lines[1::2]):
+            action, meta = next(iter(json.loads(action_line).items()))
+            doc_id, created = self._put(meta.get('_index', index), meta.get('_id'), json.loads(source_line))
+            items.append({action: {"_index": meta.get('_index', index), "_id": doc_id,
+                                   "status": 201 if created else 200}})
+        return {"took": 1, "errors": False, "items": items}
+
+    def count(self, index=None, body=None, **kwargs):
+        self._request("count")
+        query = (body or {}).get('query', {"match_all": {}})
+        return {"count": sum(len(self._evaluate(query, self.store[name]["docs"]))
+                             for name in self._resolve(index))}
+
+    def search(self, index=None, body=None, scroll=None, **kwargs):
+        self._request("search")
+        body = body or {}
+        if 'pit' in body:
+            index = self._pits[body['pit']['id']]
+        response = self._search(index, body, kwargs.get('ignore_unavailable', False))
+        if scroll:
+            # scroll 은 (인덱스, 본문, 다음 위치) 만 기억 (스냅샷은 만들지 않음)
+            with self._lock:
+                self._next_id += 1
+                scroll_id = f"scroll-{self._next_id}"
+                self._scrolls[scroll_id] = (index, body, body.get('size', 10))
+            response["_scroll_id"] = scroll_id
+        if 'pit' in body:
+            response["pit_id"] = body['pit']['id']
+        return response
+
+    def scroll(self, body=None, scroll_id=None, **kwargs):
+        self._request("scroll")
+        scroll_id = scroll_id or body['scroll_id']
+        index, search_body, offset = self._scrolls[scroll_id]
+        response = self._search(index, dict(search_body, **{"from": offset}))
+        self._scrolls[scroll_id] = (index, search_body, offset + search_body.get('size', 10))
+        response["_scroll_id"] = scroll_id
+        return response
+
+    def clear_scroll(self, body=None, scroll_id=None, **kwargs):
+        self._request("clear_scroll")
+        ids = scroll_id or body['scroll_id']
+        for scroll_id in (ids if isinstance(ids, list) else [ids]):
+            self._scrolls.pop(scroll_id, None)
+        return {"succeeded": True}
+
+    def create_pit(self, index, **kwargs):
+        self._request("create_pit")
+        self._resolve(index)
+        with self._lock:
+            self._next_id += 1
+            pit_id = f"pit-{self._next_id}"
+            self._pits[pit_id] = index
+        return {"pit_id": pit_id}
+
+    def delete_pit(self, body=None, **kwargs):
+        self._request("delete_pit")
+        for pit_id in body['pit_id']:
+            self._pits.pop(pit_id, None)
+        return {"pits": [{"pit_id": pit_id, "successful": True} for pit_id in body['pit_id']]}
+
+    def msearch(self, body, index=None, **kwargs):
+        self._request("msearch")
+        lines = body.splitlines() if isinstance(body, str) else [json.dumps(line) for line in body]
+        lines = [json.loads(line) for line in lines if line.strip()]
+        responses = []
+        for header, search_body in zip(lines[::2], lines[1::2]):
+            responses.append(self._search(header.get('index', index), search_body))
+        return {"responses": responses}
+
+    def _search(self, index, body, ignore_unavailable=False):
+        start = time.perf_counter()
+        query = body.get('query', {"match_all": {}})
+        scored = []
+        names = self._resolve(index, ignore_unavailable)
+        for name in names:
+            docs = self.store[name]["docs"]
+            positions = {doc_id: pos for pos, doc_id in enumerate(docs)}
+            for doc_id, score in self._evaluate(query, docs).items():
+                scored.append((name, doc_id, score, docs[doc_id], positions[doc_id]))
+
+        sort = body.get('sort')
+        specs = []
+        for spec in (sort if isinstance(sort, list) else [sort]) if sort else []:
+            field, order = (spec, 'asc') if isinstance(spec, str) else next(iter(spec.items()))
+            order = order.get('order', 'asc') if isinstance(order, dict) else order
+            specs.append((field, order))
+
+        def sort_value(item, field):
+            if field == '_id':
+                return item[1]
+            if field == '_doc':
+                return item[4]
+            if field == '_score':
+                return item[2]
+            return _field_value(item[3], field)
+
+        def sort_key(value):
+            return (value is None, value if value is not None else 0)
+
+        if specs:
+            for field, order in reversed(specs):
+                scored.sort(key=lambda item, f=field: sort_key(sort_value(item, f)), reverse=(order == 'desc'))
+            search_after = body.get('search_after')
+            if search_after is not None:
+                def is_after(item):
+                    for (field, order), bound in zip(specs, search_after):
+                        value, bound = sort_key(sort_value(item, field)), sort_key(bound)
+                        if value != bound:
+                            return (value > bound) if order == 'asc' else (value < bound)
+                    return False
+                scored = [item for item in scored if is_after(item)]
+        else:
+            scored.sort(key=lambda item: item[2], reverse=True)
+
+        aggs = body.get('aggs') or body.get('aggregations')
+        aggregations = None
+        if aggs:
+            all_docs = {(name, doc_id): source for name in names
+                        for doc_id, source in self.store[name]["docs"].items()}
+            matched = {(item[0], item[1]): item[3] for item in scored}
+            aggregations = self._aggregate(aggs, matched, all_docs)
+
+        start_at = body.get('from', 0)
+        size = body.get('size', 10)
+        hits = []
+        for item in scored[start_at:start_at + size]:
+            name, doc_id, score, source, _ = item
+            hit = {"_index": name, "_id": doc_id, "_score": score,
+                   "_source": self._filter_source(source, body.get('_source'))}
+            if specs:
+                hit["sort"] = [sort_value(item, field) for field, _ in specs]
+            hits.append(hit)
+        return {
+            "took": int((time.perf_counter() - start) * 1000),
+            "timed_out": False,
+            "hits": {
+                "total": {"value": len(scored), "relation": "eq"},
+                "max_score": max((item[2] for item in scored), default=None),
+                "hits": hits,
+            },
+            **({"aggregations": aggregations} if aggregations is not None else {}),
+        }
+
+    def _aggregate(self, spec, docs, all_docs):
+        """
+        terms / histogram / date_histogram / cardinality / stats 계열 / percentiles / filter / global 집계를 계산합니다.
+        """
+        result = {}
+        for name, agg in spec.items():
+            sub = agg.get('aggs') or agg.get('aggregations')
+            kind = next(key for key in agg if key not in ('aggs', 'aggregations'))
+            params = agg[kind]
+
+            if kind in ('global', 'filter'):
+                bucket_docs = all_docs if kind == 'global' else {
+                    key: docs[key] for key in self._evaluate(params, docs)}
+                output = {"doc_count": len(bucket_docs)}
+                if sub:
+                    output.update(self._aggregate(sub, bucket_docs, all_docs))
+
+            elif kind in ('terms', 'histogram'):
+                groups = {}
+                for key, source in docs.items():
+                    value = _field_value(source, params['field'])
+                    for item in (value if isinstance(value, list) else [value]):
+                        if item is None:
+                            continue
+                        if kind == 'histogram':
+                            item = math.floor(item / params['interval']) * params['interval']
+                        groups.setdefault(item, {})[key] = source
+                if kind == 'terms':
+                    ordered = sorted(groups.items(), key=lambda group: (-len(group[1]), str(group[0])))
+                    ordered = ordered[:params.get('size', 10)]
+                else:
+                    ordered = sorted(groups.items(), key=lambda group: group[0])
+                    ordered = [group for group in ordered if len(group[1]) >= params.get('min_doc_count', 0)]
+                buckets = []
+                for key, bucket_docs in ordered:
+                    bucket = {"key": key, "doc_count": len(bucket_docs)}
+                    if sub:
+                        bucket.update(self._aggregate(sub, bucket_docs, all_docs))
+                    buckets.append(bucket)
+                output = {"buckets": buckets}
+
+            elif kind == 'date_histogram':
+                # 고정 간격 (fixed_interval / 'minute' · 'hour' · 'day') 만 지원, UTC 기준
+                interval = params.get('fixed_interval') or params.get('calendar_interval') or params.get('interval')
+                seconds = {'minute': 60, 'hour': 3600, 'day': 86400}.get(interval) or \
+                    int(interval[:-1]) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[interval[-1]]
+                groups = {}
+                for key, source in docs.items():
+                    value = _field_value(source, params['field'])
+                    if value is None:
+                        continue
+                    if isinstance(value, str):
+                        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                        epoch = (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+                    else:
+                        epoch = value / 1000
+                    groups.setdefault(int(epoch // seconds * seconds), {})[key] = source
+                buckets = []
+                for start in sorted(groups):
+                    bucket = {"key_as_string": datetime.fromtimestamp(start, tz=timezone.utc).strftime(
+                        '%Y-%m-%dT%H:%M:%S.000Z'), "key": start * 1000, "doc_count": len(groups[start])}
+                    if sub:
+                        bucket.update(self._aggregate(sub, groups[start], all_docs))
+                    buckets.append(bucket)
+                output = {"buckets": buckets}
+
+            elif kind == 'percentiles':
+                values = [value for value in (_field_value(source, params['field']) for source in docs.values())
+                          if isinstance(value, (int, float))]
+                percents = params.get('percents', [1, 5, 25, 50, 75, 95, 99])
+                output = {"values": {str(float(p)): float(np.percentile(values, p)) if values else None
+                                     for p in percents}}
+
+            elif kind == 'cardinality':
+                values = set()
+                for source in docs.values():
+                    value = _field_value(source, params['field'])
+                    values.update(str(item) for item in (value if isinstance(value, list) else [value])
+                                  if item is not None)
+                output = {"value": len(values)}
+
+            elif kind in ('stats', 'min', 'max', 'avg', 'sum', 'value_count'):
+                values = [value for value in (_field_value(source, params['field']) for source in docs.values())
+                          if isinstance(value, (int, float))]
+                stats = {
+                    "count": len(values),
+                    "min": min(values) if values else None,
+                    "max": max(values) if values else None,
+                    "avg": sum(values) / len(values) if values else None,
+                    "sum": float(sum(values)),
+                }
+                output = stats if kind == 'stats' else {
+                    "value": stats["count" if kind == 'value_count' else kind]}
+
+            else:
+                raise ValueError(f"FakeOpenSearch does not support '{kind}' aggregations.")
+            result[name] = output
+        return result
+
+    @staticmethod
+    def _filter_source(source, spec):
+        if spec is None or spec is True:
+            return dict(source)
+        if spec is False:
+            return {}
+        if isinstance(spec, list):
+            spec = {"includes": spec}
+        includes, excludes = spec.get('includes'), spec.get('excludes', [])
+        return {key: value for key, value in source.items()
+                if (not includes or key in includes) and key not in excludes}
+
+    def _evaluate(self, query, docs):
+        """
+        쿼리를 평가하여 {문서 ID: 점수} 를 반환합니다.
+        """
+        (kind, spec), = query.items()
+
+        if kind == 'match_all':
+            return {doc_id: 1.0 for doc_id in docs}
+
+        if kind in ('match', 'match_phrase'):
+            (field, value), = spec.items()
+            boost = 1.0
+            if isinstance(value, dict):
+                boost = value.get('boost', 1.0)
+                value = value['query']
+            terms = set(tokenize(value))
+            result = {}
+            cache = self._vectors.setdefault(id(docs), {})
+            for doc_id, source in docs.items():
+                entry = cache.setdefault(doc_id, {})
+                tokens = entry.get(('tokens', field))
+                if tokens is None:
+                    tokens = entry[('tokens', field)] = tokenize(_field_value(source, field) or '')
+                score = sum(1.0 for token in tokens if token in terms)
+                if score:
+                    result[doc_id] = boost * score / math.sqrt(len(tokens))
+            return result
+
+        if kind in ('term', 'terms'):
+            (field, value), = spec.items()
+            if isinstance(value, dict):
+                value = value.get('value')
+            values = {str(v).lower() for v in (value if isinstance(value, list) else [value])}
+            return {doc_id: 1.0 for doc_id, source in docs.items()
+                    if str(_field_value(source, field)).lower() in values}
+
+        if kind == 'range':
+            (field, bounds), = spec.items()
+            return {doc_id: 1.0 for doc_id, source in docs.items()
+                    if all(_compare(_field_value(source, field), op, bound)
+                           for op, bound in bounds.items() if op in ('gt', 'gte', 'lt', 'lte'))}
+
+        if kind == 'ids':
+            values = set(spec['values'])
+            return {doc_id: 1.0 for doc_id in docs if doc_id in values}
+
+        if kind == 'exists':
+            return {doc_id: 1.0 for doc_id, source in docs.items()
+                    if _field_value(source, spec['field']) is not None}
+
+        if kind in ('prefix', 'wildcard'):
+            (field, value), = spec.items()
+            if isinstance(value, dict):
+                value = value.get('value')
+            pattern = re.compile(re.escape(str(value).lower()).replace('\\*', '.*').replace('\\?', '.')
+                                 + ('.*' if kind == 'prefix' else '') + '$')
+            return {doc_id: 1.0 for doc_id, source in docs.items()
+                    if pattern.match(str(_field_value(source, field)).lower())}
+
+        if kind == 'knn':
+            (field, params), = spec.items()
+            vector = np.asarray(params['vector'], dtype='float32')
+            scored = []
+            cache = self._vectors.setdefault(id(docs), {})
+            # knn 절 안의 filter 는 top-k 를 고르기 전에 적용 (OpenSearch efficient filtering)
+            allowed = self._evaluate(params['filter'], docs) if params.get('filter') else docs
+            for doc_id, source in docs.items():
+                if doc_id not in allowed:
+                    continue
+                stored = cache.get(doc_id, {}).get(field)
+                if stored is None:
+                    stored = _field_value(source, field)
+                    if not stored:
+                        continue
+                    stored = cache.setdefault(doc_id, {})[field] = np.asarray(stored, dtype='float32')
+                distance = float(np.sum((stored - vector) ** 2))
+                scored.append((doc_id, 1.0 / (1.0 + distance)))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            boost = params.get('boost', 1.0)
+            return {doc_id: boost * score for doc_id, score in scored[:params.get('k', 10)]}
+
+        if kind == 'bool':
+            return self._evaluate_bool(spec, docs)
+
+        raise ValueError(f"FakeOpenSearch does not support '{kind}' queries.")
+
+    def _evaluate_bool(self, spec, docs):
+        def clauses(name):
+            value = spec.get(name, [])
+            return value if isinstance(value, list) else [value]
+
+        candidates = None
+        scores = {}
+        for clause in clauses('must'):
+            result = self._evaluate(clause, docs)
+            candidates = set(result) if candidates is None else candidates & set(result)
+            for doc_id, score in result.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        for clause in clauses('filter'):
+            result = self._evaluate(clause, docs)
+            candidates = set(result) if candidates is None else candidates & set(result)
+
+        should = clauses('should')
+        should_hits = {}
+        for clause in should:
+            for doc_id, score in self._evaluate(clause, docs).items():
+                should_hits[doc_id] = should_hits.get(doc_id, 0) + 1
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        minimum = spec.get('minimum_should_match', 1 if should and candidates is None else 0)
+        if candidates is None:
+            candidates = set(docs)
+        if minimum:
+            candidates = {doc_id for doc_id in candidates if should_hits.get(doc_id, 0) >= int(minimum)}
+
+        for clause in clauses('must_not'):
+            candidates -= set(self._evaluate(clause, docs))
+        return {doc_id: scores.get(doc_id, 0.0) for doc_id in candidates}
+
+
+class FakeAsyncOpenSearch:
+    """
+    FakeOpenSearch 를 감싼 AsyncOpenSearch 대체 클라이언트입니다 (search / msearch / count / close).
+    요청은 워커 스레드에서 실행하므로 여러 요청을 gather 하면 지연이 겹칩니다.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    async def search(self, **kwargs):
+        return await asyncio.to_thread(self.client.search, **kwargs)
+
+    async def msearch(self, **kwargs):
+        return await asyncio.to_thread(self.client.msearch, **kwargs)
+
+    async def count(self, **kwargs):
+        return await asyncio.to_thread(self.client.count, **kwargs)
+
+    async def close(self):
+        pass
+
+
+class FakeAthena:
+    """
+    start_query_execution / get_query_execution 을 지원하는 Athena 대체 클라이언트입니다.
+    테이블은 메모리 SQLite 에 올려 실행하고, 결과는 실제 Athena 처럼 스테이징 위치 (로컬 디렉터리) 에
+    UNLOAD 는 Parquet 파일, 그 밖의 쿼리는 <query_id>.csv 로 씁니다.
+    """
+    _UNLOAD_RE = re.compile(r"^\s*UNLOAD\s*\((.*)\)\s*TO\s*'([^']+)'\s*WITH\s*\(.*\)\s*$", re.I | re.S)
+
+    def __init__(self, latency_ms=0.0):
+        import sqlite3
+        self.latency_ms = latency_ms
+        self.calls = {"query": 0, "unload": 0}
+        self._db = sqlite3.connect(':memory:', check_same_thread=False)
+        self._executions = {}
+        self._lock = threading.Lock()
+
+    def register_table(self, name, rows):
+        """
+        :param rows: dict 리스트 또는 Arrow 테이블
+        """
+        if hasattr(rows, 'to_pylist'):
+            rows = rows.to_pylist()
+        columns = list(rows[0]) if rows else []
+        with self._lock:
+            self._db.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self._db.execute(f'CREATE TABLE "{name}" ({", ".join(f"{column!r}" for column in columns)})')
+            self._db.executemany(f'INSERT INTO "{name}" VALUES ({", ".join("?" for _ in columns)})',
+                                 [[row.get(column) for column in columns] for row in rows])
+            self._db.commit()
+
+    def _select(self, sql):
+        # Athena 의 스키마 접두사 (itsms.table) 는 SQLite 에 없으므로 제거
+        sql = re.sub(r"\b(?:from|join)\s+\"?itsms\"?\.", lambda m: m.group(0).split()[0] + " ", sql, flags=re.I)
+        with self._lock:
+            cursor = self._db.execute(sql)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        import pyarrow as pa
+        return pa.table({column: [row[i] for row in rows] for i, column in enumerate(columns)})
+
+    def start_query_execution(self, QueryString, ResultConfiguration, **kwargs):
+        import os
+        import uuid
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+
+        time.sleep(self.latency_ms / 1000)
+        query_id = uuid.uuid4().hex
+        output = ResultConfiguration['OutputLocation']
+        status = {"State": "SUCCEEDED"}
+        try:
+            unload = self._UNLOAD_RE.match(QueryString)
+            if unload:
+                self.calls["unload"] += 1
+                location = unload.group(2)
+                table = self._select(unload.group(1))
+                if table.num_rows:
+                    # Athena 와 같이 결과가 0 행이면 파일을 쓰지 않음
+                    os.makedirs(location, exist_ok=True)
+                    pq.write_table(table, os.path.join(location, f"{query_id}_0.parquet"))
+                output_location = os.path.join(output, f"{query_id}-manifest.csv")
+            else:
+                self.calls["query"] += 1
+                os.makedirs(output, exist_ok=True)
+                if QueryString.strip().lower().startswith('show tables'):
+                    output_location = os.path.join(output, f"{query_id}.txt")
+                    tables = self._select("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+                    with open(output_location, 'w') as f:
+                        f.write("\n".join(tables.column('name').to_pylist()) + "\n")
+                else:
+                    output_location = os.path.join(output, f"{query_id}.csv")
+                    pa_csv.write_csv(self._select(QueryString), output_location)
+        except Exception as e:
+            status = {"State": "FAILED", "StateChangeReason": str(e)}
+            output_location = None
+        self._executions[query_id] = {
+            "QueryExecutionId": query_id,
+            "Query": QueryString,
+            "Status": status,
+            "ResultConfiguration": {"OutputLocation": output_location},
+        }
+        return {"QueryExecutionId": query_id}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": self._executions[QueryExecutionId]}
+
+    def stop_query_execution(self, QueryExecutionId):
+        self._executions[QueryExecutionId]["Status"] = {"State": "CANCELLED"}
+        return {}
@@ -2,7 +2,6 @@ import os
 import streamlit as st
 from langchain_community.llms import Bedrock
 from langchain_experimental.sql import SQLDatabaseChain
-from langchain.sql_database import SQLDatabase
 from langchain.prompts import PromptTemplate
 
 from langchain_aws import ChatBedrock
@@ -10,6 +9,10 @@ from langchain_community.agent_toolkits import create_sql_agent
 
 from sqlalchemy import create_engine
 
+from athena_cache import cached_sql_database, get_athena_cache
+from athena_arrow import ATHENA_REGION, ATHENA_DATABASE, STAGING_DIR
+from datalake_mirror import get_datalake_mirror, SEMANTICS_NOTE
+
 # 사용할 LLM 모델을 선택하고 파라미터값을 설정합니다.
 @st.cache_resource
 def get_llm():
@@ -34,15 +37,19 @@ def get_athena_agent():
     llm = get_llm()
 
     # Athena 를 통해서 DataLake 에 연결합니다.
-    conn_str = "awsathena+rest://athena.us-west-2.amazonaws.com:443/"\
-               "itsms?s3_staging_dir=s3://athena-federation-20240224/athenaresults/"
+    # (SQLAlchemy 엔진은 테이블 목록 / 스키마 반영에만 사용)
+    conn_str = "awsathena+rest://athena.{region_name}.amazonaws.com:443/"\
+               "{schema_name}?s3_staging_dir={s3_staging_dir}"
 
     engine = create_engine(conn_str.format(
-        region_name="us-west-2",
-        schema_name="itsms",
-        s3_staging_dir="s3://athena-federation-20240224/athenaresults/"))
+        region_name=ATHENA_REGION,
+        schema_name=ATHENA_DATABASE,
+        s3_staging_dir=STAGING_DIR))
         
-    athena_db_connection = SQLDatabase(engine)
+    # 테이블은 에이전트가 사용할 때만 반영하고 (샘플 행 조회 없음), 스키마 설명 / SQL 결과는 세션 간 캐시
+    # SQL 은 로컬 미러 (DuckDB / Parquet) 에 신선한 테이블만 참조하면 로컬에서, 아니면 Athena 에서 실행
+    # Athena 결과는 GetQueryResults 로 한 행씩 받지 않고 UNLOAD Parquet / 결과 파일을 Arrow 로 읽어 최대 MAX_CONTEXT_ROWS 행만 전달
+    athena_db_connection = cached_sql_database(engine, query_fn=get_datalake_mirror().fetch_for_llm)
     athena_agent_executor = create_sql_agent(llm, db=athena_db_connection, verbose=True)
     
     return athena_agent_executor
@@ -57,6 +64,28 @@ st.sidebar.write("2. The chatbot will convert your question to an SQL query.")
 st.sidebar.write("3. The query will be executed on the Athena database.")
 st.sidebar.write("4. The results will be displayed below.")
 
+# Athena 결과 / 스키마 캐시 (세션 / 프로세스 간 공유)
+athena_cache = get_athena_cache()
+with st.sidebar.expander("Athena cache", expanded=False):
+    cache_stats = athena_cache.stats()
+    st.caption(f"SQL results {cache_stats['results']}, table schemas {cache_stats['tables']}, "
+               f"hit rate {cache_stats['result_hit_rate']:.0%}")
+    invalidate_table = st.text_input("Table to invalidate (empty: all)", "")
+    if st.button("Invalidate cache"):
+        athena_cache.invalidate(invalidate_table.strip() or None)
+
+# 로컬 미러 상태 (python datalake_mirror.py sync --table <테이블> --index <인덱스> 로 동기화)
+datalake_mirror = get_datalake_mirror()
+with st.sidebar.expander("Local mirror", expanded=False):
+    mirror_status = datalake_mirror.status()
+    if mirror_status:
+        for table_name, entry in mirror_status.items():
+            st.caption(f"{table_name}: {entry['rows']} rows, {entry['age_s']}s old"
+                       f"{'' if entry['fresh'] else ' (stale, using Athena)'}")
+        st.caption(SEMANTICS_NOTE)
+    else:
+        st.caption("No mirrored tables. All queries go to Athena.")
+
 # 사용자 입력 받기
 user_input = st.text_input("Ask a question about the database:", "")
 
@@ -76,6 +105,20 @@ if user_input:
             st.subheader("Generated SQL Query:")
             st.code(response['sql_query'], language='sql')
 
+# SQL 직접 실행 (결과를 Arrow 로 가져와 표로 표시)
+with st.expander("Run SQL"):
+    sql_text = st.text_area("SQL", "SELECT * FROM server_info LIMIT 100")
+    max_rows = st.number_input("Max rows", min_value=1, max_value=1_000_000, value=10_000)
+    if st.button("Run"):
+        try:
+            with st.spinner('Running query...'):
+                result_table, total_rows, source = datalake_mirror.query(sql_text, int(max_rows))
+            st.caption(f"{result_table.num_rows} of {total_rows} rows ({source})"
+                       f"{' — ' + SEMANTICS_NOTE if source == 'local' else ''}")
+            st.dataframe(result_table, use_container_width=True)
+        except Exception as e:
+            st.error(f"Error in Athena query: {str(e)}")
+
 # 추가 정보 표시
 st.markdown("---")
 st.write("This chatbot uses Amazon Bedrock's Claude 3.5 Sonnet model to interpret your questions and generate SQL queries for the Athena database.")
@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import time
+import threading
+
+import duckdb
+import pyarrow.parquet as pq
+
+from athena_cache import referenced_tables, get_athena_cache
+from athena_arrow import fetch_arrow, format_for_llm, ATHENA_DATABASE, MAX_CONTEXT_ROWS
+
+
+# itsms 데이터레이크 로컬 미러 설정 (환경 변수로 변경 가능)
+MIRROR_DIR = os.environ.get(
+    'ITSMS_MIRROR_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'itsms', 'mirror')
+)
+MAX_AGE = int(os.environ.get('ITSMS_MIRROR_MAX_AGE', '3600'))     # 이 시간보다 오래된 미러는 Athena 로 조회 (초)
+MANIFEST_NAME = 'manifest.json'
+
+# Athena (Trino) 와 결과가 같도록 DuckDB 연결에 적용하는 설정
+#   integer_division: 정수 / 정수를 Trino 와 같이 정수 나눗셈 (0 방향 버림, 5 / 2 = 2) 으로 계산
+#   세션 설정이라 연결의 cursor() 에 이어지지 않고, 전역 (SET GLOBAL) 으로는 설정할 수 없으므로 cursor 마다 적용
+LOCAL_SETTINGS = ("SET integer_division = true",)
+# DuckDB 에서 오류 없이 다른 결과를 내는 구문 — 이런 SQL 은 미러가 신선해도 Athena 로 조회
+#   concat(): Trino 는 인자 중 NULL 이 있으면 NULL, DuckDB 는 NULL 을 건너뜀
+LOCAL_UNSAFE_RE = re.compile(r"\bconcat\s*\(", re.I)
+# 설정으로 맞출 수 없는 차이 (미러 상태 / 결과에 표시)
+SEMANTICS_NOTE = "Local results use DuckDB: division by zero returns NULL instead of failing as in Athena."
+
+_default_mirror = None
+_default_lock = threading.Lock()
+
+
+class DatalakeMirror:
+    """
+    itsms 테이블 / OpenSearch 인덱스를 로컬 Parquet 파일로 저장하고 DuckDB 로 조회하는 미러입니다.
+    쿼리가 참조하는 테이블이 모두 미러에 있고 max_age 이내에 동기화되었으면 로컬에서 실행하며,
+    그렇지 않으면 (또는 DuckDB 에서 실행할 수 없는 SQL 이면) Athena 로 조회합니다.
+    """
+    def __init__(self, mirror_dir=MIRROR_DIR, max_age=MAX_AGE, database=ATHENA_DATABASE):
+        os.makedirs(mirror_dir, exist_ok=True)
+        self.mirror_dir = mirror_dir
+        self.max_age = max_age
+        self.database = database
+        self.stats = {"local": 0, "athena": 0, "fallback_errors": 0}
+        self._lock = threading.Lock()
+        self._manifest = {}
+        self._manifest_mtime = None
+        self._conn = duckdb.connect(':memory:')
+        self._conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{database}"')
+        self._load_manifest()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.mirror_dir, MANIFEST_NAME)
+
+    def _load_manifest(self):
+        # 다른 프로세스 (sync 명령) 가 미러를 갱신했으면 뷰를 다시 만듦
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        for table, entry in manifest.items():
+            path = os.path.join(self.mirror_dir, entry['file']).replace("'", "''")
+            for view in (f'"{table}"', f'"{self.database}"."{table}"'):
+                self._conn.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet('{path}')")
+        self._manifest = manifest
+        self._manifest_mtime = mtime
+
+    def _save_entry(self, table, entry):
+        with self._lock:
+            manifest = {}
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            manifest[table] = entry
+            temp_path = f"{self.manifest_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.manifest_path)
+            self._load_manifest()
+        # 같은 테이블을 참조한 Athena 결과 캐시는 새 데이터와 어긋나므로 삭제
+        get_athena_cache().invalidate(table)
+
+    def _write(self, table, source, writer):
+        table = table.lower()
+        file_name = f"{table}.parquet"
+        temp_path = os.path.join(self.mirror_dir, f"{file_name}.tmp")
+        start = time.time()
+        rows = writer(temp_path)
+        if not os.path.exists(temp_path):
+            raise ValueError(f"Nothing to mirror from {source}: no rows.")
+        # 쓰는 도중 조회하는 쿼리가 깨진 파일을 읽지 않도록 교체
+        os.replace(temp_path, os.path.join(self.mirror_dir, file_name))
+        entry = {"file": file_name, "rows": rows, "source": source, "synced_at": time.time()}
+        self._save_entry(table, entry)
+        print(f"Mirrored {rows} rows from {source} to {file_name} in {time.time() - start:.1f}s.")
+        return entry
+
+    def sync_table(self, table, **kwargs):
+        """
+        Athena 테이블 전체를 Arrow 로 가져와 Parquet 으로 저장합니다.
+        """
+        def writer(path):
+            result, _ = fetch_arrow(f'SELECT * FROM "{self.database}"."{table}"', **kwargs)
+            if result.num_rows:
+                # 빈 테이블은 UNLOAD 결과에 스키마가 없으므로 쓰지 않음 (인덱스 미러와 같이 오류)
+                pq.write_table(result, path, compression='zstd')
+            return result.num_rows
+        return self._write(table, f"athena:{self.database}.{table}", writer)
+
+    def sync_index(self, index_name, table=None, client=None, **kwargs):
+        """
+        OpenSearch 인덱스 문서 전체를 (벡터 필드 제외) Parquet 으로 내보냅니다.
+
+        :param table: 미러 테이블 이름 (기본값: 인덱스 이름)
+        """
+        from result_export import export_matches
+        if client is None:
+            from opensearch_client import get_opensearch_client
+            client = get_opensearch_client()
+
+        def writer(path):
+            return export_matches(client, index_name, None, path, 'parquet', **kwargs)
+        return self._write(table or index_name, f"opensearch:{index_name}", writer)
+
+    def status(self):
+        """
+        :return: {테이블: {"rows", "source", "age_s", "fresh"}}
+        """
+        with self._lock:
+            self._load_manifest()
+            manifest = dict(self._manifest)
+        now = time.time()
+        return {table: {"rows": entry['rows'], "source": entry['source'],
+                        "age_s": round(now - entry['synced_at']),
+                        "fresh": now - entry['synced_at'] <= self.max_age}
+                for table, entry in manifest.items()}
+
+    def is_local(self, sql):
+        """
+        SQL 이 참조하는 테이블이 모두 미러에 있고 신선한지 확인합니다.
+        DuckDB 와 Trino 의 결과가 다른 구문 (LOCAL_UNSAFE_RE) 을 쓰는 SQL 은 로컬에서 실행하지 않습니다.
+        """
+        tables = referenced_tables(sql)
+        if not tables or LOCAL_UNSAFE_RE.search(sql):
+            return False
+        status = self.status()
+        return all(table in status and status[table]['fresh'] for table in tables)
+
+    def query(self, sql, max_rows=None, **kwargs):
+        """
+        SQL 을 로컬 미러 (DuckDB) 또는 Athena 에서 실행합니다.
+
+        :param max_rows: 최대 행 수 (None 이면 전체)
+        :param kwargs: Athena 로 조회할 때 fetch_arrow() 인자
+        :return: (Arrow 테이블, 전체 행 수, 'local' 또는 'athena')
+        """
+        sql = sql.strip().rstrip(';')
+        if self.is_local(sql):
+            try:
+                with self._lock:
+                    cursor = self._conn.cursor()
+                for setting in LOCAL_SETTINGS:
+                    cursor.execute(setting)
+                result = cursor.execute(sql).fetch_arrow_table()
+                cursor.close()
+                self.stats["local"] += 1
+                total = result.num_rows
+                return (result.slice(0, max_rows) if max_rows is not None else result), total, 'local'
+            except duckdb.Error as e:
+                # Athena (Trino) 문법과 다른 경우 등
+                print(f"Local mirror could not run the query ({str(e)}), falling back to Athena.")
+                self.stats["fallback_errors"] += 1
+        result, total = fetch_arrow(sql, max_rows, **kwargs)
+        self.stats["athena"] += 1
+        return result, total, 'athena'
+
+    def fetch_for_llm(self, sql, max_rows=MAX_CONTEXT_ROWS, **kwargs):
+        """
+        SQL 에이전트용: 최대 max_rows 행만 텍스트 표로 반환합니다.
+        로컬 미러에서 실행한 결과에는 SEMANTICS_NOTE 를 덧붙여 답변에 차이가 드러나도록 합니다.
+        """
+        result, total, source = self.query(sql, max_rows, **kwargs)
+        text = format_for_llm(result, total, max_rows)
+        return f"{text}\n({SEMANTICS_NOTE})" if source == 'local' else text
+
+
+def get_datalake_mirror():
+    """
+    프로세스 전체에서 공유하는 기본 미러를 반환합니다.
+    """
+    global _default_mirror
+    if _default_mirror is None:
+        with _default_lock:
+            if _default_mirror is None:
+                _default_mirror = DatalakeMirror()
+    return _default_mirror
+
+
+# 메인 실행: 미러 동기화 / 상태 확인 / 조회
+#   python datalake_mirror.py sync --table server_info --index weblog_info
+#   python datalake_mirror.py status
+#   python datalake_mirror.py query "SELECT os, count(*) FROM server_info GROUP BY os"
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['sync', 'status', 'query'])
+    parser.add_argument('sql', nargs='?', default=None, help='query 명령에서 실행할 SQL')
+    parser.add_argument('--table', action='append', default=[], help='미러할 Athena 테이블 (여러 번 지정 가능)')
+    parser.add_argument('--index', action='append', default=[], help='미러할 OpenSearch 인덱스 (여러 번 지정 가능)')
+    parser.add_argument('--max-rows', type=int, default=MAX_CONTEXT_ROWS)
+    args = parser.parse_args()
+
+    mirror = get_datalake_mirror()
+    if args.command == 'sync':
+        for table_name in args.table:
+            mirror.sync_table(table_name)
+        for index in args.index:
+            mirror.sync_index(index)
+    elif args.command == 'query':
+        start_time = time.time()
+        table_result, total_rows, source = mirror.query(args.sql, args.max_rows)
+        print(format_for_llm(table_result, total_rows, args.max_rows))
+        print(f"\n{source}: {total_rows} rows in {(time.time() - start_time) * 1000:.0f}ms")
+    print(json.dumps(mirror.status(), indent=2))
@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+
+# 자연어 질문 → OpenSearch DSL 캐시 설정 (환경 변수로 변경 가능)
+DEFAULT_CACHE_PATH = os.environ.get(
+    'ITSMS_DSL_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'itsms', 'dsl_cache.sqlite')
+)
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get('ITSMS_DSL_CACHE_THRESHOLD', '0.92'))
+QUESTION_EMBED_DIMENSIONS = 256     # 질문 비교용 임베딩 차원 (작게 유지)
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+# 조회 결과: match 는 'exact', 'semantic' 또는 None (미스)
+DslLookup = namedtuple('DslLookup', ['dsl', 'match', 'similarity', 'question', 'vector'])
+
+
+def normalize_question(text):
+    return " ".join(re.sub(r"[^\w\s.]", " ", text.lower()).split())
+
+
+def _numbers(text):
+    # 질문 속 숫자 (16GB 와 32GB 처럼 숫자만 다른 질문은 같은 DSL 을 쓰면 안 됨)
+    return sorted(re.findall(r"\d+(?:\.\d+)?", text))
+
+
+def schema_version(schema_text):
+    """
+    스키마 설명 텍스트로 버전 문자열을 만듭니다. 스키마가 바뀌면 이전 캐시 항목은 사용되지 않습니다.
+    """
+    return hashlib.sha1(schema_text.encode('utf-8')).hexdigest()[:12]
+
+
+def _default_embed(text):
+    from titan_embedding import embed_text
+    return embed_text(text, dimensions=QUESTION_EMBED_DIMENSIONS)
+
+
+class DslCache:
+    """
+    검증된 (질문, DSL) 쌍을 SQLite 파일에 저장하는 캐시입니다.
+    항목은 (인덱스, 스키마 버전) 범위로 구분되며, 정규화한 질문이 같거나
+    질문 임베딩의 코사인 유사도가 임계값 이상이면 저장된 DSL 을 반환합니다.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, threshold=DEFAULT_SIMILARITY_THRESHOLD, embed_fn=_default_embed):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.threshold = threshold
+        self.embed_fn = embed_fn
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (인덱스, 스키마 버전) 별 유사도 검색용 행렬: (최대 rowid, rowid 리스트, 벡터 행렬)
+        self._matrices = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS dsl_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                index_name TEXT,
+                schema_version TEXT,
+                normalized TEXT,
+                question TEXT,
+                vector BLOB,
+                dsl TEXT,
+                created_at REAL,
+                last_hit REAL,
+                hit_count INTEGER DEFAULT 0,
+                UNIQUE (index_name, schema_version, normalized)
+            )
+        """)
+        self._conn.commit()
+
+    def _embed(self, text):
+        if self.embed_fn is None:
+            return None
+        try:
+            return self.embed_fn(text)
+        except Exception as e:
+            # 임베딩 실패 시 정확 일치 캐시만 사용
+            print(f"DSL cache: question embedding failed: {str(e)}")
+            return None
+
+    def _scope_matrix(self, index_name, version):
+        # 다른 프로세스가 추가한 항목도 보이도록 최대 rowid 가 바뀌면 다시 읽음
+        max_id = self._conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM dsl_cache WHERE index_name = ? AND schema_version = ?",
+            (index_name, version)
+        ).fetchone()[0]
+        cached = self._matrices.get((index_name, version))
+        if cached is not None and cached[0] == max_id:
+            return cached
+        rows = self._conn.execute(
+            "SELECT id, vector FROM dsl_cache WHERE index_name = ? AND schema_version = ? AND vector IS NOT NULL",
+            (index_name, version)
+        ).fetchall()
+        ids = [row_id for row_id, _ in rows]
+        matrix = (np.vstack([np.frombuffer(blob, dtype='float32') for _, blob in rows])
+                  if rows else np.zeros((0, QUESTION_EMBED_DIMENSIONS), dtype='float32'))
+        if len(matrix):
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        cached = (max_id, ids, matrix)
+        self._matrices[(index_name, version)] = cached
+        return cached
+
+    def _record_hit(self, row_id):
+        self._conn.execute("UPDATE dsl_cache SET last_hit = ?, hit_count = hit_count + 1 WHERE id = ?",
+                           (time.time(), row_id))
+        self._conn.commit()
+
+    def lookup(self, question, index_name, version):
+        """
+        질문에 해당하는 캐시된 DSL 을 찾습니다.
+
+        :param question: 자연어 질문
+        :param index_name: 검색 대상 인덱스
+        :param version: 스키마 버전 (schema_version())
+        :return: DslLookup (미스인 경우 dsl 은 None, vector 는 store() 에 다시 넘길 질문 임베딩)
+        """
+        normalized = normalize_question(question)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, dsl FROM dsl_cache WHERE index_name = ? AND schema_version = ? AND normalized = ?",
+                (index_name, version, normalized)
+            ).fetchone()
+            if row:
+                self._record_hit(row[0])
+                self.hits["exact"] += 1
+                return DslLookup(json.loads(row[1]), 'exact', 1.0, question, None)
+
+        vector = self._embed(normalized)
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            return DslLookup(None, None, None, None, None)
+
+        query = np.asarray(vector, dtype='float32')
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        numbers = _numbers(normalized)
+        with self._lock:
+            _, ids, matrix = self._scope_matrix(index_name, version)
+            if len(ids) and matrix.shape[1] == len(query):
+                similarities = matrix @ query
+                for pos in np.argsort(-similarities)[:5]:
+                    similarity = float(similarities[pos])
+                    if similarity < self.threshold:
+                        break
+                    row_id, cached_question, dsl = self._conn.execute(
+                        "SELECT id, normalized, dsl FROM dsl_cache WHERE id = ?", (ids[pos],)
+                    ).fetchone()
+                    if _numbers(cached_question) != numbers:
+                        continue
+                    self._record_hit(row_id)
+                    self.hits["semantic"] += 1
+                    return DslLookup(json.loads(dsl), 'semantic', similarity, cached_question, vector)
+            self.misses += 1
+        return DslLookup(None, None, None, None, vector)
+
+    def store(self, question, index_name, version, dsl, vector=None):
+        """
+        검증된 DSL 을 저장합니다. 검색이 성공한 DSL 만 저장하세요.
+
+        :param vector: lookup() 이 반환한 질문 임베딩 (없으면 새로 계산)
+        """
+        normalized = normalize_question(question)
+        if vector is None:
+            vector = self._embed(normalized)
+        blob = array('f', vector).tobytes() if vector is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO dsl_cache (index_name, schema_version, normalized, question, vector, dsl, created_at, last_hit)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (index_name, schema_version, normalized)
+                DO UPDATE SET dsl = excluded.dsl, vector = excluded.vector, created_at = excluded.created_at
+            """, (index_name, version, normalized, question, blob, json.dumps(dsl), now, now))
+            self._conn.commit()
+
+    def invalidate(self, index_name=None, version=None):
+        """
+        캐시 항목을 삭제합니다. 인자가 없으면 전체를 삭제합니다.
+        """
+        with self._lock:
+            if index_name is None:
+                self._conn.execute("DELETE FROM dsl_cache")
+            elif version is None:
+                self._conn.execute("DELETE FROM dsl_cache WHERE index_name = ?", (index_name,))
+            else:
+                self._conn.execute("DELETE FROM dsl_cache WHERE index_name = ? AND schema_version = ?",
+                                   (index_name, version))
+            self._conn.commit()
+            self._matrices.clear()
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM dsl_cache").fetchone()[0]
+        hits = self.hits["exact"] + self.hits["semantic"]
+        lookups = hits + self.misses
+        return {
+            "entries": count,
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_dsl_cache():
+    """
+    프로세스 전체에서 공유하는 기본 DSL 캐시를 반환합니다.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = DslCache()
+    return _default_cache
+
+
+# 메인 실행: 캐시 상태 확인 / 삭제
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--index', default=None, help='삭제할 인덱스 (없으면 전체)')
+    args = parser.parse_args()
+
+    cache = get_dsl_cache()
+    if args.command == 'clear':
+        cache.invalidate(args.index)
+    print(json.dumps(cache.stats(), indent=2))
@@ -1,65 +1,36 @@
-import json 
 import time 
 import random
+import argparse
 from faker import Faker
 from datetime import datetime, timedelta
 
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
-
-# AWS 인증 설정
-region = 'us-west-2'
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
-
-# OpenSearch Serverless 연결 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com' # vector
-port = 443
-
-# OpenSearch 클라이언트 생성
-client = OpenSearch(
-    hosts=[{'host': host, 'port': port}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
+from opensearch_client import get_opensearch_client
+from titan_embedding import embed_text
+from opensearch_bulk import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_CHUNK_BYTES, DEFAULT_THREAD_COUNT
+from ingest_pipeline import (run_pipeline, generate_records, DEFAULT_EMBED_BATCH_SIZE,
+                             DEFAULT_EMBED_WORKERS, DEFAULT_QUEUE_SIZE)
+from ingest_checkpoint import make_doc_id, open_checkpoint
+from vector_mapping import SUPPORTED_DIMENSIONS, VECTOR_ENCODINGS
+from synthetic_data import iter_records
+from record_text import get_renderer, TEXT_FORMAT, TEXT_FORMATS
+from log_templates import TemplateDeduper
+from weblog_rollups import RollupWriter, ensure_rollup_index, run_id_for, ROLLUP_INDEX
+from weblog_partitions import (weblog_mappings, ensure_template, partition_index, PARTITION_FORMATS,
+                               PARTITION_GRANULARITY, WEBLOG_ALIAS, WEBLOG_PATTERN)
 
 # Faker 인스턴스 생성
 fake = Faker()
 
+# 문서 ID 로 사용할 필드 (None 이면 레코드 내용 해시)
+ID_FIELD = None
+
 # 인덱스 이름 설정
 index_name = 'weblog_info'
 
 # 인덱스 생성 함수
-def create_index_if_not_exists():
-    index_mapping = {
-        "mappings": {
-            "properties": {
-                "timestamp": {"type": "date"},
-                "ip_address": {"type": "ip"},
-                "method": {"type": "keyword"},
-                "url": {"type": "text"},
-                "status_code": {"type": "integer"},
-                "user_agent": {"type": "text"},
-                "referrer": {"type": "text"},
-                "response_time": {"type": "float"},
-                "bytes_sent": {"type": "long"},
-                "full_text":{"type": "text"},
-                "vector_embedding": {
-                    "type": "knn_vector",
-                    "dimension": 1024,
-                    "method": {
-                        "name": "hnsw",
-                        "space_type": "l2"
-                    }
-                }
-            }
-        }
-    }
+def create_index_if_not_exists(dimensions=1024, vector_encoding='none'):
+    index_mapping = {"mappings": weblog_mappings(dimensions, vector_encoding)}
+    client = get_opensearch_client()
     if not client.indices.exists(index=index_name):
         client.indices.create(index=index_name, body=index_mapping)
         print(f"Index '{index_name}' created with required mappings.")
@@ -68,7 +39,7 @@ def create_index_if_not_exists():
 
 def check_index_exists(index_name):
     try:
-        return client.indices.exists(index=index_name)
+        return get_opensearch_client().indices.exists(index=index_name)
     except Exception as e:
         print(f"Error checking index: {str(e)}")
         return False
@@ -94,41 +65,13 @@ def generate_embedding(json_obj, dimensions=1024, normalize=True):
     """
     Amazon Titan Text Embeddings V2를 사용하여 문자열을 임베딩합니다.
     
-    :param text: 임베딩할 문자열
+    :param json_obj: 임베딩할 레코드 (full_text 와 같은 문서 텍스트로 변환하여 임베딩)
     :param dimensions: 임베딩 벡터의 차원 (256, 512, 또는 1024)
     :param normalize: 임베딩 벡터를 정규화할지 여부
     :return: 임베딩 벡터
     """
-    # Bedrock 클라이언트 생성
-    bedrock_runtime = boto3.client(
-        service_name='bedrock-runtime',
-        region_name='us-west-2'  # 사용하려는 AWS 리전으로 변경하세요
-    )
-    
-    text = json.dumps(json_obj)
-    
-    # 요청 본문 생성
-    body = json.dumps({
-        "inputText": text,
-        "dimensions": dimensions,
-        "normalize": normalize
-    })
-    
     try:
-        # 모델 호출
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId="amazon.titan-embed-text-v2:0",
-            accept="application/json",
-            contentType="application/json"
-        )
-        
-        # 응답 처리
-        response_body = json.loads(response.get('body').read())
-        embedding = response_body['embedding']
-        
-        return embedding
-    
+        return embed_text(get_renderer('weblog')(json_obj), dimensions, normalize)
     except Exception as e:
         print(f"Error generating embedding: {str(e)}")
         return None
@@ -152,28 +95,134 @@ def generate_web_log():
         "bytes_sent": random.randint(500, 5000),
     }
 
-# 더미 데이터 생성 및 인덱싱
-def index_dummy_data(num_records):
-    for _ in range(num_records):
-        web_log = generate_web_log()
-        full_text = json.dumps(web_log) # 전체 json 텍스트 저장용
-        embed_info = generate_embedding(web_log)
-        web_log.update({"full_text": full_text})
-        web_log.update({"vector_embedding": embed_info})
-        
-        response = client.index(
-            index=index_name,
-            body=web_log,
-            # refresh=True
-        )
-        print(f"Indexed document ID: {response['_id']}")
+# 더미 데이터 생성 → 임베딩 → bulk 인덱싱 (단계별 동시 실행)
+def index_dummy_data(num_records, batch_size=DEFAULT_CHUNK_SIZE, max_batch_bytes=DEFAULT_MAX_CHUNK_BYTES,
+                     workers=DEFAULT_THREAD_COUNT, embed_batch_size=DEFAULT_EMBED_BATCH_SIZE,
+                     embed_workers=DEFAULT_EMBED_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, checkpoint=None,
+                     dimensions=1024, generator='faker', seed=None, partition=None, template_dedup=False,
+                     rollups=True, text_format=None, text_fields=None):
+    """
+    :param partition: 'daily' / 'hourly' 이면 timestamp 에 맞는 시간 파티션 (weblog-YYYY.MM.DD[.HH]) 에,
+                      None 이면 index_name 단일 인덱스에 씁니다.
+    :param template_dedup: IP / 시각 / 바이트 수 등을 가린 로그 템플릿마다 한 번만 임베딩 (문서에 template_id 저장).
+                           문서 벡터가 템플릿 벡터 (응답 시간 등급, 유입 호스트) 로 바뀌므로 기본값은 사용 안 함.
+                           faker 생성기는 URL / 유입 경로가 줄마다 달라 템플릿이 거의 줄어들지 않음
+    :param rollups: 인덱싱된 로그로 분 / 시 / 일 단위 롤업 (건수, bytes_sent 합계, response_time 스케치) 을 함께 기록
+    :param text_format: full_text / 임베딩 입력 형식 ('compact' 또는 'json', 기본값: record_text.TEXT_FORMAT)
+    :param text_fields: compact 텍스트에 포함할 필드 (순서 유지, 기본값: 전체)
+    """
+    # faker: 레코드마다 Faker / random 호출, vectorized: numpy 로 배치 단위 생성 (시드 고정, 현실적인 분포)
+    if generator == 'vectorized':
+        records = iter_records('weblog', num_records, seed=seed or 0)
+    else:
+        records = generate_records(generate_web_log, num_records)
+    # full_text 와 임베딩 입력은 같은 텍스트 (템플릿 중복 제거 시에는 템플릿을 같은 형식으로 변환해 임베딩)
+    render = get_renderer('weblog', text_format, text_fields)
+    # 같은 대상 / 생성기 / 시드로 다시 적재하면 같은 run_id 로 롤업을 다시 써서 (재시작 포함) 중복 집계되지 않음
+    target = WEBLOG_PATTERN if partition else index_name
+    run_id = run_id_for(target, generator, (seed or 0) if generator == 'vectorized' else seed)
+    rollup_writer = None
+    if rollups:
+        ensure_rollup_index(get_opensearch_client())
+        rollup_writer = RollupWriter(get_opensearch_client(), target=target, run_id=run_id)
+    elif get_opensearch_client().indices.exists(index=ROLLUP_INDEX):
+        # 롤업 없이 적재한 기간은 커버리지에 기록하여 롤업으로 답하지 않도록 함
+        rollup_writer = RollupWriter(get_opensearch_client(), intervals={}, target=target, run_id=run_id)
+    if rollup_writer is not None:
+        rollup_writer.begin()
+    stats = run_pipeline(
+        get_opensearch_client(),
+        index_name,
+        records,
+        text_fn=render,
+        embed_batch_size=embed_batch_size,
+        embed_workers=embed_workers,
+        queue_size=queue_size,
+        chunk_size=batch_size,
+        max_chunk_bytes=max_batch_bytes,
+        index_workers=workers,
+        dimensions=dimensions,
+        id_fn=lambda record: make_doc_id(record, id_field=ID_FIELD),
+        index_fn=(lambda record: partition_index(record['timestamp'], partition)) if partition else None,
+        dedup=TemplateDeduper(text_fn=render) if template_dedup else None,
+        on_indexed=rollup_writer.add if rollup_writer is not None else None,
+        checkpoint=checkpoint
+    )
+    stats.rollups = rollup_writer.close() if rollup_writer is not None else None
+    if rollups:
+        print(rollup_writer.summary())
+    print(stats.summary())
+    return stats
 
 # 메인 실행
 if __name__ == "__main__":
-    create_index_if_not_exists()
-    
-    wait_for_index_creation(index_name)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num-records', type=int, default=500, help='생성할 레코드 수')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_CHUNK_SIZE, help='bulk 배치당 문서 수')
+    parser.add_argument('--max-batch-mb', type=float, default=DEFAULT_MAX_CHUNK_BYTES / 1024 / 1024,
+                        help='bulk 배치당 최대 크기 (MB)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_THREAD_COUNT, help='병렬 bulk 워커 수')
+    parser.add_argument('--embed-batch-size', type=int, default=DEFAULT_EMBED_BATCH_SIZE, help='임베딩 배치 크기')
+    parser.add_argument('--embed-workers', type=int, default=DEFAULT_EMBED_WORKERS,
+                        help='동시에 처리하는 임베딩 배치 수')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='단계 사이 큐에 쌓일 수 있는 최대 배치 수')
+    parser.add_argument('--dimensions', type=int, choices=SUPPORTED_DIMENSIONS, default=1024,
+                        help='임베딩 벡터 차원')
+    parser.add_argument('--vector-encoding', choices=VECTOR_ENCODINGS, default='none',
+                        help='OpenSearch 벡터 저장 인코딩 (fp16: 메모리 절반)')
+    parser.add_argument('--seed', type=int, default=None, help='더미 데이터 난수 시드')
+    parser.add_argument('--generator', choices=['faker', 'vectorized'], default='faker',
+                        help='더미 데이터 생성 방식 (vectorized: synthetic_data.py 의 numpy 배치 생성)')
+    parser.add_argument('--partition', choices=list(PARTITION_FORMATS) + ['none'], default=PARTITION_GRANULARITY,
+                        help='시간 파티션 단위 (none: weblog_info 단일 인덱스)')
+    parser.add_argument('--alias', action='store_true',
+                        help=f"파티션 템플릿에 '{WEBLOG_ALIAS}' 별칭 추가 (관리형 도메인, Serverless 컬렉션은 별칭 미지원)")
+    parser.add_argument('--template-dedup', action='store_true',
+                        help='로그 템플릿마다 한 번만 임베딩 (문서 벡터는 템플릿 벡터, --generator vectorized 또는 실제 로그에 효과적)')
+    parser.add_argument('--no-rollups', action='store_true', help='분 단위 롤업을 기록하지 않음')
+    parser.add_argument('--text-format', choices=TEXT_FORMATS, default=TEXT_FORMAT,
+                        help='full_text / 임베딩 입력 형식 (json: 레코드 JSON 문자열)')
+    parser.add_argument('--text-fields', default=None,
+                        help='compact 텍스트에 포함할 필드 (쉼표 구분, 순서 유지, 기본값: 전체)')
+    parser.add_argument('--checkpoint', default=None, help='체크포인트 파일 경로')
+    parser.add_argument('--resume', action='store_true', help='체크포인트 이후부터 이어서 인덱싱')
+    args = parser.parse_args()
+
+    partition = None if args.partition == 'none' else args.partition
+    target = WEBLOG_PATTERN if partition else index_name
+
+    # 재시작 시 같은 레코드를 다시 만들 수 있도록 체크포인트의 시드로 난수 초기화
+    checkpoint_path = args.checkpoint or f"{target.rstrip('-*')}.checkpoint.json"
+    checkpoint = open_checkpoint(checkpoint_path, target, resume=args.resume, seed=args.seed)
+    random.seed(checkpoint.seed)
+    Faker.seed(checkpoint.seed)
+
+    if partition:
+        # 파티션 인덱스는 bulk 인덱싱 중 템플릿으로 자동 생성
+        ensure_template(get_opensearch_client(), args.dimensions, args.vector_encoding,
+                        alias=WEBLOG_ALIAS if args.alias else None)
+    else:
+        create_index_if_not_exists(args.dimensions, args.vector_encoding)
+        wait_for_index_creation(index_name)
     
-    num_records = 500  # 생성할 레코드 수
-    index_dummy_data(num_records)
-    print(f"{num_records} dummy web log records have been indexed to OpenSearch Serverless.")
+    num_records = args.num_records  # 생성할 레코드 수
+    index_dummy_data(
+        num_records,
+        batch_size=args.batch_size,
+        max_batch_bytes=int(args.max_batch_mb * 1024 * 1024),
+        workers=args.workers,
+        embed_batch_size=args.embed_batch_size,
+        embed_workers=args.embed_workers,
+        queue_size=args.queue_size,
+        checkpoint=checkpoint,
+        dimensions=args.dimensions,
+        generator=args.generator,
+        seed=checkpoint.seed,
+        partition=partition,
+        template_dedup=args.template_dedup,
+        rollups=not args.no_rollups,
+        text_format=args.text_format,
+        text_fields=args.text_fields
+    )
+    print(f"{num_records} dummy web log records have been indexed to OpenSearch Serverless ({target}).")
@@ -1,31 +1,11 @@
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
-import json
-
-# AWS 설정
-region = 'us-west-2'  # 사용 중인 리전으로 변경하세요
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
+from opensearch_client import get_opensearch_client
+from titan_embedding import embed_text
 
 # OpenSearch Serverless 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com'  # 실제 엔드포인트로 변경하세요
 index_name = 'itsmindex'
 
-
-
-
-# OpenSearch 클라이언트 설정
-client = OpenSearch(
-    hosts = [{'host': host, 'port': 443}],
-    http_auth = awsauth,
-    use_ssl = True,
-    verify_certs = True,
-    connection_class = RequestsHttpConnection
-)
+# OpenSearch 클라이언트 (공유 커넥션 모듈)
+client = get_opensearch_client()
 
 # Index 확인
 response = client.indices.get_mapping(index="itsmindex")
@@ -56,20 +36,9 @@ print(response)
 # client.indices.create(index="itsmindex", body=index_settings)
 
 
-# Bedrock 클라이언트 설정
-bedrock = boto3.client(service_name='bedrock-runtime', region_name=region)
-
-# 텍스트를 임베딩으로 변환하는 함수
+# 텍스트를 임베딩으로 변환하는 함수 (공유 Bedrock 클라이언트 사용)
 def get_embedding(text):
-    body = json.dumps({"inputText": text})
-    response = bedrock.invoke_model(
-        modelId="amazon.titan-embed-text-v2:0",
-        contentType="application/json",
-        accept="application/json",
-        body=body
-    )
-    response_body = json.loads(response['body'].read())
-    return response_body['embedding']
+    return embed_text(text)
 
 # 문서를 OpenSearch에 인덱싱하는 함수
 def index_document(text, metadata=None):
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+from result_export import iter_documents
+
+
+# 캐시 설정 (환경 변수로 변경 가능)
+DEFAULT_CACHE_PATH = os.environ.get(
+    'ITSMS_EMBEDDING_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'itsms', 'embeddings.sqlite')
+)
+DEFAULT_MAX_ENTRIES = 1_000_000             # 최대 캐시 항목 수
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024  # 최대 벡터 저장 크기 (4GB)
+EVICT_CHECK_INTERVAL = 1000                 # 몇 건 저장마다 용량을 확인할지
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def make_key(text, model_id, dimensions, normalize):
+    """
+    (모델 ID, 텍스트, 차원, 정규화 여부) 조합의 해시로 캐시 키를 만듭니다.
+    """
+    payload = json.dumps([model_id, dimensions, bool(normalize), text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _encode(vector):
+    return array('f', vector).tobytes()
+
+
+def _decode(blob):
+    vector = array('f')
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """
+    텍스트 임베딩을 SQLite 파일에 float32 로 저장하는 내용 주소 기반 캐시입니다.
+    마지막 접근 시각 기준 LRU 로 항목 수 / 크기 제한을 유지합니다.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_check = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model_id TEXT,
+                dimensions INTEGER,
+                vector BLOB,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """
+        여러 키를 한 번에 조회합니다.
+
+        :param keys: 캐시 키 리스트
+        :return: {키: 벡터} 딕셔너리 (캐시에 있는 항목만)
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update((key, _decode(blob)) for key, blob in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items, model_id=None, dimensions=None):
+        """
+        여러 (키, 벡터) 쌍을 저장합니다.
+
+        :param items: [(키, 벡터), ...]
+        :param model_id: 임베딩 모델 ID
+        :param dimensions: 벡터 차원
+        """
+        now = time.time()
+        rows = [(key, model_id, dimensions or len(vector), _encode(vector), now)
+                for key, vector in items if vector is not None]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= EVICT_CHECK_INTERVAL:
+                self._puts_since_check = 0
+                self._evict()
+
+    def put(self, key, vector, model_id=None, dimensions=None):
+        self.put_many([(key, vector)], model_id, dimensions)
+
+    def _evict(self):
+        # 항목 수 / 크기 제한을 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        avg_bytes = total_bytes / count if count else 1
+        target = min(self.max_entries, int(self.max_bytes / avg_bytes))
+        # 매번 제거하지 않도록 제한의 90% 까지 비움
+        excess = count - int(target * 0.9)
+        self._conn.execute("""
+            DELETE FROM embeddings WHERE key IN (
+                SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?
+            )
+        """, (excess,))
+        self._conn.commit()
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def warm_from_index(self, client, index_name, model_id, text_field='full_text',
+                        vector_field='vector_embedding', dimensions=1024, normalize=True, batch_size=500):
+        """
+        기존 인덱스에 저장된 (텍스트, 벡터) 쌍으로 캐시를 채웁니다.
+        인덱스의 text_field 가 임베딩 입력 텍스트와 같아야 합니다.
+        template_id 가 있는 문서 (log_templates.TemplateDeduper) 의 벡터는 full_text 가 아니라 템플릿 텍스트의 임베딩이므로 건너뜁니다.
+
+        :param client: OpenSearch 클라이언트
+        :param index_name: 인덱스 이름
+        :param model_id: 벡터를 생성한 임베딩 모델 ID
+        :param text_field: 임베딩 입력 텍스트 필드
+        :param vector_field: 벡터 필드
+        :param dimensions: 벡터 차원
+        :param normalize: 벡터 정규화 여부
+        :param batch_size: 한 번에 저장할 항목 수
+        :return: 캐시에 저장한 항목 수
+        """
+        batch = []
+        warmed = 0
+        for hit in iter_documents(client, index_name, page_size=batch_size,
+                                  source=[text_field, vector_field, 'template_id']):
+            source = hit.get('_source', {})
+            text, vector = source.get(text_field), source.get(vector_field)
+            if text is None or not vector or len(vector) != dimensions or source.get('template_id'):
+                continue
+            batch.append((make_key(text, model_id, dimensions, normalize), vector))
+            if len(batch) >= batch_size:
+                self.put_many(batch, model_id, dimensions)
+                warmed += len(batch)
+                batch = []
+        if batch:
+            self.put_many(batch, model_id, dimensions)
+            warmed += len(batch)
+        return warmed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_cache():
+    """
+    프로세스 전체에서 공유하는 기본 임베딩 캐시를 반환합니다.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = EmbeddingCache()
+    return _default_cache
+
+
+# 메인 실행: 기존 인덱스로 캐시 워밍 / 캐시 상태 확인
+if __name__ == "__main__":
+    import argparse
+
+    from opensearch_client import get_opensearch_client
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['warm', 'stats'])
+    parser.add_argument('--index', action='append', default=[], help='워밍할 인덱스 (여러 번 지정 가능)')
+    parser.add_argument('--dimensions', type=int, default=1024)
+    args = parser.parse_args()
+
+    cache = get_embedding_cache()
+    if args.command == 'warm':
+        client = get_opensearch_client()
+        for index_name in args.index:
+            warmed = cache.warm_from_index(client, index_name, "amazon.titan-embed-text-v2:0",
+                                           dimensions=args.dimensions)
+            print(f"Warmed {warmed} embeddings from index '{index_name}'.")
+    print(json.dumps(cache.stats(), indent=2))
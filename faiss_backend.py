@@ -0,0 +1,207 @@
+import os
+import json
+import time
+
+import numpy as np
+import faiss
+
+from result_export import iter_documents
+
+
+# 로컬 FAISS 인덱스 저장 위치
+DEFAULT_INDEX_DIR = os.environ.get('ITSMS_FAISS_DIR', 'faiss_indexes')
+
+# 인덱스 종류별 기본 파라미터
+HNSW_M = 32             # HNSW 그래프 이웃 수
+HNSW_EF_SEARCH = 64     # HNSW 검색 시 후보 수
+IVF_NPROBE = 16         # IVF 검색 시 탐색할 클러스터 수
+PQ_SUBVECTOR_DIM = 16   # PQ 서브벡터 하나의 차원
+
+# 저장 벡터 양자화 방식
+QUANTIZERS = ('none', 'fp16', 'int8', 'pq')
+SQ_TYPES = {
+    'fp16': faiss.ScalarQuantizer.QT_fp16,
+    'int8': faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def export_vectors(client, index_name, vector_field='vector_embedding', batch_size=500):
+    """
+    OpenSearch 인덱스에서 문서 ID 와 벡터를 모두 가져옵니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param vector_field: 벡터 필드 이름
+    :param batch_size: 한 번에 가져올 문서 수
+    :return: (문서 ID 리스트, float32 벡터 행렬)
+    """
+    ids = []
+    vectors = []
+    query = {"exists": {"field": vector_field}}
+    for hit in iter_documents(client, index_name, query, page_size=batch_size, source=[vector_field]):
+        vector = hit.get('_source', {}).get(vector_field)
+        if vector:
+            ids.append(hit['_id'])
+            vectors.append(vector)
+    return ids, np.asarray(vectors, dtype='float32')
+
+
+def _pq_params(vectors):
+    # 서브벡터 하나당 16차원, 학습 데이터가 적으면 코드 비트 수를 줄임 (2^nbits * 39 개 이상 필요)
+    dimension = vectors.shape[1]
+    m = max(1, dimension // PQ_SUBVECTOR_DIM)
+    nbits = 8
+    while nbits > 4 and len(vectors) < (2 ** nbits) * 39:
+        nbits -= 1
+    return m, nbits
+
+
+def build_faiss_index(vectors, kind='hnsw', quantizer='none'):
+    """
+    벡터 행렬로 FAISS 인덱스를 만듭니다. OpenSearch 매핑과 같은 L2 거리를 사용합니다.
+
+    :param vectors: float32 벡터 행렬 (문서 수 x 차원)
+    :param kind: 'hnsw', 'ivf' 또는 'flat' (전수 검색)
+    :param quantizer: 저장 벡터 양자화 방식 ('none', 'fp16', 'int8', 'pq')
+    :return: FAISS 인덱스
+    """
+    if quantizer not in QUANTIZERS:
+        raise ValueError(f"Unknown quantizer: {quantizer}")
+    dimension = vectors.shape[1]
+    sq_type = SQ_TYPES.get(quantizer)
+
+    if kind == 'hnsw':
+        if quantizer == 'none':
+            index = faiss.IndexHNSWFlat(dimension, HNSW_M)
+        elif quantizer == 'pq':
+            m, _ = _pq_params(vectors)
+            index = faiss.IndexHNSWPQ(dimension, m, HNSW_M)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, sq_type, HNSW_M)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif kind == 'ivf':
+        # 클러스터 수는 문서 수의 제곱근 정도로 설정
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        coarse = faiss.IndexFlatL2(dimension)
+        if quantizer == 'none':
+            index = faiss.IndexIVFFlat(coarse, dimension, nlist)
+        elif quantizer == 'pq':
+            m, nbits = _pq_params(vectors)
+            index = faiss.IndexIVFPQ(coarse, dimension, nlist, m, nbits)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(coarse, dimension, nlist, sq_type)
+        index.nprobe = min(IVF_NPROBE, nlist)
+    elif kind == 'flat':
+        if quantizer == 'none':
+            index = faiss.IndexFlatL2(dimension)
+        elif quantizer == 'pq':
+            m, nbits = _pq_params(vectors)
+            index = faiss.IndexPQ(dimension, m, nbits)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, sq_type)
+    else:
+        raise ValueError(f"Unknown FAISS index kind: {kind}")
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def index_memory_bytes(index):
+    """
+    직렬화한 인덱스 크기로 메모리 사용량을 추정합니다.
+    """
+    return int(faiss.serialize_index(index).nbytes)
+
+
+class FaissVectorStore:
+    """
+    FAISS 인덱스와 OpenSearch 문서 ID 목록을 함께 관리합니다.
+    """
+    def __init__(self, index, ids, metadata=None):
+        self.index = index
+        self.ids = ids
+        self.metadata = metadata or {}
+
+    @staticmethod
+    def _paths(index_name, directory):
+        return (os.path.join(directory, f"{index_name}.faiss"),
+                os.path.join(directory, f"{index_name}.json"))
+
+    def save(self, index_name, directory=DEFAULT_INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+        index_path, meta_path = self._paths(index_name, directory)
+        faiss.write_index(self.index, index_path)
+        with open(meta_path, 'w') as f:
+            json.dump({"ids": self.ids, "metadata": self.metadata}, f)
+
+    @classmethod
+    def load(cls, index_name, directory=DEFAULT_INDEX_DIR):
+        index_path, meta_path = cls._paths(index_name, directory)
+        index = faiss.read_index(index_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return cls(index, meta['ids'], meta.get('metadata'))
+
+    @classmethod
+    def exists(cls, index_name, directory=DEFAULT_INDEX_DIR):
+        return all(os.path.exists(path) for path in cls._paths(index_name, directory))
+
+    def search(self, query_vector, k=10):
+        """
+        가까운 벡터 k 개를 찾습니다.
+        점수는 OpenSearch l2 공간과 같은 1 / (1 + L2 거리^2) 로 계산합니다.
+
+        :param query_vector: 쿼리 벡터
+        :param k: 반환할 결과 수
+        :return: [(문서 ID, 점수), ...] (점수 내림차순)
+        """
+        query = np.asarray([query_vector], dtype='float32')
+        distances, positions = self.index.search(query, k)
+        return [(self.ids[pos], 1.0 / (1.0 + float(dist)))
+                for dist, pos in zip(distances[0], positions[0]) if pos >= 0]
+
+
+def build_from_opensearch(client, index_name, kind='hnsw', quantizer='none', directory=DEFAULT_INDEX_DIR,
+                          vector_field='vector_embedding'):
+    """
+    OpenSearch 인덱스의 벡터를 내보내 FAISS 인덱스를 만들고 디스크에 저장합니다.
+
+    :return: FaissVectorStore
+    """
+    start = time.time()
+    ids, vectors = export_vectors(client, index_name, vector_field)
+    if not ids:
+        raise ValueError(f"Index '{index_name}' has no '{vector_field}' vectors.")
+    store = FaissVectorStore(build_faiss_index(vectors, kind, quantizer), ids, {
+        "source_index": index_name,
+        "kind": kind,
+        "quantizer": quantizer,
+        "dimension": int(vectors.shape[1]),
+        "count": len(ids),
+        "built_at": time.time(),
+    })
+    store.save(index_name, directory)
+    print(f"Built {kind}/{quantizer} FAISS index for '{index_name}' with {len(ids)} vectors "
+          f"({index_memory_bytes(store.index) / 1024 / 1024:.1f} MB) in {time.time() - start:.1f}s.")
+    return store
+
+
+# 메인 실행: OpenSearch 인덱스로부터 로컬 FAISS 인덱스 생성
+if __name__ == "__main__":
+    import argparse
+
+    from opensearch_client import get_opensearch_client
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--index', action='append', required=True, help='내보낼 인덱스 (여러 번 지정 가능)')
+    parser.add_argument('--kind', choices=['hnsw', 'ivf', 'flat'], default='hnsw')
+    parser.add_argument('--quantizer', choices=QUANTIZERS, default='none', help='저장 벡터 양자화 방식')
+    parser.add_argument('--directory', default=DEFAULT_INDEX_DIR)
+    args = parser.parse_args()
+
+    client = get_opensearch_client()
+    for index_name in args.index:
+        build_from_opensearch(client, index_name, kind=args.kind, quantizer=args.quantizer,
+                              directory=args.directory)
@@ -1,129 +1,101 @@
 import json
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
-
-# AWS 설정
-region = 'us-west-2'  # 예: 'us-west-2'
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
-
-# OpenSearch Serverless 연결 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com'  # 실제 엔드포인트로 변경하세요
-port = 443
-
-# OpenSearch 클라이언트 생성
-opensearch_client = OpenSearch(
-    hosts=[{'host': host, 'port': port}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
-
-# Amazon Bedrock 클라이언트 생성
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name=region,
-    aws_access_key_id=credentials.access_key,
-    aws_secret_access_key=credentials.secret_key,
-    aws_session_token=credentials.token
-)
-
-def generate_opensearch_query(natural_language_query):
-    schema_info = """
-    Index Name: server_info
-    Fields:
-    - instance_name (text): Server instance name (e.g., srv-1234)
-    - cpu (integer): CPU information (e.g., "4", "8")
-    - memory (integer): Memory information (e.g., "16", "32")
-    - disk (integer): Disk information (e.g., "500", "1000")
-    - os (text): Operating system (e.g., "Ubuntu 20.04", "CentOS 7")
-    - purpose (text): Server purpose (e.g., "Web Server", "Database Server")
-    - service_name (text): Name of the service running on the server
-    - ip_address (ip): IP address of the server
-    - location (text): Physical location of the server
-    - department (text): Department responsible for the server
-    - last_updated (date): Date of last update
-    - registration_date (date): Date when the server was registered
-    - server_status (text): Current status of the server (e.g., "running", "shutdown", "stop")
-
-    Index Name: weblog_info
-    Fields:
-    - timestamp (date): Log entry creation time
-    - ip_address (ip): Client's IP address
-    - method (keyword): HTTP request method (e.g., "GET", "POST", "PUT", "DELETE")
-    - url (text): Requested URL path
-    - status_code (integer): HTTP response status code
-    - user_agent (text): Client's User-Agent string
-    - referrer (text): Request's Referrer URL
-    - response_time (float): Time spent processing the request (seconds)
-    - bytes_sent (long): Number of bytes sent in response
-    - vector_embedding (knn_vector): Vector representation for machine learning tasks
-        - dimension: 1024
-        - method:
-            - name: hnsw
-            - space_type: l2
 
+from opensearch_client import get_opensearch_client
+from llm_dsl import generate_dsl
+from dsl_cache import get_dsl_cache, schema_version
+from index_metadata import get_index_metadata, FALLBACK_SCHEMA_PROMPT
+from result_export import export_matches
+from weblog_partitions import is_weblog_target, route_indices, search_weblog
+
+
+def schema_info(index_name='server_info'):
+    """
+    실제 매핑과 필드 통계로 만든 스키마 설명과 DSL 캐시용 스키마 버전을 반환합니다 (메타데이터 캐시 사용).
+
+    :return: (스키마 설명, 스키마 버전)
     """
+    metadata = get_index_metadata()
+    try:
+        return metadata.schema_prompt(index_name), metadata.schema_version(index_name)
+    except Exception as e:
+        print(f"Failed to read index metadata ({str(e)}), using the static schema description.")
+        return FALLBACK_SCHEMA_PROMPT, schema_version(FALLBACK_SCHEMA_PROMPT)
 
-    messages = [
-        {
-            "role": "user",
-            "content": f"Given the following schema information:\n\n{schema_info}\n\nGenerate an OpenSearch query in JSON format for the following natural language query. The query should use the appropriate fields and query types based on the schema. Natural language query: {natural_language_query}"
-        }
-    ]
-
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4000,
-        "temperature": 0.3,
-        "top_k": 250, 
-        "top_p": 0.5, 
-        "messages": messages
-    })
 
+def generate_opensearch_query(natural_language_query, schema_text=FALLBACK_SCHEMA_PROMPT):
     try:
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
-            contentType="application/json",
-            accept="application/json"
-        )
-        
-        response_body = json.loads(response['body'].read())
-        generated_query = response_body['content'][0]['text']
-        
-        print(generated_query)
-        
-        # 생성된 쿼리에서 JSON 부분만 추출
-        json_start = generated_query.find('{')
-        json_end = generated_query.rfind('}') + 1
-        json_query = generated_query[json_start:json_end]
-        
-        return json.loads(json_query)
+        # JSON 객체가 완성되는 즉시 LLM 스트림 읽기를 멈춤
+        opensearch_query, info = generate_dsl(natural_language_query, schema_text)
+        print(info['text'])
+        if info['first_token_ms'] is not None:
+            print(f"LLM first token {info['first_token_ms']:.0f}ms, query ready {info['total_ms']:.0f}ms")
+        return opensearch_query
     except Exception as e:
         print(f"Error: {str(e)}")
         return None
 
-def search_opensearch(query):
-    index_name = 'server_info'
-    response = opensearch_client.search(
-        index=index_name,
-        body=query
-    )
+def search_opensearch(query, index_name='server_info'):
+    if is_weblog_target(index_name):
+        # 웹 로그 집계는 롤업으로, 그 밖에는 쿼리의 timestamp 범위와 겹치는 시간 파티션만 검색
+        response = search_weblog(query, verbose=True)
+    else:
+        response = get_opensearch_client().search(
+            index=index_name,
+            body=query
+        )
+    if response.get('aggregations'):
+        print(f"\nAggregations ({response['hits']['total']['value']} matching documents):")
+        print(json.dumps(response['aggregations'], indent=2, ensure_ascii=False))
     return response['hits']['hits']
 
-def natural_language_search(natural_language_query):
-    opensearch_query = generate_opensearch_query(natural_language_query)
-    
-    print("\nGenerated OpenSearch Query: {}".format(opensearch_query))
-    
-    search_results = search_opensearch(opensearch_query)
+def question_to_query(natural_language_query, index_name='server_info'):
+    """
+    질문을 OpenSearch DSL 로 변환합니다. 같은 / 비슷한 질문으로 검증된 DSL 이 있으면 LLM 호출을 생략합니다.
+
+    :return: (DSL, DSL 캐시 조회 결과)
+    """
+    schema_text, version = schema_info(index_name)
+    cached = get_dsl_cache().lookup(natural_language_query, index_name, version)
+    if cached.dsl is not None:
+        opensearch_query = cached.dsl
+        print(f"\nCached OpenSearch Query ({cached.match}, similarity {cached.similarity:.3f}): {opensearch_query}")
+    else:
+        opensearch_query = generate_opensearch_query(natural_language_query, schema_text)
+        print("\nGenerated OpenSearch Query: {}".format(opensearch_query))
+    return opensearch_query, cached
+
+def remember_query(natural_language_query, index_name, opensearch_query, cached):
+    # 검색이 성공한 DSL 만 캐시에 저장
+    if cached.dsl is None and opensearch_query is not None:
+        _, version = schema_info(index_name)
+        get_dsl_cache().store(natural_language_query, index_name, version, opensearch_query, cached.vector)
+
+def natural_language_search(natural_language_query, index_name='server_info'):
+    opensearch_query, cached = question_to_query(natural_language_query, index_name)
+    search_results = search_opensearch(opensearch_query, index_name)
+    remember_query(natural_language_query, index_name, opensearch_query, cached)
     return search_results
 
+def natural_language_export(natural_language_query, output_path, index_name='server_info'):
+    """
+    질문에 맞는 문서 전체를 파일로 내보냅니다 (size / 첫 페이지 제한 없음).
+
+    :param output_path: 출력 파일 (.parquet / .ndjson / .arrow)
+    :return: 내보낸 문서 수
+    """
+    opensearch_query, cached = question_to_query(natural_language_query, index_name)
+    client = get_opensearch_client()
+    target = index_name
+    if is_weblog_target(index_name):
+        targets = route_indices(client, opensearch_query)
+        if not targets:
+            print("No weblog partitions overlap the query time range.")
+            return 0
+        target = ",".join(targets)
+    count = export_matches(client, target, opensearch_query, output_path)
+    remember_query(natural_language_query, index_name, opensearch_query, cached)
+    return count
+
 # 메인 실행
 if __name__ == "__main__":
     # natural_language_query = "Find all servers with more than 16GB of memory that are currently running"
@@ -131,8 +103,22 @@ if __name__ == "__main__":
 
     # print(json.dumps(opensearch_query, indent=2))
 
-    user_query = "Find all linux servers that are currently running"
-    results = natural_language_search(user_query)
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('question', nargs='?', default="Find all linux servers that are currently running")
+    parser.add_argument('--index', default='server_info',
+                        help='검색할 인덱스 (weblog-* / weblog 이면 시간 범위에 맞는 파티션만 검색)')
+    parser.add_argument('--export', default=None,
+                        help='질문에 맞는 문서 전체를 내보낼 파일 (.parquet / .ndjson / .arrow)')
+    args = parser.parse_args()
+
+    user_query = args.question
+    if args.export:
+        natural_language_export(user_query, args.export, args.index)
+        raise SystemExit(0)
+
+    results = natural_language_search(user_query, args.index)
     
     print("\nSearch Results:")
     for result in results:
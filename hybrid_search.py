@@ -0,0 +1,451 @@
+import time
+import asyncio
+
+from opensearchpy.exceptions import TransportError
+
+
+# 검색 결과에서 기본으로 제외할 필드 (쿼리 벡터 크기만큼 응답이 커지지 않도록)
+DEFAULT_SOURCE = {"excludes": ["vector_embedding"]}
+
+# 로컬 벡터 검색 / 클라이언트 결합 시 최종 결과 수 대비 후보를 몇 배 가져올지
+DEFAULT_OVERSAMPLE = 5
+
+# knn 절 안의 filter (top-k 를 고르기 전에 필터 적용) 를 지원하는 엔진 — nmslib 은 지원하지 않음
+EFFICIENT_FILTER_ENGINES = ('faiss', 'lucene')
+
+# 클라이언트 측 점수 결합 방식
+#   rrf    : Reciprocal Rank Fusion, 순위만 사용 (점수 크기 무관)
+#   minmax : 각 검색 점수를 0~1 로 정규화한 뒤 가중합
+FUSION_METHODS = ('rrf', 'minmax')
+RRF_RANK_CONSTANT = 60
+
+# _msearch 를 지원하지 않는 엔드포인트 (프록시 / 컬렉션 유형) 의 응답 코드 — 검색을 비동기 클라이언트로 동시에 실행
+MSEARCH_UNSUPPORTED_STATUS = (404, 405, 501)
+
+# 대시보드 집계 설정 (text 필드는 .keyword 하위 필드로 집계)
+DASHBOARD_TERMS_FIELDS = {"os": "os.keyword", "server_status": "server_status.keyword",
+                          "department": "department.keyword"}
+DASHBOARD_HISTOGRAM_FIELDS = {"cpu": 4, "memory": 32}     # 필드: 구간 크기
+DASHBOARD_STATS_FIELDS = ("cpu", "memory", "disk")
+DASHBOARD_TERMS_SIZE = 20
+
+
+def build_filters(os_filter=None, status_filter=None, cpu_range=None, memory_range=None):
+    """
+    사이드바 필터 값을 OpenSearch bool filter 절 리스트로 변환합니다.
+    """
+    filters = []
+    if os_filter:
+        filters.append({"terms": {"os": os_filter}})
+    if status_filter:
+        filters.append({"terms": {"server_status": status_filter}})
+    if cpu_range:
+        filters.append({"range": {"cpu": {"gte": cpu_range[0], "lte": cpu_range[1]}}})
+    if memory_range:
+        filters.append({"range": {"memory": {"gte": memory_range[0], "lte": memory_range[1]}}})
+    return filters
+
+
+def build_keyword_query(search_query, filters=None):
+    """
+    텍스트 검색(match) 조건에 필터를 적용한 query 절을 만듭니다.
+    클라이언트 결합 / FAISS 검색의 키워드 검색과 전체 결과 내보내기에서 사용합니다.
+    """
+    return {"bool": {"must": [{"match": {"full_text": search_query}}], "filter": filters or []}}
+
+
+def build_hybrid_query(search_query, query_vector, keyword_weight, vector_weight, filters=None, size=10,
+                       offset=0, source=None):
+    """
+    텍스트 검색(match)과 벡터 검색(knn)을 bool.should 로 결합한 검색 쿼리를 만듭니다.
+
+    :param search_query: 검색어
+    :param query_vector: 검색어 임베딩 벡터
+    :param keyword_weight: 키워드 검색 가중치
+    :param vector_weight: 벡터 검색 가중치
+    :param filters: bool filter 절 리스트
+    :param size: 반환할 결과 수 (페이지 크기)
+    :param offset: 건너뛸 결과 수 (페이지 시작 위치)
+    :param source: _source 필터 (기본값: 벡터 필드 제외)
+    :return: 검색 쿼리 dict
+    """
+    search_body = {
+        "from": offset,
+        "size": size,
+        "_source": source or DEFAULT_SOURCE,
+        "track_scores": True,
+        "query": {
+            "bool": {
+                "should": [
+                    # 텍스트 검색
+                    {
+                        "match": {
+                            "full_text": {
+                                "query": search_query,
+                                "boost": keyword_weight  # 텍스트 검색 가중치
+                            }
+                        }
+                    },
+                    # 벡터 검색
+                    {
+                        "knn": {
+                            "vector_embedding": {
+                                "vector": query_vector,  # Titan Embeddings로 생성한 벡터
+                                "k": offset + size,
+                                "boost": vector_weight
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+    }
+    if filters:
+        search_body["query"]["bool"]["filter"] = filters
+    return search_body
+
+
+def build_knn_query(query_vector, k, filters=None, engine=None):
+    """
+    kNN 검색 query 절을 만듭니다. faiss / lucene 엔진은 knn.filter 로 top-k 를 고르기 전에 필터를 적용하고,
+    그 밖의 엔진 (nmslib, 지정하지 않은 기본 엔진) 은 bool.filter 로 감싸 top-k 결과를 거릅니다 (k 보다 적을 수 있음).
+
+    :param engine: 벡터 필드의 knn 엔진 (IndexMetadata.vector_engine())
+    """
+    knn_params = {"vector": query_vector, "k": k}
+    if filters and engine in EFFICIENT_FILTER_ENGINES:
+        knn_params["filter"] = {"bool": {"filter": filters}}
+        return {"knn": {"vector_embedding": knn_params}}
+    query = {"knn": {"vector_embedding": knn_params}}
+    if filters:
+        return {"bool": {"must": [query], "filter": filters}}
+    return query
+
+
+def search_opensearch_knn(client, index_name, search_query, query_vector, keyword_weight, vector_weight,
+                          filters=None, size=10, offset=0, source=None):
+    """
+    OpenSearch 한 번의 요청으로 BM25 + kNN 하이브리드 검색을 수행합니다.
+
+    :return: (검색 결과 hits, 실행한 검색 쿼리)
+    """
+    search_body = build_hybrid_query(search_query, query_vector, keyword_weight, vector_weight, filters, size,
+                                     offset, source)
+    results = client.search(index=index_name, body=search_body)
+    return results['hits']['hits'], search_body
+
+
+def fuse_rrf(result_lists, weights, rank_constant=RRF_RANK_CONSTANT):
+    """
+    여러 검색 결과를 Reciprocal Rank Fusion 으로 합칩니다.
+    문서 점수 = sum(weight / (rank_constant + 순위))
+
+    :param result_lists: 검색별 [(문서 ID, 점수), ...] 리스트 (점수 내림차순)
+    :param weights: 검색별 가중치
+    :return: [(문서 ID, 결합 점수), ...] (내림차순)
+    """
+    scores = {}
+    for results, weight in zip(result_lists, weights):
+        for rank, (doc_id, _) in enumerate(results, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rank_constant + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def fuse_minmax(result_lists, weights):
+    """
+    검색별 점수를 min-max 로 0~1 정규화한 뒤 가중합으로 합칩니다.
+    한쪽 검색에만 나온 문서는 다른 쪽 점수를 0 으로 봅니다.
+
+    :param result_lists: 검색별 [(문서 ID, 점수), ...] 리스트
+    :param weights: 검색별 가중치
+    :return: [(문서 ID, 결합 점수), ...] (내림차순)
+    """
+    scores = {}
+    for results, weight in zip(result_lists, weights):
+        if not results:
+            continue
+        values = [score or 0.0 for _, score in results]
+        low, high = min(values), max(values)
+        for (doc_id, _), value in zip(results, values):
+            # 점수가 모두 같으면 전부 1 로 봄
+            normalized = (value - low) / (high - low) if high > low else 1.0
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight * normalized
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def fuse_results(keyword_results, vector_results, keyword_weight, vector_weight, method='rrf'):
+    if method == 'rrf':
+        return fuse_rrf([keyword_results, vector_results], [keyword_weight, vector_weight])
+    if method == 'minmax':
+        return fuse_minmax([keyword_results, vector_results], [keyword_weight, vector_weight])
+    raise ValueError(f"Unknown fusion method: {method}")
+
+
+def search_concurrently(index_name, bodies, async_client=None):
+    """
+    여러 검색을 AsyncOpenSearch 로 동시에 실행합니다 (_msearch 를 쓸 수 없을 때).
+
+    :param async_client: 비동기 클라이언트 (기본값: opensearch_client 의 공유 클라이언트)
+    :return: 검색 응답 리스트 (bodies 순서, _msearch 의 responses 와 같은 형태)
+    """
+    from opensearch_client import get_async_opensearch_client, run_async
+    async_client = async_client or get_async_opensearch_client()
+
+    async def search_all():
+        return await asyncio.gather(*(async_client.search(index=index_name, body=body) for body in bodies))
+    return list(run_async(search_all()))
+
+
+def search_fusion(client, index_name, search_query, query_vector, keyword_weight, vector_weight,
+                  filters=None, size=10, method='rrf', oversample=DEFAULT_OVERSAMPLE, offset=0, source=None,
+                  vector_engine=None):
+    """
+    BM25 와 kNN 검색을 _msearch 한 번으로 동시에 실행하고 클라이언트에서 결과를 결합합니다.
+    _msearch 를 지원하지 않는 엔드포인트에서는 두 검색을 비동기 클라이언트로 동시에 보냅니다 (search_concurrently()).
+    두 점수의 크기가 달라도 가중치가 의도대로 동작하도록 RRF 또는 min-max 정규화를 사용합니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param search_query: 검색어
+    :param query_vector: 검색어 임베딩 벡터
+    :param keyword_weight: 키워드 검색 가중치
+    :param vector_weight: 벡터 검색 가중치
+    :param filters: bool filter 절 리스트
+    :param size: 반환할 결과 수
+    :param method: 결합 방식 ('rrf', 'minmax')
+    :param oversample: 각 검색에서 (offset + size) 대비 몇 배의 후보를 가져올지
+    :param offset: 건너뛸 결과 수 (페이지 시작 위치)
+    :param source: _source 필터 (기본값: 벡터 필드 제외)
+    :param vector_engine: 벡터 필드의 knn 엔진 (필터 적용 방식 결정, build_knn_query() 참고)
+    :return: (검색 결과 hits, 실행 정보)
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}")
+    filters = filters or []
+    candidates = (offset + size) * oversample
+
+    keyword_body = {
+        "size": candidates,
+        "_source": source or DEFAULT_SOURCE,
+        "query": build_keyword_query(search_query, filters)
+    }
+    vector_query = build_knn_query(query_vector, candidates, filters, vector_engine)
+    vector_body = {
+        "size": candidates,
+        "_source": source or DEFAULT_SOURCE,
+        "query": vector_query
+    }
+
+    start = time.perf_counter()
+    transport = "msearch"
+    try:
+        responses = client.msearch(body=[{"index": index_name}, keyword_body, {"index": index_name},
+                                         vector_body])['responses']
+    except TransportError as e:
+        if e.status_code not in MSEARCH_UNSUPPORTED_STATUS:
+            raise
+        transport = "async"
+        responses = search_concurrently(index_name, [keyword_body, vector_body])
+    total_ms = (time.perf_counter() - start) * 1000
+
+    keyword_response, vector_response = responses
+    for name, response in (("keyword", keyword_response), ("vector", vector_response)):
+        if 'error' in response:
+            raise RuntimeError(f"{name} sub-query failed: {response['error']}")
+
+    sources = {}
+    result_lists = []
+    for response in (keyword_response, vector_response):
+        hits = response['hits']['hits']
+        sources.update((hit['_id'], hit['_source']) for hit in hits)
+        result_lists.append([(hit['_id'], hit['_score']) for hit in hits])
+
+    ranked = fuse_results(result_lists[0], result_lists[1], keyword_weight, vector_weight,
+                          method)[offset:offset + size]
+    hits = [{"_index": index_name, "_id": doc_id, "_score": score, "_source": sources[doc_id]}
+            for doc_id, score in ranked]
+    return hits, {
+        "backend": "opensearch",
+        "fusion": method,
+        "transport": transport,
+        # 검색별 서버 처리 시간 (took) 과 전체 왕복 시간
+        "latency_ms": {
+            "keyword": keyword_response.get('took'),
+            "vector": vector_response.get('took'),
+            "round_trip": round(total_ms, 3),
+        },
+        "candidates": {"keyword": len(result_lists[0]), "vector": len(result_lists[1])},
+        "keyword_query": keyword_body,
+        # 쿼리 벡터는 자리표시자로 표시
+        "vector_query": build_knn_query("<vector>", candidates, filters, vector_engine),
+    }
+
+
+def search_faiss(client, store, index_name, search_query, query_vector, keyword_weight, vector_weight,
+                 filters=None, size=10, oversample=DEFAULT_OVERSAMPLE, method=None, offset=0, source=None):
+    """
+    BM25 는 OpenSearch 에서, kNN 은 로컬 FAISS 인덱스에서 수행한 뒤 점수를 합칩니다.
+    method 가 없으면 OpenSearch bool.should 와 같이 가중치를 곱한 각 점수의 합을,
+    있으면 fuse_results() 의 결합 점수를 사용합니다.
+
+    :param client: OpenSearch 클라이언트
+    :param store: faiss_backend.FaissVectorStore
+    :param index_name: 인덱스 이름
+    :param search_query: 검색어
+    :param query_vector: 검색어 임베딩 벡터
+    :param keyword_weight: 키워드 검색 가중치
+    :param vector_weight: 벡터 검색 가중치
+    :param filters: bool filter 절 리스트
+    :param size: 반환할 결과 수
+    :param oversample: 각 검색에서 (offset + size) 대비 몇 배의 후보를 가져올지
+    :param method: 결합 방식 (None, 'rrf', 'minmax')
+    :param offset: 건너뛸 결과 수 (페이지 시작 위치)
+    :param source: _source 필터 (기본값: 벡터 필드 제외)
+    :return: (검색 결과 hits, 실행 정보)
+    """
+    filters = filters or []
+    candidates = (offset + size) * oversample
+
+    # 벡터 검색 (로컬)
+    start = time.perf_counter()
+    vector_hits = store.search(query_vector, candidates)
+    vector_ms = (time.perf_counter() - start) * 1000
+
+    # 텍스트 검색 (OpenSearch BM25)
+    keyword_body = {
+        "size": candidates,
+        "_source": source or DEFAULT_SOURCE,
+        "query": build_keyword_query(search_query, filters)
+    }
+    start = time.perf_counter()
+    keyword_results = client.search(index=index_name, body=keyword_body)['hits']['hits']
+    keyword_ms = (time.perf_counter() - start) * 1000
+
+    # 벡터 후보 문서 조회 (필터 적용)
+    sources = {hit['_id']: hit['_source'] for hit in keyword_results}
+    vector_scores = {doc_id: score for doc_id, score in vector_hits}
+    missing = [doc_id for doc_id in vector_scores if doc_id not in sources]
+    if missing:
+        fetch_body = {
+            "size": len(missing),
+            "_source": source or DEFAULT_SOURCE,
+            "query": {"bool": {"filter": [{"ids": {"values": missing}}] + filters}}
+        }
+        for hit in client.search(index=index_name, body=fetch_body)['hits']['hits']:
+            sources[hit['_id']] = hit['_source']
+
+    # 필터에 걸려 조회되지 않은 벡터 후보는 제외
+    keyword_list = [(hit['_id'], hit['_score'] or 0.0) for hit in keyword_results]
+    vector_list = [(doc_id, score) for doc_id, score in vector_hits if doc_id in sources]
+    if method is None:
+        scores = {}
+        for doc_id, score in keyword_list:
+            scores[doc_id] = keyword_weight * score
+        for doc_id, score in vector_list:
+            scores[doc_id] = scores.get(doc_id, 0.0) + vector_weight * score
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    else:
+        ranked = fuse_results(keyword_list, vector_list, keyword_weight, vector_weight, method)
+    ranked = ranked[offset:offset + size]
+
+    hits = [{"_index": index_name, "_id": doc_id, "_score": score, "_source": sources[doc_id]}
+            for doc_id, score in ranked]
+    return hits, {
+        "backend": "faiss",
+        "fusion": method or "weighted_sum",
+        "faiss_ms": round(vector_ms, 3),
+        "keyword_ms": round(keyword_ms, 3),
+        "keyword_query": keyword_body,
+        "vector_candidates": len(vector_hits),
+    }
+
+
+def fetch_document(client, index_name, doc_id, source=None):
+    """
+    문서 하나의 상세 정보를 가져옵니다 (결과 표에서 선택한 행).
+    Serverless 벡터 컬렉션은 문서 ID 조회(GET)를 지원하지 않으므로 ids 쿼리를 사용합니다.
+    """
+    body = {"size": 1, "_source": source or DEFAULT_SOURCE, "query": {"ids": {"values": [doc_id]}}}
+    hits = client.search(index=index_name, body=body)['hits']['hits']
+    return hits[0]['_source'] if hits else None
+
+
+def redact_vectors(value, max_items=8):
+    """
+    디버그 출력용으로 검색 쿼리 안의 긴 숫자 리스트(쿼리 벡터)를 요약합니다.
+    """
+    if isinstance(value, dict):
+        return {key: redact_vectors(item, max_items) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) > max_items and all(isinstance(item, (int, float)) for item in value):
+            return f"<{len(value)} floats>"
+        return [redact_vectors(item, max_items) for item in value]
+    return value
+
+
+def resolve_terms_fields(index_fields=None):
+    """
+    분포 차트를 집계할 필드를 인덱스 매핑에서 찾습니다 (keyword 필드 또는 .keyword 하위 필드).
+    .keyword 하위 필드 없이 만든 이전 인덱스처럼 집계할 수 없는 필드는 None 입니다.
+
+    :param index_fields: IndexMetadata.index_fields() 결과 (없으면 DASHBOARD_TERMS_FIELDS 그대로 사용)
+    :return: {차트 이름: 집계 필드 또는 None}
+    """
+    if index_fields is None:
+        return dict(DASHBOARD_TERMS_FIELDS)
+    keywords = {field['field']: field['keyword'] for field in index_fields}
+    return {name: keywords.get(name) for name in DASHBOARD_TERMS_FIELDS}
+
+
+def build_dashboard_aggs(filters=None, terms_fields=None):
+    """
+    대시보드 차트용 집계 요청을 만듭니다 (운영체제 / 상태 / 부서 분포, CPU / 메모리 구간, 리소스 통계).
+    검색 결과 페이지와 무관하게 필터에 맞는 전체 문서를 집계합니다.
+
+    :param terms_fields: resolve_terms_fields() 결과 (None 인 차트는 집계하지 않음)
+    """
+    aggs = {}
+    for name, field in (terms_fields or DASHBOARD_TERMS_FIELDS).items():
+        if field:
+            aggs[name] = {"terms": {"field": field, "size": DASHBOARD_TERMS_SIZE}}
+    for name, interval in DASHBOARD_HISTOGRAM_FIELDS.items():
+        aggs[f"{name}_histogram"] = {"histogram": {"field": name, "interval": interval, "min_doc_count": 1}}
+    for name in DASHBOARD_STATS_FIELDS:
+        aggs[f"{name}_stats"] = {"stats": {"field": name}}
+    return {"fleet": {"filter": {"bool": {"filter": filters or []}}, "aggs": aggs}}
+
+
+def parse_dashboard_aggs(aggregations):
+    """
+    build_dashboard_aggs() 응답을 차트에서 쓰기 쉬운 dict 로 변환합니다.
+
+    :return: {"total": 문서 수, "os": [(값, 문서 수), ...], "cpu_histogram": [...], "cpu_stats": {...}, ...,
+              "unavailable": 집계할 수 없었던 분포 차트 이름 리스트}
+    """
+    fleet = aggregations["fleet"]
+    dashboard = {"total": fleet["doc_count"], "unavailable": []}
+    for name in DASHBOARD_TERMS_FIELDS:
+        if name not in fleet:
+            dashboard[name] = None
+            dashboard["unavailable"].append(name)
+            continue
+        dashboard[name] = [(bucket["key"], bucket["doc_count"]) for bucket in fleet[name]["buckets"]]
+    for name in DASHBOARD_HISTOGRAM_FIELDS:
+        dashboard[f"{name}_histogram"] = [(bucket["key"], bucket["doc_count"])
+                                          for bucket in fleet[f"{name}_histogram"]["buckets"]]
+    for name in DASHBOARD_STATS_FIELDS:
+        dashboard[f"{name}_stats"] = fleet[f"{name}_stats"]
+    return dashboard
+
+
+def fetch_dashboard(client, index_name, filters=None, index_fields=None):
+    """
+    필터에 맞는 전체 문서의 대시보드 집계를 가져옵니다 (size 0, 문서는 가져오지 않음).
+    결과는 필터 조합별로 캐시해서 사용하세요 (검색어와 무관).
+
+    :param index_fields: IndexMetadata.index_fields() 결과 — 주어지면 매핑에 있는 keyword 필드로만 분포를 집계
+    """
+    body = {"size": 0, "track_total_hits": True,
+            "aggs": build_dashboard_aggs(filters, resolve_terms_fields(index_fields))}
+    response = client.search(index=index_name, body=body)
+    return parse_dashboard_aggs(response["aggregations"])
@@ -0,0 +1,315 @@
+import os
+import json
+import threading
+
+from cachetools import TTLCache
+
+from dsl_cache import schema_version as _hash_schema
+from weblog_partitions import partition_span, WEBLOG_PATTERN
+
+
+# 인덱스 메타데이터 캐시 설정 (환경 변수로 변경 가능)
+METADATA_TTL = int(os.environ.get('ITSMS_METADATA_TTL', '600'))    # 인덱스 목록 / 매핑 / 통계 유효 시간 (초)
+METADATA_CACHE_SIZE = 256
+EXAMPLE_VALUES = 5          # 스키마 프롬프트에 넣을 예시 값 수
+ENUM_CARDINALITY = 50       # 고유 값이 이 수 이하인 필드는 값 목록을 프롬프트에 표시
+NUMERIC_TYPES = ('integer', 'long', 'short', 'byte', 'float', 'double', 'half_float', 'scaled_float')
+
+# 인덱스 메타데이터를 읽지 못할 때 LLM 에 전달하는 고정 스키마 설명 (get-serverinfo.py / app-serverinfo.py 공용)
+# 필드 / 타입 표기는 실제 매핑 (dummy-serverinfo.py, weblog_partitions.weblog_mappings()) 과 render_field() 형식을 따름
+FALLBACK_SCHEMA_PROMPT = """Index: server_info
+- instance_name (keyword): Server instance name (e.g., "srv-1234")
+- cpu (integer): Number of logical CPU cores (e.g., 4, 8)
+- memory (integer): Memory in GB (e.g., 16, 32)
+- disk (integer): Disk size in GB (e.g., 500, 1000)
+- os (text, exact: os.keyword): Operating system (e.g., "Ubuntu 20.04", "CentOS 7")
+- purpose (text): Server purpose (e.g., "Web Server", "Database Server")
+- service_name (text): Name of the service running on the server
+- ip_address (ip): IP address of the server
+- location (text): Physical location of the server
+- department (text, exact: department.keyword): Department responsible for the server
+- last_updated (date): Date of last update
+- registration_date (date): Date when the server was registered
+- server_status (text, exact: server_status.keyword): Current status of the server ("running", "shutdown", "stop")
+- full_text (text): All fields rendered as one text for keyword search
+- vector_embedding (knn_vector, dimension 1024): knn queries only
+
+Index: weblog-* (time partitions weblog-YYYY.MM.DD, or the single index weblog_info)
+- timestamp (date): Log entry creation time
+- ip_address (ip): Client's IP address
+- method (keyword): HTTP request method (e.g., "GET", "POST", "PUT", "DELETE")
+- url (text): Requested URL path
+- status_code (integer): HTTP response status code
+- user_agent (text): Client's User-Agent string
+- referrer (text): Request's Referrer URL
+- response_time (float): Time spent processing the request (seconds)
+- bytes_sent (long): Number of bytes sent in response
+- full_text (text): All fields rendered as one text for keyword search
+- template_id (keyword): ID of the masked log template (logs with the same template share an embedding)
+- vector_embedding (knn_vector, dimension 1024): knn queries only"""
+
+_default_metadata = None
+_default_lock = threading.Lock()
+
+
+def flatten_mapping(properties, prefix=''):
+    """
+    매핑의 properties 를 필드 리스트로 펼칩니다 (object 하위 필드는 'a.b' 경로).
+
+    :return: [{"field", "type", "keyword", "dimension", "engine"}] — keyword 는 집계 / 정확 일치에 쓸 필드 (없으면 None),
+             engine 은 knn_vector 의 method.engine (지정하지 않았으면 None)
+    """
+    fields = []
+    for name, spec in properties.items():
+        path = f"{prefix}{name}"
+        if 'properties' in spec and 'type' not in spec:
+            fields.extend(flatten_mapping(spec['properties'], f"{path}."))
+            continue
+        field_type = spec.get('type', 'object')
+        keyword = path if field_type == 'keyword' else None
+        for sub_name, sub_spec in spec.get('fields', {}).items():
+            if keyword is None and sub_spec.get('type') == 'keyword':
+                keyword = f"{path}.{sub_name}"
+        fields.append({
+            "field": path,
+            "type": field_type,
+            "keyword": keyword,
+            "dimension": spec.get('dimension'),
+            "engine": (spec.get('method') or {}).get('engine'),
+        })
+    return fields
+
+
+def build_profile_aggs(fields):
+    """
+    필드별 고유 값 수 / 상위 값 / 범위를 한 번의 size 0 검색으로 구하는 집계입니다.
+    """
+    aggs = {}
+    for i, field in enumerate(fields):
+        if field['keyword']:
+            aggs[f"f{i}_cardinality"] = {"cardinality": {"field": field['keyword']}}
+            aggs[f"f{i}_top"] = {"terms": {"field": field['keyword'], "size": EXAMPLE_VALUES}}
+        elif field['type'] in NUMERIC_TYPES or field['type'] == 'date':
+            aggs[f"f{i}_stats"] = {"stats": {"field": field['field']}}
+    return aggs
+
+
+def parse_profile_aggs(fields, aggregations):
+    profiles = {}
+    for i, field in enumerate(fields):
+        profile = {}
+        if f"f{i}_cardinality" in aggregations:
+            profile['cardinality'] = aggregations[f"f{i}_cardinality"]['value']
+            profile['examples'] = [bucket['key'] for bucket in aggregations[f"f{i}_top"]['buckets']]
+        elif f"f{i}_stats" in aggregations:
+            stats = aggregations[f"f{i}_stats"]
+            if stats.get('count'):
+                # date 필드는 *_as_string 값이 읽기 쉬움
+                profile['min'] = stats.get('min_as_string', stats.get('min'))
+                profile['max'] = stats.get('max_as_string', stats.get('max'))
+        if profile:
+            profiles[field['field']] = profile
+    return profiles
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, str) else str(value)
+
+
+def render_field(field, profile=None):
+    """
+    필드 한 줄 설명을 만듭니다 (예: - os (text, exact: os.keyword): 5 values "Ubuntu 22.04", "CentOS 7", ...).
+    """
+    kind = field['type']
+    if field['dimension']:
+        kind += f", dimension {field['dimension']}"
+    if field['keyword'] and field['keyword'] != field['field']:
+        kind += f", exact: {field['keyword']}"
+    line = f"- {field['field']} ({kind})"
+    if field['type'] == 'knn_vector':
+        return line + ": knn queries only"
+    profile = profile or {}
+    if 'cardinality' in profile:
+        cardinality = profile['cardinality']
+        examples = profile['examples'] if cardinality <= ENUM_CARDINALITY else profile['examples'][:2]
+        values = ", ".join(_format_value(value) for value in examples)
+        if cardinality <= len(examples):
+            line += f": {values}"
+        elif cardinality <= ENUM_CARDINALITY:
+            line += f": {cardinality} values, top {values}, ..."
+        else:
+            line += f": {cardinality} distinct, e.g. {values}"
+    elif 'min' in profile:
+        line += f": {_format_value(profile['min'])} .. {_format_value(profile['max'])}"
+    return line
+
+
+class IndexMetadataCache:
+    """
+    인덱스 목록 / 매핑 / 필드 통계를 TTL 동안 보관하는 캐시입니다.
+    Streamlit 재실행이나 질문마다 cat.indices / get_mapping / 집계 요청을 반복하지 않도록 하고,
+    실제 매핑으로 LLM 스키마 프롬프트를 만들어 프롬프트가 인덱스와 어긋나지 않게 합니다.
+    """
+    def __init__(self, client=None, ttl=METADATA_TTL):
+        self._client = client
+        self._cache = TTLCache(maxsize=METADATA_CACHE_SIZE, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from opensearch_client import get_opensearch_client
+            return get_opensearch_client()
+        return self._client
+
+    def _get(self, key, load, refresh=False):
+        with self._lock:
+            if not refresh and key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._cache[key] = value
+        return value
+
+    def list_indices(self, refresh=False):
+        """
+        시스템 인덱스 ('.' 으로 시작) 를 제외한 인덱스 이름 목록입니다.
+        웹 로그 시간 파티션 (weblog-YYYY.MM.DD[.HH]) 은 패턴 하나 (weblog-*) 로 표시합니다.
+        """
+        def load():
+            names = []
+            for index in self.client.cat.indices(format="json"):
+                name = WEBLOG_PATTERN if partition_span(index['index']) else index['index']
+                if not name.startswith('.') and name not in names:
+                    names.append(name)
+            return names
+        return self._get(('indices',), load, refresh)
+
+    def index_fields(self, index_name, refresh=False):
+        """
+        인덱스 매핑을 펼친 필드 리스트입니다 (flatten_mapping() 참고).
+        별칭 / 패턴이면 처음 나온 매핑을 기준으로 합칩니다.
+        """
+        def load():
+            fields = {}
+            for mapping in self.client.indices.get_mapping(index=index_name).values():
+                properties = mapping.get('mappings', {}).get('properties', {})
+                for field in flatten_mapping(properties):
+                    fields.setdefault(field['field'], field)
+            return list(fields.values())
+        return self._get(('fields', index_name), load, refresh)
+
+    def vector_dimension(self, index_name, vector_field='vector_embedding', default=1024):
+        for field in self.index_fields(index_name):
+            if field['field'] == vector_field and field['dimension']:
+                return int(field['dimension'])
+        return default
+
+    def vector_engine(self, index_name, vector_field='vector_embedding'):
+        """
+        벡터 필드의 knn 엔진입니다 (매핑에 없으면 기본 엔진을 뜻하는 None — 이전에 만든 인덱스는 nmslib).
+        """
+        for field in self.index_fields(index_name):
+            if field['field'] == vector_field:
+                return field['engine']
+        return None
+
+    def field_profiles(self, index_name, refresh=False):
+        """
+        keyword 필드의 고유 값 수와 상위 값, 숫자 / 날짜 필드의 범위입니다.
+        """
+        def load():
+            fields = self.index_fields(index_name, refresh)
+            aggs = build_profile_aggs(fields)
+            if not aggs:
+                return {}
+            response = self.client.search(index=index_name, body={"size": 0, "aggs": aggs})
+            return parse_profile_aggs(fields, response.get('aggregations', {}))
+        return self._get(('profiles', index_name), load, refresh)
+
+    def schema_prompt(self, index_names, refresh=False):
+        """
+        LLM 에 전달할 간결한 스키마 설명을 만듭니다 (필드 타입, 정확 일치용 필드, 값 예시 / 범위).
+
+        :param index_names: 인덱스 이름 또는 리스트
+        """
+        if isinstance(index_names, str):
+            index_names = [index_names]
+        sections = []
+        for index_name in index_names:
+            try:
+                profiles = self.field_profiles(index_name, refresh)
+            except Exception as e:
+                # 통계 집계가 실패해도 매핑만으로 프롬프트를 만듦
+                print(f"Failed to profile fields of '{index_name}': {str(e)}")
+                profiles = {}
+            lines = [f"Index: {index_name}"]
+            lines.extend(render_field(field, profiles.get(field['field']))
+                         for field in self.index_fields(index_name))
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
+
+    def schema_version(self, index_names):
+        """
+        매핑 (필드 이름 / 타입) 으로 만든 DSL 캐시 버전입니다.
+        문서가 추가되어 값 통계가 바뀌어도 버전은 그대로이고, 필드가 바뀌면 새 버전이 됩니다.
+        """
+        if isinstance(index_names, str):
+            index_names = [index_names]
+        schema = {index_name: [(field['field'], field['type'], field['keyword'])
+                               for field in self.index_fields(index_name)]
+                  for index_name in index_names}
+        return _hash_schema(json.dumps(schema, sort_keys=True))
+
+    def refresh(self, index_name=None):
+        """
+        캐시된 메타데이터를 버립니다. index_name 이 없으면 인덱스 목록을 포함해 전체를 버립니다.
+        """
+        with self._lock:
+            if index_name is None:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if len(key) > 1 and key[1] == index_name]:
+                self._cache.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def get_index_metadata():
+    """
+    프로세스 전체에서 공유하는 인덱스 메타데이터 캐시를 반환합니다.
+    """
+    global _default_metadata
+    if _default_metadata is None:
+        with _default_lock:
+            if _default_metadata is None:
+                _default_metadata = IndexMetadataCache()
+    return _default_metadata
+
+
+# 메인 실행: 스키마 프롬프트 확인
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--index', action='append', default=None, help='대상 인덱스 (여러 번 지정 가능, 기본값: 전체)')
+    args = parser.parse_args()
+
+    metadata = get_index_metadata()
+    index_names = args.index or metadata.list_indices()
+    prompt = metadata.schema_prompt(index_names)
+    print(prompt)
+    print(f"\n# schema version {metadata.schema_version(index_names)}, {len(prompt)} chars")
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+
+
+def make_doc_id(record, id_field=None):
+    """
+    레코드로부터 항상 같은 문서 ID 를 만듭니다.
+    id_field 값이 있으면 그대로 사용하고, 없으면 레코드 내용의 해시를 사용합니다.
+
+    :param record: 레코드 (full_text / vector_embedding 추가 전)
+    :param id_field: ID 로 사용할 필드 이름 (예: 'instance_name')
+    :return: 문서 ID 문자열
+    """
+    if id_field and record.get(id_field):
+        return str(record[id_field])
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class Checkpoint:
+    """
+    입력 레코드 순번 기준으로 인덱싱이 끝난 위치를 파일에 기록합니다.
+    bulk 배치는 순서 없이 끝나므로, 앞에서부터 연속으로 끝난 레코드 수(committed)와
+    그 뒤에 먼저 끝난 순번들을 함께 저장합니다.
+    """
+    def __init__(self, path, index_name=None, seed=None):
+        self.path = path
+        self.index_name = index_name
+        self.seed = seed
+        self.committed = 0
+        self.done = set()
+        self.batches = 0
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        checkpoint = cls(path, data.get('index_name'), data.get('seed'))
+        checkpoint.committed = data.get('committed', 0)
+        checkpoint.done = set(data.get('done', []))
+        checkpoint.batches = data.get('batches', 0)
+        checkpoint.updated_at = data.get('updated_at')
+        return checkpoint
+
+    def is_done(self, seq):
+        return seq < self.committed or seq in self.done
+
+    def mark_done(self, seqs):
+        """
+        bulk 배치에서 성공한 레코드 순번을 기록하고 파일에 저장합니다.
+        """
+        with self._lock:
+            self.done.update(seqs)
+            while self.committed in self.done:
+                self.done.discard(self.committed)
+                self.committed += 1
+            self.batches += 1
+            self.updated_at = time.time()
+            self._save()
+
+    def _save(self):
+        data = {
+            "index_name": self.index_name,
+            "seed": self.seed,
+            "committed": self.committed,
+            "done": sorted(self.done),
+            "batches": self.batches,
+            "updated_at": self.updated_at,
+        }
+        # 쓰는 도중 중단되어도 기존 파일이 깨지지 않도록 임시 파일 후 교체
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+
+def open_checkpoint(path, index_name, resume=False, seed=None):
+    """
+    --resume 이면 기존 체크포인트를 불러오고, 아니면 새 체크포인트를 만듭니다.
+    재시작 시 같은 레코드를 다시 만들 수 있도록 난수 시드를 함께 저장합니다.
+
+    :param path: 체크포인트 파일 경로
+    :param index_name: 인덱스 이름
+    :param resume: 기존 체크포인트에서 이어서 진행할지 여부
+    :param seed: 난수 시드 (없으면 새로 생성)
+    :return: Checkpoint
+    """
+    if resume and os.path.exists(path):
+        checkpoint = Checkpoint.load(path)
+        if checkpoint.index_name not in (None, index_name):
+            raise ValueError(f"Checkpoint '{path}' belongs to index '{checkpoint.index_name}'.")
+        print(f"Resuming from checkpoint '{path}': {checkpoint.committed} records already indexed.")
+        return checkpoint
+
+    if resume:
+        print(f"Checkpoint '{path}' not found. Starting from the beginning.")
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    checkpoint = Checkpoint(path, index_name, seed)
+    checkpoint.save()
+    return checkpoint
@@ -0,0 +1,212 @@
+import json
+import queue
+import threading
+
+from titan_embedding import embed_texts
+from opensearch_bulk import bulk_index, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_CHUNK_BYTES, DEFAULT_THREAD_COUNT
+
+
+# 기본 파이프라인 설정
+DEFAULT_EMBED_BATCH_SIZE = 64   # 임베딩 단계 배치 크기
+DEFAULT_EMBED_WORKERS = 2       # 동시에 처리하는 임베딩 배치 수
+DEFAULT_QUEUE_SIZE = 8          # 단계 사이 큐에 쌓일 수 있는 최대 배치 수
+
+_DONE = object()
+
+
+class PipelineError(Exception):
+    pass
+
+
+def generate_records(generator_fn, num_records):
+    """
+    레코드 생성 함수를 num_records 번 호출하는 제너레이터를 만듭니다.
+
+    :param generator_fn: 레코드(dict)를 반환하는 함수 (예: generate_server_info)
+    :param num_records: 생성할 레코드 수
+    """
+    for _ in range(num_records):
+        yield generator_fn()
+
+
+def _put(q, item, stop):
+    # 큐가 가득 차면 대기 (backpressure), 다른 단계가 실패하면 중단
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(client, index_name, records, text_fn=json.dumps,
+                 embed_batch_size=DEFAULT_EMBED_BATCH_SIZE, embed_workers=DEFAULT_EMBED_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, index_workers=DEFAULT_THREAD_COUNT,
+                 dimensions=1024, normalize=True, id_fn=None, index_fn=None, dedup=None, on_indexed=None,
+                 checkpoint=None, verbose=True):
+    """
+    레코드 생성 → 임베딩 → bulk 인덱싱을 단계별 스레드로 동시에 실행합니다.
+    단계 사이의 큐는 크기가 제한되어 있어, 느린 단계가 있으면 앞 단계가 대기합니다.
+    checkpoint 가 주어지면 이미 인덱싱된 레코드는 임베딩하지 않고 건너뛰며, 배치가 끝날 때마다 기록합니다.
+    임베딩에 실패한 레코드는 벡터 없이 인덱싱하지 않고 체크포인트에도 기록하지 않으므로, --resume 시 다시 임베딩합니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param records: 레코드(dict) iterable
+    :param text_fn: 레코드를 full_text / 임베딩 입력 문자열로 변환하는 함수
+    :param embed_batch_size: 임베딩 배치 크기
+    :param embed_workers: 동시에 처리하는 임베딩 배치 수
+    :param queue_size: 단계 사이 큐의 최대 배치 수
+    :param chunk_size: bulk 배치당 최대 문서 수
+    :param max_chunk_bytes: bulk 배치당 최대 바이트 수
+    :param index_workers: 병렬 bulk 워커 수
+    :param dimensions: 임베딩 벡터 차원
+    :param normalize: 임베딩 벡터 정규화 여부
+    :param id_fn: 레코드로부터 문서 ID 를 만드는 함수 (없으면 OpenSearch 가 ID 생성)
+    :param index_fn: 레코드를 쓸 인덱스 이름을 정하는 함수 (예: 시간 파티션, 없으면 index_name)
+    :param dedup: log_templates.TemplateDeduper — 주어지면 레코드마다 임베딩하지 않고 템플릿마다 한 번만 임베딩하며,
+                  문서에 template_id 를 추가합니다
+    :param on_indexed: bulk 배치가 끝날 때마다 인덱싱에 성공한 레코드 리스트로 호출할 함수 (예: 롤업 집계).
+                       체크포인트로 건너뛴 (이전 실행에서 인덱싱된) 레코드도 전달하므로, 재시작해도 전체 레코드를 다시 집계합니다
+    :param checkpoint: ingest_checkpoint.Checkpoint (재시작 지원)
+    :param verbose: 진행 상황 출력 여부
+    :return: BulkStats (produced / embedded / embed_failed / skipped / dedup 속성 추가)
+    """
+    record_queue = queue.Queue(maxsize=queue_size)
+    doc_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    counts = {"produced": 0, "embedded": 0, "embed_failed": 0, "skipped": 0}
+    counts_lock = threading.Lock()
+
+    def produce():
+        try:
+            batch = []
+            skipped = []
+            for seq, record in enumerate(records):
+                # 체크포인트에 기록된 레코드는 임베딩 전에 건너뜀 (on_indexed 에는 전달)
+                if checkpoint is not None and checkpoint.is_done(seq):
+                    counts["skipped"] += 1
+                    if on_indexed is not None:
+                        skipped.append(record)
+                        if len(skipped) >= embed_batch_size:
+                            on_indexed(skipped)
+                            skipped = []
+                    continue
+                batch.append((seq, record))
+                if len(batch) >= embed_batch_size:
+                    if not _put(record_queue, batch, stop):
+                        return
+                    counts["produced"] += len(batch)
+                    batch = []
+            if skipped:
+                on_indexed(skipped)
+            if batch and _put(record_queue, batch, stop):
+                counts["produced"] += len(batch)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for _ in range(embed_workers):
+                _put(record_queue, _DONE, stop)
+
+    def embed():
+        try:
+            while True:
+                batch = _get(record_queue, stop)
+                if batch is _DONE:
+                    break
+                docs = []
+                failed = 0
+                texts = [text_fn(record) for _, record in batch]
+                if dedup is not None:
+                    template_ids, vectors = zip(*dedup.embed_records([record for _, record in batch],
+                                                                     dimensions, normalize))
+                else:
+                    template_ids, vectors = [None] * len(batch), embed_texts(texts, dimensions, normalize)
+                for (seq, record), text, vector, template_id in zip(batch, texts, vectors, template_ids):
+                    # 임베딩 실패 (스로틀링 등) — 인덱싱하지 않아 체크포인트에 남지 않음
+                    if vector is None:
+                        failed += 1
+                        continue
+                    doc_id = id_fn(record) if id_fn is not None else None
+                    record.update({"full_text": text})
+                    record.update({"vector_embedding": vector})
+                    if template_id is not None:
+                        record.update({"template_id": template_id})
+                    doc = {"_id": doc_id, "_source": record, "_seq": seq}
+                    if index_fn is not None:
+                        doc["_index"] = index_fn(record)
+                    docs.append(doc)
+                if not _put(doc_queue, docs, stop):
+                    break
+                with counts_lock:
+                    counts["embedded"] += len(batch) - failed
+                    counts["embed_failed"] += failed
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(doc_queue, _DONE, stop)
+
+    def documents():
+        finished = 0
+        while finished < embed_workers:
+            batch = _get(doc_queue, stop)
+            if batch is _DONE:
+                if stop.is_set():
+                    return
+                finished += 1
+                continue
+            yield from batch
+
+    def on_batch(succeeded, failed):
+        if on_indexed is not None and succeeded:
+            on_indexed([doc['_source'] for doc in succeeded])
+        if checkpoint is not None and succeeded:
+            checkpoint.mark_done(doc['_seq'] for doc in succeeded)
+
+    threads = [threading.Thread(target=produce, name='pipeline-produce', daemon=True)]
+    threads += [threading.Thread(target=embed, name=f'pipeline-embed-{i}', daemon=True)
+                for i in range(embed_workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        stats = bulk_index(client, index_name, documents(), chunk_size=chunk_size,
+                           max_chunk_bytes=max_chunk_bytes, thread_count=index_workers,
+                           on_batch=on_batch, verbose=verbose)
+    except Exception:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=5)
+
+    if errors:
+        raise PipelineError(f"Ingestion pipeline failed: {errors[0]}") from errors[0]
+
+    stats.produced = counts["produced"]
+    stats.embedded = counts["embedded"]
+    stats.embed_failed = counts["embed_failed"]
+    stats.skipped = counts["skipped"]
+    stats.dedup = dedup.stats() if dedup is not None else None
+    if verbose and dedup is not None:
+        print(dedup.summary())
+    if verbose and stats.embed_failed:
+        print(f"Skipped {stats.embed_failed} records whose embedding failed. "
+              "Run again with --resume to retry them.")
+    if verbose and stats.skipped:
+        print(f"Skipped {stats.skipped} records already indexed according to the checkpoint.")
+    return stats
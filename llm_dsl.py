@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import threading
+
+import boto3
+from botocore.config import Config
+
+from titan_embedding import region
+
+
+# 자연어 → OpenSearch DSL 생성 설정
+DSL_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+DSL_MAX_TOKENS = 512        # DSL 본문만 받으므로 작게 유지 (설명 문장은 요청하지 않음)
+DSL_TEMPERATURE = 0.0
+DSL_STREAM = os.environ.get('ITSMS_LLM_STREAM', '1') != '0'   # 스트리밍 응답 사용 여부 (0 이면 invoke_model)
+DSL_PREFILL = "{"           # 응답을 JSON 객체로 바로 시작하도록 assistant 응답 앞부분을 채움
+DSL_MAX_RETRIES = 5         # 스로틀링 시 botocore 재시도 횟수 (첫 호출 제외)
+
+_llm_client = None
+_lock = threading.Lock()
+
+
+def get_llm_client():
+    """
+    DSL 생성용 Bedrock Runtime 클라이언트를 반환합니다.
+    임베딩 공유 클라이언트 (titan_embedding.get_bedrock_client) 는 embed_text 가 직접 재시도하도록
+    botocore 재시도를 끄므로, Claude 호출에는 botocore 재시도가 켜진 별도 클라이언트를 사용합니다.
+    """
+    global _llm_client
+    if _llm_client is None:
+        with _lock:
+            if _llm_client is None:
+                _llm_client = boto3.client(
+                    service_name='bedrock-runtime',
+                    region_name=region,
+                    config=Config(retries={'max_attempts': DSL_MAX_RETRIES, 'mode': 'standard'})
+                )
+    return _llm_client
+
+
+def build_dsl_messages(natural_language_query, schema_text):
+    return [
+        {
+            "role": "user",
+            "content": f"Given the following schema information:\n\n{schema_text}\n\n"
+                       "Generate an OpenSearch query for the following natural language query. "
+                       "The query should use the appropriate fields and query types based on the schema. "
+                       "Respond with the query as a single JSON object only, without explanation or markdown. "
+                       f"Natural language query: {natural_language_query}"
+        },
+        {"role": "assistant", "content": DSL_PREFILL},
+    ]
+
+
+class JsonObjectExtractor:
+    """
+    스트리밍 텍스트에서 처음으로 완성되는 JSON 객체를 찾습니다.
+    문자열 / 이스케이프 상태와 괄호 깊이를 추적하여, 닫는 괄호가 도착하는 즉시 객체를 반환합니다.
+    파싱할 수 없는 괄호 블록 (예: 설명 문장 속 {placeholder}) 은 건너뛰고 다음 '{' 부터 다시 찾습니다.
+    """
+    def __init__(self):
+        self.text = ""
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """
+        :param chunk: 새로 도착한 텍스트
+        :return: 완성된 JSON 객체 (아직 없으면 None)
+        """
+        self.text += chunk
+        for char in chunk:
+            if not self._buffer:
+                if char == '{':
+                    self._buffer.append(char)
+                    self._depth = 1
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        return json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+        return None
+
+
+def _iter_stream_text(response):
+    # Anthropic Messages 스트림 이벤트 중 텍스트 조각만 꺼냄
+    for event in response['body']:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = json.loads(chunk['bytes'])
+        if payload.get('type') == 'content_block_delta' and payload['delta'].get('type') == 'text_delta':
+            yield payload['delta']['text']
+
+
+def _parse_remaining(extractor):
+    # 모델이 prefill 한 '{' 를 다시 출력한 경우 응답 텍스트만으로 다시 찾음
+    dsl = JsonObjectExtractor().feed(extractor.text[len(DSL_PREFILL):])
+    if dsl is None:
+        raise ValueError(f"No JSON object in model response: {extractor.text[:200]!r}")
+    return dsl
+
+
+def generate_dsl(natural_language_query, schema_text, stream=None, model_id=DSL_MODEL_ID,
+                 max_tokens=DSL_MAX_TOKENS, client=None):
+    """
+    자연어 질문을 OpenSearch DSL 로 변환합니다.
+    stream=True 이면 invoke_model_with_response_stream 으로 응답을 받으며,
+    JSON 객체가 완성되는 즉시 스트림 읽기를 멈추고 반환합니다 (나머지 토큰은 기다리지 않음).
+
+    :param natural_language_query: 자연어 질문
+    :param schema_text: LLM 에 전달할 스키마 설명
+    :param stream: 스트리밍 응답 사용 여부 (기본값: ITSMS_LLM_STREAM)
+    :param model_id: Bedrock 모델 ID
+    :param max_tokens: 최대 출력 토큰 수
+    :param client: Bedrock Runtime 클라이언트 (기본값: get_llm_client())
+    :return: (DSL dict, {"text", "first_token_ms", "total_ms"})
+    """
+    client = client or get_llm_client()
+    stream = DSL_STREAM if stream is None else stream
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": DSL_TEMPERATURE,
+        "messages": build_dsl_messages(natural_language_query, schema_text),
+    })
+    start = time.perf_counter()
+    extractor = JsonObjectExtractor()
+    extractor.feed(DSL_PREFILL)
+
+    if not stream:
+        response = client.invoke_model(body=body, modelId=model_id,
+                                       contentType="application/json", accept="application/json")
+        response_body = json.loads(response['body'].read())
+        text = "".join(block.get('text', '') for block in response_body['content'])
+        dsl = extractor.feed(text)
+        if dsl is None:
+            dsl = _parse_remaining(extractor)
+        return dsl, {"text": extractor.text, "first_token_ms": None,
+                     "total_ms": (time.perf_counter() - start) * 1000}
+
+    response = client.invoke_model_with_response_stream(body=body, modelId=model_id,
+                                                         contentType="application/json", accept="application/json")
+    first_token_ms = None
+    dsl = None
+    stream_body = response['body']
+    try:
+        for text in _iter_stream_text(response):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            dsl = extractor.feed(text)
+            if dsl is not None:
+                break
+    finally:
+        # 객체가 완성되면 남은 이벤트는 읽지 않고 연결을 닫음
+        if hasattr(stream_body, 'close'):
+            stream_body.close()
+    if dsl is None:
+        dsl = _parse_remaining(extractor)
+    return dsl, {"text": extractor.text, "first_token_ms": first_token_ms,
+                 "total_ms": (time.perf_counter() - start) * 1000}
@@ -0,0 +1,185 @@
+import re
+import json
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+from cachetools import LRUCache
+
+from titan_embedding import embed_texts
+
+
+# 로그 템플릿 중복 제거 설정
+TEMPLATE_CACHE_SIZE = 100_000   # 메모리에 유지할 템플릿 벡터 수
+RESPONSE_TIME_BUCKETS = ((0.5, "fast"), (2.0, "normal"))    # 초 단위 상한 → 응답 시간 등급 (그 밖은 "slow")
+
+# 템플릿에서 제외하는 (줄마다 달라지는) 필드
+VOLATILE_FIELDS = ('timestamp', 'ip_address', 'bytes_sent', 'full_text', 'vector_embedding', 'template_id')
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+_HEX_RE = re.compile(r"(?<![0-9A-Za-z])(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}(?![0-9A-Za-z])")
+_NUMBER_RE = re.compile(r"(?<![A-Za-z0-9])\d+(?:[._]\d+)*")
+_QUERY_VALUE_RE = re.compile(r"=[^&]*")
+
+
+def mask_text(text):
+    """
+    UUID / 16진 ID / 숫자 (버전 번호 포함) 를 자리표시자로 바꿉니다.
+    """
+    text = _UUID_RE.sub("<uuid>", text)
+    text = _HEX_RE.sub("<id>", text)
+    return _NUMBER_RE.sub("<n>", text)
+
+
+def mask_url(url):
+    # '/orders/detail/123?page=2' → '/orders/detail/<n>?page=<*>'
+    path, _, query = str(url).partition('?')
+    path = mask_text(path)
+    return f"{path}?{_QUERY_VALUE_RE.sub('=<*>', query)}" if query else path
+
+
+def mask_referrer(referrer):
+    # 외부 유입 경로는 호스트만 남김 ('-' 은 직접 방문)
+    if not referrer or referrer == '-':
+        return '-'
+    return urlsplit(str(referrer)).netloc or '-'
+
+
+def response_time_class(seconds):
+    if seconds is None:
+        return None
+    for limit, label in RESPONSE_TIME_BUCKETS:
+        if seconds < limit:
+            return label
+    return "slow"
+
+
+def weblog_template(record):
+    """
+    웹 로그 레코드의 템플릿입니다. IP / 시각 / 전송 바이트는 빼고, URL / User-Agent 의 ID·숫자는 가리며,
+    응답 시간은 등급으로 바꿉니다. 템플릿이 같은 로그는 같은 임베딩을 사용합니다.
+    """
+    template = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    if 'url' in template:
+        template['url'] = mask_url(template['url'])
+    if 'user_agent' in template:
+        template['user_agent'] = mask_text(str(template['user_agent']))
+    if 'referrer' in template:
+        template['referrer'] = mask_referrer(template['referrer'])
+    if 'response_time' in template:
+        template['response_time'] = response_time_class(template['response_time'])
+    return template
+
+
+def template_id(template):
+    """
+    템플릿 내용으로 만든 고정 ID 입니다 (문서의 template_id 필드).
+    """
+    payload = json.dumps(template, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class TemplateDeduper:
+    """
+    레코드를 템플릿으로 묶어 템플릿마다 한 번만 임베딩하는 인덱싱 단계입니다.
+    같은 템플릿의 문서는 같은 벡터와 template_id 를 가집니다. 여러 임베딩 스레드에서 동시에 사용할 수 있습니다.
+
+    :param template_fn: 레코드 → 템플릿 dict (기본값: weblog_template)
+    :param text_fn: 템플릿 → 임베딩 입력 문자열 (기본값: json.dumps)
+    """
+    def __init__(self, template_fn=weblog_template, text_fn=json.dumps, cache_size=TEMPLATE_CACHE_SIZE):
+        self.template_fn = template_fn
+        self.text_fn = text_fn
+        self.records = 0
+        self.embedded = 0
+        self.failed = 0
+        self._seen = set()
+        self._vectors = LRUCache(maxsize=cache_size)
+        self._pending = {}  # 임베딩 요청 중인 template_id → 완료 이벤트
+        self._lock = threading.Lock()
+
+    def embed_records(self, records, dimensions=1024, normalize=True):
+        """
+        :return: 레코드 순서대로 (template_id, 벡터) 리스트 (임베딩 실패 시 벡터는 None)
+        """
+        ids, texts = [], {}
+        for record in records:
+            template = self.template_fn(record)
+            tid = template_id(template)
+            ids.append(tid)
+            texts.setdefault(tid, template)
+
+        # 다른 임베딩 스레드가 요청 중인 템플릿은 다시 요청하지 않고 끝나기를 기다림
+        with self._lock:
+            vectors = {tid: self._vectors[tid] for tid in texts if tid in self._vectors}
+            waiting = {tid: self._pending[tid] for tid in texts if tid not in vectors and tid in self._pending}
+            missing = [tid for tid in texts if tid not in vectors and tid not in waiting]
+            done = threading.Event()
+            for tid in missing:
+                self._pending[tid] = done
+            self.records += len(ids)
+            self._seen.update(texts)
+        try:
+            if missing:
+                fetched = embed_texts([self.text_fn(texts[tid]) for tid in missing], dimensions, normalize)
+                with self._lock:
+                    for tid, vector in zip(missing, fetched):
+                        if vector is None:
+                            self.failed += 1
+                            continue
+                        self._vectors[tid] = vector
+                        vectors[tid] = vector
+                    self.embedded += len(missing)
+        finally:
+            with self._lock:
+                for tid in missing:
+                    self._pending.pop(tid, None)
+            done.set()
+        for tid, event in waiting.items():
+            event.wait()
+            with self._lock:
+                vectors[tid] = self._vectors.get(tid)
+        return [(tid, vectors.get(tid)) for tid in ids]
+
+    def stats(self):
+        with self._lock:
+            templates = len(self._seen)
+            return {
+                "records": self.records,
+                "templates": templates,
+                "embedding_requests": self.embedded,
+                "embedding_calls_saved": self.records - self.embedded,
+                "dedup_ratio": round(self.records / templates, 2) if templates else 0.0,
+            }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"Template dedup: {stats['records']} records -> {stats['templates']} templates "
+                f"(dedup ratio {stats['dedup_ratio']}x), {stats['embedding_requests']} embedding requests, "
+                f"{stats['embedding_calls_saved']} calls saved")
+
+
+# 메인 실행: 더미 웹 로그의 템플릿 중복 제거율 확인 (임베딩 호출 없음)
+#   python log_templates.py --num-records 100000
+if __name__ == "__main__":
+    import argparse
+    from collections import Counter
+    from synthetic_data import iter_records
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num-records', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=5, help='출력할 상위 템플릿 수')
+    args = parser.parse_args()
+
+    counts = Counter()
+    examples = {}
+    for log in iter_records('weblog', args.num_records, seed=args.seed):
+        log_template = weblog_template(log)
+        tid = template_id(log_template)
+        counts[tid] += 1
+        examples.setdefault(tid, log_template)
+    print(f"{args.num_records} records -> {len(counts)} templates "
+          f"(dedup ratio {args.num_records / max(len(counts), 1):.1f}x)")
+    for tid, count in counts.most_common(args.top):
+        print(f"{count:>8}  {tid}  {json.dumps(examples[tid], ensure_ascii=False)}")
@@ -1,28 +1,11 @@
 import streamlit as st
 import json
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
 
-# AWS 및 OpenSearch 설정
-region = 'us-west-2'  # 예: 'us-west-2'
-service = 'aoss'
-credentials = boto3.Session().get_credentials()
-awsauth = AWS4Auth(credentials.access_key, credentials.secret_key,
-                   region, service, session_token=credentials.token)
+from opensearch_client import get_opensearch_client
+from result_export import render_export_expander
 
-# OpenSearch 연결 설정
-host = 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com'  # 예: 'https://xxx.us-west-2.aoss.amazonaws.com'
-port = 443
-
-# OpenSearch 클라이언트 생성
-opensearch_client = OpenSearch(
-    hosts=[{'host': host, 'port': port}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
+# OpenSearch 클라이언트 (공유 커넥션 모듈, 프로세스당 한 번 생성)
+opensearch_client = get_opensearch_client()
 
 def search_opensearch(query):
     try:
@@ -59,6 +42,9 @@ if query_json:
                     st.json(hit['_source'])
             else:
                 st.write("No results found.")
+        
+        # 전체 결과 내보내기 (첫 페이지 제한 없이 PIT / search_after 로 모든 문서를 파일로 저장)
+        render_export_expander(opensearch_client, "server_info", query)
     except json.JSONDecodeError:
         st.error("Invalid JSON. Please enter a valid JSON query.")
     except Exception as e:
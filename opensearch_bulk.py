@@ -0,0 +1,217 @@
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from opensearchpy.exceptions import TransportError
+
+from search_cache import bump_index_generation
+
+
+# 재시도 대상 상태 코드 (스로틀링 / 일시적 서버 오류)
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+# 재시도 지터 전용 난수 (dummy-*.py 가 재생성을 위해 시드를 고정하는 전역 random 과 분리)
+_jitter = random.Random()
+
+# 기본 배치 설정
+DEFAULT_CHUNK_SIZE = 500                    # 배치당 문서 수
+DEFAULT_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # 배치당 최대 크기 (10MB)
+DEFAULT_THREAD_COUNT = 4                    # 병렬 bulk 워커 수
+
+
+class BulkStats:
+    """
+    bulk 인덱싱 진행 상황을 집계합니다. 여러 워커 스레드에서 동시에 갱신됩니다.
+    """
+    def __init__(self):
+        self.indexed = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.bytes_sent = 0
+        self.errors = []
+        self.started = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, indexed, failed, retried, nbytes, errors):
+        with self._lock:
+            self.indexed += indexed
+            self.failed += failed
+            self.retried += retried
+            self.batches += 1
+            self.bytes_sent += nbytes
+            self.errors.extend(errors[:10])
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def docs_per_sec(self):
+        return self.indexed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"Indexed {self.indexed} documents in {self.elapsed:.1f}s "
+                f"({self.docs_per_sec:.1f} docs/sec, {self.batches} batches, "
+                f"{self.bytes_sent / 1024 / 1024:.1f} MB), "
+                f"retried: {self.retried}, failed: {self.failed}")
+
+
+def expand_action(doc, index_name):
+    """
+    문서를 bulk 액션 라인과 소스 라인으로 변환합니다.
+    opensearchpy.helpers 와 같이 '_source' 키가 있으면 액션 형태로, 없으면 문서 전체를 소스로 봅니다.
+
+    :param doc: 인덱싱할 문서 또는 {'_index', '_id', '_source'} 형태의 액션
+    :param index_name: 기본 인덱스 이름
+    :return: (액션 라인, 소스 라인) 문자열 튜플
+    """
+    if '_source' in doc:
+        meta = {"_index": doc.get('_index', index_name)}
+        if doc.get('_id') is not None:
+            meta["_id"] = doc['_id']
+        source = doc['_source']
+    else:
+        meta = {"_index": index_name}
+        source = doc
+    action_line = json.dumps({"index": meta})
+    source_line = json.dumps(source, ensure_ascii=False)
+    return action_line, source_line
+
+
+def iter_chunks(docs, index_name, chunk_size=DEFAULT_CHUNK_SIZE, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    """
+    문서를 문서 수와 바이트 크기 기준으로 bulk 배치로 나눕니다.
+
+    :param docs: 문서 iterable
+    :param index_name: 기본 인덱스 이름
+    :param chunk_size: 배치당 최대 문서 수
+    :param max_chunk_bytes: 배치당 최대 바이트 수
+    :return: [(액션 라인, 소스 라인, 원본 문서), ...] 배치를 yield 하는 제너레이터
+    """
+    chunk = []
+    chunk_bytes = 0
+    for doc in docs:
+        action_line, source_line = expand_action(doc, index_name)
+        # 줄바꿈 2개 포함
+        size = len(action_line.encode('utf-8')) + len(source_line.encode('utf-8')) + 2
+        if chunk and (len(chunk) >= chunk_size or chunk_bytes + size > max_chunk_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append((action_line, source_line, doc))
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def _backoff(attempt, initial_backoff, max_backoff):
+    # 지수 백오프 + 지터
+    delay = min(max_backoff, initial_backoff * (2 ** attempt))
+    time.sleep(delay * (0.5 + _jitter.random() / 2))
+
+
+def send_chunk(client, chunk, max_retries=3, initial_backoff=1, max_backoff=30):
+    """
+    하나의 배치를 _bulk API 로 전송합니다.
+    일부 문서만 거부(429/5xx)된 경우 거부된 문서만 다시 전송합니다.
+
+    :param client: OpenSearch 클라이언트
+    :param chunk: iter_chunks() 가 만든 배치
+    :param max_retries: 최대 재시도 횟수
+    :param initial_backoff: 첫 재시도 대기 시간 (초)
+    :param max_backoff: 최대 재시도 대기 시간 (초)
+    :return: (성공 문서 리스트, 실패 (문서, 오류) 리스트, 재시도 횟수, 전송 바이트 수)
+    """
+    pending = chunk
+    succeeded = []
+    failed = []
+    retried = 0
+    nbytes = 0
+
+    for attempt in range(max_retries + 1):
+        body = "\n".join(f"{action}\n{source}" for action, source, _ in pending) + "\n"
+        nbytes += len(body.encode('utf-8'))
+
+        try:
+            response = client.bulk(body=body)
+        except TransportError as e:
+            # 요청 전체가 스로틀링된 경우 배치 전체를 재시도
+            if e.status_code in RETRYABLE_STATUS and attempt < max_retries:
+                retried += len(pending)
+                _backoff(attempt, initial_backoff, max_backoff)
+                continue
+            failed.extend((doc, str(e)) for _, _, doc in pending)
+            return succeeded, failed, retried, nbytes
+
+        retry = []
+        for item, entry in zip(response['items'], pending):
+            result = item.get('index') or item.get('create') or {}
+            status = result.get('status', 500)
+            if status < 300:
+                succeeded.append((entry[2], result))
+            elif status in RETRYABLE_STATUS and attempt < max_retries:
+                retry.append(entry)
+            else:
+                failed.append((entry[2], result.get('error', status)))
+
+        if not retry:
+            break
+        retried += len(retry)
+        pending = retry
+        _backoff(attempt, initial_backoff, max_backoff)
+
+    return succeeded, failed, retried, nbytes
+
+
+def bulk_index(client, index_name, docs, chunk_size=DEFAULT_CHUNK_SIZE,
+               max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, thread_count=DEFAULT_THREAD_COUNT,
+               max_retries=3, on_batch=None, verbose=True):
+    """
+    병렬 워커로 문서를 _bulk API 에 인덱싱합니다.
+    동시에 전송 중인 배치 수를 워커 수의 2배로 제한하여 메모리 사용량을 일정하게 유지합니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param docs: 문서 iterable (제너레이터 권장)
+    :param chunk_size: 배치당 최대 문서 수
+    :param max_chunk_bytes: 배치당 최대 바이트 수
+    :param thread_count: 병렬 bulk 워커 수
+    :param max_retries: 거부된 문서의 최대 재시도 횟수
+    :param on_batch: 배치 전송이 끝날 때마다 (성공 문서 리스트, 실패 문서 리스트) 로 호출할 함수
+    :param verbose: 배치별 진행 상황 출력 여부
+    :return: BulkStats
+    """
+    stats = BulkStats()
+
+    def worker(chunk):
+        succeeded, failed, retried, nbytes = send_chunk(client, chunk, max_retries=max_retries)
+        stats.record(len(succeeded), len(failed), retried, nbytes, [err for _, err in failed])
+        # 검색 결과 캐시 무효화 (다른 프로세스의 검색 앱 포함)
+        for written_index in {doc.get('_index', index_name) if '_source' in doc else index_name
+                              for doc, _ in succeeded}:
+            bump_index_generation(written_index)
+        if on_batch is not None:
+            on_batch([doc for doc, _ in succeeded], [doc for doc, _ in failed])
+        if verbose:
+            print(f"Bulk batch: {len(succeeded)} indexed, {len(failed)} failed "
+                  f"(total {stats.indexed}, {stats.docs_per_sec:.1f} docs/sec)")
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        in_flight = set()
+        for chunk in iter_chunks(docs, index_name, chunk_size, max_chunk_bytes):
+            if len(in_flight) >= thread_count * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(executor.submit(worker, chunk))
+        for future in wait(in_flight).done:
+            future.result()
+
+    stats.finished = time.time()
+    for error in stats.errors:
+        print(f"Bulk error: {error}")
+    return stats
@@ -0,0 +1,134 @@
+import os
+import asyncio
+import threading
+
+import boto3
+from opensearchpy import OpenSearch, AsyncOpenSearch, RequestsHttpConnection, AsyncHttpConnection
+from opensearchpy import AWSV4SignerAsyncAuth
+from requests_aws4auth import AWS4Auth
+
+
+# OpenSearch Serverless 연결 설정 (환경 변수로 변경 가능)
+region = os.environ.get('ITSMS_REGION', 'us-west-2')
+service = 'aoss'
+host = os.environ.get('ITSMS_OPENSEARCH_HOST', 'o0hj5d4vh1k6bxab969l.us-west-2.aoss.amazonaws.com')
+port = int(os.environ.get('ITSMS_OPENSEARCH_PORT', '443'))
+
+# 커넥션 풀 설정
+POOL_MAXSIZE = int(os.environ.get('ITSMS_OPENSEARCH_POOL_SIZE', '32'))  # 호스트당 유지할 keep-alive 연결 수
+TIMEOUT = int(os.environ.get('ITSMS_OPENSEARCH_TIMEOUT', '30'))         # 요청 타임아웃 (초)
+MAX_RETRIES = 3                                                          # 연결 오류 / 타임아웃 재시도 횟수
+
+_client = None
+_async_client = None
+_async_loop = None
+_credentials = None
+_lock = threading.RLock()
+
+
+def get_credentials():
+    """
+    자동 갱신되는 boto3 자격 증명을 반환합니다.
+    세션 토큰이 만료되기 전에 botocore 가 새 토큰을 받아오므로 장시간 실행되는 프로세스에서도 사용할 수 있습니다.
+    """
+    global _credentials
+    if _credentials is None:
+        with _lock:
+            if _credentials is None:
+                _credentials = boto3.Session().get_credentials()
+    return _credentials
+
+
+def _connection_options():
+    return {
+        "hosts": [{'host': host, 'port': port}],
+        "use_ssl": True,
+        "verify_certs": True,
+        "timeout": TIMEOUT,
+        "max_retries": MAX_RETRIES,
+        "retry_on_timeout": True,
+    }
+
+
+def get_opensearch_client():
+    """
+    프로세스 전체에서 공유하는 OpenSearch 클라이언트를 반환합니다.
+    처음 호출할 때 생성하며, 요청마다 갱신된 자격 증명으로 SigV4 서명합니다.
+    클라이언트는 스레드 안전하므로 워커 스레드에서도 같은 클라이언트를 사용합니다.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                awsauth = AWS4Auth(refreshable_credentials=get_credentials(),
+                                   region=region, service=service)
+                _client = OpenSearch(
+                    http_auth=awsauth,
+                    connection_class=RequestsHttpConnection,
+                    pool_maxsize=POOL_MAXSIZE,
+                    **_connection_options()
+                )
+    return _client
+
+
+def _event_loop():
+    # AsyncOpenSearch 의 aiohttp 세션은 만든 이벤트 루프에서만 쓸 수 있으므로, 전용 스레드의 루프 하나를 공유
+    global _async_loop
+    if _async_loop is None:
+        with _lock:
+            if _async_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='opensearch-async', daemon=True).start()
+                _async_loop = loop
+    return _async_loop
+
+
+def get_async_opensearch_client():
+    """
+    동시 요청이 많은 작업용 AsyncOpenSearch 클라이언트를 반환합니다 (aiohttp 기반).
+    처음 호출할 때 생성하며, 동기 클라이언트와 같은 자동 갱신 자격 증명으로 요청마다 SigV4 서명합니다.
+    공유 이벤트 루프에서 사용하므로 run_async() 로 실행하는 코루틴 안에서만 요청하세요.
+    """
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                _async_client = AsyncOpenSearch(
+                    http_auth=AWSV4SignerAsyncAuth(get_credentials(), region, service),
+                    connection_class=AsyncHttpConnection,
+                    maxsize=POOL_MAXSIZE,
+                    **_connection_options()
+                )
+    return _async_client
+
+
+def run_async(coroutine, timeout=None):
+    """
+    코루틴을 공유 이벤트 루프에서 실행하고 결과를 기다립니다 (Streamlit / CLI 의 동기 코드에서 호출).
+
+    :param timeout: 대기 시간 제한 (초, None 이면 무제한)
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop()).result(timeout)
+
+
+def close_async_opensearch_client():
+    global _async_client
+    if _async_client is not None:
+        run_async(_async_client.close())
+        _async_client = None
+
+
+def set_opensearch_client(client):
+    """
+    공유 클라이언트를 교체합니다 (벤치마크 / 로컬 대체 클라이언트용).
+    """
+    global _client
+    _client = client
+
+
+def set_async_opensearch_client(client):
+    """
+    공유 비동기 클라이언트를 교체합니다 (로컬 대체 클라이언트용).
+    """
+    global _async_client
+    _async_client = client
@@ -0,0 +1,125 @@
+import os
+import json
+
+
+# 문서 텍스트 (full_text / 임베딩 입력) 설정
+TEXT_FORMATS = ('compact', 'json')
+TEXT_FORMAT = os.environ.get('ITSMS_TEXT_FORMAT', 'compact')    # json: 레코드 JSON 문자열 (이전 방식)
+
+# 데이터셋별 (필드, 형식 문자열) — 이 순서대로 이어 붙이며, 값이 없는 필드는 건너뜀
+# 형식 문자열은 str.format 규칙을 따름 (예: '{:.10}' 은 ISO 시각에서 날짜만 사용)
+TEXT_FIELDS = {
+    'weblog': (
+        ('method', '{}'),
+        ('url', '{}'),
+        ('status_code', 'status {}'),
+        ('response_time', 'response time {}'),
+        ('bytes_sent', '{} bytes'),
+        ('ip_address', 'from {}'),
+        ('referrer', 'referrer {}'),
+        ('user_agent', 'agent {}'),
+        ('timestamp', 'at {}'),
+    ),
+    'server': (
+        ('instance_name', '{}'),
+        ('purpose', '{}'),
+        ('server_status', '{}'),
+        ('os', '{}'),
+        ('cpu', '{} vCPU'),
+        ('memory', '{} GB memory'),
+        ('disk', '{} GB disk'),
+        ('service_name', 'service {}'),
+        ('department', '{} department'),
+        ('location', 'in {}'),
+        ('ip_address', 'ip {}'),
+        ('registration_date', 'registered {:.10}'),
+        ('last_updated', 'updated {:.10}'),
+    ),
+}
+TEXT_SEPARATORS = {'weblog': ' ', 'server': ', '}
+
+# 필드 선택 / 순서 (쉼표 구분, 비어 있으면 TEXT_FIELDS 전체)
+#   예: ITSMS_TEXT_FIELDS_WEBLOG=method,url,status_code,user_agent
+TEXT_FIELDS_ENV = {dataset: os.environ.get(f'ITSMS_TEXT_FIELDS_{dataset.upper()}', '') for dataset in TEXT_FIELDS}
+
+
+class RecordRenderer:
+    """
+    레코드를 '필드 형식' 조각을 이어 붙인 짧은 문장으로 바꿉니다.
+    JSON 의 중괄호 / 따옴표 / 키 이름이 없어 임베딩 입력 토큰과 full_text 역색인이 작아지고, BM25 잡음이 줄어듭니다.
+
+    :param fields: (필드, 형식 문자열) 순서 리스트 — 포함할 필드와 순서를 정함
+    :param separator: 조각 사이 구분자
+    """
+    def __init__(self, fields, separator=', '):
+        self.fields = tuple(fields)
+        self.separator = separator
+
+    def __call__(self, record):
+        parts = []
+        for field, fmt in self.fields:
+            value = record.get(field)
+            if value is None or value == '':
+                continue
+            try:
+                parts.append(fmt.format(value))
+            except (ValueError, TypeError):
+                parts.append(fmt.format(str(value)))
+        return self.separator.join(parts)
+
+
+def json_text(record):
+    # 이전 방식: 레코드 전체를 JSON 문자열로
+    return json.dumps(record)
+
+
+def select_fields(dataset, names=None):
+    """
+    :param names: 포함할 필드 이름 리스트 또는 쉼표 구분 문자열 (순서 유지, None 이면 환경 변수 / 전체)
+    :return: (필드, 형식 문자열) 리스트 — TEXT_FIELDS 에 없는 필드는 '<필드 이름> {값}' 형식
+    """
+    table = dict(TEXT_FIELDS[dataset])
+    if names is None:
+        names = TEXT_FIELDS_ENV.get(dataset, '')
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    if not names:
+        return list(TEXT_FIELDS[dataset])
+    return [(name, table.get(name, name.replace('_', ' ') + ' {}')) for name in names]
+
+
+def get_renderer(dataset, text_format=None, fields=None):
+    """
+    full_text / 임베딩 입력을 만드는 함수를 반환합니다 (ingest_pipeline.run_pipeline 의 text_fn).
+
+    :param dataset: 'weblog' 또는 'server'
+    :param text_format: 'compact' (기본값: TEXT_FORMAT) 또는 'json'
+    :param fields: 포함할 필드 이름 (순서 유지, compact 에만 적용)
+    """
+    text_format = text_format or TEXT_FORMAT
+    if text_format not in TEXT_FORMATS:
+        raise ValueError(f"Unsupported text format: {text_format} (expected one of {TEXT_FORMATS})")
+    if text_format == 'json':
+        return json_text
+    return RecordRenderer(select_fields(dataset, fields), TEXT_SEPARATORS.get(dataset, ', '))
+
+
+# 메인 실행: 더미 레코드의 JSON / compact 텍스트 비교
+#   python record_text.py --dataset server --fields purpose,os,department
+if __name__ == "__main__":
+    import argparse
+    from synthetic_data import iter_records
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dataset', choices=list(TEXT_FIELDS), default='weblog')
+    parser.add_argument('--fields', default=None, help='포함할 필드 (쉼표 구분, 순서 유지)')
+    parser.add_argument('--num-records', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    render = get_renderer(args.dataset, 'compact', args.fields)
+    for record in iter_records(args.dataset, args.num_records, seed=args.seed):
+        json_version, compact_version = json_text(record), render(record)
+        print(f"json    ({len(json_version):>4} chars): {json_version}")
+        print(f"compact ({len(compact_version):>4} chars): {compact_version}")
+        print()
@@ -0,0 +1,398 @@
+import os
+import json
+import time
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from opensearchpy.exceptions import OpenSearchException
+
+
+# 전체 결과 내보내기 설정
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_KEEP_ALIVE = '2m'                       # PIT / scroll 유지 시간 (페이지 사이 간격보다 길어야 함)
+DEFAULT_SORT = [{"_doc": "asc"}]                # 정렬이 필요 없을 때 가장 저렴한 순서
+DEFAULT_SOURCE = {"excludes": ["vector_embedding"]}
+EXPORT_FORMATS = ('parquet', 'ndjson', 'arrow')
+EXPORT_EXTENSIONS = {'parquet': '.parquet', 'ndjson': '.ndjson', 'arrow': '.arrow'}
+EXPORT_MIME_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'ndjson': 'application/x-ndjson',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+# Streamlit 내보내기 최대 문서 수 (st.download_button 은 파일 전체를 메모리에 올리므로 더 큰 결과는 CLI 사용)
+UI_EXPORT_MAX_DOCS = int(os.environ.get('ITSMS_UI_EXPORT_MAX_DOCS', '50000'))
+SEARCH_BODY_KEYS = {'query', 'size', 'from', 'sort', '_source', 'aggs', 'track_total_hits'}
+
+
+def _query_of(body):
+    # search 본문 전체 / query 절만 / None 모두 허용
+    if not body:
+        return {"match_all": {}}
+    if SEARCH_BODY_KEYS & set(body):
+        return body.get('query', {"match_all": {}})
+    return body
+
+
+def _iter_pit(client, pit_id, query, page_size, source, sort, keep_alive):
+    try:
+        search_after = None
+        while True:
+            body = {
+                "size": page_size,
+                "query": query,
+                "_source": source,
+                "sort": sort,
+                "pit": {"id": pit_id, "keep_alive": keep_alive},
+                "track_total_hits": search_after is None,
+            }
+            if search_after is not None:
+                body["search_after"] = search_after
+            response = client.search(body=body)
+            # 응답마다 PIT ID 가 바뀔 수 있음
+            pit_id = response.get('pit_id', pit_id)
+            hits = response['hits']['hits']
+            if not hits:
+                return
+            yield hits, response['hits'].get('total')
+            if len(hits) < page_size:
+                return
+            search_after = hits[-1]['sort']
+    finally:
+        try:
+            client.delete_pit(body={"pit_id": [pit_id]})
+        except Exception as e:
+            print(f"Failed to delete PIT: {str(e)}")
+
+
+def _iter_scroll(client, index_name, query, page_size, source, keep_alive, slices):
+    # slices > 1 이면 slice 별로 차례대로 읽음 (여러 프로세스에 slice 를 나눠 줄 때도 같은 결과)
+    for slice_id in range(slices):
+        body = {"size": page_size, "query": query, "_source": source, "sort": ["_doc"]}
+        if slices > 1:
+            body["slice"] = {"id": slice_id, "max": slices}
+        response = client.search(index=index_name, body=body, scroll=keep_alive)
+        scroll_ids = set()
+        try:
+            while True:
+                scroll_id = response.get('_scroll_id')
+                if scroll_id:
+                    scroll_ids.add(scroll_id)
+                hits = response['hits']['hits']
+                if not hits:
+                    break
+                yield hits, response['hits'].get('total') if slices == 1 else None
+                response = client.scroll(body={"scroll": keep_alive, "scroll_id": scroll_id})
+        finally:
+            if scroll_ids:
+                try:
+                    client.clear_scroll(body={"scroll_id": list(scroll_ids)})
+                except Exception as e:
+                    print(f"Failed to clear scroll: {str(e)}")
+
+
+def iter_result_pages(client, index_name, body=None, page_size=DEFAULT_PAGE_SIZE, source=DEFAULT_SOURCE,
+                      sort=None, keep_alive=DEFAULT_KEEP_ALIVE, slices=1, method='auto', max_docs=None):
+    """
+    검색 조건에 맞는 문서 전체를 페이지 단위로 하나씩 가져옵니다 (size 제한 없음).
+    point-in-time + search_after 를 사용하고, PIT 를 지원하지 않으면 (sliced) scroll 을 사용합니다.
+    페이지는 필요할 때 요청하므로 전체 결과를 메모리에 올리지 않습니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param body: 검색 본문 또는 query 절 (size / from 은 무시)
+    :param page_size: 페이지당 문서 수
+    :param source: _source 필터 (기본값: 벡터 필드 제외)
+    :param sort: search_after 정렬 (기본값: _doc)
+    :param keep_alive: PIT / scroll 유지 시간
+    :param slices: scroll 사용 시 slice 수
+    :param method: 'auto', 'pit' 또는 'scroll'
+    :param max_docs: 최대 문서 수 (None 이면 전체)
+    :return: hits 리스트를 페이지마다 yield 하는 제너레이터
+    """
+    query = _query_of(body)
+    sort = sort or (body or {}).get('sort') or DEFAULT_SORT
+
+    def pages():
+        if method in ('auto', 'pit'):
+            try:
+                pit_id = client.create_pit(index=index_name, keep_alive=keep_alive)['pit_id']
+            except OpenSearchException as e:
+                # PIT 미지원 (예: 일부 Serverless 컬렉션) → scroll
+                if method == 'pit':
+                    raise
+                print(f"Point-in-time search unavailable ({str(e)}), falling back to scroll.")
+            else:
+                yield from _iter_pit(client, pit_id, query, page_size, source, sort, keep_alive)
+                return
+        yield from _iter_scroll(client, index_name, query, page_size, source, keep_alive, slices)
+
+    yielded = 0
+    expected = None
+    started = False
+    for hits, total in pages():
+        if not started:
+            started = True
+            if isinstance(total, dict) and total.get('relation') == 'eq':
+                expected = total['value']
+        if max_docs is not None and yielded + len(hits) >= max_docs:
+            yield hits[:max_docs - yielded]
+            return
+        yielded += len(hits)
+        yield hits
+
+    if expected is not None and yielded != expected:
+        print(f"Warning: exported {yielded} documents but the search matched {expected}. "
+              "Pass a sort on a unique field for a stable search_after order.")
+
+
+def iter_documents(client, index_name, body=None, **kwargs):
+    """
+    iter_result_pages() 의 문서 단위 버전입니다.
+    """
+    for hits in iter_result_pages(client, index_name, body, **kwargs):
+        yield from hits
+
+
+def _rows(hits, include_id=True):
+    rows = []
+    for hit in hits:
+        row = dict(hit.get('_source', {}))
+        if include_id:
+            row['_id'] = hit['_id']
+        rows.append(row)
+    return rows
+
+
+def _merge_field(field, other):
+    # 숫자 / 정수·실수 / null 차이는 넓은 타입으로, 합칠 수 없는 타입 (숫자 / 문자열 등) 은 문자열로
+    try:
+        return pa.unify_schemas([pa.schema([field]), pa.schema([other])], promote_options='permissive').field(0)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.field(field.name, pa.string())
+
+
+def merge_schemas(schema, other):
+    """
+    두 페이지의 스키마를 합칩니다 (필드 순서는 처음 나온 순서, 새 필드는 뒤에 추가).
+    """
+    if schema is None:
+        return other
+    fields = {field.name: field for field in schema}
+    for field in other:
+        fields[field.name] = _merge_field(fields[field.name], field) if field.name in fields else field
+    return pa.schema(list(fields.values()))
+
+
+def _json_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def conform_batch(batch, schema):
+    """
+    RecordBatch 를 스키마에 맞춥니다 (없는 필드는 null, 타입은 변환, 변환할 수 없는 값은 JSON 문자열).
+    """
+    columns = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+            continue
+        column = batch.column(index)
+        try:
+            columns.append(column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            values = column.to_pylist()
+            try:
+                columns.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                columns.append(pa.array([_json_text(value) for value in values], type=pa.string()))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def iter_record_batches(pages, schema=None, include_id=True):
+    """
+    페이지를 Arrow RecordBatch 로 변환합니다.
+    schema 가 없으면 모든 페이지의 스키마를 합친 스키마를 사용합니다 (merge_schemas()). 파일 writer 는 처음에
+    스키마가 정해져야 하므로, 페이지를 임시 Arrow 파일에 쓰면서 스키마를 합친 뒤 다시 읽어 맞춥니다
+    (메모리에는 한 페이지만 올림). 나중 페이지에만 있는 필드도 빠지지 않고, 타입이 달라도 중간에 실패하지 않습니다.
+    """
+    if schema is not None:
+        for hits in pages:
+            rows = _rows(hits, include_id)
+            if rows:
+                yield conform_batch(pa.RecordBatch.from_pylist(rows), schema)
+        return
+    with tempfile.TemporaryDirectory(prefix="export-") as spool:
+        paths = []
+        for hits in pages:
+            rows = _rows(hits, include_id)
+            if not rows:
+                continue
+            batch = pa.RecordBatch.from_pylist(rows)
+            schema = merge_schemas(schema, batch.schema)
+            paths.append(os.path.join(spool, f"{len(paths)}.arrow"))
+            with pa.ipc.new_file(paths[-1], batch.schema) as writer:
+                writer.write_batch(batch)
+        for path in paths:
+            with pa.ipc.open_file(path) as reader:
+                batch = reader.get_batch(0)
+            yield conform_batch(batch, schema)
+
+
+def write_ndjson(pages, path, include_id=True):
+    count = 0
+    with open(path, 'w') as f:
+        for hits in pages:
+            for row in _rows(hits, include_id):
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+                count += 1
+    return count
+
+
+def write_parquet(pages, path, include_id=True, compression='zstd'):
+    count = 0
+    writer = None
+    try:
+        for batch in iter_record_batches(pages, include_id=include_id):
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression=compression)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def write_arrow(pages, path, include_id=True):
+    # Arrow IPC 파일 (pyarrow.ipc.open_file / pandas 에서 바로 읽기 가능)
+    count = 0
+    writer = None
+    try:
+        for batch in iter_record_batches(pages, include_id=include_id):
+            if writer is None:
+                writer = pa.ipc.new_file(path, batch.schema)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def export_format_for(path):
+    extension = os.path.splitext(path)[1].lower()
+    return {'.parquet': 'parquet', '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+            '.arrow': 'arrow', '.feather': 'arrow'}.get(extension, 'ndjson')
+
+
+def export_matches(client, index_name, body, path, export_format=None, **kwargs):
+    """
+    검색 조건에 맞는 문서 전체를 파일로 내보냅니다.
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 인덱스 이름
+    :param body: 검색 본문 또는 query 절
+    :param path: 출력 파일 경로
+    :param export_format: 'parquet', 'ndjson' 또는 'arrow' (기본값: 확장자로 판단)
+    :param kwargs: iter_result_pages() 인자
+    :return: 내보낸 문서 수
+    """
+    export_format = export_format or export_format_for(path)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    start = time.time()
+    pages = iter_result_pages(client, index_name, body, **kwargs)
+    writer = {'parquet': write_parquet, 'ndjson': write_ndjson, 'arrow': write_arrow}[export_format]
+    count = writer(pages, path)
+    print(f"Exported {count} documents from '{index_name}' to {path} in {time.time() - start:.1f}s.")
+    return count
+
+
+def export_to_tempfile(client, index_name, body, export_format='parquet', **kwargs):
+    """
+    검색 결과 전체를 임시 파일로 내보냅니다 (Streamlit 다운로드 버튼용).
+    호출한 쪽에서 사용 후 파일을 삭제해야 합니다. 다운로드 버튼은 파일 전체를 메모리에 올리므로
+    max_docs=UI_EXPORT_MAX_DOCS 로 제한하고, 더 큰 결과는 export_cli_hint() 의 명령으로 내보내세요.
+
+    :return: (파일 경로, 내보낸 문서 수)
+    """
+    fd, path = tempfile.mkstemp(prefix=f"{index_name}-", suffix=EXPORT_EXTENSIONS[export_format])
+    os.close(fd)
+    try:
+        count = export_matches(client, index_name, body, path, export_format, **kwargs)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, count
+
+
+def export_cli_hint(index_name, body, export_format='parquet'):
+    """
+    UI 제한을 넘는 결과를 파일로 바로 내보내는 CLI 명령입니다 (메모리에 올리지 않고 페이지마다 씀).
+    """
+    query = json.dumps(_query_of(body), ensure_ascii=False).replace("'", "'\\''")
+    output = f"{index_name.rstrip('-*').split(',')[0]}{EXPORT_EXTENSIONS[export_format]}"
+    return f"python result_export.py --index '{index_name}' --query '{query}' --output {output}"
+
+
+def render_export_expander(client, index_name, body, note=None, resolve_index=None):
+    """
+    Streamlit 앱의 "Export all matches" 영역입니다 (형식 선택, CLI 명령, UI_EXPORT_MAX_DOCS 제한, 다운로드 버튼).
+
+    :param client: OpenSearch 클라이언트
+    :param index_name: 내보낼 인덱스 (파일 이름과 CLI 명령에 사용)
+    :param body: 검색 본문 또는 query 절
+    :param note: 제한 안내 앞에 붙일 설명 (선택)
+    :param resolve_index: 버튼을 눌렀을 때 실제로 조회할 인덱스를 돌려주는 함수 (예: weblog 파티션 라우팅)
+    """
+    import streamlit as st
+
+    with st.expander("Export all matches"):
+        limit = f"다운로드는 최대 {UI_EXPORT_MAX_DOCS:,}건이며, 더 큰 결과는 아래 명령으로 내보내세요."
+        st.caption(f"{note} {limit}" if note else limit)
+        export_format = st.selectbox("파일 형식", EXPORT_FORMATS, key="export_format")
+        st.code(export_cli_hint(index_name, body, export_format), language="bash")
+        if not st.button("Export all matches"):
+            return
+        try:
+            export_index = resolve_index() if resolve_index else index_name
+            path, count = export_to_tempfile(client, export_index, body, export_format, max_docs=UI_EXPORT_MAX_DOCS)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            finally:
+                os.remove(path)
+        except Exception as e:
+            st.error(f"Error in export: {str(e)}")
+            return
+        if count >= UI_EXPORT_MAX_DOCS:
+            st.warning(f"처음 {UI_EXPORT_MAX_DOCS:,}건만 내보냈습니다. 전체 결과는 위 명령으로 내보내세요.")
+        st.download_button(f"Download {count} documents ({export_format})", data,
+                           file_name=f"{index_name.rstrip('-*')}{EXPORT_EXTENSIONS[export_format]}",
+                           mime=EXPORT_MIME_TYPES[export_format])
+
+
+# 메인 실행: 검색 결과 전체 내보내기
+if __name__ == "__main__":
+    import argparse
+
+    from opensearch_client import get_opensearch_client
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--index', required=True)
+    parser.add_argument('--query', default=None, help='검색 본문 또는 query 절 JSON (기본값: 전체)')
+    parser.add_argument('--output', required=True, help='출력 파일 (.parquet / .ndjson / .arrow)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--method', choices=['auto', 'pit', 'scroll'], default='auto')
+    parser.add_argument('--slices', type=int, default=1, help='scroll 사용 시 slice 수')
+    parser.add_argument('--max-docs', type=int, default=None)
+    args = parser.parse_args()
+
+    export_matches(get_opensearch_client(), args.index, json.loads(args.query) if args.query else None,
+                   args.output, page_size=args.page_size, method=args.method, slices=args.slices,
+                   max_docs=args.max_docs)
@@ -0,0 +1,381 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import importlib.util
+from contextlib import contextmanager, redirect_stdout
+from unittest import mock
+
+import titan_embedding
+import llm_dsl
+import opensearch_client as opensearch_client_module
+import embedding_cache
+import search_cache
+import dsl_cache
+import index_metadata
+import weblog_partitions
+import weblog_rollups
+from hybrid_search import search_opensearch_knn, search_fusion
+from llm_dsl import generate_dsl
+from synthetic_data import iter_batches, iter_records
+from opensearch_bulk import bulk_index
+from record_text import get_renderer
+from bench_fakes import (FakeOpenSearch, FakeAsyncOpenSearch, FakeBedrockRuntime, fake_embedding, estimate_tokens,
+                         tokenize)
+
+
+# 로컬 대체 클라이언트(bench_fakes.py)로 실제 코드 경로의 처리량 / 지연 시간을 측정합니다.
+#   python run-benchmarks.py --records 2000 --output bench_results/run.json
+#   python run-benchmarks.py --baseline bench_results/run.json   (이전 결과와 비교)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HYBRID_QUERIES = [
+    "database server",
+    "web server running ubuntu",
+    "windows server finance department",
+    "backup server with large disk",
+    "application server SK Chemical",
+    "red hat file server",
+    "R&D servers in shutdown state",
+    "marketing web servers",
+]
+
+NL_QUESTIONS = [
+    "Find all linux servers that are currently running",
+    "Find all servers with more than 16GB of memory that are currently running",
+    "Show windows servers",
+    "List all servers",
+]
+
+
+@contextmanager
+def fake_aws(opensearch_client, bedrock_client):
+    """
+    공유 OpenSearch / Bedrock 클라이언트를 대체 클라이언트로 바꿉니다.
+    """
+    with mock.patch.object(opensearch_client_module, '_client', opensearch_client), \
+         mock.patch.object(opensearch_client_module, '_async_client', FakeAsyncOpenSearch(opensearch_client)), \
+         mock.patch.object(titan_embedding, '_bedrock_client', bedrock_client), \
+         mock.patch.object(llm_dsl, '_llm_client', bedrock_client), \
+         mock.patch.object(embedding_cache, '_default_cache', embedding_cache.EmbeddingCache(':memory:')), \
+         mock.patch.object(search_cache, 'GENERATIONS_PATH', ':memory:'), \
+         mock.patch.object(search_cache, '_generations_conn', None), \
+         mock.patch.object(dsl_cache, '_default_cache', dsl_cache.DslCache(':memory:')), \
+         mock.patch.object(index_metadata, '_default_metadata', index_metadata.IndexMetadataCache()), \
+         mock.patch.object(weblog_partitions, '_partition_cache', weblog_partitions.TTLCache(16, 60)):
+        yield
+
+
+def load_script(filename):
+    # 하이픈이 들어간 스크립트 파일을 모듈로 불러옴 (__main__ 블록은 실행되지 않음)
+    name = filename.replace('-', '_').removesuffix('.py')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    with redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+def latency_summary(latencies_ms):
+    ordered = sorted(latencies_ms)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(percentile(50), 3),
+        "p95_ms": round(percentile(95), 3),
+        "p99_ms": round(percentile(99), 3),
+    }
+
+
+def bench_ingestion(script, num_records, bedrock_client=None, **kwargs):
+    module = load_script(script)
+    embed_calls = bedrock_client.calls.get('embedding', 0) if bedrock_client is not None else 0
+    with redirect_stdout(io.StringIO()):
+        module.create_index_if_not_exists()
+        stats = module.index_dummy_data(num_records, **kwargs)
+    result = {
+        "records": num_records,
+        "indexed": stats.indexed,
+        "failed": stats.failed,
+        "elapsed_s": round(stats.elapsed, 3),
+        "docs_per_sec": round(stats.docs_per_sec, 1),
+    }
+    if bedrock_client is not None:
+        result["embed_calls"] = bedrock_client.calls.get('embedding', 0) - embed_calls
+    if getattr(stats, 'dedup', None):
+        result["templates"] = stats.dedup["templates"]
+        result["dedup_ratio"] = stats.dedup["dedup_ratio"]
+    return result
+
+
+def bench_generation(dataset, rows):
+    start = time.perf_counter()
+    generated = sum(batch.num_rows for batch in iter_batches(dataset, rows, seed=0))
+    elapsed = time.perf_counter() - start
+    return {"rows": generated, "elapsed_s": round(elapsed, 3), "rows_per_sec": round(generated / elapsed, 1)}
+
+
+BENCH_ROLLUP_INDEX = 'bench_weblog_rollups'   # 인덱싱 벤치마크가 쓰는 롤업과 섞이지 않도록 별도 인덱스 사용
+
+
+def _ensure_weblog_dataset(client, rows):
+    # 30일치 웹 로그를 시간 파티션에 쓰고, 같은 레코드로 롤업도 기록
+    if weblog_partitions.list_partitions(client, refresh=True):
+        return
+    weblog_partitions.ensure_template(client)
+    weblog_rollups.ensure_rollup_index(client, BENCH_ROLLUP_INDEX)
+    writer = weblog_rollups.RollupWriter(client, BENCH_ROLLUP_INDEX)
+    writer.begin()
+    records = list(iter_records('weblog', rows, seed=0, days=30))
+    docs = ({"_index": weblog_partitions.partition_index(record['timestamp'], 'hourly'), "_source": record}
+            for record in records)
+    with redirect_stdout(io.StringIO()):
+        bulk_index(client, None, docs, verbose=False)
+        for start in range(0, len(records), 1000):
+            writer.add(records[start:start + 1000])
+        writer.close()
+
+
+def bench_weblog_routing(client, rows, iterations, window_hours):
+    # 마지막 window_hours 시간 쿼리를 전체 패턴 / 라우팅으로 각각 검색 (롤업 사용 안 함)
+    _ensure_weblog_dataset(client, rows)
+    end = weblog_partitions.partition_span(weblog_partitions.list_partitions(client, refresh=True)[-1])[1]
+    start = end.timestamp() - window_hours * 3600
+    query = {"size": 0, "query": {"bool": {"filter": [{"range": {"timestamp": {
+        "gte": time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(start))}}}]}},
+        "aggs": {"status": {"terms": {"field": "status_code"}}}}
+    results = {}
+    for mode in ('full', 'routed'):
+        latencies = []
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            if mode == 'routed':
+                response = weblog_partitions.search_weblog(query, client=client, use_rollups=False)
+            else:
+                response = client.search(index=weblog_partitions.WEBLOG_PATTERN, body=query)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        results[mode] = dict(latency_summary(latencies), hits=response['hits']['total']['value'])
+    results["routed"]["targets"] = len(weblog_partitions.route_indices(client, query))
+    return results
+
+
+def bench_weblog_rollups(client, rows, iterations):
+    # 한 달 대시보드 (일별 건수 / p99 응답 시간 / 전송량, 상태 코드별 건수) 를 원본 로그와 롤업으로 각각 계산
+    _ensure_weblog_dataset(client, rows)
+    query = {"size": 0, "aggs": {
+        "per_day": {"date_histogram": {"field": "timestamp", "fixed_interval": "1d"},
+                    "aggs": {"p99": {"percentiles": {"field": "response_time", "percents": [99]}},
+                             "bytes": {"sum": {"field": "bytes_sent"}}}},
+        "by_status": {"terms": {"field": "status_code"}},
+    }}
+    results = {}
+    for mode in ('raw', 'rollup'):
+        latencies = []
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            if mode == 'rollup':
+                response = weblog_rollups.answer_from_rollups(query, client, BENCH_ROLLUP_INDEX)
+            else:
+                response = client.search(index=weblog_partitions.WEBLOG_PATTERN, body=query)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        rows_read = response['_rollup']['rows'] if mode == 'rollup' else response['hits']['total']['value']
+        results[mode] = dict(latency_summary(latencies), rows_read=rows_read,
+                             p99_first_day=response['aggregations']['per_day']['buckets'][0]['p99']['values']['99.0'])
+    return results
+
+
+# 검색 품질 평가용 질의 필드 — 레코드의 값으로 질의를 만들고, 이 필드 값이 모두 같은 문서를 정답으로 봄
+TEXT_QUERY_FIELDS = {'weblog': ('method', 'url', 'status_code'), 'server': ('purpose', 'os', 'department')}
+
+
+def bench_text_format(dataset, text_format, rows, embed_sample=50, num_queries=50, dimensions=256):
+    # full_text / 임베딩 입력 형식별 토큰 수, Titan 지연, full_text 역색인 크기, BM25 / kNN 검색 품질 (precision@10)
+    render = get_renderer(dataset, text_format)
+    records = list(iter_records(dataset, rows, seed=3))
+    texts = [render(record) for record in records]
+    tokens = [estimate_tokens(text) for text in texts]
+
+    latencies = []
+    for text in texts[:embed_sample]:
+        begin = time.perf_counter()
+        titan_embedding.embed_text(text, dimensions, use_cache=False)
+        latencies.append((time.perf_counter() - begin) * 1000)
+
+    # 검색 품질은 별도 가짜 인덱스에서 측정 (벡터는 지연 없이 fake_embedding 으로 계산)
+    client = FakeOpenSearch()
+    docs = ({"_id": str(i), "_source": dict(record, full_text=text, vector_embedding=fake_embedding(text, dimensions))}
+            for i, (record, text) in enumerate(zip(records, texts)))
+    with redirect_stdout(io.StringIO()):
+        bulk_index(client, 'text_format', docs, verbose=False)
+
+    fields = TEXT_QUERY_FIELDS[dataset]
+    precision = {"bm25": [], "knn": []}
+    for record in records[::max(1, len(records) // num_queries)][:num_queries]:
+        question = ' '.join(str(record[field]) for field in fields)
+        relevant = {str(i) for i, other in enumerate(records) if all(other[f] == record[f] for f in fields)}
+        queries = {"bm25": {"match": {"full_text": question}},
+                   "knn": {"knn": {"vector_embedding": {"vector": fake_embedding(question, dimensions), "k": 10}}}}
+        for mode, query in queries.items():
+            hits = client.search(index='text_format', body={"size": 10, "query": query})['hits']['hits']
+            found = sum(1 for hit in hits if hit['_id'] in relevant)
+            precision[mode].append(found / min(10, len(relevant)))
+
+    embed_latency = latency_summary(latencies)
+    return {
+        "records": len(records),
+        "avg_tokens": round(statistics.fmean(tokens), 1),
+        "embed_mean_ms": embed_latency["mean_ms"],
+        "embed_p95_ms": embed_latency["p95_ms"],
+        "full_text_bytes": sum(len(text.encode('utf-8')) for text in texts),
+        "postings": sum(len(set(tokenize(text))) for text in texts),
+        "vocabulary": len({token for text in texts for token in tokenize(text)}),
+        "bm25_precision_at_10": round(statistics.fmean(precision["bm25"]), 3),
+        "knn_precision_at_10": round(statistics.fmean(precision["knn"]), 3),
+    }
+
+
+def bench_hybrid_queries(client, index_name, iterations, fusion=None):
+    latencies = []
+    for _ in range(iterations):
+        for search_query in HYBRID_QUERIES:
+            start = time.perf_counter()
+            query_vector = titan_embedding.embed_text(search_query)
+            if fusion:
+                search_fusion(client, index_name, search_query, query_vector, 0.3, 0.7, method=fusion)
+            else:
+                search_opensearch_knn(client, index_name, search_query, query_vector, 0.3, 0.7)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def bench_nl_to_dsl(iterations):
+    module = load_script('get-serverinfo.py')
+    latencies = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            for question in NL_QUESTIONS:
+                start = time.perf_counter()
+                module.natural_language_search(question)
+                latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def bench_llm_dsl(iterations, stream):
+    # DSL 캐시 없이 LLM 호출만 측정 (스트리밍은 JSON 객체가 완성되면 바로 반환)
+    schema_text = index_metadata.get_index_metadata().schema_prompt('server_info')
+    latencies = []
+    for _ in range(iterations):
+        for question in NL_QUESTIONS:
+            start = time.perf_counter()
+            generate_dsl(question, schema_text, stream=stream)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    # 이전 결과 대비 변화율 출력
+    for section, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(section, {})
+        for key, value in current.items():
+            old = previous.get(key)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                print(f"  {section:24s} {key:14s} {old:>12} -> {value:>12} ({(value - old) / old * 100:+.1f}%)")
+
+
+# 메인 실행
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=2000, help='인덱싱 벤치마크 레코드 수')
+    parser.add_argument('--generate-rows', type=int, default=1_000_000, help='더미 데이터 생성 벤치마크 행 수')
+    parser.add_argument('--weblog-rows', type=int, default=50_000, help='시간 파티션 라우팅 벤치마크 웹 로그 수')
+    parser.add_argument('--text-rows', type=int, default=2000, help='문서 텍스트 형식 비교 벤치마크 레코드 수')
+    parser.add_argument('--query-iterations', type=int, default=25, help='하이브리드 검색 반복 횟수')
+    parser.add_argument('--nl-iterations', type=int, default=5, help='자연어 → DSL 반복 횟수')
+    parser.add_argument('--embed-latency-ms', type=float, default=15.0, help='가짜 Titan 호출 지연')
+    parser.add_argument('--llm-latency-ms', type=float, default=300.0, help='가짜 Claude 첫 토큰 지연')
+    parser.add_argument('--embed-token-latency-ms', type=float, default=0.1,
+                        help='가짜 Titan 입력 토큰당 추가 지연')
+    parser.add_argument('--token-latency-ms', type=float, default=5.0, help='가짜 Claude 출력 조각당 지연')
+    parser.add_argument('--search-latency-ms', type=float, default=5.0, help='가짜 OpenSearch 요청 지연')
+    parser.add_argument('--output', default=f"bench_results/run-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument('--baseline', default=None, help='비교할 이전 결과 JSON')
+    args = parser.parse_args()
+
+    opensearch_client = FakeOpenSearch(latency_ms=args.search_latency_ms)
+    bedrock_client = FakeBedrockRuntime(embed_latency_ms=args.embed_latency_ms,
+                                        llm_latency_ms=args.llm_latency_ms,
+                                        token_latency_ms=args.token_latency_ms,
+                                        embed_token_latency_ms=args.embed_token_latency_ms)
+
+    benchmarks = {}
+    with fake_aws(opensearch_client, bedrock_client):
+        print("Running data generation benchmarks...")
+        for dataset in ('weblog', 'server'):
+            benchmarks[f"generate_{dataset}"] = bench_generation(dataset, args.generate_rows)
+        print("Running ingestion benchmarks...")
+        benchmarks["ingest_server_info"] = bench_ingestion('dummy-serverinfo.py', args.records)
+        benchmarks["ingest_weblog_info"] = bench_ingestion('dummy-weblog.py', args.records)
+        # 로그 템플릿 중복 제거 전후의 Titan 호출 수 (시드가 달라 임베딩 캐시는 공유되지 않음)
+        for seed, template_dedup in ((1, False), (2, True)):
+            benchmarks[f"ingest_weblog_{'dedup' if template_dedup else 'per_line'}"] = bench_ingestion(
+                'dummy-weblog.py', args.records, bedrock_client, generator='vectorized', seed=seed,
+                template_dedup=template_dedup)
+        print("Running weblog time-range routing benchmark...")
+        for window_hours in (1, 24):
+            routing = bench_weblog_routing(opensearch_client, args.weblog_rows, args.query_iterations, window_hours)
+            benchmarks[f"weblog_{window_hours}h_full"] = routing["full"]
+            benchmarks[f"weblog_{window_hours}h_routed"] = routing["routed"]
+        print("Running weblog rollup benchmark...")
+        rollups = bench_weblog_rollups(opensearch_client, args.weblog_rows, max(1, args.query_iterations // 5))
+        benchmarks["weblog_month_raw"] = rollups["raw"]
+        benchmarks["weblog_month_rollup"] = rollups["rollup"]
+        print("Running document text format benchmark...")
+        for dataset in ('weblog', 'server'):
+            for text_format in ('json', 'compact'):
+                benchmarks[f"text_{dataset}_{text_format}"] = bench_text_format(dataset, text_format, args.text_rows)
+        print("Running hybrid query benchmark...")
+        benchmarks["hybrid_query"] = bench_hybrid_queries(opensearch_client, 'server_info', args.query_iterations)
+        for fusion in ('rrf', 'minmax'):
+            benchmarks[f"hybrid_query_{fusion}"] = bench_hybrid_queries(opensearch_client, 'server_info',
+                                                                        args.query_iterations, fusion)
+        print("Running NL-to-DSL benchmark...")
+        benchmarks["nl_to_dsl"] = bench_nl_to_dsl(args.nl_iterations)
+        benchmarks["llm_dsl_invoke"] = bench_llm_dsl(args.nl_iterations, stream=False)
+        benchmarks["llm_dsl_stream"] = bench_llm_dsl(args.nl_iterations, stream=True)
+
+    results = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "git_revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": vars(args),
+        "fake_calls": {"bedrock": bedrock_client.calls, "opensearch": opensearch_client.calls},
+        "benchmarks": benchmarks,
+    }
+    print(json.dumps(benchmarks, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(f"Compared with {args.baseline}:")
+            compare(results, json.load(f))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
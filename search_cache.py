@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from cachetools import TTLCache, LRUCache
+
+
+# 캐시 설정
+RESULT_CACHE_SIZE = 1000        # 검색 결과 캐시 최대 항목 수
+RESULT_CACHE_TTL = 300          # 검색 결과 캐시 유효 시간 (초)
+QUERY_VECTOR_CACHE_SIZE = 5000  # 검색어 벡터 캐시 최대 항목 수
+
+# 인덱스별 변경 세대 번호 저장 위치 (인덱싱 프로세스와 검색 앱이 공유)
+GENERATIONS_PATH = os.environ.get(
+    'ITSMS_INDEX_GENERATIONS',
+    os.path.join(os.path.expanduser('~'), '.cache', 'itsms', 'index_generations.sqlite')
+)
+
+_lock = threading.Lock()
+_generations_conn = None
+_result_cache = None
+_query_vector_cache = None
+
+
+def _get_generations_conn():
+    global _generations_conn
+    if _generations_conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(GENERATIONS_PATH)), exist_ok=True)
+        _generations_conn = sqlite3.connect(GENERATIONS_PATH, check_same_thread=False, timeout=10)
+        _generations_conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations (index_name TEXT PRIMARY KEY, generation INTEGER, updated_at REAL)"
+        )
+        _generations_conn.commit()
+    return _generations_conn
+
+
+def index_generation(index_name):
+    """
+    인덱스의 현재 세대 번호를 반환합니다. 인덱싱 작업이 쓸 때마다 증가합니다.
+    """
+    with _lock:
+        row = _get_generations_conn().execute(
+            "SELECT generation FROM generations WHERE index_name = ?", (index_name,)
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def bump_index_generation(index_name):
+    """
+    인덱스에 문서를 쓴 뒤 호출합니다. 다른 프로세스의 해당 인덱스 검색 결과 캐시가 무효화됩니다.
+    """
+    with _lock:
+        conn = _get_generations_conn()
+        conn.execute("""
+            INSERT INTO generations VALUES (?, 1, ?)
+            ON CONFLICT(index_name) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at
+        """, (index_name, time.time()))
+        conn.commit()
+
+
+def normalize_query(text):
+    return " ".join(text.lower().split())
+
+
+def make_result_key(index_name, search_query, filters, keyword_weight, vector_weight, size, backend=None):
+    """
+    (인덱스, 정규화한 검색어, 필터, 가중치, 결과 수, 백엔드) 조합으로 캐시 키를 만듭니다.
+    """
+    return (
+        index_name,
+        normalize_query(search_query),
+        json.dumps(filters or [], sort_keys=True),
+        round(float(keyword_weight), 4),
+        round(float(vector_weight), 4),
+        int(size),
+        backend,
+    )
+
+
+def make_dashboard_key(index_name, filters):
+    """
+    대시보드 집계 캐시 키입니다. 집계는 검색어와 무관하므로 (인덱스, 필터) 만 사용합니다.
+    """
+    return (index_name, "dashboard", json.dumps(filters or [], sort_keys=True))
+
+
+class SearchResultCache:
+    """
+    프로세스 전체에서 공유하는 검색 결과 캐시입니다 (TTL + 최대 크기).
+    항목에 인덱스 세대 번호를 함께 저장하여, 인덱싱 이후의 조회는 캐시를 사용하지 않습니다.
+    """
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        generation = index_generation(key[0])
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == generation:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        generation = index_generation(key[0])
+        with self._lock:
+            self._cache[key] = (generation, value)
+
+    def invalidate(self, index_name=None):
+        """
+        인덱스의 캐시 항목을 삭제합니다. index_name 이 없으면 전체를 삭제합니다.
+        """
+        with self._lock:
+            if index_name is None:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if key[0] == index_name]:
+                self._cache.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class QueryVectorCache:
+    """
+    검색어 임베딩 벡터 캐시입니다. 가중치나 필터만 바뀐 검색은 임베딩을 다시 요청하지 않습니다.
+    """
+    def __init__(self, maxsize=QUERY_VECTOR_CACHE_SIZE):
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get_or_create(self, text, dimensions, embed_fn):
+        key = (normalize_query(text), dimensions)
+        with self._lock:
+            vector = self._cache.get(key)
+        if vector is None:
+            vector = embed_fn(text, dimensions=dimensions)
+            with self._lock:
+                self._cache[key] = vector
+        return vector
+
+
+def get_result_cache():
+    global _result_cache
+    with _lock:
+        if _result_cache is None:
+            _result_cache = SearchResultCache()
+    return _result_cache
+
+
+def get_query_vector_cache():
+    global _query_vector_cache
+    with _lock:
+        if _query_vector_cache is None:
+            _query_vector_cache = QueryVectorCache()
+    return _query_vector_cache
@@ -0,0 +1,328 @@
+import os
+import json
+import time
+import ipaddress
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# 대량 더미 데이터 생성 설정
+SCALE_PROFILES = {
+    'xs': 1_000,
+    's': 100_000,
+    'm': 1_000_000,
+    'l': 10_000_000,
+    'xl': 100_000_000,
+}
+DEFAULT_BATCH_ROWS = 500_000        # RecordBatch 당 행 수 (메모리 사용량 기준)
+DEFAULT_START = datetime(2024, 10, 1)
+DEFAULT_DAYS = 30
+DATASETS = ('weblog', 'server')
+
+# 웹 로그 분포
+CLIENT_POOL = 50_000                # 클라이언트 IP 수 (Zipf 분포로 선택)
+URL_POOL = 2_000                    # URL 경로 수 (Zipf 분포로 선택)
+IP_ZIPF_EXPONENT = 1.1
+URL_ZIPF_EXPONENT = 1.2
+METHODS = (["GET", "POST", "PUT", "DELETE"], [0.80, 0.12, 0.05, 0.03])
+STATUS_CODES = ([200, 201, 204, 400, 401, 403, 404, 500], [0.80, 0.04, 0.03, 0.02, 0.02, 0.01, 0.06, 0.02])
+# 시간대별 상대 트래픽 (0시 ~ 23시, 새벽 4시 최저 / 오후 2시 최고)
+HOURLY_TRAFFIC = [0.25, 0.18, 0.13, 0.10, 0.09, 0.11, 0.20, 0.40, 0.70, 0.90, 0.97, 1.00,
+                  0.95, 0.98, 1.00, 0.97, 0.92, 0.85, 0.72, 0.62, 0.55, 0.48, 0.40, 0.32]
+WEEKEND_TRAFFIC = 0.6
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_6) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0 Edg/129.0",
+    "curl/8.5.0",
+    "python-requests/2.32.3",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+]
+USER_AGENT_WEIGHTS = [0.38, 0.14, 0.16, 0.12, 0.06, 0.06, 0.02, 0.02, 0.03, 0.01]
+REFERRERS = (["-", "https://www.google.com/", "https://www.naver.com/", "https://portal.example.com/",
+              "https://www.bing.com/", "https://t.co/"], [0.45, 0.25, 0.15, 0.08, 0.04, 0.03])
+URL_SECTIONS = ["api", "app", "static", "products", "orders", "users", "search", "docs", "admin", "reports"]
+URL_ACTIONS = ["list", "detail", "edit", "create", "delete", "export", "status", "summary", "history", "config"]
+
+# 서버 정보 분포
+CPU_CHOICES = ([2, 4, 8, 16, 32, 64], [0.15, 0.30, 0.25, 0.15, 0.10, 0.05])
+MEMORY_PER_CPU = ([2, 4, 8], [0.25, 0.50, 0.25])    # 코어당 메모리 (GB), 결과는 4 ~ 128GB 로 제한
+OS_CHOICES = (["Ubuntu 20.04", "CentOS 7", "Windows Server 2019", "Red Hat Enterprise Linux 8"],
+              [0.40, 0.20, 0.25, 0.15])
+PURPOSES = (["Web Server", "Database Server", "Application Server", "File Server", "Backup Server"],
+            [0.30, 0.20, 0.30, 0.10, 0.10])
+# 용도별 디스크 크기 후보 (GB)
+PURPOSE_DISKS = {
+    "Web Server": [100, 200],
+    "Database Server": [500, 1000, 2000],
+    "Application Server": [100, 200, 500],
+    "File Server": [1000, 2000],
+    "Backup Server": [1000, 2000],
+}
+COMPANIES = (["SK Discovery", "SK Chemical", "SK GAS"], [0.4, 0.35, 0.25])
+DEPARTMENTS = (["IT", "Finance", "HR", "Marketing", "Sales", "R&D"], [0.35, 0.12, 0.08, 0.12, 0.13, 0.20])
+SERVER_STATUSES = (["running", "shutdown", "stop"], [0.85, 0.05, 0.10])
+LOCATIONS = ["Seoul", "Busan", "Incheon", "Daejeon", "Ulsan", "Pangyo", "Singapore", "Tokyo",
+             "Frankfurt", "Virginia", "Oregon", "Sydney"]
+
+
+def rows_for(profile_or_rows):
+    """
+    스케일 프로파일 이름 ('xs' ~ 'xl') 또는 행 수를 행 수로 바꿉니다.
+    """
+    if isinstance(profile_or_rows, str) and profile_or_rows in SCALE_PROFILES:
+        return SCALE_PROFILES[profile_or_rows]
+    return int(profile_or_rows)
+
+
+def _epoch_seconds(moment):
+    # naive datetime 은 UTC 로 취급 (실행 환경의 시간대와 무관하게 같은 데이터)
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
+
+
+def _ipv4_strings(addresses):
+    octets = [pc.cast(pa.array((addresses >> shift) & 255), pa.string()) for shift in (24, 16, 8, 0)]
+    return pc.binary_join_element_wise(*octets, '.')
+
+
+def _rng(seed, batch_index):
+    # 배치마다 독립적인 난수 스트림 (같은 시드 / batch_rows 면 중간 배치부터 같은 데이터를 다시 만들 수 있음)
+    return np.random.default_rng([seed, batch_index])
+
+
+def _categorical(rng, choices, size):
+    values, weights = choices
+    weights = np.asarray(weights, dtype='float64')
+    indices = np.searchsorted(np.cumsum(weights / weights.sum()), rng.random(size), side='right')
+    return pa.array(values).take(pa.array(np.minimum(indices, len(values) - 1)))
+
+
+def _zipf_ranks(rng, pool_size, exponent, size):
+    # 순위 k 의 확률이 1 / k^exponent 에 비례 (CDF 역변환)
+    cdf = np.cumsum(1.0 / np.arange(1, pool_size + 1) ** exponent)
+    return np.minimum(np.searchsorted(cdf / cdf[-1], rng.random(size), side='right'), pool_size - 1)
+
+
+def _ip_pool(seed, size):
+    # 순위별 클라이언트 IP (시드마다 고정된 공인 대역 주소)
+    rng = np.random.default_rng([seed, 2**31])
+    addresses = rng.integers(int(ipaddress.IPv4Address('1.0.0.0')), int(ipaddress.IPv4Address('223.255.255.255')),
+                             size=size, dtype='uint64')
+    return _ipv4_strings(addresses.astype('int64'))
+
+
+def _url_pool(seed, size):
+    rng = np.random.default_rng([seed, 2**31 + 1])
+    sections = rng.integers(0, len(URL_SECTIONS), size)
+    actions = rng.integers(0, len(URL_ACTIONS), size)
+    ids = rng.integers(1, 100_000, size)
+    return pa.array([f"/{URL_SECTIONS[s]}/{URL_ACTIONS[a]}" + (f"/{i}" if i % 3 else "")
+                     for s, a, i in zip(sections, actions, ids)])
+
+
+def _traffic_cdf(start, days):
+    # 분 단위 상대 트래픽의 누적 분포 (하루 주기 + 주말 감소)
+    minutes = np.arange(days * 1440)
+    hours = (minutes // 60) % 24
+    weekdays = (start.weekday() + minutes // 1440) % 7
+    intensity = np.asarray(HOURLY_TRAFFIC)[hours] * np.where(weekdays >= 5, WEEKEND_TRAFFIC, 1.0)
+    cdf = np.concatenate([[0.0], np.cumsum(intensity)])
+    return cdf / cdf[-1]
+
+
+class _WeblogContext:
+    def __init__(self, seed, total_rows, start, days):
+        self.seed = seed
+        self.total_rows = total_rows
+        self.start_ms = _epoch_seconds(start) * 1000
+        self.cdf = _traffic_cdf(start, days)
+        self.ips = _ip_pool(seed, CLIENT_POOL)
+        self.urls = _url_pool(seed, URL_POOL)
+
+
+def _weblog_batch(context, batch_index, offset, size):
+    rng = _rng(context.seed, batch_index)
+    # 전체 구간의 트래픽 분포에서 행 순서대로 시각을 배정하므로 timestamp 는 전체적으로 정렬됨
+    quantiles = (offset + np.arange(size) + rng.random(size)) / context.total_rows
+    minutes = np.interp(quantiles, context.cdf, np.arange(len(context.cdf)))
+    timestamps = context.start_ms + (minutes * 60_000).astype('int64')
+
+    status = np.asarray(_categorical(rng, STATUS_CODES, size))
+    # 응답 시간: 로그 정규 분포 (중앙값 120ms, 긴 꼬리), 5xx 는 느림
+    response_time = rng.lognormal(np.log(0.12), 0.9, size) * np.where(status >= 500, 8.0, 1.0)
+    response_time = np.round(np.minimum(response_time, 30.0), 3)
+    bytes_sent = rng.lognormal(np.log(2500), 0.8, size).astype('int64')
+    bytes_sent = np.where(status == 204, 0, np.where(status >= 400, np.minimum(bytes_sent, 600), bytes_sent))
+
+    return pa.RecordBatch.from_pydict({
+        "timestamp": pa.array(timestamps, type=pa.timestamp('ms')),
+        "ip_address": context.ips.take(pa.array(_zipf_ranks(rng, CLIENT_POOL, IP_ZIPF_EXPONENT, size))),
+        "method": _categorical(rng, METHODS, size),
+        "url": context.urls.take(pa.array(_zipf_ranks(rng, URL_POOL, URL_ZIPF_EXPONENT, size))),
+        "status_code": pa.array(status.astype('int32')),
+        "user_agent": _categorical(rng, (USER_AGENTS, USER_AGENT_WEIGHTS), size),
+        "referrer": _categorical(rng, REFERRERS, size),
+        "response_time": pa.array(response_time),
+        "bytes_sent": pa.array(bytes_sent),
+    })
+
+
+def _server_batch(seed, batch_index, offset, size, start):
+    rng = _rng(seed, batch_index)
+    numbers = offset + np.arange(size)
+    cpu = np.asarray(_categorical(rng, CPU_CHOICES, size))
+    memory = np.clip(cpu * np.asarray(_categorical(rng, MEMORY_PER_CPU, size)), 4, 128)
+    purpose = _categorical(rng, PURPOSES, size)
+    disk = np.zeros(size, dtype='int64')
+    purpose_values = np.asarray(purpose.to_numpy(zero_copy_only=False))
+    for name, disks in PURPOSE_DISKS.items():
+        mask = purpose_values == name
+        disk[mask] = rng.choice(disks, int(mask.sum()))
+
+    start_s = _epoch_seconds(start)
+    registered = start_s - rng.integers(0, 2 * 365 * 86400, size)
+    updated = registered + (rng.random(size) * (start_s - registered)).astype('int64')
+    # 10.0.0.0/8 대역에서 서버 번호 순서대로 사설 IP 배정
+    ip_address = _ipv4_strings(int(ipaddress.IPv4Address('10.0.1.0')) + numbers)
+
+    return pa.RecordBatch.from_pydict({
+        # 번호 순서대로 만든 고유 이름 (문서 ID 충돌 없음)
+        "instance_name": pc.binary_join_element_wise(
+            "srv", pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width=7, padding='0'), '-'),
+        "cpu": pa.array(cpu.astype('int32')),
+        "memory": pa.array(memory.astype('int32')),
+        "disk": pa.array(disk.astype('int32')),
+        "os": _categorical(rng, OS_CHOICES, size),
+        "purpose": purpose,
+        "service_name": _categorical(rng, COMPANIES, size),
+        "ip_address": ip_address,
+        "location": pa.array(LOCATIONS).take(pa.array(_zipf_ranks(rng, len(LOCATIONS), 1.0, size))),
+        "department": _categorical(rng, DEPARTMENTS, size),
+        "last_updated": pa.array(updated, type=pa.timestamp('s')),
+        "registration_date": pa.array(registered, type=pa.timestamp('s')),
+        "server_status": _categorical(rng, SERVER_STATUSES, size),
+    })
+
+
+def iter_batches(dataset, rows, seed=0, batch_rows=DEFAULT_BATCH_ROWS, start=DEFAULT_START, days=DEFAULT_DAYS,
+                 first_row=0):
+    """
+    더미 데이터를 Arrow RecordBatch 단위로 생성합니다 (numpy 벡터 연산, 시드 고정).
+
+    :param dataset: 'weblog' 또는 'server'
+    :param rows: 전체 행 수 또는 스케일 프로파일 ('xs' / 's' / 'm' / 'l' / 'xl')
+    :param seed: 난수 시드 (같은 시드 / 행 수 / batch_rows 면 같은 데이터)
+    :param batch_rows: 배치당 행 수
+    :param start: 웹 로그 시작 시각 / 서버 등록일 기준 시각
+    :param days: 웹 로그 기간 (일)
+    :param first_row: 이 행부터 생성 (batch_rows 의 배수, 재시작용)
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    total_rows = rows_for(rows)
+    context = _WeblogContext(seed, total_rows, start, days) if dataset == 'weblog' else None
+    for offset in range(first_row, total_rows, batch_rows):
+        size = min(batch_rows, total_rows - offset)
+        batch_index = offset // batch_rows
+        if dataset == 'weblog':
+            yield _weblog_batch(context, batch_index, offset, size)
+        else:
+            yield _server_batch(seed, batch_index, offset, size, start)
+
+
+def _iso_batch(batch):
+    # JSON / OpenSearch 용으로 timestamp 열을 ISO 8601 문자열로 변환
+    columns = []
+    for field, column in zip(batch.schema, batch.columns):
+        if pa.types.is_timestamp(field.type):
+            column = pc.strftime(column, format='%Y-%m-%dT%H:%M:%S')
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def iter_records(dataset, rows, seed=0, **kwargs):
+    """
+    iter_batches() 의 레코드(dict) 버전입니다. ingest_pipeline.run_pipeline() 에 바로 넘길 수 있습니다.
+    """
+    for batch in iter_batches(dataset, rows, seed, **kwargs):
+        yield from _iso_batch(batch).to_pylist()
+
+
+def write_parquet(batches, path, compression='zstd'):
+    count = 0
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression=compression)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def write_ndjson(batches, path):
+    count = 0
+    with open(path, 'w') as f:
+        for batch in batches:
+            # pandas 의 C 구현 JSON 직렬화 사용 (dict 변환보다 훨씬 빠름)
+            if not batch.num_rows:
+                continue
+            text = _iso_batch(batch).to_pandas().to_json(orient='records', lines=True, force_ascii=False)
+            f.write(text if text.endswith("\n") else text + "\n")
+            count += batch.num_rows
+    return count
+
+
+def generate_to_file(dataset, rows, path, seed=0, **kwargs):
+    """
+    더미 데이터를 Parquet 또는 NDJSON 파일로 저장합니다 (확장자로 판단).
+
+    :return: 저장한 행 수
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    start = time.time()
+    batches = iter_batches(dataset, rows, seed, **kwargs)
+    writer = write_parquet if path.endswith('.parquet') else write_ndjson
+    count = writer(batches, path)
+    elapsed = time.time() - start
+    print(f"Generated {count} {dataset} rows to {path} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s).")
+    return count
+
+
+# 메인 실행: 대량 더미 데이터 생성
+#   python synthetic_data.py weblog --rows l --seed 42 --output data/weblog.parquet
+#   python synthetic_data.py server --rows 100000 --output data/server.ndjson
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dataset', choices=DATASETS)
+    parser.add_argument('--rows', default='m', help=f"행 수 또는 프로파일 ({', '.join(SCALE_PROFILES)})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument('--start', default=DEFAULT_START.date().isoformat(), help='웹 로그 시작일 (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='웹 로그 기간 (일)')
+    parser.add_argument('--output', default=None, help='출력 파일 (.parquet / .ndjson, 없으면 생성 속도만 측정)')
+    args = parser.parse_args()
+
+    options = dict(seed=args.seed, batch_rows=args.batch_rows,
+                   start=datetime.fromisoformat(args.start), days=args.days)
+    if args.output:
+        generate_to_file(args.dataset, args.rows, args.output, **options)
+    else:
+        started = time.time()
+        generated = sum(batch.num_rows for batch in iter_batches(args.dataset, args.rows, **options))
+        elapsed = time.time() - started
+        print(json.dumps({"rows": generated, "elapsed_s": round(elapsed, 3),
+                          "rows_per_sec": round(generated / max(elapsed, 1e-9))}))
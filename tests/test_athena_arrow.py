@@ -0,0 +1,74 @@
+import pytest
+
+from athena_arrow import can_unload, fetch_arrow, format_for_llm
+from bench_fakes import FakeAthena
+
+SERVERS = [{"instance_name": f"srv-{i:02d}", "os": "Ubuntu" if i % 2 else "CentOS", "cpu": i} for i in range(10)]
+
+
+@pytest.fixture
+def athena():
+    athena = FakeAthena()
+    athena.register_table("server_info", SERVERS)
+    return athena
+
+
+@pytest.fixture
+def fetch(tmp_path, athena):
+    def fetch(sql, max_rows=None):
+        return fetch_arrow(sql, max_rows, staging_dir=str(tmp_path), client=athena)
+    return fetch
+
+
+@pytest.mark.parametrize("sql, unload", [
+    ("SELECT * FROM server_info", True),
+    ("  (WITH t AS (SELECT 1) SELECT * FROM t)", True),
+    ("SELECT * FROM server_info ORDER BY cpu", False),
+    ("SHOW TABLES", False),
+])
+def test_can_unload(sql, unload):
+    assert can_unload(sql) == unload
+
+
+def test_select_is_unloaded_to_parquet(athena, fetch):
+    table, total = fetch('SELECT instance_name, cpu FROM "itsms"."server_info" WHERE cpu >= 4;')
+    assert athena.calls == {"query": 0, "unload": 1}
+    assert total == 6
+    assert sorted(table.column("cpu").to_pylist()) == [4, 5, 6, 7, 8, 9]
+
+
+def test_unload_row_cap_keeps_total(fetch):
+    table, total = fetch("SELECT * FROM server_info", max_rows=3)
+    assert (table.num_rows, total) == (3, 10)
+
+
+def test_empty_unload_result(athena, fetch):
+    # 0 행이면 UNLOAD 가 파일을 쓰지 않음 → 컬럼 없는 빈 테이블
+    table, total = fetch("SELECT * FROM server_info WHERE cpu > 100")
+    assert athena.calls["unload"] == 1
+    assert (table.num_rows, total) == (0, 0)
+    assert format_for_llm(table, total) == "\n(0 rows)"
+
+
+def test_ordered_select_reads_csv_result(athena, fetch):
+    # ORDER BY 는 UNLOAD 로 순서가 보장되지 않으므로 결과 CSV 를 읽음
+    table, total = fetch("SELECT instance_name, cpu FROM server_info ORDER BY cpu DESC", max_rows=2)
+    assert athena.calls == {"query": 1, "unload": 0}
+    assert total == 10
+    assert table.to_pylist() == [{"instance_name": "srv-09", "cpu": 9}, {"instance_name": "srv-08", "cpu": 8}]
+
+
+def test_show_tables_reads_text_result(athena, fetch):
+    table, total = fetch("SHOW TABLES")
+    assert table.column("result").to_pylist() == ["server_info"]
+
+
+def test_failed_query_raises(fetch):
+    with pytest.raises(RuntimeError, match="failed"):
+        fetch("SELECT * FROM missing_table")
+
+
+def test_format_for_llm_reports_omitted_rows(fetch):
+    table, total = fetch("SELECT instance_name, cpu FROM server_info ORDER BY cpu", max_rows=2)
+    assert format_for_llm(table, total, max_rows=2) == (
+        "instance_name | cpu\nsrv-00 | 0\nsrv-01 | 1\n... (8 more rows, 10 total)")
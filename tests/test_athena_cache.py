@@ -0,0 +1,79 @@
+import pytest
+
+import athena_cache
+from athena_cache import AthenaCache, referenced_tables
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("SELECT os, count(*) FROM server_info GROUP BY os", ["server_info"]),
+    ('SELECT * FROM "itsms"."server_info" JOIN itsms.weblog_info ON 1 = 1', ["server_info", "weblog_info"]),
+    # 쉼표로 나열한 테이블 (ON 뒤의 같은 깊이 쉼표 포함)
+    ("SELECT * FROM server_info s, weblog_info w WHERE s.ip_address = w.ip_address", ["server_info", "weblog_info"]),
+    ("SELECT * FROM a JOIN b ON a.id = b.id, c", ["a", "b", "c"]),
+    ("SELECT * FROM (a JOIN b ON a.id = b.id), c", ["a", "b", "c"]),
+    # 서브쿼리 안의 테이블
+    ("SELECT * FROM (SELECT * FROM a) x, b WHERE x.id IN (SELECT id FROM c)", ["a", "b", "c"]),
+    # 함수 인자 안의 FROM 은 테이블이 아님
+    ("SELECT extract(year FROM ts) AS y, count(*) FROM weblog_info GROUP BY 1", ["weblog_info"]),
+    ("SELECT substring(url FROM 2 FOR 5), trim(both '/' FROM url) FROM weblog_info", ["weblog_info"]),
+    # WITH 로 정의한 이름 / UNNEST / 문자열 / 주석
+    ("WITH recent AS (SELECT * FROM weblog_info) SELECT * FROM recent, server_info", ["server_info", "weblog_info"]),
+    ("SELECT * FROM server_info CROSS JOIN UNNEST(tags) AS t (tag)", ["server_info"]),
+    ("SELECT 'from a' FROM b -- FROM c\n/* JOIN d */", ["b"]),
+    ("SELECT * FROM a UNION ALL SELECT * FROM b WHERE x = 1", ["a", "b"]),
+    ("SELECT 1", []),
+])
+def test_referenced_tables(sql, tables):
+    assert referenced_tables(sql) == tables
+
+
+def test_invalidate_covers_every_joined_table():
+    cache = AthenaCache(':memory:')
+    sql = "SELECT count(*) FROM server_info s, weblog_info w WHERE s.ip_address = w.ip_address"
+    cache.put_result(sql, "42")
+    cache.invalidate("weblog_info")
+    assert cache.get_result(sql) is None
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(athena_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_result_hit_ignores_formatting(clock):
+    cache = AthenaCache(':memory:', result_ttl=60)
+    cache.put_result("SELECT os FROM server_info WHERE os = 'Ubuntu';", [["Ubuntu"]])
+    assert cache.get_result("select  os\nFROM server_info -- comment\nwhere os = 'Ubuntu'") == [["Ubuntu"]]
+    # 문자열 리터럴의 대소문자는 다른 쿼리
+    assert cache.get_result("SELECT os FROM server_info WHERE os = 'ubuntu'") is None
+    assert cache.stats()["result_hits"] == 1 and cache.stats()["result_misses"] == 1
+
+
+def test_result_and_schema_ttl(clock):
+    cache = AthenaCache(':memory:', result_ttl=60, schema_ttl=600)
+    cache.put_result("SELECT 1 FROM server_info", "1")
+    cache.put_table_info("itsms", "server_info", "CREATE TABLE server_info (os varchar)")
+    clock[0] += 59
+    assert cache.get_result("SELECT 1 FROM server_info") == "1"
+    clock[0] += 2
+    assert cache.get_result("SELECT 1 FROM server_info") is None
+    assert cache.get_table_info("itsms", "server_info") is not None
+    clock[0] += 600
+    assert cache.get_table_info("itsms", "server_info") is None
+
+
+def test_invalidate_only_touches_referenced_table():
+    cache = AthenaCache(':memory:')
+    cache.put_result("SELECT * FROM server_info", "servers")
+    cache.put_result("SELECT * FROM weblog_info", "logs")
+    cache.put_table_info("itsms", "server_info", "server schema")
+    cache.put_table_info("itsms", "weblog_info", "weblog schema")
+    cache.invalidate("Server_Info")
+    assert cache.get_result("SELECT * FROM server_info") is None
+    assert cache.get_table_info("itsms", "server_info") is None
+    assert cache.get_result("SELECT * FROM weblog_info") == "logs"
+    assert cache.get_table_info("itsms", "weblog_info") == "weblog schema"
+    cache.invalidate()
+    assert cache.stats()["results"] == 0 and cache.stats()["tables"] == 0
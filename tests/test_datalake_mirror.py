@@ -0,0 +1,106 @@
+import pytest
+
+import athena_cache
+from athena_cache import AthenaCache
+from bench_fakes import FakeAthena
+from datalake_mirror import SEMANTICS_NOTE, DatalakeMirror
+
+SERVERS = [
+    {"instance_name": "web-01", "os": "Ubuntu", "cpu": 5},
+    {"instance_name": "db-01", "os": "CentOS", "cpu": 2},
+]
+WEBLOGS = [
+    {"instance_name": "web-01", "url": "/orders", "status_code": 200},
+    {"instance_name": "web-01", "url": "/cart", "status_code": 500},
+]
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = AthenaCache(':memory:')
+    monkeypatch.setattr(athena_cache, '_default_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def athena():
+    athena = FakeAthena()
+    athena.register_table("server_info", SERVERS)
+    athena.register_table("weblog_info", WEBLOGS)
+    return athena
+
+
+@pytest.fixture
+def mirror(tmp_path, athena):
+    mirror = DatalakeMirror(mirror_dir=str(tmp_path / "mirror"))
+    mirror.sync_table("server_info", client=athena, staging_dir=str(tmp_path / "staging"))
+    return mirror
+
+
+def test_local_integer_division_matches_athena(mirror):
+    # Trino 와 같이 정수 / 정수는 정수 나눗셈
+    result, total, source = mirror.query("SELECT 5 / 2 AS half, cpu / 2 AS half_cpu FROM server_info ORDER BY cpu")
+    assert source == 'local'
+    assert result.to_pylist() == [{"half": 2, "half_cpu": 1}, {"half": 2, "half_cpu": 2}]
+
+
+@pytest.mark.parametrize("sql, count", [
+    ("SELECT count(*) AS n FROM server_info s, weblog_info w WHERE s.instance_name = w.instance_name", 2),
+    ("SELECT count(*) AS n FROM server_info s JOIN weblog_info w ON s.instance_name = w.instance_name", 2),
+    ("SELECT count(*) AS n FROM server_info WHERE instance_name IN (SELECT instance_name FROM weblog_info)", 1),
+])
+def test_stale_second_table_runs_on_athena(tmp_path, athena, mirror, sql, count):
+    staging_dir = str(tmp_path / "staging")
+    mirror.sync_table("weblog_info", client=athena, staging_dir=staging_dir)
+    assert mirror.is_local(sql)
+    # 두 번째 테이블만 오래됨 → 첫 테이블이 신선해도 Athena 로 조회
+    mirror._save_entry("weblog_info", dict(mirror._manifest["weblog_info"], synced_at=0))
+    assert not mirror.is_local(sql)
+    result, _, source = mirror.query(sql, client=athena, staging_dir=staging_dir)
+    assert source == 'athena'
+    assert result.column("n").to_pylist() == [count]
+
+
+def test_fresh_mirror_runs_locally(tmp_path, athena, mirror):
+    sql = "SELECT os, count(*) AS n FROM itsms.server_info GROUP BY os ORDER BY os"
+    calls = dict(athena.calls)
+    result, total, source = mirror.query(sql, client=athena, staging_dir=str(tmp_path / "staging"))
+    assert source == 'local' and athena.calls == calls
+    assert result.to_pylist() == [{"os": "CentOS", "n": 1}, {"os": "Ubuntu", "n": 1}]
+    assert mirror.fetch_for_llm(sql).endswith(f"({SEMANTICS_NOTE})")
+
+
+def test_concat_is_not_run_locally(mirror):
+    # concat() 은 NULL 처리가 Trino 와 달라 미러가 신선해도 Athena 로 조회
+    assert mirror.is_local("SELECT instance_name FROM server_info")
+    assert not mirror.is_local("SELECT CONCAT (instance_name, os) FROM server_info")
+
+
+@pytest.mark.parametrize("sql, reason", [
+    ("SELECT count(*) AS n FROM weblog_info", "not mirrored"),
+    ("SELECT count(*) AS n FROM server_info", "stale"),
+])
+def test_falls_back_to_athena(tmp_path, athena, mirror, sql, reason):
+    if reason == "stale":
+        mirror.max_age = -1
+    calls = athena.calls["unload"]
+    result, total, source = mirror.query(sql, client=athena, staging_dir=str(tmp_path / "staging"))
+    assert source == 'athena' and athena.calls["unload"] == calls + 1
+    assert total == 1 and mirror.stats["athena"] == 1
+    assert f"({SEMANTICS_NOTE})" not in mirror.fetch_for_llm(sql, client=athena, staging_dir=str(tmp_path / "staging"))
+
+
+def test_local_error_falls_back_to_athena(tmp_path, athena, mirror):
+    # DuckDB 에 없는 함수 (SQLite 대체 클라이언트에는 있음)
+    sql = "SELECT iif(cpu > 1, os, '-') AS os FROM server_info WHERE cpu = 2"
+    result, _, source = mirror.query(sql, client=athena, staging_dir=str(tmp_path / "staging"))
+    assert source == 'athena'
+    assert mirror.stats == {"local": 0, "athena": 1, "fallback_errors": 1}
+    assert result.to_pylist() == [{"os": "CentOS"}]
+
+
+def test_sync_invalidates_cached_results(tmp_path, athena, mirror, cache):
+    cache.put_result("SELECT * FROM server_info", "old")
+    mirror.sync_table("server_info", client=athena, staging_dir=str(tmp_path / "staging"))
+    assert cache.get_result("SELECT * FROM server_info") is None
+    assert mirror.status()["server_info"]["rows"] == 2 and mirror.status()["server_info"]["fresh"]
@@ -0,0 +1,67 @@
+import pytest
+
+from dsl_cache import DslCache, normalize_question, schema_version
+
+DSL = {"query": {"term": {"server_status.keyword": "running"}}}
+VECTORS = {
+    "show running servers": [1.0, 0.0, 0.0],
+    "list running servers": [0.99, 0.1, 0.0],
+    "show stopped servers": [0.0, 1.0, 0.0],
+    "servers with 16gb memory": [0.0, 0.0, 1.0],
+    "servers with 32gb memory": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def cache():
+    cache = DslCache(':memory:', threshold=0.9, embed_fn=VECTORS.get)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Show running servers?", "show running servers"),
+    ("  SHOW   running, servers!", "show running servers"),
+    ("memory > 16.5GB", "memory 16.5gb"),
+])
+def test_normalize_question(question, expected):
+    assert normalize_question(question) == expected
+
+
+@pytest.mark.parametrize("question, match", [
+    ("Show running servers?", "exact"),
+    ("list running servers", "semantic"),
+    ("show stopped servers", None),
+    ("unknown question", None),
+])
+def test_lookup(cache, question, match):
+    cache.store("show running servers", "server_info", "v1", DSL)
+    result = cache.lookup(question, "server_info", "v1")
+    assert result.match == match
+    assert result.dsl == (DSL if match else None)
+
+
+def test_numbers_must_match(cache):
+    cache.store("servers with 16GB memory", "server_info", "v1", DSL)
+    assert cache.lookup("servers with 32GB memory", "server_info", "v1").dsl is None
+
+
+@pytest.mark.parametrize("index_name, version", [("weblog_info", "v1"), ("server_info", "v2")])
+def test_entries_are_scoped_by_index_and_schema(cache, index_name, version):
+    cache.store("show running servers", "server_info", "v1", DSL)
+    assert cache.lookup("show running servers", index_name, version).dsl is None
+
+
+def test_invalidate(cache):
+    cache.store("show running servers", "server_info", "v1", DSL)
+    cache.store("show running servers", "server_info", "v2", DSL)
+    cache.invalidate("server_info", "v1")
+    assert cache.lookup("show running servers", "server_info", "v1").dsl is None
+    assert cache.lookup("show running servers", "server_info", "v2").dsl == DSL
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_schema_version_changes_with_schema():
+    assert schema_version("os: keyword") == schema_version("os: keyword")
+    assert schema_version("os: keyword") != schema_version("os: text")
@@ -0,0 +1,70 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+import embedding_cache
+from bench_fakes import FakeOpenSearch
+from embedding_cache import EmbeddingCache, make_key
+
+MODEL_ID = "amazon.titan-embed-text-v2:0"
+
+
+@pytest.fixture
+def cache():
+    cache = EmbeddingCache(':memory:')
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize("other", [
+    ("other text", MODEL_ID, 1024, True),
+    ("text", "amazon.titan-embed-text-v1", 1024, True),
+    ("text", MODEL_ID, 256, True),
+    ("text", MODEL_ID, 1024, False),
+])
+def test_key_covers_model_dimensions_and_normalize(other):
+    assert make_key("text", MODEL_ID, 1024, True) == make_key("text", MODEL_ID, 1024, True)
+    assert make_key("text", MODEL_ID, 1024, True) != make_key(*other)
+
+
+def test_hit_and_miss(cache):
+    key = make_key("text", MODEL_ID, 4, True)
+    assert cache.get(key) is None
+    cache.put(key, [0.5, -0.25, 0.0, 1.0], MODEL_ID, 4)
+    assert cache.get(key) == [0.5, -0.25, 0.0, 1.0]
+    assert cache.get_many([key, "missing"]) == {key: [0.5, -0.25, 0.0, 1.0]}
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 2, 2)
+
+
+def test_failed_embeddings_are_not_stored(cache):
+    cache.put_many([("a", None), ("b", [1.0])], MODEL_ID, 1)
+    assert cache.get_many(["a", "b"]) == {"b": [1.0]}
+
+
+def test_evicts_least_recently_used(cache, monkeypatch):
+    monkeypatch.setattr(embedding_cache, 'EVICT_CHECK_INTERVAL', 1)
+    # 접근 순서가 같은 시각으로 겹치지 않도록 시계를 1초씩 증가
+    monkeypatch.setattr(embedding_cache, 'time', SimpleNamespace(time=itertools.count().__next__))
+    cache.max_entries = 10
+    for i in range(10):
+        cache.put(f"key-{i}", [float(i)], MODEL_ID, 1)
+    # key-0 을 다시 사용하면 가장 오래된 항목은 key-1
+    cache.get("key-0")
+    cache.put("key-10", [10.0], MODEL_ID, 1)
+    remaining = set(cache.get_many([f"key-{i}" for i in range(11)]))
+    # 제한의 90% 까지 비움
+    assert len(remaining) == 9
+    assert {"key-0", "key-10"} <= remaining
+    assert "key-1" not in remaining and "key-2" not in remaining
+
+
+def test_warm_from_index_skips_template_vectors(cache):
+    client = FakeOpenSearch()
+    client.index("weblog_info", {"full_text": "line one", "vector_embedding": [1.0, 0.0]})
+    # 템플릿 중복 제거로 인덱싱한 문서의 벡터는 full_text 의 임베딩이 아님
+    client.index("weblog_info", {"full_text": "line two", "vector_embedding": [0.0, 1.0], "template_id": "abc"})
+    assert cache.warm_from_index(client, "weblog_info", MODEL_ID, dimensions=2) == 1
+    assert cache.get(make_key("line one", MODEL_ID, 2, True)) == [1.0, 0.0]
+    assert cache.get(make_key("line two", MODEL_ID, 2, True)) is None
@@ -0,0 +1,68 @@
+import pytest
+from opensearchpy.exceptions import TransportError
+
+from bench_fakes import FakeAsyncOpenSearch, FakeOpenSearch
+from hybrid_search import build_knn_query, fuse_minmax, fuse_rrf, search_fusion
+
+FILTERS = [{"terms": {"os": ["Ubuntu"]}}]
+
+
+@pytest.mark.parametrize("engine, filters, expected", [
+    # 효율적 필터링을 지원하는 엔진은 knn.filter
+    ("faiss", FILTERS,
+     {"knn": {"vector_embedding": {"vector": [0.1], "k": 5, "filter": {"bool": {"filter": FILTERS}}}}}),
+    ("lucene", FILTERS,
+     {"knn": {"vector_embedding": {"vector": [0.1], "k": 5, "filter": {"bool": {"filter": FILTERS}}}}}),
+    # nmslib / 기본 엔진은 knn.filter 를 지원하지 않으므로 bool.filter 로 감쌈
+    ("nmslib", FILTERS,
+     {"bool": {"must": [{"knn": {"vector_embedding": {"vector": [0.1], "k": 5}}}], "filter": FILTERS}}),
+    (None, FILTERS,
+     {"bool": {"must": [{"knn": {"vector_embedding": {"vector": [0.1], "k": 5}}}], "filter": FILTERS}}),
+    ("faiss", None, {"knn": {"vector_embedding": {"vector": [0.1], "k": 5}}}),
+    ("nmslib", [], {"knn": {"vector_embedding": {"vector": [0.1], "k": 5}}}),
+])
+def test_build_knn_query(engine, filters, expected):
+    assert build_knn_query([0.1], 5, filters, engine) == expected
+
+
+KEYWORD = [("a", 12.0), ("b", 8.0), ("c", 2.0)]
+VECTOR = [("c", 0.9), ("a", 0.8)]
+
+
+@pytest.mark.parametrize("weights, expected", [
+    ((1.0, 1.0), ["a", "c", "b"]),
+    ((0.0, 1.0), ["c", "a", "b"]),
+])
+def test_fuse_rrf(weights, expected):
+    fused = fuse_rrf([KEYWORD, VECTOR], weights, rank_constant=60)
+    assert [doc_id for doc_id, _ in fused] == expected
+    assert dict(fused)["a"] == pytest.approx(weights[0] / 61 + weights[1] / 62)
+
+
+@pytest.mark.parametrize("weights, expected", [
+    ((0.6, 0.4), {"a": 0.6, "b": 0.36, "c": 0.4}),
+    ((1.0, 0.0), {"a": 1.0, "b": 0.6, "c": 0.0}),
+])
+def test_fuse_minmax(weights, expected):
+    fused = fuse_minmax([KEYWORD, VECTOR], weights)
+    assert dict(fused) == pytest.approx(expected)
+    assert [doc_id for doc_id, _ in fused] == sorted(expected, key=expected.get, reverse=True)
+
+
+class NoMsearchOpenSearch(FakeOpenSearch):
+    def msearch(self, body, index=None, **kwargs):
+        raise TransportError(405, "method_not_allowed")
+
+
+@pytest.mark.parametrize("client_class, transport", [(FakeOpenSearch, "msearch"), (NoMsearchOpenSearch, "async")])
+def test_search_fusion_without_msearch(monkeypatch, client_class, transport):
+    opensearch_client = pytest.importorskip("opensearch_client")
+    client = client_class()
+    for name, vector in (("web server", [1.0, 0.0]), ("database server", [0.0, 1.0]), ("mail relay", [0.7, 0.7])):
+        client.index("server_info", {"full_text": name, "vector_embedding": vector})
+    # _msearch 가 없으면 두 검색을 공유 비동기 클라이언트로 동시에 보냄
+    monkeypatch.setattr(opensearch_client, '_async_client', FakeAsyncOpenSearch(client))
+    hits, info = search_fusion(client, "server_info", "database", [0.0, 1.0], 0.5, 0.5, size=2)
+    assert info["transport"] == transport
+    assert hits[0]["_source"]["full_text"] == "database server"
+    assert client.calls.get("search", 0) == (2 if transport == "async" else 0)
@@ -0,0 +1,43 @@
+import re
+
+import pytest
+
+from bench_fakes import FakeOpenSearch
+from index_metadata import FALLBACK_SCHEMA_PROMPT, IndexMetadataCache, flatten_mapping, render_field
+from weblog_partitions import weblog_mappings
+
+
+def field_heads(lines):
+    # '- 필드 (타입 ...): 설명' → {필드: '- 필드 (타입 ...)'}
+    return {match.group(1): match.group(0) for match in (re.match(r"- (\S+) \([^)]*\)", line) for line in lines)}
+
+
+def fallback_fields(section):
+    return field_heads(FALLBACK_SCHEMA_PROMPT.split("\n\n")[section].splitlines()[1:])
+
+
+def test_fallback_matches_weblog_mapping():
+    fields = flatten_mapping(weblog_mappings()["properties"])
+    assert fallback_fields(1) == field_heads(render_field(field) for field in fields)
+
+
+def test_fallback_matches_live_server_prompt():
+    # dummy-serverinfo.py 의 매핑으로 만든 인덱스의 (값 통계 없는) 프롬프트와 필드 / 타입이 같음
+    properties = {
+        "instance_name": {"type": "keyword"}, "cpu": {"type": "integer"}, "memory": {"type": "integer"},
+        "disk": {"type": "integer"}, "os": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+        "purpose": {"type": "text"}, "service_name": {"type": "text"}, "ip_address": {"type": "ip"},
+        "location": {"type": "text"}, "department": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+        "last_updated": {"type": "date"}, "registration_date": {"type": "date"},
+        "server_status": {"type": "text", "fields": {"keyword": {"type": "keyword"}}}, "full_text": {"type": "text"},
+        "vector_embedding": {"type": "knn_vector", "dimension": 1024},
+    }
+    client = FakeOpenSearch()
+    client.indices.create(index="server_info", body={"mappings": {"properties": properties}})
+    prompt = IndexMetadataCache(client).schema_prompt("server_info")
+    assert fallback_fields(0) == field_heads(prompt.splitlines()[1:])
+
+
+@pytest.mark.parametrize("stale", ["web_log", "interger", "os (keyword)", "server_status (keyword)"])
+def test_fallback_has_no_stale_entries(stale):
+    assert stale not in FALLBACK_SCHEMA_PROMPT
@@ -0,0 +1,70 @@
+import pytest
+
+import search_cache
+import ingest_pipeline
+from bench_fakes import FakeOpenSearch
+from ingest_checkpoint import Checkpoint, make_doc_id, open_checkpoint
+from ingest_pipeline import run_pipeline
+
+RECORDS = [{"name": f"record-{i}"} for i in range(10)]
+
+
+@pytest.fixture(autouse=True)
+def generations(monkeypatch):
+    monkeypatch.setattr(search_cache, 'GENERATIONS_PATH', ':memory:')
+    monkeypatch.setattr(search_cache, '_generations_conn', None)
+
+
+def fake_embedder(fail=()):
+    """
+    fail 에 있는 텍스트는 titan_embedding.embed_texts 처럼 None 을 반환합니다.
+    """
+    calls = []
+
+    def embed_texts(texts, dimensions=1024, normalize=True):
+        texts = list(texts)
+        calls.extend(texts)
+        return [None if text in fail else [float(len(text))] for text in texts]
+
+    return embed_texts, calls
+
+
+def ingest(client, checkpoint, monkeypatch, fail=()):
+    embed_texts, calls = fake_embedder(fail)
+    monkeypatch.setattr(ingest_pipeline, 'embed_texts', embed_texts)
+    stats = run_pipeline(client, 'test', [dict(record) for record in RECORDS], text_fn=lambda r: r["name"],
+                         embed_batch_size=3, chunk_size=2, id_fn=make_doc_id, checkpoint=checkpoint,
+                         verbose=False)
+    return stats, calls
+
+
+@pytest.mark.parametrize("done", [[], [0, 1, 2], [0, 1, 2, 5, 9], list(range(10))])
+def test_resume_skips_done_records(tmp_path, monkeypatch, done):
+    path = str(tmp_path / "test.checkpoint.json")
+    checkpoint = open_checkpoint(path, 'test', seed=1)
+    if done:
+        checkpoint.mark_done(done)
+    client = FakeOpenSearch()
+    stats, calls = ingest(client, open_checkpoint(path, 'test', resume=True), monkeypatch)
+    assert calls == [record["name"] for i, record in enumerate(RECORDS) if i not in done]
+    assert stats.skipped == len(done)
+    assert Checkpoint.load(path).committed == len(RECORDS)
+
+
+def test_resume_retries_failed_embeddings(tmp_path, monkeypatch):
+    path = str(tmp_path / "test.checkpoint.json")
+    client = FakeOpenSearch()
+    failed = {"record-4", "record-7"}
+
+    stats, _ = ingest(client, open_checkpoint(path, 'test', seed=1), monkeypatch, fail=failed)
+    docs = client.store['test']["docs"]
+    # 벡터 없는 문서는 인덱싱하지 않고, 체크포인트는 첫 실패 레코드 앞에서 멈춤
+    assert stats.embed_failed == 2 and len(docs) == 8
+    assert all(doc["vector_embedding"] is not None for doc in docs.values())
+    assert Checkpoint.load(path).committed == 4
+
+    stats, calls = ingest(client, open_checkpoint(path, 'test', resume=True), monkeypatch)
+    assert sorted(calls) == sorted(failed)
+    assert stats.skipped == 8 and stats.embed_failed == 0
+    assert len(docs) == 10 and all(doc["vector_embedding"] is not None for doc in docs.values())
+    assert Checkpoint.load(path).committed == len(RECORDS)
@@ -0,0 +1,36 @@
+import pytest
+
+from llm_dsl import JsonObjectExtractor
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    (['{"query": {"match_all": {}}}'], {"query": {"match_all": {}}}),
+    (['{"query": ', '{"term": {"os": ', '"Ubuntu"}}}', ' trailing text'], {"query": {"term": {"os": "Ubuntu"}}}),
+    (['Here is the query: {"size": 10}'], {"size": 10}),
+    # 문자열 안의 괄호 / 이스케이프한 따옴표는 깊이에 포함하지 않음
+    (['{"q": "a } b { \\" c"}'], {"q": 'a } b { " c'}),
+    # 파싱할 수 없는 괄호 블록은 건너뜀
+    (['Use {placeholder} then {"size": 1}'], {"size": 1}),
+    (['{"aggs": {"x": {"terms": {"field": "os", "size": [1, 2]}}}}'],
+     {"aggs": {"x": {"terms": {"field": "os", "size": [1, 2]}}}}),
+])
+def test_extractor_returns_first_object(chunks, expected):
+    extractor = JsonObjectExtractor()
+    results = [extractor.feed(chunk) for chunk in chunks]
+    assert next(result for result in results if result is not None) == expected
+
+
+@pytest.mark.parametrize("chunks", [
+    ['{"query": {"match_all": {}}'],
+    ['no json here'],
+    [''],
+])
+def test_extractor_incomplete(chunks):
+    extractor = JsonObjectExtractor()
+    assert all(extractor.feed(chunk) is None for chunk in chunks)
+    assert extractor.text == "".join(chunks)
+
+
+def test_extractor_stops_at_first_object():
+    extractor = JsonObjectExtractor()
+    assert extractor.feed('{"a": 1}') == {"a": 1}
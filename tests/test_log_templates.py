@@ -0,0 +1,77 @@
+import pytest
+
+import log_templates
+from log_templates import TemplateDeduper, mask_text, mask_url, weblog_template
+
+
+def log(i, url="/orders/detail/123", status=200, response_time=0.2):
+    return {
+        "timestamp": f"2024-10-01T00:00:{i % 60:02d}",
+        "ip_address": f"10.0.0.{i % 256}",
+        "method": "GET",
+        "url": url,
+        "status_code": status,
+        "user_agent": f"Mozilla/5.0 Chrome/{100 + i}.0.{i}",
+        "referrer": f"https://www.example.com/page/{i}",
+        "response_time": response_time,
+        "bytes_sent": 500 + i,
+    }
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+
+    def embed_texts(texts, dimensions=1024, normalize=True):
+        calls.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(log_templates, 'embed_texts', embed_texts)
+    return calls
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("/orders/detail/123", "/orders/detail/<n>"),
+    ("Chrome/118.0.5993.88", "Chrome/<n>"),
+    ("/u/3f2a9c1e-0b4d-4a5e-9c3f-1d2e3f4a5b6c", "/u/<uuid>"),
+    ("/session/a1b2c3d4e5f6", "/session/<id>"),
+    ("/static/app", "/static/app"),
+])
+def test_mask_text(text, expected):
+    assert mask_text(text) == expected
+
+
+def test_mask_url_masks_query_values():
+    assert mask_url("/search/42?q=disk&page=2") == "/search/<n>?q=<*>&page=<*>"
+
+
+def test_template_ignores_volatile_fields():
+    assert weblog_template(log(1)) == weblog_template(log(2))
+    assert weblog_template(log(1)) != weblog_template(log(1, status=500))
+    assert weblog_template(log(1))["referrer"] == "www.example.com"
+
+
+@pytest.mark.parametrize("records, templates", [
+    ([log(i) for i in range(100)], 1),
+    ([log(i, status=[200, 404, 500][i % 3]) for i in range(90)], 3),
+    ([log(i, url=f"/orders/detail/{i}", response_time=[0.1, 1.0, 3.0][i % 3]) for i in range(60)], 3),
+    ([log(i, url=f"/page-{chr(97 + i)}") for i in range(10)], 10),
+])
+def test_dedup_ratio(embed_calls, records, templates):
+    deduper = TemplateDeduper()
+    results = deduper.embed_records(records[:len(records) // 2])
+    results += deduper.embed_records(records[len(records) // 2:])
+    stats = deduper.stats()
+    assert len(embed_calls) == stats["embedding_requests"] == stats["templates"] == templates
+    assert stats["dedup_ratio"] == round(len(records) / templates, 2)
+    assert stats["embedding_calls_saved"] == len(records) - templates
+    assert len({tid for tid, _ in results}) == templates
+    assert all(vector is not None for _, vector in results)
+
+
+def test_failed_template_is_retried(monkeypatch):
+    outcomes = [[None], [[1.0]]]
+    monkeypatch.setattr(log_templates, 'embed_texts', lambda texts, *args: outcomes.pop(0))
+    deduper = TemplateDeduper()
+    assert deduper.embed_records([log(1)])[0][1] is None
+    assert deduper.embed_records([log(2)])[0][1] == [1.0]
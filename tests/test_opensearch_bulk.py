@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from opensearchpy.exceptions import TransportError
+
+import opensearch_bulk
+from opensearch_bulk import iter_chunks, send_chunk
+
+
+class ScriptedBulkClient:
+    """
+    요청마다 미리 정한 문서별 상태 코드로 응답하는 bulk 클라이언트입니다.
+    상태 코드가 예외 객체이면 요청 전체가 실패합니다.
+    """
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def bulk(self, body):
+        lines = body.splitlines()
+        self.requests.append([json.loads(line)["name"] for line in lines[1::2]])
+        statuses = self.responses.pop(0)
+        if isinstance(statuses, Exception):
+            raise statuses
+        return {"items": [{"index": {"status": status, "error": f"status {status}"}} for status in statuses]}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(opensearch_bulk, '_backoff', lambda *args: None)
+
+
+def chunk_of(*names):
+    return next(iter_chunks([{"name": name} for name in names], 'test'))
+
+
+@pytest.mark.parametrize("responses, requests, succeeded, failed", [
+    # 429 / 503 문서만 다시 전송하고, 400 은 재시도하지 않고 실패로 기록
+    ([[201, 429, 400, 503], [201, 201]],
+     [["a", "b", "c", "d"], ["b", "d"]], ["a", "b", "d"], ["c"]),
+    ([[429, 201], [429], [201]],
+     [["a", "b"], ["a"], ["a"]], ["b", "a"], []),
+    # 재시도 횟수를 넘으면 실패
+    ([[503], [503], [503], [503]],
+     [["a"], ["a"], ["a"], ["a"]], [], ["a"]),
+    # 요청 전체가 스로틀링되면 배치 전체를 다시 전송
+    ([TransportError(429, "throttled"), [201, 201]],
+     [["a", "b"], ["a", "b"]], ["a", "b"], []),
+    ([TransportError(400, "bad request")],
+     [["a", "b"]], [], ["a", "b"]),
+])
+def test_send_chunk_retries_only_rejected_items(responses, requests, succeeded, failed):
+    client = ScriptedBulkClient(*responses)
+    ok, errors, _, _ = send_chunk(client, chunk_of("a", "b", "c", "d")[:len(requests[0])], max_retries=3)
+    assert client.requests == requests
+    assert [doc["name"] for doc, _ in ok] == succeeded
+    assert [doc["name"] for doc, _ in errors] == failed
+
+
+@pytest.mark.parametrize("chunk_size, max_chunk_bytes, sizes", [
+    (2, 10 ** 6, [2, 2, 1]),
+    (10, 10 ** 6, [5]),
+    # 바이트 제한이 문서 수보다 먼저 걸리면 작은 배치로 나눔
+    (10, 100, [2, 2, 1]),
+])
+def test_iter_chunks(chunk_size, max_chunk_bytes, sizes):
+    docs = [{"name": str(i)} for i in range(5)]
+    chunks = list(iter_chunks(docs, 'test', chunk_size, max_chunk_bytes))
+    assert [len(chunk) for chunk in chunks] == sizes
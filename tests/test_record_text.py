@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import record_text
+from record_text import RecordRenderer, get_renderer, json_text, select_fields
+
+
+WEBLOG = {"timestamp": "2024-10-01T12:00:00", "ip_address": "10.0.0.1", "method": "GET", "url": "/orders/1",
+          "status_code": 200, "response_time": 0.25, "bytes_sent": 512, "referrer": "", "user_agent": None}
+SERVER = {"instance_name": "web-01", "purpose": "web", "server_status": "running", "os": "Ubuntu 22.04",
+          "cpu": 4, "memory": 16, "disk": 100, "service_name": "shop", "department": "Sales",
+          "location": "Seoul", "ip_address": "10.0.1.5", "registration_date": "2023-05-01T09:30:00",
+          "last_updated": "2024-09-30T18:00:00"}
+
+
+@pytest.mark.parametrize("dataset, record, fields, expected", [
+    # 값이 없는 필드 (None / '') 는 건너뜀
+    ("weblog", WEBLOG, None,
+     "GET /orders/1 status 200 response time 0.25 512 bytes from 10.0.0.1 at 2024-10-01T12:00:00"),
+    # 날짜 필드는 '{:.10}' 형식으로 날짜만
+    ("server", SERVER, None,
+     "web-01, web, running, Ubuntu 22.04, 4 vCPU, 16 GB memory, 100 GB disk, service shop, Sales department, "
+     "in Seoul, ip 10.0.1.5, registered 2023-05-01, updated 2024-09-30"),
+    # fields 는 포함할 필드와 순서를 정함 (쉼표 구분 문자열 / 리스트)
+    ("weblog", WEBLOG, "status_code, method,url", "status 200 GET /orders/1"),
+    ("server", SERVER, ["department", "purpose"], "Sales department, web"),
+    # TEXT_FIELDS 에 없는 필드는 '<필드 이름> {값}'
+    ("server", dict(SERVER, owner_team="infra"), "instance_name,owner_team", "web-01, owner team infra"),
+])
+def test_compact_renderer(dataset, record, fields, expected):
+    assert get_renderer(dataset, 'compact', fields)(record) == expected
+
+
+@pytest.mark.parametrize("dataset", ["weblog", "server"])
+def test_json_renderer_keeps_record(dataset):
+    record = WEBLOG if dataset == "weblog" else SERVER
+    render = get_renderer(dataset, 'json', fields="method")
+    assert render is json_text
+    assert json.loads(render(record)) == record
+
+
+def test_compact_is_shorter_than_json():
+    render = get_renderer("weblog", 'compact')
+    assert len(render(WEBLOG)) < len(json_text(WEBLOG))
+
+
+def test_format_falls_back_to_str():
+    # 형식이 값의 타입에 맞지 않으면 문자열로 바꿔 적용
+    render = RecordRenderer([("registration_date", "registered {:.10}"), ("cpu", "{:.10} vCPU")])
+    assert render({"registration_date": "2023-05-01T09:30:00", "cpu": 4}) == "registered 2023-05-01, 4 vCPU"
+
+
+@pytest.mark.parametrize("names", [None, "", " , "])
+def test_select_fields_defaults_to_all(monkeypatch, names):
+    monkeypatch.setitem(record_text.TEXT_FIELDS_ENV, "weblog", "")
+    assert [field for field, _ in select_fields("weblog", names)][:2] == ["method", "url"]
+
+
+def test_unknown_text_format():
+    with pytest.raises(ValueError):
+        get_renderer("weblog", "yaml")
@@ -0,0 +1,146 @@
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from opensearchpy.exceptions import TransportError
+from streamlit.testing.v1 import AppTest
+
+from bench_fakes import FakeOpenSearch
+import result_export
+from result_export import (export_cli_hint, export_matches, iter_documents, iter_record_batches, iter_result_pages,
+                           merge_schemas)
+
+
+class NoPitOpenSearch(FakeOpenSearch):
+    # PIT 를 지원하지 않는 컬렉션
+    def create_pit(self, index, **kwargs):
+        raise TransportError(400, "pit not supported")
+
+
+def populate(client, count=25):
+    for i in range(count):
+        client.index("server_info", {"instance_name": f"srv-{i:03d}", "cpu": i % 4, "vector_embedding": [0.1]},
+                     id=f"id-{i:03d}")
+    return client
+
+
+@pytest.mark.parametrize("client_class, method, calls", [
+    (FakeOpenSearch, 'auto', {"create_pit", "delete_pit"}),
+    (FakeOpenSearch, 'pit', {"create_pit", "delete_pit"}),
+    (NoPitOpenSearch, 'auto', {"scroll", "clear_scroll"}),
+    (FakeOpenSearch, 'scroll', {"scroll", "clear_scroll"}),
+])
+def test_pages_cover_all_matches(client_class, method, calls):
+    client = populate(client_class())
+    pages = list(iter_result_pages(client, "server_info", {"query": {"term": {"cpu": 1}}},
+                                   page_size=2, method=method))
+    ids = [hit["_id"] for hits in pages for hit in hits]
+    assert sorted(ids) == [f"id-{i:03d}" for i in range(1, 25, 4)]
+    assert all(len(hits) <= 2 for hits in pages)
+    assert all("vector_embedding" not in hit["_source"] for hits in pages for hit in hits)
+    assert calls <= set(client.calls)
+
+
+def test_pit_sort_on_unique_field():
+    client = populate(FakeOpenSearch())
+    docs = iter_documents(client, "server_info", None, page_size=4, sort=[{"instance_name": "desc"}])
+    assert [hit["_id"] for hit in docs] == [f"id-{i:03d}" for i in reversed(range(25))]
+
+
+def test_pit_required():
+    with pytest.raises(TransportError):
+        list(iter_result_pages(populate(NoPitOpenSearch()), "server_info", method='pit'))
+
+
+@pytest.mark.parametrize("max_docs, expected", [(None, 25), (7, 7), (10, 10), (100, 25)])
+def test_max_docs(max_docs, expected):
+    client = populate(FakeOpenSearch())
+    assert len(list(iter_documents(client, "server_info", page_size=5, max_docs=max_docs))) == expected
+
+
+@pytest.mark.parametrize("filename", ["out.ndjson", "out.parquet"])
+def test_export_matches(tmp_path, filename):
+    path = str(tmp_path / filename)
+    count = export_matches(populate(FakeOpenSearch()), "server_info", {"term": {"cpu": 0}}, path, page_size=3)
+    if filename.endswith(".parquet"):
+        rows = pq.read_table(path).to_pylist()
+    else:
+        rows = [json.loads(line) for line in open(path)]
+    assert count == len(rows) == 7
+    assert {row["_id"] for row in rows} == {f"id-{i:03d}" for i in range(0, 25, 4)}
+
+
+def test_export_cli_hint():
+    assert export_cli_hint("weblog-*", {"query": {"match_all": {}}}, 'ndjson') == (
+        "python result_export.py --index 'weblog-*' --query '{\"match_all\": {}}' --output weblog.ndjson")
+
+
+def hits(*sources):
+    return [{"_id": str(i), "_source": source} for i, source in enumerate(sources)]
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    (pa.int64(), pa.float64(), pa.float64()),
+    (pa.null(), pa.string(), pa.string()),
+    (pa.int64(), pa.string(), pa.string()),
+    (pa.struct([("a", pa.int64())]), pa.struct([("b", pa.string())]), pa.struct([("a", pa.int64()), ("b", pa.string())])),
+])
+def test_merge_schemas_promotes_types(first, second, expected):
+    merged = merge_schemas(pa.schema([("x", first)]), pa.schema([("x", second), ("y", pa.bool_())]))
+    assert merged == pa.schema([("x", expected), ("y", pa.bool_())])
+
+
+def test_record_batches_unify_pages():
+    # 나중 페이지의 새 필드 / 다른 타입 (정수 → 실수, 정수 → 문자열, null → 값) 을 모든 배치에 반영
+    pages = [hits({"cpu": 4, "port": 80, "tag": None}, {"cpu": 8, "port": 443, "tag": None}),
+             hits({"cpu": 2.5, "port": "8080/tcp", "tag": "db", "owner": {"team": "infra"}})]
+    batches = list(iter_record_batches(pages, include_id=False))
+    assert len({batch.schema for batch in batches}) == 1
+    assert batches[0].schema == pa.schema([("cpu", pa.float64()), ("port", pa.string()), ("tag", pa.string()),
+                                          ("owner", pa.struct([("team", pa.string())]))])
+    assert pa.Table.from_batches(batches).to_pylist() == [
+        {"cpu": 4.0, "port": "80", "tag": None, "owner": None},
+        {"cpu": 8.0, "port": "443", "tag": None, "owner": None},
+        {"cpu": 2.5, "port": "8080/tcp", "tag": "db", "owner": {"team": "infra"}},
+    ]
+
+
+def test_record_batches_with_fixed_schema():
+    schema = pa.schema([("cpu", pa.int64()), ("os", pa.string())])
+    pages = [hits({"cpu": 4, "extra": 1}), hits({"os": {"name": "Ubuntu"}})]
+    rows = pa.Table.from_batches(list(iter_record_batches(pages, schema, include_id=False))).to_pylist()
+    assert rows == [{"cpu": 4, "os": None}, {"cpu": None, "os": '{"name": "Ubuntu"}'}]
+
+
+@pytest.mark.parametrize("filename", ["out.parquet", "out.arrow"])
+def test_export_keeps_fields_added_in_later_pages(tmp_path, filename):
+    client = populate(FakeOpenSearch(), count=4)
+    client.index("server_info", {"instance_name": "srv-new", "cpu": "8 vCPU", "owner": "infra"}, id="id-new")
+    path = str(tmp_path / filename)
+    assert export_matches(client, "server_info", None, path, page_size=2, sort=[{"instance_name": "asc"}]) == 5
+    table = pq.read_table(path) if filename.endswith(".parquet") else pa.ipc.open_file(path).read_all()
+    assert table.schema.field("cpu").type == pa.string()
+    assert table.to_pylist()[-1] == {"instance_name": "srv-new", "cpu": "8 vCPU", "owner": "infra", "_id": "id-new"}
+    assert table.to_pylist()[0]["owner"] is None
+
+
+def _export_app():
+    from bench_fakes import FakeOpenSearch
+    from result_export import render_export_expander
+
+    client = FakeOpenSearch()
+    for i in range(5):
+        client.index("server_info", {"instance_name": f"srv-{i:03d}", "cpu": i % 2}, id=f"id-{i:03d}")
+    render_export_expander(client, "server_info", {"query": {"term": {"cpu": 0}}}, note="키워드 검색 결과 전체.")
+
+
+@pytest.mark.parametrize("cap, warned", [(100, False), (2, True)])
+def test_export_expander(monkeypatch, cap, warned):
+    monkeypatch.setattr(result_export, 'UI_EXPORT_MAX_DOCS', cap)
+    at = AppTest.from_function(_export_app).run()
+    assert at.caption[0].value.startswith("키워드 검색 결과 전체. 다운로드는 최대")
+    assert "--index 'server_info'" in at.code[0].value
+    at.button[0].click().run()
+    assert not at.exception and not at.error
+    assert len(at.warning) == int(warned)
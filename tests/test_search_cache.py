@@ -0,0 +1,81 @@
+import pytest
+
+import search_cache
+from search_cache import (QueryVectorCache, SearchResultCache, bump_index_generation, make_dashboard_key,
+                          make_result_key)
+
+BASE = ("server_info", "Web  Server", [{"term": {"os": "Ubuntu"}}], 0.3, 0.7, 10, "opensearch")
+
+
+@pytest.fixture(autouse=True)
+def generations(monkeypatch):
+    monkeypatch.setattr(search_cache, 'GENERATIONS_PATH', ':memory:')
+    monkeypatch.setattr(search_cache, '_generations_conn', None)
+
+
+@pytest.mark.parametrize("same", [
+    ("server_info", "web server", [{"term": {"os": "Ubuntu"}}], 0.3, 0.7, 10, "opensearch"),
+    ("server_info", " WEB server ", [{"term": {"os": "Ubuntu"}}], 0.30001, 0.7, 10, "opensearch"),
+])
+def test_result_key_normalizes_query_and_weights(same):
+    assert make_result_key(*same) == make_result_key(*BASE)
+
+
+@pytest.mark.parametrize("position, value", [
+    (0, "weblog_info"),
+    (1, "database server"),
+    (2, [{"term": {"os": "CentOS"}}]),
+    (2, None),
+    (3, 0.5),
+    (4, 0.5),
+    (5, 20),
+    (6, "faiss"),
+])
+def test_result_key_changes_with_each_input(position, value):
+    args = list(BASE)
+    args[position] = value
+    assert make_result_key(*args) != make_result_key(*BASE)
+
+
+def test_dashboard_key_ignores_query():
+    assert make_dashboard_key("server_info", None) == make_dashboard_key("server_info", [])
+    assert make_dashboard_key("server_info", None) != make_dashboard_key("server_info", [{"term": {"os": "x"}}])
+
+
+def test_indexing_invalidates_cached_results():
+    cache = SearchResultCache()
+    key = make_result_key(*BASE)
+    other = make_result_key("weblog_info", *BASE[1:])
+    cache.put(key, ["hit"])
+    cache.put(other, ["log"])
+    assert cache.get(key) == ["hit"]
+    bump_index_generation("server_info")
+    assert cache.get(key) is None
+    assert cache.get(other) == ["log"]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_invalidate_by_index():
+    cache = SearchResultCache()
+    key = make_result_key(*BASE)
+    other = make_result_key("weblog_info", *BASE[1:])
+    cache.put(key, ["hit"])
+    cache.put(other, ["log"])
+    cache.invalidate("server_info")
+    assert cache.get(key) is None and cache.get(other) == ["log"]
+    cache.invalidate()
+    assert cache.get(other) is None
+
+
+def test_query_vector_cache_embeds_once_per_query_and_dimensions():
+    calls = []
+
+    def embed(text, dimensions):
+        calls.append((text, dimensions))
+        return [float(dimensions)]
+
+    cache = QueryVectorCache()
+    assert cache.get_or_create("Web Server", 256, embed) == [256.0]
+    assert cache.get_or_create(" web  server", 256, embed) == [256.0]
+    assert cache.get_or_create("web server", 1024, embed) == [1024.0]
+    assert calls == [("Web Server", 256), ("web server", 1024)]
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from bench_fakes import FakeOpenSearch
+from weblog_partitions import WEBLOG_PATTERN, extract_time_range, parse_date_math, route_indices
+
+NOW = datetime(2024, 10, 15, 13, 45, 30, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("value, kwargs, expected", [
+    ("now", {}, NOW),
+    ("now-1d", {}, utc(2024, 10, 14, 13, 45, 30)),
+    ("now-1d/d", {}, utc(2024, 10, 14)),
+    ("now/d", {"upper": True}, utc(2024, 10, 15, 23, 59, 59, 999000)),
+    ("now-1M/M", {}, utc(2024, 9, 1)),
+    ("now+2h/h", {}, utc(2024, 10, 15, 15)),
+    ("now/w", {}, utc(2024, 10, 14)),
+    ("2024-01-31||+1M", {}, utc(2024, 2, 29)),
+    ("2024-10-01T00:00:00", {"time_zone": "+09:00"}, utc(2024, 9, 30, 15)),
+    ("now/d", {"time_zone": "Asia/Seoul"}, utc(2024, 10, 14, 15)),
+    (1727740800000, {}, utc(2024, 10, 1)),
+    ("2024-10-01T00:00:00Z", {}, utc(2024, 10, 1)),
+    # 숫자 문자열은 날짜로 먼저 읽음 (epoch 밀리초는 날짜가 아닐 때 또는 format 이 epoch_millis 일 때)
+    ("2024", {}, utc(2024, 1, 1)),
+    ("2024-10", {}, utc(2024, 10, 1)),
+    ("20241001", {}, utc(2024, 10, 1)),
+    ("2024", {"upper": True}, utc(2024, 1, 1, 23, 59, 59, 999000)),
+    ("2024-10-14", {"upper": True}, utc(2024, 10, 14, 23, 59, 59, 999000)),
+    ("1727740800000", {}, utc(2024, 10, 1)),
+    ("20241001", {"epoch_millis": True}, utc(1970, 1, 1, 5, 37, 21, 1000)),
+    ("2024||+1M", {}, utc(2024, 2, 1)),
+    ("now-1x", {}, None),
+    ("not a date", {}, None),
+])
+def test_parse_date_math(value, kwargs, expected):
+    assert parse_date_math(value, now=NOW, **kwargs) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"query": {"match_all": {}}}, (None, None)),
+    ({"range": {"timestamp": {"gte": "2024-10-01", "lt": "2024-10-02"}}},
+     (utc(2024, 10, 1), utc(2024, 10, 2))),
+    ({"bool": {"filter": [{"range": {"timestamp": {"gte": "now-1d/d"}}},
+                          {"range": {"timestamp": {"gte": "now-2h", "lte": "now"}}}]}},
+     (utc(2024, 10, 15, 11, 45, 30), NOW)),
+    ({"constant_score": {"filter": {"range": {"timestamp": {"gt": 1727740800, "format": "epoch_second"}}}}},
+     (utc(2024, 10, 1), None)),
+    # should / must_not 아래의 범위는 결과를 제한하지 않음
+    ({"bool": {"should": [{"range": {"timestamp": {"gte": "now-1d"}}}],
+               "must_not": [{"range": {"timestamp": {"lt": "now-7d"}}}]}}, (None, None)),
+    ({"range": {"response_time": {"gte": 100}}}, (None, None)),
+    ({"range": {"timestamp": {"gte": "20241001", "lte": "2024-10-02"}}},
+     (utc(2024, 10, 1), utc(2024, 10, 2, 23, 59, 59, 999000))),
+    ({"range": {"timestamp": {"gte": "1727740800000", "format": "epoch_millis"}}}, (utc(2024, 10, 1), None)),
+    ({"range": {"timestamp": {"gte": "2024", "format": "strict_date_optional_time||epoch_millis"}}},
+     (utc(2024, 1, 1), None)),
+])
+def test_extract_time_range(query, expected):
+    assert extract_time_range(query, now=NOW) == expected
+
+
+@pytest.fixture
+def client():
+    client = FakeOpenSearch()
+    for name in ("weblog-2024.10.13", "weblog-2024.10.14",
+                 "weblog-2024.10.15.12", "weblog-2024.10.15.13", "weblog_info"):
+        client.indices.create(name)
+    return client
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"match_all": {}}, [WEBLOG_PATTERN]),
+    ({"range": {"timestamp": {"gte": "2024-10-14T06:00:00", "lt": "2024-10-14T07:00:00"}}},
+     ["weblog-2024.10.14"]),
+    ({"range": {"timestamp": {"gte": "now-1d/d"}}},
+     ["weblog-2024.10.14", "weblog-2024.10.15.*"]),
+    ({"range": {"timestamp": {"gte": "now-30m"}}}, ["weblog-2024.10.15.13"]),
+    # 상한은 lt / lte 구분 없이 경계 파티션을 포함 (더 읽어도 결과는 같음)
+    ({"range": {"timestamp": {"lt": "2024-10-14"}}}, ["weblog-2024.10.13", "weblog-2024.10.14"]),
+    ({"range": {"timestamp": {"lt": "2024-10-13T23:59:59"}}}, ["weblog-2024.10.13"]),
+    ({"range": {"timestamp": {"gte": "2024-09-01", "lt": "2024-09-02"}}}, []),
+    # 연도 / basic_date 숫자 문자열을 1970 년 epoch 로 읽으면 파티션이 하나도 선택되지 않음
+    ({"range": {"timestamp": {"gte": "20241014"}}}, ["weblog-2024.10.14", "weblog-2024.10.15.*"]),
+    ({"range": {"timestamp": {"gte": "2024", "lte": "2024-10-13"}}}, ["weblog-2024.10.13"]),
+])
+def test_route_indices(client, query, expected):
+    assert route_indices(client, {"query": query}, now=NOW, refresh=True) == expected
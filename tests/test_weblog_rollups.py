@@ -0,0 +1,257 @@
+import pytest
+
+import search_cache
+from bench_fakes import FakeOpenSearch
+from weblog_rollups import (DDSketch, RollupWriter, Unsupported, _check_aggs, _cover, _translate,
+                            answer_from_rollups, ensure_rollup_index)
+
+
+@pytest.mark.parametrize("node, filters, must_not", [
+    (None, [], []),
+    ({"match_all": {}}, [], []),
+    ({"term": {"status_code": 500}}, [{"term": {"status_code": 500}}], []),
+    ({"match": {"method": {"query": "GET"}}}, [{"term": {"method": "GET"}}], []),
+    ({"term": {"method.keyword": {"value": "POST"}}}, [{"term": {"method": "POST"}}], []),
+    ({"terms": {"status_code": [500, 503]}}, [{"terms": {"status_code": [500, 503]}}], []),
+    ({"range": {"status_code": {"gte": 500, "format": "x"}}}, [{"range": {"status_code": {"gte": 500}}}], []),
+    ({"range": {"timestamp": {"gte": "now-1d"}}}, [], []),
+    ({"bool": {"filter": [{"term": {"status_code": 200}}], "must_not": {"term": {"method": "HEAD"}}}},
+     [{"term": {"status_code": 200}}], [{"term": {"method": "HEAD"}}]),
+    ({"constant_score": {"filter": {"term": {"status_code": 404}}}}, [{"term": {"status_code": 404}}], []),
+    # url prefix 는 롤업의 url_prefix (앞 1 단계) 안에 있을 때만 같은 조건
+    ({"prefix": {"url": "/orders"}}, [{"prefix": {"url_prefix": "/orders"}}], []),
+    ({"prefix": {"url.keyword": {"value": "/or"}}}, [{"prefix": {"url_prefix": "/or"}}], []),
+    ({"bool": {"must_not": {"prefix": {"url": "/assets"}}}}, [], [{"prefix": {"url_prefix": "/assets"}}]),
+    ({"term": {"url_prefix": "/orders"}}, [{"term": {"url_prefix": "/orders"}}], []),
+])
+def test_translate(node, filters, must_not):
+    translated_filters, translated_must_not = [], []
+    _translate(node, translated_filters, translated_must_not)
+    assert translated_filters == filters
+    assert translated_must_not == must_not
+
+
+@pytest.mark.parametrize("node", [
+    # 여러 키가 있는 절 — ValueError 가 아니라 Unsupported 로 원본 검색으로 대체
+    {"term": {"status_code": 500}, "match": {"method": "GET"}},
+    {"term": {"status_code": 500, "method": "GET"}},
+    {"term": "status_code"},
+    [{"term": {"status_code": 500}}],
+    {"bool": {"should": [{"term": {"status_code": 500}}]}},
+    {"bool": {"must_not": {"bool": {"filter": []}}}},
+    {"bool": {"must_not": {"range": {"timestamp": {"gte": "now-1d"}}}}},
+    {"term": {"url": "/orders"}},
+    {"match": {"url": "orders"}},
+    # 앞 1 단계보다 깊거나, 가려지는 숫자 / ID 의 앞부분으로 끝나는 prefix
+    {"prefix": {"url": "/orders/detail"}},
+    {"prefix": {"url": "/orders/"}},
+    {"prefix": {"url": "/v1"}},
+    {"prefix": {"url": "/ab"}},
+    {"prefix": {"url": "/ord"}},
+    {"prefix": {"url": "orders"}},
+    {"prefix": {"method": "G"}},
+])
+def test_translate_unsupported(node):
+    with pytest.raises(Unsupported):
+        _translate(node, [], [])
+
+
+DAY, HOUR, MINUTE = 86400, 3600, 60
+
+
+@pytest.mark.parametrize("low, high, largest, expected", [
+    (0, 2 * DAY, DAY, [('1d', 0, 2 * DAY)]),
+    (DAY - HOUR, 2 * DAY + 2 * MINUTE, DAY,
+     [('1h', DAY - HOUR, DAY), ('1d', DAY, 2 * DAY), ('1m', 2 * DAY, 2 * DAY + 2 * MINUTE)]),
+    (30, 2 * HOUR, DAY, [('1m', MINUTE, HOUR), ('1h', HOUR, 2 * HOUR)]),
+    (0, 2 * DAY, HOUR, [('1h', 0, 2 * DAY)]),
+    (10, 50, DAY, []),
+    (HOUR, HOUR, DAY, []),
+])
+def test_cover(low, high, largest, expected):
+    assert _cover(low, high, largest) == expected
+
+
+def test_sketch_merge_matches_single_sketch():
+    values = [0, 0.5, 1, 3, 10, 42, 250, 1000, 1000, 7500]
+    whole, first, second = DDSketch(), DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+    merged = first.merge(second)
+    assert merged.count == whole.count == len(values)
+    assert merged.bins == whole.bins and merged.zero_count == whole.zero_count
+    for q in (0.0, 0.5, 0.99, 1.0):
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+@pytest.mark.parametrize("q, exact", [(0.5, 50), (0.9, 90), (0.99, 99)])
+def test_sketch_quantile_relative_error(q, exact):
+    sketch = DDSketch(0.01)
+    for value in range(1, 101):
+        sketch.add(value)
+    assert abs(sketch.quantile(q) - exact) <= exact * 0.01
+
+
+def test_sketch_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.02))
+
+
+def test_sketch_round_trip():
+    sketch = DDSketch()
+    for value in (0, 1, 2, 3, 500):
+        sketch.add(value)
+    restored = DDSketch.from_dict(sketch.to_dict())
+    assert restored.bins == sketch.bins and restored.zero_count == sketch.zero_count
+
+
+@pytest.mark.parametrize("aggs, supported", [
+    ({"by_url": {"terms": {"field": "url_prefix"}, "aggs": {"p99": {"percentiles": {"field": "response_time"}}}}}, True),
+    ({"s": {"terms": {"field": "status_code", "size": 3, "order": [{"_count": "asc"}, {"_key": "desc"}]}}}, True),
+    ({"s": {"terms": {"field": "status_code", "min_doc_count": 5}}}, True),
+    ({"h": {"date_histogram": {"field": "timestamp", "fixed_interval": "1d", "min_doc_count": 1}}}, True),
+    ({"p": {"percentiles": {"field": "response_time", "percents": [99], "keyed": False}}}, True),
+    # url terms 는 전체 URL 별 버킷 — 앞 단계만 남은 롤업으로는 답할 수 없음
+    ({"by_url": {"terms": {"field": "url"}, "aggs": {"p99": {"percentiles": {"field": "response_time"}}}}}, False),
+    ({"by_url": {"terms": {"field": "url.keyword"}}}, False),
+    ({"by_agent": {"terms": {"field": "user_agent"}}}, False),
+    # 롤업에서 구현하지 않은 인자
+    ({"s": {"terms": {"field": "status_code", "order": {"p99": "desc"}},
+            "aggs": {"p99": {"percentiles": {"field": "response_time", "percents": [99]}}}}}, False),
+    ({"s": {"terms": {"field": "status_code", "order": {"_term": "asc"}}}}, False),
+    ({"s": {"terms": {"field": "status_code", "include": [200, 404]}}}, False),
+    ({"s": {"terms": {"field": "method", "exclude": "GET"}}}, False),
+    ({"s": {"terms": {"field": "method", "missing": "-"}}}, False),
+    ({"s": {"terms": {"field": "status_code", "min_doc_count": 0}}}, False),
+    ({"h": {"date_histogram": {"field": "timestamp", "fixed_interval": "1h", "format": "yyyy-MM-dd"}}}, False),
+    ({"h": {"date_histogram": {"field": "timestamp", "fixed_interval": "1h",
+                               "extended_bounds": {"min": "2024-10-01", "max": "2024-10-02"}}}}, False),
+    ({"h": {"date_histogram": {"field": "timestamp", "fixed_interval": "1h", "keyed": True}}}, False),
+    ({"p": {"percentiles": {"field": "response_time", "tdigest": {"compression": 200}}}}, False),
+    ({"a": {"avg": {"field": "response_time", "missing": 0}}}, False),
+])
+def test_check_aggs_params(aggs, supported):
+    if supported:
+        assert _check_aggs(aggs) == 86400
+    else:
+        with pytest.raises(Unsupported):
+            _check_aggs(aggs)
+
+
+# status_code 별 건수: 200 → 18, 503 → 8, 500 → 6
+LOGS = [
+    {"timestamp": f"2024-10-01T{hour:02d}:{minute:02d}:30", "method": "GET", "status_code": status_code,
+     "url": url, "response_time": response_time, "bytes_sent": 1000}
+    for hour in range(0, 24, 3)
+    for minute, url, response_time, status_code in ((0, "/orders/detail/1", 0.2, 200), (10, "/orders/list", 0.4, 200),
+                                                    (20, "/cart", 1.5, 500 if hour < 18 else 200),
+                                                    (40, "/cart/items/9", 2.5, 503))
+]
+BY_URL = {"by_url": {"terms": {"field": "url_prefix"},
+                     "aggs": {"p99": {"percentiles": {"field": "response_time", "percents": [99]}}}}}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(search_cache, 'GENERATIONS_PATH', ':memory:')
+    monkeypatch.setattr(search_cache, '_generations_conn', None)
+    client = FakeOpenSearch()
+    ensure_rollup_index(client)
+    writer = RollupWriter(client, target="weblog_info", run_id="run")
+    writer.begin()
+    for log in LOGS:
+        client.index("weblog_info", log)
+    writer.add(LOGS)
+    writer.close()
+    return client
+
+
+def rollup_answer(client, time_range, query=None, aggs=BY_URL):
+    clauses = [{"range": {"timestamp": time_range}}] + ([query] if query else [])
+    body = {"size": 0, "query": {"bool": {"filter": clauses}}, "aggs": aggs}
+    return answer_from_rollups(body, client, target="weblog_info")
+
+
+def test_p99_by_url_prefix_from_rollups(client):
+    response = rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"})
+    buckets = {bucket["key"]: bucket for bucket in response["aggregations"]["by_url"]["buckets"]}
+    assert {key: bucket["doc_count"] for key, bucket in buckets.items()} == {"/orders": 16, "/cart": 16}
+    assert buckets["/cart"]["p99"]["values"]["99.0"] == pytest.approx(2.5, rel=0.01)
+    assert buckets["/orders"]["p99"]["values"]["99.0"] == pytest.approx(0.4, rel=0.01)
+    assert response["_rollup"]["url_prefix_depth"] == 1
+
+
+def test_url_terms_use_raw_search(client):
+    aggs = {"by_url": {"terms": {"field": "url"}}}
+    assert rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"}, aggs=aggs) is None
+
+
+@pytest.mark.parametrize("params, keys, other", [
+    ({}, [200, 503, 500], 0),
+    ({"size": 1}, [200], 14),
+    ({"order": {"_key": "desc"}}, [503, 500, 200], 0),
+    ({"order": {"_key": "asc"}}, [200, 500, 503], 0),
+    ({"order": {"_count": "asc"}}, [500, 503, 200], 0),
+    ({"order": [{"_count": "desc"}, {"_key": "desc"}], "size": 2}, [200, 503], 6),
+    ({"min_doc_count": 7}, [200, 503], 6),
+])
+def test_terms_order_and_min_doc_count(client, params, keys, other):
+    aggs = {"s": {"terms": dict({"field": "status_code"}, **params)}}
+    response = rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"}, aggs=aggs)
+    assert [bucket["key"] for bucket in response["aggregations"]["s"]["buckets"]] == keys
+    assert response["aggregations"]["s"]["sum_other_doc_count"] == other
+
+
+@pytest.mark.parametrize("min_doc_count, buckets", [(0, 22), (1, 8), (5, 0)])
+def test_date_histogram_min_doc_count(client, min_doc_count, buckets):
+    aggs = {"h": {"date_histogram": {"field": "timestamp", "fixed_interval": "1h", "min_doc_count": min_doc_count}}}
+    response = rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"}, aggs=aggs)
+    assert len(response["aggregations"]["h"]["buckets"]) == buckets
+
+
+@pytest.mark.parametrize("aggs", [
+    {"s": {"terms": {"field": "status_code", "order": {"p99": "desc"}},
+           "aggs": {"p99": {"percentiles": {"field": "response_time", "percents": [99]}}}}},
+    {"s": {"terms": {"field": "status_code", "include": [500]}}},
+    {"h": {"date_histogram": {"field": "timestamp", "calendar_interval": "day", "format": "yyyy-MM-dd"}}},
+])
+def test_unsupported_params_use_raw_search(client, aggs):
+    assert rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"}, aggs=aggs) is None
+
+
+@pytest.mark.parametrize("query, count", [
+    ({"prefix": {"url": "/or"}}, 16),
+    ({"prefix": {"url": "/"}}, 32),
+    ({"bool": {"must_not": {"prefix": {"url": "/cart"}}}}, 16),
+])
+def test_url_prefix_filter_from_rollups(client, query, count):
+    response = rollup_answer(client, {"gte": "2024-10-01", "lte": "2024-10-01"}, query,
+                             {"n": {"value_count": {"field": "response_time"}}})
+    assert response["aggregations"]["n"]["value"] == count
+
+
+@pytest.mark.parametrize("time_range, answered", [
+    ({"gte": "2024-10-01T00:00:00", "lt": "2024-10-01T12:00:00"}, True),
+    ({"gte": "2024-10-01T00:00:00", "lte": "2024-10-01T11:59:59.999"}, True),
+    # 분 경계에서 어긋나면 (1ms 라도) 원본 검색
+    ({"gte": "2024-10-01T00:00:30", "lt": "2024-10-01T12:00:00"}, False),
+    ({"gte": "2024-10-01T00:00:00", "lte": "2024-10-01T12:00:00"}, False),
+    ({"gt": "2024-10-01T00:00:00", "lt": "2024-10-01T12:00:00"}, False),
+    ({"gte": "2024-10-01T00:00:00", "lt": "2024-10-01T11:59:59"}, False),
+])
+def test_time_range_edges_must_align(client, time_range, answered):
+    response = rollup_answer(client, time_range, aggs={"n": {"value_count": {"field": "response_time"}}})
+    assert (response is not None) == answered
+    if answered:
+        assert response["aggregations"]["n"]["value"] == 16
+
+
+def test_url_rollups_require_matching_depth(client):
+    writer = RollupWriter(client, target="weblog_info", run_id="deeper", url_prefix_depth=2)
+    writer.begin()
+    writer.add([dict(LOGS[0], timestamp="2024-10-01T23:00:00")])
+    writer.close()
+    assert rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"}) is None
+    assert rollup_answer(client, {"gte": "2024-10-01", "lt": "2024-10-02"},
+                         aggs={"n": {"value_count": {"field": "response_time"}}}) is not None
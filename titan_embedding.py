@@ -0,0 +1,148 @@
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from embedding_cache import get_embedding_cache, make_key
+
+
+# Bedrock 설정
+region = 'us-west-2'
+MODEL_ID = "amazon.titan-embed-text-v2:0"
+
+DEFAULT_MAX_WORKERS = 8     # 동시 임베딩 요청 수
+MAX_RETRIES = 6             # 스로틀링 시 최대 재시도 횟수
+
+# 재시도 대상 Bedrock 오류 코드
+THROTTLING_ERRORS = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+}
+
+# 스로틀링 재시도 지터용 난수 (전역 random 은 더미 데이터 재생성용 시드에 묶여 있으므로 사용하지 않음)
+_jitter = random.Random()
+
+_bedrock_client = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_bedrock_client():
+    """
+    프로세스 전체에서 공유하는 Bedrock Runtime 클라이언트를 반환합니다.
+    boto3 클라이언트는 스레드 안전하므로 한 번만 생성하고, 워커 수에 맞춰 커넥션 풀을 늘립니다.
+    """
+    global _bedrock_client
+    if _bedrock_client is None:
+        with _lock:
+            if _bedrock_client is None:
+                _bedrock_client = boto3.client(
+                    service_name='bedrock-runtime',
+                    region_name=region,
+                    config=Config(
+                        max_pool_connections=DEFAULT_MAX_WORKERS * 2,
+                        retries={'max_attempts': 1, 'mode': 'standard'}  # 재시도는 embed_text 에서 처리
+                    )
+                )
+    return _bedrock_client
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS,
+                                               thread_name_prefix='titan-embedding')
+    return _executor
+
+
+def _invoke_titan(text, dimensions, normalize, max_retries):
+    body = json.dumps({
+        "inputText": text,
+        "dimensions": dimensions,
+        "normalize": normalize
+    })
+
+    for attempt in range(max_retries + 1):
+        try:
+            response = get_bedrock_client().invoke_model(
+                body=body,
+                modelId=MODEL_ID,
+                accept="application/json",
+                contentType="application/json"
+            )
+            return json.loads(response['body'].read())['embedding']
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code not in THROTTLING_ERRORS or attempt == max_retries:
+                raise
+            # 지수 백오프 + 지터 (최대 20초)
+            delay = min(20, 0.5 * (2 ** attempt))
+            time.sleep(delay * (0.5 + _jitter.random() / 2))
+
+
+def embed_text(text, dimensions=1024, normalize=True, max_retries=MAX_RETRIES, use_cache=True):
+    """
+    Amazon Titan Text Embeddings V2를 사용하여 문자열을 임베딩합니다.
+    캐시에 있으면 Bedrock 을 호출하지 않고, 스로틀링 오류는 지수 백오프로 재시도합니다.
+
+    :param text: 임베딩할 문자열
+    :param dimensions: 임베딩 벡터의 차원 (256, 512, 또는 1024)
+    :param normalize: 임베딩 벡터를 정규화할지 여부
+    :param max_retries: 스로틀링 시 최대 재시도 횟수
+    :param use_cache: 임베딩 캐시 사용 여부
+    :return: 임베딩 벡터
+    """
+    cache = get_embedding_cache() if use_cache else None
+    if cache is not None:
+        key = make_key(text, MODEL_ID, dimensions, normalize)
+        vector = cache.get(key)
+        if vector is not None:
+            return vector
+
+    vector = _invoke_titan(text, dimensions, normalize, max_retries)
+    if cache is not None:
+        cache.put(key, vector, MODEL_ID, dimensions)
+    return vector
+
+
+def embed_texts(texts, dimensions=1024, normalize=True, use_cache=True):
+    """
+    여러 문자열을 공유 스레드 풀에서 동시에 임베딩합니다.
+    캐시에 있는 텍스트와 배치 안의 중복 텍스트는 Bedrock 을 호출하지 않습니다.
+    결과는 입력 순서대로 반환하며, 실패한 항목은 None 으로 채웁니다.
+
+    :param texts: 임베딩할 문자열 리스트
+    :param dimensions: 임베딩 벡터의 차원 (256, 512, 또는 1024)
+    :param normalize: 임베딩 벡터를 정규화할지 여부
+    :param use_cache: 임베딩 캐시 사용 여부
+    :return: 임베딩 벡터 리스트
+    """
+    texts = list(texts)
+    cache = get_embedding_cache() if use_cache else None
+    keys = [make_key(text, MODEL_ID, dimensions, normalize) for text in texts]
+    vectors = cache.get_many(keys) if cache is not None else {}
+
+    # 캐시에 없는 텍스트만 한 번씩 요청
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+
+    def task(text):
+        try:
+            return _invoke_titan(text, dimensions, normalize, MAX_RETRIES)
+        except Exception as e:
+            print(f"Error generating embedding: {str(e)}")
+            return None
+
+    fetched = dict(zip(missing, _get_executor().map(task, missing.values())))
+    if cache is not None:
+        cache.put_many(fetched.items(), MODEL_ID, dimensions)
+    vectors.update(fetched)
+    return [vectors.get(key) for key in keys]
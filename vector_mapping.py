@@ -0,0 +1,49 @@
+# Titan Text Embeddings V2 가 지원하는 벡터 차원
+SUPPORTED_DIMENSIONS = (256, 512, 1024)
+
+# OpenSearch 에 저장할 벡터 인코딩 ('fp16' 은 faiss 엔진의 scalar quantization 사용)
+VECTOR_ENCODINGS = ('none', 'fp16')
+
+
+def knn_vector_mapping(dimension=1024, encoding='none'):
+    """
+    vector_embedding 필드의 knn_vector 매핑을 만듭니다.
+
+    :param dimension: 벡터 차원 (256, 512, 또는 1024)
+    :param encoding: 저장 벡터 인코딩 ('none' 또는 'fp16')
+    :return: knn_vector 매핑 dict
+    """
+    if dimension not in SUPPORTED_DIMENSIONS:
+        raise ValueError(f"Unsupported embedding dimension: {dimension}")
+    if encoding not in VECTOR_ENCODINGS:
+        raise ValueError(f"Unsupported vector encoding: {encoding}")
+
+    method = {
+        "name": "hnsw",
+        "space_type": "l2"
+    }
+    if encoding == 'fp16':
+        # 벡터당 메모리를 절반으로 줄임
+        method.update({
+            "engine": "faiss",
+            "parameters": {
+                "encoder": {"name": "sq", "parameters": {"type": "fp16"}}
+            }
+        })
+    return {
+        "type": "knn_vector",
+        "dimension": dimension,
+        "method": method
+    }
+
+
+def get_vector_dimension(client, index_name, vector_field='vector_embedding'):
+    """
+    인덱스 매핑에서 벡터 필드의 차원을 읽습니다. 검색어 임베딩 차원을 맞출 때 사용합니다.
+    """
+    mappings = client.indices.get_mapping(index=index_name)
+    for mapping in mappings.values():
+        field = mapping.get('mappings', {}).get('properties', {}).get(vector_field)
+        if field and 'dimension' in field:
+            return int(field['dimension'])
+    return 1024
@@ -0,0 +1,450 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+from cachetools import TTLCache
+
+from vector_mapping import knn_vector_mapping
+
+
+# 웹 로그 시간 파티션 인덱스 설정 (환경 변수로 변경 가능)
+WEBLOG_INDEX_PREFIX = os.environ.get('ITSMS_WEBLOG_PREFIX', 'weblog-')
+WEBLOG_PATTERN = f"{WEBLOG_INDEX_PREFIX}*"                             # 모든 파티션 (시간 범위가 없는 쿼리)
+WEBLOG_ALIAS = os.environ.get('ITSMS_WEBLOG_ALIAS', 'weblog')          # 템플릿이 새 파티션에 붙이는 별칭
+WEBLOG_TEMPLATE = 'weblog-partitions'
+PARTITION_GRANULARITY = os.environ.get('ITSMS_WEBLOG_PARTITION', 'daily')
+RETENTION_DAYS = int(os.environ.get('ITSMS_WEBLOG_RETENTION_DAYS', '30'))
+PARTITION_LIST_TTL = 60     # 파티션 목록 캐시 유효 시간 (초)
+TIME_FIELD = 'timestamp'
+
+# 파티션 단위별 인덱스 이름 형식 (UTC 기준)
+PARTITION_FORMATS = {
+    'daily': '%Y.%m.%d',
+    'hourly': '%Y.%m.%d.%H',
+}
+PARTITION_SPANS = {
+    'daily': timedelta(days=1),
+    'hourly': timedelta(hours=1),
+}
+
+_partition_cache = TTLCache(maxsize=16, ttl=PARTITION_LIST_TTL)
+_cache_lock = threading.Lock()
+
+_PARTITION_RE = re.compile(r"^(\d{4})\.(\d{2})\.(\d{2})(?:\.(\d{2}))?$")
+_DATE_MATH_RE = re.compile(r"([+-])(\d+)([yMwdhHms])|/([yMwdhHms])")
+_PARTIAL_DATE_RE = re.compile(r"^(\d{4})(?:-(\d{2}))?$")
+_UNITS = {
+    's': timedelta(seconds=1), 'm': timedelta(minutes=1), 'h': timedelta(hours=1), 'H': timedelta(hours=1),
+    'd': timedelta(days=1), 'w': timedelta(weeks=1),
+}
+_EMPTY_RESPONSE = {
+    "took": 0,
+    "timed_out": False,
+    "hits": {"total": {"value": 0, "relation": "eq"}, "max_score": None, "hits": []},
+}
+
+
+def weblog_mappings(dimensions=1024, vector_encoding='none'):
+    """
+    웹 로그 인덱스 (단일 인덱스 / 시간 파티션 공통) 매핑입니다.
+    """
+    return {
+        "properties": {
+            "timestamp": {"type": "date"},
+            "ip_address": {"type": "ip"},
+            "method": {"type": "keyword"},
+            "url": {"type": "text"},
+            "status_code": {"type": "integer"},
+            "user_agent": {"type": "text"},
+            "referrer": {"type": "text"},
+            "response_time": {"type": "float"},
+            "bytes_sent": {"type": "long"},
+            "full_text": {"type": "text"},
+            "template_id": {"type": "keyword"},
+            "vector_embedding": knn_vector_mapping(dimensions, vector_encoding)
+        }
+    }
+
+
+def ensure_template(client, dimensions=1024, vector_encoding='none', alias=None):
+    """
+    weblog-* 파티션에 매핑과 별칭을 자동으로 적용하는 인덱스 템플릿을 만듭니다 (이미 있으면 덮어씀).
+    파티션은 bulk 인덱싱 중 처음 쓰일 때 템플릿으로 생성되므로 미리 만들 필요가 없습니다.
+
+    :param alias: 새 파티션에 붙일 별칭 (예: WEBLOG_ALIAS). 기본 대상인 Serverless 컬렉션은 별칭을 지원하지 않으므로 None
+    """
+    template = {"mappings": weblog_mappings(dimensions, vector_encoding)}
+    if alias:
+        template["aliases"] = {alias: {}}
+    client.indices.put_index_template(name=WEBLOG_TEMPLATE, body={
+        "index_patterns": [WEBLOG_PATTERN],
+        "template": template,
+        "priority": 100,
+    })
+    print(f"Index template '{WEBLOG_TEMPLATE}' for '{WEBLOG_PATTERN}' is ready.")
+
+
+def parse_timestamp(value, time_zone=None, epoch_millis=False, upper=False):
+    """
+    문서 / 쿼리의 날짜 값을 UTC datetime 으로 변환합니다.
+    숫자는 epoch 밀리초로, 문자열은 날짜 ('2024', '2024-10', '20241001', ISO 8601 — 시간대가 없으면 time_zone 또는 UTC) 로 읽습니다.
+    숫자 문자열은 epoch_millis 이면 epoch 밀리초로 읽고, 아니면 날짜로 먼저 읽은 뒤 날짜가 아닐 때만 epoch 밀리초로 봅니다
+    (OpenSearch 기본 날짜 형식 strict_date_optional_time||epoch_millis 와 같은 순서).
+
+    :param epoch_millis: range 의 format 이 epoch_millis 인지 여부
+    :param upper: lte 상한인지 여부 — 빠진 시각 필드를 OpenSearch 처럼 23:59:59.999 로 채움
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, (int, float)):
+        return datetime.fromtimestamp(float(value) / 1000, tz=timezone.utc)
+    else:
+        text = str(value).strip()
+        is_number = text.lstrip('-').isdigit()
+        if is_number and epoch_millis:
+            return datetime.fromtimestamp(float(text) / 1000, tz=timezone.utc)
+        try:
+            moment = _parse_date(text, upper)
+        except ValueError:
+            if not is_number:
+                raise
+            return datetime.fromtimestamp(float(text) / 1000, tz=timezone.utc)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=_zone(time_zone))
+    return moment.astimezone(timezone.utc)
+
+
+def _parse_date(text, upper=False):
+    # 'yyyy' / 'yyyy-MM' 은 fromisoformat 이 읽지 못하므로 직접 처리 (빠진 월 / 일은 01)
+    match = _PARTIAL_DATE_RE.match(text)
+    if match:
+        moment = datetime(int(match.group(1)), int(match.group(2) or 1), 1)
+        has_time = False
+    else:
+        moment = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        has_time = 'T' in text.upper()
+    if upper and not has_time:
+        moment = moment.replace(hour=23, minute=59, second=59, microsecond=999000)
+    return moment
+
+
+def _zone(time_zone):
+    if not time_zone:
+        return timezone.utc
+    match = re.match(r"^([+-])(\d{2}):?(\d{2})$", time_zone)
+    if match:
+        offset = timedelta(hours=int(match.group(2)), minutes=int(match.group(3)))
+        return timezone(offset if match.group(1) == '+' else -offset)
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(time_zone)
+
+
+def _add_months(moment, months):
+    month = moment.month - 1 + months
+    year = moment.year + month // 12
+    month = month % 12 + 1
+    days = [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28,
+            31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1]
+    return moment.replace(year=year, month=month, day=min(moment.day, days))
+
+
+def _round_down(moment, unit):
+    if unit == 'y':
+        return moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit == 'M':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit == 'w':
+        moment = moment - timedelta(days=moment.weekday())
+        unit = 'd'
+    fields = {'d': ('hour', 'minute', 'second'), 'h': ('minute', 'second'), 'H': ('minute', 'second'),
+              'm': ('second',), 's': ()}[unit]
+    return moment.replace(microsecond=0, **{field: 0 for field in fields})
+
+
+def _round_up(moment, unit):
+    # 단위의 마지막 순간 (lte / gt 경계의 '/d' 반올림과 같음)
+    start = _round_down(moment, unit)
+    if unit == 'y':
+        end = start.replace(year=start.year + 1)
+    elif unit == 'M':
+        end = _add_months(start, 1)
+    else:
+        end = start + _UNITS[unit]
+    return end - timedelta(milliseconds=1)
+
+
+def parse_date_math(value, time_zone=None, upper=False, now=None, epoch_millis=False, inclusive=True):
+    """
+    range 쿼리의 경계 값을 UTC datetime 으로 계산합니다.
+    'now-1d/d', '2024-10-01||+1M' 같은 날짜 연산을 지원하며, 반올림 ('/d') 은 상한이면 단위의 끝으로 계산합니다.
+
+    :param upper: 상한 (lt / lte) 경계인지 여부
+    :param epoch_millis: range 의 format 이 epoch_millis 인지 여부 (숫자 문자열을 epoch 밀리초로 읽음)
+    :param inclusive: 상한이 lte 인지 여부 — lt 이면 빠진 시각 필드를 채우지 않음 ('2024-10-02' → 00:00)
+    :return: UTC datetime (해석할 수 없으면 None — 호출한 쪽에서 범위 제한 없음으로 처리)
+    """
+    try:
+        if isinstance(value, str) and (value.startswith('now') or '||' in value):
+            if value.startswith('now'):
+                moment, expression = now or datetime.now(timezone.utc), value[3:]
+            else:
+                anchor, expression = value.split('||', 1)
+                moment = parse_timestamp(anchor, time_zone)
+            if time_zone:
+                moment = moment.astimezone(_zone(time_zone))
+            position = 0
+            for match in _DATE_MATH_RE.finditer(expression):
+                if match.start() != position:
+                    return None
+                position = match.end()
+                sign, amount, unit, rounding = match.groups()
+                if rounding:
+                    moment = _round_up(moment, rounding) if upper else _round_down(moment, rounding)
+                elif unit == 'y':
+                    moment = _add_months(moment, int(amount) * 12 * (1 if sign == '+' else -1))
+                elif unit == 'M':
+                    moment = _add_months(moment, int(amount) * (1 if sign == '+' else -1))
+                else:
+                    moment = moment + _UNITS[unit] * int(amount) * (1 if sign == '+' else -1)
+            if position != len(expression):
+                return None
+            return moment.astimezone(timezone.utc)
+        return parse_timestamp(value, time_zone, epoch_millis, upper and inclusive)
+    except (ValueError, TypeError, KeyError, OverflowError):
+        return None
+
+
+def _range_bounds(spec, now=None, half_open=False):
+    # {"gte": ..., "lt": ..., "format": ..., "time_zone": ...} → (하한, 상한)
+    # half_open 이면 [하한, 상한) 으로 맞춤 (gt / lte 경계에 1ms 를 더함)
+    time_zone = spec.get('time_zone')
+    formats = str(spec.get('format', '')).split('||')
+    epoch_seconds = 'epoch_second' in formats
+    # 여러 형식이면 앞의 형식부터 시도하므로 epoch_millis 가 첫 형식일 때만 숫자 문자열을 바로 epoch 로 읽음
+    epoch_millis = formats[0] == 'epoch_millis'
+    lower = upper = None
+    for op in ('gt', 'gte', 'from', 'lt', 'lte', 'to'):
+        value = spec.get(op)
+        if value is None:
+            continue
+        if epoch_seconds and isinstance(value, (int, float, str)) and str(value).lstrip('-').isdigit():
+            value = int(value) * 1000
+        is_upper = op in ('lt', 'lte', 'to')
+        bound = parse_date_math(value, time_zone, upper=is_upper, now=now, epoch_millis=epoch_millis,
+                                inclusive=op != 'lt')
+        if half_open and bound is not None and op in ('gt', 'lte', 'to'):
+            bound += timedelta(milliseconds=1)
+        if is_upper:
+            upper = bound if upper is None or (bound is not None and bound < upper) else upper
+        else:
+            lower = bound if lower is None or (bound is not None and bound > lower) else lower
+    return lower, upper
+
+
+def extract_time_range(query, field=TIME_FIELD, now=None, half_open=False):
+    """
+    쿼리에서 모든 결과가 반드시 만족하는 field 범위를 찾습니다 (bool must / filter, constant_score 의 range).
+    should / must_not 아래의 조건은 결과를 줄이지 않을 수 있으므로 무시합니다.
+
+    :param query: 검색 본문 ({"query": ...}) 또는 쿼리
+    :param half_open: 결과를 [하한, 상한) 으로 반환할지 여부 (gt / lte 경계를 1ms 옮김, 롤업 경계 비교용)
+    :return: (하한, 상한) UTC datetime — 제한이 없는 쪽은 None
+    """
+    if isinstance(query, dict) and 'query' in query:
+        query = query['query']
+    lower = upper = None
+
+    def visit(node):
+        nonlocal lower, upper
+        if not isinstance(node, dict):
+            return
+        for kind, spec in node.items():
+            if kind == 'range' and isinstance(spec, dict) and isinstance(spec.get(field), dict):
+                low, high = _range_bounds(spec[field], now, half_open)
+                if low is not None and (lower is None or low > lower):
+                    lower = low
+                if high is not None and (upper is None or high < upper):
+                    upper = high
+            elif kind == 'bool' and isinstance(spec, dict):
+                for clause in ('must', 'filter'):
+                    children = spec.get(clause, [])
+                    for child in (children if isinstance(children, list) else [children]):
+                        visit(child)
+            elif kind == 'constant_score' and isinstance(spec, dict):
+                visit(spec.get('filter'))
+    visit(query)
+    return lower, upper
+
+
+def partition_index(value, granularity=PARTITION_GRANULARITY):
+    """
+    타임스탬프가 속하는 파티션 인덱스 이름입니다 (예: weblog-2024.10.01, weblog-2024.10.01.13).
+    """
+    if granularity not in PARTITION_FORMATS:
+        raise ValueError(f"Unsupported partition granularity: {granularity}")
+    return WEBLOG_INDEX_PREFIX + parse_timestamp(value).strftime(PARTITION_FORMATS[granularity])
+
+
+def partition_span(index_name):
+    """
+    파티션 인덱스가 담는 시간 구간 [시작, 끝) 입니다 (UTC).
+
+    :return: (시작, 끝) 또는 파티션 이름이 아니면 None
+    """
+    if not index_name.startswith(WEBLOG_INDEX_PREFIX):
+        return None
+    match = _PARTITION_RE.match(index_name[len(WEBLOG_INDEX_PREFIX):])
+    if not match:
+        return None
+    year, month, day, hour = match.groups()
+    try:
+        start = datetime(int(year), int(month), int(day), int(hour or 0), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return start, start + PARTITION_SPANS['hourly' if hour else 'daily']
+
+
+def is_weblog_target(index_name):
+    """
+    시간 범위로 라우팅할 웹 로그 인덱스 (패턴 / 별칭) 인지 확인합니다.
+    """
+    return index_name in (WEBLOG_PATTERN, WEBLOG_ALIAS)
+
+
+def list_partitions(client, refresh=False):
+    """
+    존재하는 파티션 인덱스 이름 목록입니다 (시간순, PARTITION_LIST_TTL 동안 캐시).
+    """
+    with _cache_lock:
+        if not refresh and WEBLOG_PATTERN in _partition_cache:
+            return _partition_cache[WEBLOG_PATTERN]
+    indices = client.cat.indices(index=WEBLOG_PATTERN, format="json")
+    names = sorted((index['index'] for index in indices if partition_span(index['index'])),
+                   key=lambda name: partition_span(name))
+    with _cache_lock:
+        _partition_cache[WEBLOG_PATTERN] = names
+    return names
+
+
+def _collapse(selected, existing):
+    # 하루치 시간 파티션이 모두 선택되었으면 'weblog-YYYY.MM.DD.*' 하나로 줄여 요청 URL 길이를 제한
+    by_day = {}
+    for name in existing:
+        if len(name) - len(WEBLOG_INDEX_PREFIX) == len('YYYY.MM.DD.HH'):
+            by_day.setdefault(name[:-3], set()).add(name)
+    chosen = set(selected)
+    targets = []
+    done = set()
+    for name in selected:
+        day = name[:-3]
+        hours = by_day.get(day)
+        if hours and len(hours) > 1 and hours <= chosen:
+            if day not in done:
+                targets.append(f"{day}.*")
+                done.add(day)
+        else:
+            targets.append(name)
+    return targets
+
+
+def route_indices(client, query, now=None, refresh=False):
+    """
+    쿼리의 timestamp 범위와 겹치는 파티션 인덱스만 고릅니다.
+
+    :return: 검색할 인덱스 이름 / 패턴 리스트 (범위 제한이 없으면 [WEBLOG_PATTERN], 겹치는 파티션이 없으면 [])
+    """
+    lower, upper = extract_time_range(query, now=now)
+    if lower is None and upper is None:
+        return [WEBLOG_PATTERN]
+    existing = list_partitions(client, refresh)
+    selected = []
+    for name in existing:
+        start, end = partition_span(name)
+        if (lower is None or end > lower) and (upper is None or start <= upper):
+            selected.append(name)
+    return _collapse(selected, existing)
+
+
+def search_weblog(query, client=None, verbose=False, use_rollups=True, **kwargs):
+    """
+    timestamp 범위와 겹치는 파티션만 검색합니다. 검색 비용이 보존 기간이 아닌 요청한 시간 범위에 비례합니다.
+    원본 로그가 필요 없는 집계 쿼리는 먼저 롤업 인덱스로 답합니다 (weblog_rollups.answer_from_rollups()).
+    롤업이 조회 기간의 원본 로그를 모두 담고 있지 않으면 (진행 중 / 롤업 없이 적재 / 롤업 이전 데이터) 원본을 검색합니다.
+
+    :param query: 검색 본문 (LLM 이 생성한 DSL 포함)
+    :param use_rollups: 가능하면 롤업으로 답할지 여부
+    :param kwargs: client.search() 인자
+    :return: 검색 응답 (겹치는 파티션이 없으면 빈 응답)
+    """
+    if client is None:
+        from opensearch_client import get_opensearch_client
+        client = get_opensearch_client()
+    if use_rollups:
+        from weblog_rollups import answer_from_rollups, ROLLUP_INDEX
+        if client.indices.exists(index=ROLLUP_INDEX):
+            response = answer_from_rollups(query, client, target=WEBLOG_PATTERN)
+            if response is not None:
+                if verbose:
+                    print(f"Answered from {response['_rollup']['rows']} rollup rows "
+                          f"({', '.join(response['_rollup']['intervals']) or 'no data'})")
+                return response
+    targets = route_indices(client, query)
+    if verbose:
+        print(f"Routing weblog query to {len(targets)} target(s): {','.join(targets) or '(none)'}")
+    if not targets:
+        return dict(_EMPTY_RESPONSE)
+    # 목록을 읽은 뒤 보존 정책으로 삭제된 파티션은 무시
+    return client.search(index=",".join(targets), body=query, ignore_unavailable=True, **kwargs)
+
+
+def apply_retention(client, retention_days=RETENTION_DAYS, now=None, dry_run=False):
+    """
+    끝 시각이 보존 기간보다 오래된 파티션을 삭제합니다 (인덱스 단위 삭제라 delete_by_query 보다 훨씬 가벼움).
+    관리형 도메인은 ISM 정책, Serverless 는 데이터 수명 주기 정책으로 대신할 수 있습니다.
+
+    :return: 삭제한 (dry_run 이면 삭제할) 인덱스 이름 리스트
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    expired = [name for name in list_partitions(client, refresh=True) if partition_span(name)[1] <= cutoff]
+    if expired and not dry_run:
+        for start in range(0, len(expired), 50):
+            client.indices.delete(index=",".join(expired[start:start + 50]))
+        list_partitions(client, refresh=True)
+    print(f"{'Would delete' if dry_run else 'Deleted'} {len(expired)} weblog partitions older than "
+          f"{cutoff.isoformat()}.")
+    return expired
+
+
+# 메인 실행: 템플릿 생성 / 파티션 목록 / 보존 정책 적용 / 라우팅 확인
+#   python weblog_partitions.py template
+#   python weblog_partitions.py retention --days 30 --dry-run
+#   python weblog_partitions.py route '{"query": {"range": {"timestamp": {"gte": "now-1d/d"}}}}'
+if __name__ == "__main__":
+    import json
+    import argparse
+    from opensearch_client import get_opensearch_client
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['template', 'list', 'retention', 'route'])
+    parser.add_argument('query', nargs='?', default=None, help='route 명령에서 확인할 검색 본문 (JSON)')
+    parser.add_argument('--days', type=int, default=RETENTION_DAYS, help='보존 기간 (일)')
+    parser.add_argument('--dry-run', action='store_true', help='삭제할 파티션만 출력')
+    parser.add_argument('--dimensions', type=int, default=1024)
+    parser.add_argument('--alias', action='store_true',
+                        help=f"템플릿에 '{WEBLOG_ALIAS}' 별칭 추가 (관리형 도메인, Serverless 는 미지원)")
+    args = parser.parse_args()
+
+    opensearch = get_opensearch_client()
+    if args.command == 'template':
+        ensure_template(opensearch, args.dimensions, alias=WEBLOG_ALIAS if args.alias else None)
+    elif args.command == 'list':
+        for partition in list_partitions(opensearch):
+            print(partition)
+    elif args.command == 'retention':
+        apply_retention(opensearch, args.days, dry_run=args.dry_run)
+    else:
+        start_time = time.time()
+        print(json.dumps(route_indices(opensearch, json.loads(args.query)), indent=2))
+        print(f"Routed in {(time.time() - start_time) * 1000:.1f}ms")
@@ -0,0 +1,798 @@
+import os
+import math
+import string
+import time
+import uuid
+import hashlib
+import threading
+import calendar
+from datetime import datetime, timedelta, timezone
+
+from log_templates import mask_text
+from weblog_partitions import extract_time_range, parse_timestamp, TIME_FIELD, WEBLOG_PATTERN
+
+
+# 웹 로그 분 단위 롤업 설정 (환경 변수로 변경 가능)
+ROLLUP_INDEX = os.environ.get('ITSMS_WEBLOG_ROLLUP_INDEX', 'weblog_rollups')
+# 롤업 단위 (이름 → 초). 분 단위 롤업에서 시 / 일 단위 롤업을 함께 만들어 긴 기간 조회도 읽는 행 수를 줄임
+ROLLUP_INTERVALS = {'1m': 60, '1h': 3600, '1d': 86400}
+URL_PREFIX_DEPTH = 1            # url_prefix 로 남길 경로 단계 수 ('/orders/detail/123' → '/orders')
+SKETCH_ACCURACY = 0.01          # response_time 분위수 상대 오차 (1%)
+ROLLUP_LATENESS = 120           # 구간이 끝난 뒤 늦게 도착하는 로그를 기다리는 시간 (초)
+MAX_OPEN_CELLS = 50_000         # 메모리에 유지할 최대 롤업 셀 수 (넘으면 모두 기록)
+PAGE_SIZE = 5000                # 롤업 행 조회 페이지 크기
+DEFAULT_PERCENTS = (1, 5, 25, 50, 75, 95, 99)
+
+_MIN_VALUE = 1e-9
+_FAR_FUTURE = 4102444800        # 2100-01-01 (범위 상한이 없는 쿼리)
+_CALENDAR_UNITS = {'minute': 60, '1m': 60, 'hour': 3600, '1h': 3600, 'day': 86400, '1d': 86400,
+                   'week': 'week', '1w': 'week', 'month': 'month', '1M': 'month',
+                   'quarter': 'quarter', '1q': 'quarter', 'year': 'year', '1y': 'year'}
+_FIXED_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# terms 집계로 답할 수 있는 필드 (url 은 전체 URL 별 버킷이므로 앞 단계만 남은 롤업으로 답할 수 없음)
+_TERMS_FIELDS = ('status_code', 'method', 'method.keyword', 'url_prefix')
+# 집계별로 롤업에서 구현한 인자 — 그 밖의 인자 (format / extended_bounds / include / missing / 하위 집계 기준 order 등)
+# 는 무시하면 결과가 원본 검색과 달라지므로 원본 검색으로 대체
+_AGG_PARAMS = {
+    'date_histogram': ('field', 'calendar_interval', 'fixed_interval', 'interval', 'min_doc_count',
+                       'time_zone', 'offset'),
+    'terms': ('field', 'size', 'shard_size', 'order', 'min_doc_count'),
+    'percentiles': ('field', 'percents', 'keyed'),
+}
+_TERMS_ORDER_KEYS = ('_count', '_key')
+_METRICS = {
+    'response_time': ('avg', 'sum', 'min', 'max', 'value_count', 'stats', 'percentiles'),
+    'bytes_sent': ('avg', 'sum', 'min', 'max', 'value_count', 'stats'),
+}
+
+
+class Unsupported(Exception):
+    """롤업으로 답할 수 없는 쿼리 (원본 로그 검색으로 대체)"""
+
+
+class DDSketch:
+    """
+    상대 오차가 정해진 분위수 스케치 (DDSketch) 입니다. 값을 로그 간격 구간의 개수로 저장하므로
+    두 스케치를 구간별로 더하면 정확히 병합되어, 분 단위 롤업을 합쳐 임의 구간의 분위수를 계산할 수 있습니다.
+    """
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY, bins=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = bins if bins is not None else {}
+        self.zero_count = zero_count
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value):
+        if value <= _MIN_VALUE:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        return self
+
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self):
+        keys = sorted(self.bins)
+        return {"a": self.relative_accuracy, "z": self.zero_count, "k": keys, "n": [self.bins[key] for key in keys]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['a'], dict(zip(data['k'], data['n'])), data.get('z', 0))
+
+
+def url_prefix(url, depth=URL_PREFIX_DEPTH):
+    """
+    URL 경로의 앞 depth 단계입니다 (쿼리 문자열 제외, ID·숫자는 가림).
+    """
+    path = str(url or '').split('?', 1)[0]
+    parts = [part for part in path.split('/') if part][:depth]
+    return mask_text("/" + "/".join(parts))
+
+
+def rollup_mappings():
+    return {
+        "properties": {
+            "row_id": {"type": "keyword"},
+            "interval": {"type": "keyword"},
+            "bucket": {"type": "date"},
+            "status_code": {"type": "integer"},
+            "method": {"type": "keyword"},
+            "url_prefix": {"type": "keyword"},
+            "count": {"type": "long"},
+            "bytes_sent": {"type": "long"},
+            "bytes_min": {"type": "long"},
+            "bytes_max": {"type": "long"},
+            "response_time_sum": {"type": "double"},
+            "response_time_min": {"type": "float"},
+            "response_time_max": {"type": "float"},
+            # 검색하지 않는 스케치는 색인하지 않고 _source 에만 저장
+            "response_time_sketch": {"type": "object", "enabled": False},
+            # 행을 쓴 적재 실행 ('<run_id>.<시도 번호>') — 커버리지 문서에서 완료된 실행의 행만 조회
+            "run": {"type": "keyword"},
+            # 커버리지 문서 (doc_type: coverage) — 적재 실행별 대상 / 기간 / 완료 여부
+            "doc_type": {"type": "keyword"},
+            "target": {"type": "keyword"},
+            "run_id": {"type": "keyword"},
+            "attempt": {"type": "integer"},
+            "complete": {"type": "boolean"},
+            "covers_from": {"type": "date"},
+            "covers_to": {"type": "date"},
+            "records": {"type": "long"},
+            "url_prefix_depth": {"type": "integer"},
+            "updated_at": {"type": "date"},
+        }
+    }
+
+
+def ensure_rollup_index(client, index_name=ROLLUP_INDEX):
+    if not client.indices.exists(index=index_name):
+        client.indices.create(index=index_name, body={"mappings": rollup_mappings()})
+        print(f"Rollup index '{index_name}' created.")
+    else:
+        # 이전 버전으로 만든 롤업 인덱스에 커버리지 필드 추가
+        client.indices.put_mapping(index=index_name, body=rollup_mappings())
+
+
+def run_id_for(target, generator, seed):
+    """
+    적재 실행 ID 입니다. 같은 대상 / 생성기 / 시드로 다시 적재하면 같은 ID 가 되어 이전 시도의 롤업을 대체하고,
+    시드가 없어 재현할 수 없는 적재는 매번 새 ID 를 사용합니다.
+    """
+    if seed is None:
+        return uuid.uuid4().hex[:16]
+    return hashlib.sha1(f"{target}:{generator}:{seed}".encode('utf-8')).hexdigest()[:16]
+
+
+def load_coverage(client, target=WEBLOG_PATTERN, index_name=ROLLUP_INDEX):
+    # 대상 (원본 로그 인덱스 / 패턴) 의 커버리지 문서
+    body = {"size": 10_000, "query": {"bool": {"filter": [{"term": {"doc_type": "coverage"}},
+                                                          {"term": {"target": target}}]}}}
+    return [hit['_source'] for hit in client.search(index=index_name, body=body)['hits']['hits']]
+
+
+def _data_extent(client, target):
+    # 원본 로그의 가장 이른 / 늦은 timestamp (초), 문서가 없으면 None
+    bounds = []
+    for order in ('asc', 'desc'):
+        body = {"size": 1, "_source": [TIME_FIELD], "sort": [{TIME_FIELD: order}]}
+        hits = client.search(index=target, body=body, ignore_unavailable=True)['hits']['hits']
+        if not hits or TIME_FIELD not in hits[0]['_source']:
+            return None
+        bounds.append(parse_timestamp(hits[0]['_source'][TIME_FIELD]).timestamp())
+    return bounds
+
+
+class _Cell:
+    __slots__ = ('count', 'bytes_sent', 'bytes_min', 'bytes_max', 'rt_sum', 'rt_min', 'rt_max', 'sketch')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes_sent = 0
+        self.bytes_min = None
+        self.bytes_max = None
+        self.rt_sum = 0.0
+        self.rt_min = None
+        self.rt_max = None
+        self.sketch = DDSketch()
+
+    def add(self, bytes_sent, response_time):
+        self.count += 1
+        if bytes_sent is not None:
+            self.bytes_sent += bytes_sent
+            self.bytes_min = bytes_sent if self.bytes_min is None else min(self.bytes_min, bytes_sent)
+            self.bytes_max = bytes_sent if self.bytes_max is None else max(self.bytes_max, bytes_sent)
+        if response_time is not None:
+            self.rt_sum += response_time
+            self.rt_min = response_time if self.rt_min is None else min(self.rt_min, response_time)
+            self.rt_max = response_time if self.rt_max is None else max(self.rt_max, response_time)
+            self.sketch.add(response_time)
+
+
+class RollupWriter:
+    """
+    인덱싱된 웹 로그로 (구간, status_code, method, url_prefix) 별 롤업을 스트리밍으로 만듭니다.
+    구간이 끝나고 ROLLUP_LATENESS 가 지나면 (또는 close() 에서) 롤업 인덱스에 행으로 기록합니다.
+    늦게 도착한 로그는 같은 키의 행을 하나 더 쓰며, 조회할 때 같은 키의 행을 합치므로 결과는 같습니다.
+    여러 bulk 워커 스레드에서 동시에 add() 를 호출할 수 있습니다.
+
+    적재 실행마다 커버리지 문서를 남깁니다. begin() 에서 '진행 중' 으로 기록하고 close() 에서 기간과 함께 완료로 바꾸며,
+    조회는 겹치는 커버리지가 모두 완료된 경우에만 롤업을 사용합니다. 같은 run_id 로 다시 적재하면 (재시작 포함)
+    새 시도 번호로 처음부터 다시 쓰고, 이전 시도의 행은 조회에서 제외됩니다.
+    intervals 가 비어 있으면 행 없이 커버리지만 '롤업 없음' 으로 기록합니다 (--no-rollups 적재).
+
+    :param target: 원본 로그 인덱스 / 패턴 (커버리지 대상)
+    :param run_id: 적재 실행 ID (run_id_for(), 없으면 새 ID)
+    """
+    def __init__(self, client=None, index_name=ROLLUP_INDEX, intervals=ROLLUP_INTERVALS,
+                 lateness=ROLLUP_LATENESS, max_open_cells=MAX_OPEN_CELLS, url_prefix_depth=URL_PREFIX_DEPTH,
+                 target=WEBLOG_PATTERN, run_id=None):
+        if client is None:
+            from opensearch_client import get_opensearch_client
+            client = get_opensearch_client()
+        self.client = client
+        self.index_name = index_name
+        self.target = target
+        self.run_id = run_id or uuid.uuid4().hex[:16]
+        self.run = None
+        self.attempt = None
+        self.intervals = dict(intervals)
+        self.lateness = lateness
+        self.max_open_cells = max_open_cells
+        self.url_prefix_depth = url_prefix_depth
+        self.records = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed = 0
+        self._previous_records = 0
+        self._range = None      # 더한 레코드의 [가장 이른, 가장 늦은] timestamp (초)
+        self._buckets = {}      # (구간 이름, 구간 시작) → {(status_code, method, url_prefix): _Cell}
+        self._open_cells = 0
+        self._watermark = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def begin(self):
+        """
+        이 실행의 커버리지를 '진행 중' 으로 기록합니다 (적재 전에 호출, 호출하지 않으면 첫 add() 에서 호출).
+        대상에 커버리지 문서가 하나도 없는데 원본 로그가 있으면, 그 기간을 롤업 없는 이전 데이터로 기록합니다.
+        """
+        with self._lock:
+            if self.run is not None:
+                return
+            coverage = load_coverage(self.client, self.target, self.index_name)
+            if not coverage:
+                extent = _data_extent(self.client, self.target)
+                if extent is not None:
+                    self._put_coverage('legacy', 0, False, extent, None)
+            previous = next((doc for doc in coverage if doc.get('run_id') == self.run_id), {})
+            self.attempt = (previous.get('attempt') or 0) + 1
+            self._previous_records = previous.get('records') or 0
+            self.run = f"{self.run_id}.{self.attempt}"
+            # 기간을 알 수 없는 진행 중 커버리지는 모든 기간과 겹침 (끝날 때까지 원본 검색)
+            self._put_coverage(self.run_id, self.attempt, False, None, None)
+
+    def _put_coverage(self, run_id, attempt, complete, covers, records):
+        self.client.index(index=self.index_name, id=f"coverage-{self.target}-{run_id}", body={
+            "doc_type": "coverage",
+            "target": self.target,
+            "run_id": run_id,
+            "attempt": attempt,
+            "run": f"{run_id}.{attempt}",
+            "complete": complete,
+            "covers_from": int(covers[0] * 1000) if covers else None,
+            "covers_to": int(covers[1] * 1000) if covers else None,
+            "records": records,
+            "url_prefix_depth": self.url_prefix_depth,
+            "updated_at": int(time.time() * 1000),
+        })
+
+    def add(self, records):
+        """
+        인덱싱된 레코드 (_source) 를 롤업에 더합니다.
+        """
+        if self.run is None:
+            self.begin()
+        with self._lock:
+            for record in records:
+                timestamp = record.get(TIME_FIELD)
+                if timestamp is None:
+                    continue
+                seconds = parse_timestamp(timestamp).timestamp()
+                self._range = [seconds, seconds] if self._range is None else \
+                    [min(self._range[0], seconds), max(self._range[1], seconds)]
+                key = (record.get('status_code'), record.get('method'),
+                       url_prefix(record.get('url'), self.url_prefix_depth))
+                for name, length in self.intervals.items():
+                    cells = self._buckets.setdefault((name, int(seconds // length * length)), {})
+                    cell = cells.get(key)
+                    if cell is None:
+                        cell = cells[key] = _Cell()
+                        self._open_cells += 1
+                    cell.add(record.get('bytes_sent'), record.get('response_time'))
+                self._watermark = seconds if self._watermark is None else max(self._watermark, seconds)
+                self.records += 1
+            if self._open_cells > self.max_open_cells:
+                closed = list(self._buckets)
+            else:
+                closed = [bucket for bucket in self._buckets
+                          if bucket[1] + self.intervals[bucket[0]] + self.lateness <= self._watermark]
+            rows = self._take(closed)
+        self._write(rows)
+
+    def _take(self, buckets):
+        rows = []
+        for name, start in buckets:
+            cells = self._buckets.pop((name, start))
+            self._open_cells -= len(cells)
+            for (status_code, method, prefix), cell in cells.items():
+                row_id = uuid.uuid4().hex
+                rows.append({
+                    "_id": row_id,
+                    "_source": {
+                        "row_id": row_id,
+                        "run": self.run,
+                        "interval": name,
+                        "bucket": start * 1000,
+                        "status_code": status_code,
+                        "method": method,
+                        "url_prefix": prefix,
+                        "count": cell.count,
+                        "bytes_sent": cell.bytes_sent,
+                        "bytes_min": cell.bytes_min,
+                        "bytes_max": cell.bytes_max,
+                        "response_time_sum": cell.rt_sum,
+                        "response_time_min": cell.rt_min,
+                        "response_time_max": cell.rt_max,
+                        "response_time_sketch": cell.sketch.to_dict(),
+                    },
+                })
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+        from opensearch_bulk import bulk_index
+        with self._write_lock:
+            stats = bulk_index(self.client, self.index_name, rows, thread_count=1, verbose=False)
+            self.rows_written += stats.indexed
+            self.failed += stats.failed
+            self.flushes += 1
+        if stats.failed:
+            print(f"Failed to write {stats.failed} rollup rows to '{self.index_name}'.")
+
+    def close(self):
+        """
+        열려 있는 모든 구간을 기록하고 커버리지를 완료로 바꿉니다 (인덱싱이 끝난 뒤 호출).
+        행 기록에 실패했거나, 같은 run_id 의 이전 적재보다 레코드가 적으면 (원본에 롤업에 없는 문서가 남음) 완료로 기록하지 않습니다.
+        """
+        if self.run is None:
+            self.begin()
+        with self._lock:
+            rows = self._take(list(self._buckets))
+        self._write(rows)
+        complete = bool(self.intervals) and not self.failed and self.records >= self._previous_records
+        self._put_coverage(self.run_id, self.attempt, complete, self._range, self.records)
+        return self.stats()
+
+    def stats(self):
+        return {"records": self.records, "rows_written": self.rows_written, "flushes": self.flushes,
+                "open_cells": self._open_cells, "run": self.run}
+
+    def summary(self):
+        stats = self.stats()
+        return (f"Rollups: {stats['records']} records -> {stats['rows_written']} rollup rows "
+                f"in {stats['flushes']} writes ({', '.join(self.intervals)})")
+
+
+def _histogram_unit(params):
+    # date_histogram 간격 → 초 (고정 간격) 또는 'week' / 'month' / 'quarter' / 'year' (달력 간격)
+    if params.get('offset') or params.get('time_zone') not in (None, 'UTC', 'Z', '+00:00'):
+        raise Unsupported("date_histogram offset / time_zone")
+    value = params.get('calendar_interval') or params.get('fixed_interval') or params.get('interval')
+    if value in _CALENDAR_UNITS:
+        return _CALENDAR_UNITS[value]
+    number, unit = str(value)[:-1], str(value)[-1:]
+    if unit in _FIXED_UNITS and number.isdigit():
+        return int(number) * _FIXED_UNITS[unit]
+    raise Unsupported(f"date_histogram interval {value}")
+
+
+def _max_interval(unit):
+    # 히스토그램 구간 하나에 완전히 들어가는 가장 큰 롤업 단위
+    seconds = 86400 if isinstance(unit, str) else unit
+    fitting = [length for length in ROLLUP_INTERVALS.values() if seconds >= length and seconds % length == 0]
+    if not fitting:
+        raise Unsupported(f"date_histogram interval finer than {min(ROLLUP_INTERVALS.values())}s")
+    return max(fitting)
+
+
+def _check_aggs(aggs):
+    """
+    집계가 롤업으로 계산 가능한지 확인하고, 사용할 수 있는 가장 큰 롤업 단위 (초) 를 반환합니다.
+    """
+    limit = max(ROLLUP_INTERVALS.values())
+    for agg in (aggs or {}).values():
+        sub = agg.get('aggs') or agg.get('aggregations')
+        kinds = [key for key in agg if key not in ('aggs', 'aggregations', 'meta')]
+        if len(kinds) != 1:
+            raise Unsupported("aggregation shape")
+        kind, params = kinds[0], agg[kinds[0]]
+        unknown = set(params) - set(_AGG_PARAMS.get(kind, ('field',)))
+        if unknown:
+            raise Unsupported(f"{kind} parameters {sorted(unknown)}")
+        field = params.get('field')
+        if kind == 'date_histogram':
+            if field != TIME_FIELD:
+                raise Unsupported(f"date_histogram on {field}")
+            limit = min(limit, _max_interval(_histogram_unit(params)))
+        elif kind == 'terms':
+            if field not in _TERMS_FIELDS:
+                raise Unsupported(f"terms on {field}")
+            # min_doc_count 0 은 조회 범위에 없는 값도 버킷으로 반환
+            if params.get('min_doc_count', 1) < 1:
+                raise Unsupported("terms min_doc_count 0")
+            _terms_order(params.get('order'))
+        elif kind == 'value_count':
+            pass
+        elif kind not in _METRICS.get(field, ()):
+            raise Unsupported(f"{kind} on {field}")
+        if sub:
+            if kind not in ('date_histogram', 'terms'):
+                raise Unsupported(f"sub-aggregations under {kind}")
+            limit = min(limit, _check_aggs(sub))
+    return limit
+
+
+def _terms_order(order):
+    """
+    terms 집계의 order 를 [(기준, 내림차순 여부)] 로 바꿉니다 (_count / _key 만 지원).
+    """
+    if order is None:
+        return [('_count', True)]
+    orders = []
+    for item in (order if isinstance(order, list) else [order]):
+        if not isinstance(item, dict) or len(item) != 1:
+            raise Unsupported(f"terms order {order}")
+        (key, direction), = item.items()
+        if key not in _TERMS_ORDER_KEYS or direction not in ('asc', 'desc'):
+            raise Unsupported(f"terms order by {key}")
+        orders.append((key, direction == 'desc'))
+    return orders
+
+
+def _key_order(key):
+    # 값이 없는 (None) 버킷은 마지막
+    return key is None, key
+
+
+def _row_field(field):
+    # 원본 로그 필드 → 롤업 행 필드
+    return 'method' if field == 'method.keyword' else field
+
+
+def _url_prefix_value(value, depth=URL_PREFIX_DEPTH):
+    """
+    원본 url 의 prefix 조건 값을 url_prefix 의 prefix 조건 값으로 씁니다.
+    값이 url_prefix 가 남기는 앞 depth 단계 안에 있고, 가려지는 ID·숫자를 포함하거나 그 앞부분으로 끝나지 않을 때만
+    ('/orders' 는 가능, '/orders/detail' / '/v1' / '/ab' 는 불가) 두 조건에 맞는 로그가 같습니다.
+    """
+    if isinstance(value, dict):
+        value = value.get('value')
+    if (not isinstance(value, str) or not value.startswith('/') or '?' in value or value.count('/') > depth
+            or mask_text(value) != value or value[-1] in string.hexdigits):
+        raise Unsupported(f"url prefix {value!r} at depth {depth}")
+    return value
+
+
+def _translate(node, filters, must_not, negated=False):
+    # 원본 로그 쿼리의 조건을 롤업 행 조건으로 바꿈 (timestamp 범위는 extract_time_range() 로 따로 처리)
+    if not node:
+        return
+    if not isinstance(node, dict) or len(node) != 1:
+        raise Unsupported(f"query clause {node}")
+    (kind, spec), = node.items()
+    if kind == 'match_all' and not negated:
+        return
+    if kind in ('bool', 'constant_score'):
+        if negated:
+            raise Unsupported(f"{kind} under must_not")
+        if kind == 'constant_score':
+            _translate(spec.get('filter'), filters, must_not)
+            return
+        if spec.get('should'):
+            raise Unsupported("bool should")
+        for clause in ('must', 'filter', 'must_not'):
+            children = spec.get(clause, [])
+            for child in (children if isinstance(children, list) else [children]):
+                _translate(child, filters, must_not, negated=(clause == 'must_not'))
+        return
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise Unsupported(f"{kind} clause shape")
+    (field, value), = spec.items()
+    if kind == 'range' and field == TIME_FIELD and not negated:
+        return
+    target = must_not if negated else filters
+    if field in ('url', 'url.keyword'):
+        # url 은 앞 단계만 롤업에 남으므로 prefix 조건만 답할 수 있음 (term 은 전체 URL 일치)
+        if kind != 'prefix':
+            raise Unsupported(f"{kind} on {field}")
+        target.append({"prefix": {"url_prefix": _url_prefix_value(value)}})
+        return
+    field = _row_field(field)
+    if field not in ('status_code', 'method', 'url_prefix'):
+        raise Unsupported(f"{kind} on {field}")
+    if kind == 'prefix' and field == 'url_prefix':
+        target.append({"prefix": {field: value.get('value') if isinstance(value, dict) else value}})
+        return
+    if kind in ('term', 'match', 'match_phrase'):
+        value = value.get('value', value.get('query')) if isinstance(value, dict) else value
+        target.append({"term": {field: value}})
+    elif kind == 'terms':
+        target.append({"terms": {field: value}})
+    elif kind == 'range':
+        target.append({"range": {field: {op: bound for op, bound in value.items()
+                                         if op in ('gt', 'gte', 'lt', 'lte')}}})
+    else:
+        raise Unsupported(f"{kind} query")
+
+
+def _cover(low, high, largest):
+    """
+    [low, high) 를 가장 큰 롤업 단위로 덮습니다 (가운데는 일 단위, 가장자리는 시 / 분 단위).
+
+    :return: [(롤업 이름, 시작 초, 끝 초)]
+    """
+    lengths = sorted((length for length in ROLLUP_INTERVALS.values() if length <= largest), reverse=True)
+    names = {length: name for name, length in ROLLUP_INTERVALS.items()}
+
+    def cover(start, end, candidates):
+        if start >= end or not candidates:
+            return []
+        length = candidates[0]
+        first = -(-start // length) * length
+        last = end // length * length
+        if first >= last:
+            return cover(start, end, candidates[1:])
+        return cover(start, first, candidates[1:]) + [(names[length], first, last)] + \
+            cover(last, end, candidates[1:])
+    return cover(low, high, lengths)
+
+
+def _covering_runs(client, index_name, target, low, high, url_prefix_depth=None):
+    """
+    [low, high) 를 롤업으로 답할 수 있으면 겹치는 완료된 실행 ('<run_id>.<시도 번호>') 리스트를 반환합니다.
+    커버리지가 없거나, 진행 중 / 롤업 없이 적재 / 롤업 이전 데이터의 커버리지가 겹치면 Unsupported 입니다.
+
+    :param url_prefix_depth: url_prefix 를 조건 / 집계에 사용하면 그 단계 수 (다른 단계로 만든 롤업은 사용하지 않음)
+    """
+    coverage = load_coverage(client, target, index_name)
+    if not coverage:
+        raise Unsupported(f"no rollup coverage for {target}")
+    runs = []
+    for doc in coverage:
+        start, end = doc.get('covers_from'), doc.get('covers_to')
+        overlaps = start is None or end is None or (start / 1000 < high and end / 1000 >= low)
+        if not overlaps:
+            continue
+        if not doc.get('complete'):
+            raise Unsupported(f"rollups do not cover run {doc.get('run_id')}")
+        if url_prefix_depth is not None and doc.get('url_prefix_depth') != url_prefix_depth:
+            raise Unsupported(f"run {doc.get('run_id')} has url_prefix depth {doc.get('url_prefix_depth')}")
+        runs.append(doc['run'])
+    return runs
+
+
+def _iter_rows(client, index_name, query):
+    # bucket / row_id 순서로 search_after 페이지 조회
+    body = {"size": PAGE_SIZE, "query": query, "sort": [{"bucket": "asc"}, {"row_id": "asc"}]}
+    while True:
+        hits = client.search(index=index_name, body=body)['hits']['hits']
+        for hit in hits:
+            yield hit['_source']
+        if len(hits) < PAGE_SIZE:
+            return
+        body = dict(body, search_after=hits[-1]['sort'])
+
+
+def _bucket_key(seconds, unit):
+    if not isinstance(unit, str):
+        return int(seconds // unit * unit)
+    moment = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    if unit == 'week':
+        moment = (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0)
+    elif unit == 'month':
+        moment = moment.replace(day=1, hour=0, minute=0, second=0)
+    elif unit == 'quarter':
+        moment = moment.replace(month=(moment.month - 1) // 3 * 3 + 1, day=1, hour=0, minute=0, second=0)
+    else:
+        moment = moment.replace(month=1, day=1, hour=0, minute=0, second=0)
+    return calendar.timegm(moment.timetuple())
+
+
+def _merge(rows):
+    total = {"count": 0, "bytes_sent": 0, "bytes_min": None, "bytes_max": None,
+             "rt_sum": 0.0, "rt_min": None, "rt_max": None, "sketch": None}
+    for row in rows:
+        total["count"] += row['count']
+        total["bytes_sent"] += row['bytes_sent'] or 0
+        total["rt_sum"] += row['response_time_sum'] or 0.0
+        for name, field, pick in (("bytes_min", 'bytes_min', min), ("bytes_max", 'bytes_max', max),
+                                  ("rt_min", 'response_time_min', min), ("rt_max", 'response_time_max', max)):
+            if row.get(field) is not None:
+                total[name] = row[field] if total[name] is None else pick(total[name], row[field])
+    return total
+
+
+def _metric(kind, params, rows):
+    field = params.get('field')
+    merged = _merge(rows)
+    count = merged["count"]
+    if field == 'response_time':
+        values = {"sum": merged["rt_sum"], "min": merged["rt_min"], "max": merged["rt_max"]}
+    elif field == 'bytes_sent':
+        values = {"sum": float(merged["bytes_sent"]), "min": merged["bytes_min"], "max": merged["bytes_max"]}
+    else:
+        values = {}
+    values["avg"] = values["sum"] / count if count and "sum" in values else None
+    if kind == 'value_count':
+        return {"value": count}
+    if kind == 'stats':
+        return {"count": count, "min": values["min"], "max": values["max"], "avg": values["avg"],
+                "sum": values["sum"]}
+    if kind == 'percentiles':
+        sketch = DDSketch()
+        for row in rows:
+            sketch.merge(DDSketch.from_dict(row['response_time_sketch']))
+        percents = params.get('percents', DEFAULT_PERCENTS)
+        if params.get('keyed', True):
+            return {"values": {str(float(p)): sketch.quantile(p / 100) for p in percents}}
+        return {"values": [{"key": float(p), "value": sketch.quantile(p / 100)} for p in percents]}
+    return {"value": values[kind]}
+
+
+def _aggregate(aggs, rows):
+    result = {}
+    for name, agg in aggs.items():
+        sub = agg.get('aggs') or agg.get('aggregations') or {}
+        kind = next(key for key in agg if key not in ('aggs', 'aggregations', 'meta'))
+        params = agg[kind]
+        if kind == 'date_histogram':
+            unit = _histogram_unit(params)
+            groups = {}
+            for row in rows:
+                groups.setdefault(_bucket_key(row['bucket'] / 1000, unit), []).append(row)
+            keys = sorted(groups)
+            if keys and not isinstance(unit, str) and params.get('min_doc_count', 0) == 0:
+                keys = list(range(keys[0], keys[-1] + 1, int(unit)))
+            buckets = []
+            for key in keys:
+                bucket_rows = groups.get(key, [])
+                count = sum(row['count'] for row in bucket_rows)
+                if count < params.get('min_doc_count', 0):
+                    continue
+                bucket = {"key_as_string": datetime.fromtimestamp(key, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                          "key": key * 1000, "doc_count": count}
+                bucket.update(_aggregate(sub, bucket_rows))
+                buckets.append(bucket)
+            result[name] = {"buckets": buckets}
+        elif kind == 'terms':
+            field = _row_field(params['field'])
+            groups = {}
+            for row in rows:
+                groups.setdefault(row[field], []).append(row)
+            counts = {key: sum(row['count'] for row in group) for key, group in groups.items()}
+            # OpenSearch 와 같이 건수가 같으면 key 오름차순 (정렬은 뒤의 기준부터 안정 정렬로 적용)
+            ordered = sorted(counts, key=_key_order)
+            for criterion, descending in reversed(_terms_order(params.get('order'))):
+                ordered.sort(key=counts.get if criterion == '_count' else _key_order, reverse=descending)
+            ordered = [key for key in ordered if counts[key] >= params.get('min_doc_count', 1)]
+            size = params.get('size', 10)
+            buckets = []
+            for key in ordered[:size]:
+                bucket = {"key": key, "doc_count": counts[key]}
+                bucket.update(_aggregate(sub, groups[key]))
+                buckets.append(bucket)
+            result[name] = {"doc_count_error_upper_bound": 0,
+                            "sum_other_doc_count": sum(counts.values()) - sum(bucket["doc_count"] for bucket in buckets),
+                            "buckets": buckets}
+        else:
+            result[name] = _metric(kind, params, rows)
+    return result
+
+
+def _uses_url(aggs):
+    for agg in (aggs or {}).values():
+        kind = next(key for key in agg if key not in ('aggs', 'aggregations', 'meta'))
+        if kind == 'terms' and agg[kind].get('field') == 'url_prefix':
+            return True
+        if _uses_url(agg.get('aggs') or agg.get('aggregations')):
+            return True
+    return False
+
+
+def answer_from_rollups(body, client=None, index_name=ROLLUP_INDEX, now=None, target=WEBLOG_PATTERN):
+    """
+    원본 로그 대신 롤업 인덱스로 집계 쿼리에 답합니다 (LLM 이 생성한 DSL 포함).
+    size 0 이고, 조건이 timestamp 범위 / status_code / method / url prefix 뿐이며, 집계가 date_histogram (1분 이상) /
+    terms (status_code, method, url_prefix) / response_time·bytes_sent 지표이고 롤업에서 구현한 인자만 쓸 때 답합니다.
+    url 은 앞 URL_PREFIX_DEPTH 단계 (url_prefix) 만 남으므로 url terms 집계는 원본 로그로 검색합니다.
+    시간 범위의 양 끝이 롤업 경계 (분) 에 정확히 맞을 때만 답하며, 가장 큰 롤업 단위로 덮어 읽는 행 수를 줄입니다.
+    조회 기간의 target 원본 로그가 모두 완료된 적재 실행의 롤업에 들어 있을 때만 답합니다 (RollupWriter 참고).
+
+    :return: OpenSearch 검색 응답 형태 ('_rollup' 에 사용한 단위 / 읽은 행 수 / url_prefix 단계), 답할 수 없으면 None
+    """
+    if client is None:
+        from opensearch_client import get_opensearch_client
+        client = get_opensearch_client()
+    start = time.perf_counter()
+    try:
+        if body.get('size', 10) != 0 or 'post_filter' in body:
+            raise Unsupported("hits requested")
+        aggs = body.get('aggs') or body.get('aggregations') or {}
+        largest = _check_aggs(aggs)
+        filters, must_not = [], []
+        _translate(body.get('query'), filters, must_not)
+        try:
+            lower, upper = extract_time_range(body, now=now, half_open=True)
+        except ValueError as e:
+            raise Unsupported(f"time range: {e}")
+        low = 0 if lower is None else lower.timestamp()
+        high = _FAR_FUTURE if upper is None else upper.timestamp()
+        # 경계가 분 중간이면 가장자리 롤업 행에 범위 밖의 로그가 섞이므로 원본 검색
+        smallest = min(ROLLUP_INTERVALS.values())
+        if low % smallest or high % smallest:
+            raise Unsupported("time range not aligned to rollup buckets")
+        uses_url = _uses_url(aggs) or any('url_prefix' in next(iter(clause.values()))
+                                          for clause in filters + must_not)
+        segments = _cover(int(low), int(high), largest)
+        runs = _covering_runs(client, index_name, target, low, high, URL_PREFIX_DEPTH if uses_url else None)
+    except Unsupported:
+        return None
+    if not segments or not runs:
+        rows = []
+    else:
+        should = [{"bool": {"filter": [{"term": {"interval": name}},
+                                       {"range": {"bucket": {"gte": first * 1000, "lt": last * 1000}}}]}}
+                  for name, first, last in segments]
+        query = {"bool": {"filter": filters + [{"terms": {"run": runs}},
+                                               {"bool": {"should": should, "minimum_should_match": 1}}]}}
+        if must_not:
+            query["bool"]["must_not"] = must_not
+        rows = list(_iter_rows(client, index_name, query))
+    return {
+        "took": int((time.perf_counter() - start) * 1000),
+        "timed_out": False,
+        "hits": {"total": {"value": sum(row['count'] for row in rows), "relation": "eq"},
+                 "max_score": None, "hits": []},
+        "aggregations": _aggregate(aggs, rows),
+        "_rollup": {
+            "index": index_name,
+            "rows": len(rows),
+            "intervals": sorted({name for name, _, _ in segments}, key=ROLLUP_INTERVALS.get),
+            "url_prefix_depth": URL_PREFIX_DEPTH if uses_url else None,
+        },
+    }
+
+
+# 메인 실행: 집계 쿼리를 롤업으로 실행
+#   python weblog_rollups.py '{"size": 0, "query": {"range": {"timestamp": {"gte": "now-30d/d"}}},
+#                              "aggs": {"by_day": {"date_histogram": {"field": "timestamp", "calendar_interval": "day"},
+#                                                  "aggs": {"p99": {"percentiles": {"field": "response_time", "percents": [99]}}}}}}'
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('query', help='검색 본문 (JSON)')
+    parser.add_argument('--index', default=ROLLUP_INDEX)
+    args = parser.parse_args()
+
+    response = answer_from_rollups(json.loads(args.query), index_name=args.index)
+    if response is None:
+        print("This query cannot be answered from rollups; search the raw web logs instead.")
+    else:
+        print(json.dumps(response, indent=2, ensure_ascii=False))